@@ -0,0 +1,170 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # opcional: sem o pacote, só gzip
+    brotli = None
+
+# (nível gzip, qualidade brotli) por tipo de conteúdo, pelo prefixo.
+# JSON das telas: equilíbrio entre CPU e tamanho; CSV de exportação é
+# grande e repetitivo, então compensa um nível menor (mais rápido).
+NIVEIS_PADRAO: Dict[str, Tuple[int, int]] = {
+    "application/json": (6, 5),
+    "text/csv": (5, 4),
+    "text/": (6, 5),
+    "application/javascript": (6, 5),
+    "application/xml": (6, 5),
+}
+
+
+class CompressionMiddleware:
+    """
+    Compressão gzip/brotli das respostas, em streaming.
+
+    ASGI puro: cada chunk do corpo é comprimido e enviado assim que chega,
+    sem acumular a resposta (exportações continuam com memória constante).
+    Não comprime corpos abaixo de COMPRESSION_MIN_BYTES, respostas já
+    codificadas, parciais (206) ou de tipos fora de NIVEIS_PADRAO (xlsx e
+    Parquet já são compactados).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimo_bytes: Optional[int] = None,
+        niveis: Optional[Dict[str, Tuple[int, int]]] = None,
+    ):
+        self.app = app
+        self.minimo_bytes = settings.COMPRESSION_MIN_BYTES if minimo_bytes is None else minimo_bytes
+        self.niveis = niveis or NIVEIS_PADRAO
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = escolher_codificacao(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _RespostaComprimida(self, codificacao, send)(scope, receive)
+
+    def nivel(self, content_type: str) -> Optional[Tuple[int, int]]:
+        tipo = content_type.split(";")[0].strip().lower()
+        for prefixo, nivel in self.niveis.items():
+            if tipo.startswith(prefixo):
+                return nivel
+        return None
+
+
+class _RespostaComprimida:
+    """Estado de uma resposta: decide na primeira mensagem de corpo"""
+
+    def __init__(self, middleware: CompressionMiddleware, codificacao: str, send: Send):
+        self.middleware = middleware
+        self.codificacao = codificacao
+        self.send = send
+        self.inicio: Optional[Message] = None
+        self.compressor = None
+        self.repassar = False
+
+    async def __call__(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.enviar)
+
+    async def enviar(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.inicio = message
+            return
+        if message["type"] != "http.response.body" or self.repassar:
+            await self.send(message)
+            return
+
+        corpo = message.get("body", b"")
+        mais = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = Headers(raw=self.inicio["headers"])
+            nivel = self.middleware.nivel(headers.get("content-type", ""))
+            # Tamanho pelo Content-Length (o corpo pode vir em vários chunks)
+            tamanho = headers.get("content-length")
+            tamanho = int(tamanho) if tamanho and tamanho.isdigit() else (None if mais else len(corpo))
+            if (
+                nivel is None
+                or self.inicio["status"] != 200
+                or "content-encoding" in headers
+                or "content-range" in headers
+                or (tamanho is not None and tamanho < self.middleware.minimo_bytes)
+            ):
+                self.repassar = True
+                await self.send(self.inicio)
+                await self.send(message)
+                return
+            self.compressor = _criar_compressor(self.codificacao, nivel)
+            await self.send(self._inicio_comprimido())
+
+        dados = self.compressor.compress(corpo) if corpo else b""
+        if not mais:
+            dados += self.compressor.flush()
+        if dados or not mais:
+            await self.send({"type": "http.response.body", "body": dados, "more_body": mais})
+
+    def _inicio_comprimido(self) -> Message:
+        headers = MutableHeaders(raw=list(self.inicio["headers"]))
+        headers["Content-Encoding"] = self.codificacao
+        headers.add_vary_header("Accept-Encoding")
+        del headers["Content-Length"]
+        # A representação comprimida não é idêntica byte a byte: ETag fraco
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return {**self.inicio, "headers": headers.raw}
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """br se aceito e disponível, senão gzip; respeita q=0"""
+    aceitas: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        partes: List[str] = [p.strip() for p in item.split(";")]
+        if not partes[0]:
+            continue
+        q = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith("q="):
+                try:
+                    q = float(parametro[2:])
+                except ValueError:
+                    q = 0.0
+        aceitas[partes[0]] = q
+
+    if brotli is not None and aceitas.get("br", 0) > 0:
+        return "br"
+    if aceitas.get("gzip", aceitas.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+def _criar_compressor(codificacao: str, nivel: Tuple[int, int]):
+    if codificacao == "br":
+        return _Brotli(nivel[1])
+    # wbits=31: formato gzip (cabeçalho e CRC), não zlib puro
+    return zlib.compressobj(nivel[0], zlib.DEFLATED, 31)
+
+
+class _Brotli:
+    """Mesma interface do compressobj do zlib"""
+
+    def __init__(self, qualidade: int):
+        self._compressor = brotli.Compressor(quality=qualidade)
+
+    def compress(self, dados: bytes) -> bytes:
+        return self._compressor.process(dados)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
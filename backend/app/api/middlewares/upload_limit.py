@@ -0,0 +1,93 @@
+import json
+import logging
+from typing import Optional
+
+from starlette import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.logger")
+
+# Cabeçalhos e delimitadores do multipart além do próprio arquivo
+FOLGA_MULTIPART = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Limite de tamanho do corpo aplicado enquanto ele é recebido.
+
+    ASGI puro (sem BaseHTTPMiddleware) para enxergar cada chunk do corpo:
+    Content-Length acima do limite é recusado antes de ler qualquer byte;
+    sem Content-Length (chunked), o corpo é contado e a requisição é
+    interrompida com 413 assim que o limite é ultrapassado, antes que o
+    parser de multipart grave o restante em disco.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: Optional[int] = None):
+        self.app = app
+        self.max_bytes = max_bytes or settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + FOLGA_MULTIPART
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._recusar(scope, send)
+            return
+
+        recebido = 0
+        excedido = False
+        resposta_iniciada = False
+
+        async def receive_limitado() -> Message:
+            nonlocal recebido, excedido
+            message = await receive()
+            if message["type"] == "http.request":
+                recebido += len(message.get("body", b""))
+                if recebido > self.max_bytes:
+                    excedido = True
+                    raise CorpoExcedido()
+            return message
+
+        async def send_controlado(message: Message) -> None:
+            nonlocal resposta_iniciada
+            # A resposta de erro que o app montar (ex.: falha ao ler o corpo) vira 413
+            if excedido:
+                return
+            resposta_iniciada = resposta_iniciada or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, receive_limitado, send_controlado)
+        except Exception:
+            # O parser pode embrulhar CorpoExcedido em outra exceção
+            if not excedido:
+                raise
+        if excedido and not resposta_iniciada:
+            await self._recusar(scope, send)
+
+    async def _recusar(self, scope: Scope, send: Send) -> None:
+        logger.warning("Corpo acima do limite recusado: %s %s", scope["method"], scope["path"])
+        corpo = json.dumps({
+            "error": "Arquivo excede o tamanho máximo permitido",
+            "limit_mb": settings.MAX_UPLOAD_SIZE_MB,
+            "path": scope["path"],
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(corpo)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": corpo})
+
+
+class CorpoExcedido(Exception):
+    """Levantada no receive quando o corpo passa do limite"""
+    pass
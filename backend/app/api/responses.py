@@ -0,0 +1,31 @@
+"""
+Resposta JSON rápida para payloads grandes
+
+Quando a rota devolve o model pronto, o FastAPI ainda o converte para dict,
+valida de novo contra o response_model e serializa com o encoder padrão.
+Rotas que montam a resposta a partir de dados confiáveis (repositórios e
+services) podem devolver FastJSONResponse(model): o model é serializado
+direto para bytes pelo serializador Rust do Pydantic, sem a revalidação. Se
+o orjson estiver instalado, ele serializa dicts e listas simples.
+
+O response_model continua no decorator, para a documentação (OpenAPI).
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+try:
+    import orjson
+except ImportError:  # opcional
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa models Pydantic sem revalidar"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None and not isinstance(content, BaseModel):
+            return orjson.dumps(content, default=to_jsonable_python)
+        return to_json(content)
@@ -7,12 +7,14 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.security import (
     create_access_token,
-    verify_password,
+    revoke_access_token,
+    verify_and_update_password_async,
 )
-from app.core.exceptions import UnauthorizedException
+from app.core.token_cache import token_cache
+from app.core.exceptions import ForbiddenException, UnauthorizedException
 from app.schemas.auth import Token
 from app.schemas.user import UserResponse
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import get_current_user, oauth2_scheme
 from app.schemas.auth2 import OAuth2EmailRequestForm
 from app.models.user import User
 from app.repositories.user_repository import UserRepository
@@ -26,7 +28,7 @@ router = APIRouter()
     summary="Login com email e senha",
     description="Use seu email cadastrado para autenticação",
 )
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ):
@@ -40,11 +42,26 @@ def login(
     user_repo = UserRepository(db)
     user = user_repo.get_by_email(email)
 
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         raise UnauthorizedException("Usuário ou senha inválidos")
 
+    user_id, hashed_password = user.id, user.hashed_password
+    # Devolve a conexão ao pool antes de esperar o bcrypt: com muitos logins
+    # simultâneos o pool se esgotaria e a próxima consulta travaria o event loop
+    db.rollback()
+
+    # bcrypt fora do event loop, no pool dedicado
+    valida, novo_hash = await verify_and_update_password_async(password, hashed_password)
+    if not valida:
+        raise UnauthorizedException("Usuário ou senha inválidos")
+
+    # Custo do hash mudou: regrava de forma transparente
+    if novo_hash:
+        user.hashed_password = novo_hash
+        db.commit()
+
     access_token = create_access_token(
-        subject=str(user.id),
+        subject=str(user_id),
         expires_delta=timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         ),
@@ -55,6 +72,30 @@ def login(
         "token_type": "bearer",
     }
 
+@router.post("/logout", status_code=204)
+def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Revoga o token atual; ele deixa de ser aceito imediatamente
+    """
+    revoke_access_token(db, token)
+
+
+@router.get("/token-cache")
+def get_token_cache_metrics(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Hits/misses do cache de tokens verificados (neste processo). Apenas diretores.
+    """
+    if not current_user.is_diretor:
+        raise ForbiddenException("Apenas diretores podem ver as métricas")
+    return token_cache.metricas()
+
+
 @router.get("/me", response_model=UserResponse)
 def me(
     current_user: User = Depends(get_current_user),
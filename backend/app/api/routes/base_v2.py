@@ -3,10 +3,9 @@ Rotas de Gestão de Base
 Upload, Validação, Importação e Consulta de Base de Devedores
 """
 import os
-import uuid
 from datetime import datetime
-from typing import List, Optional
-from fastapi.responses import FileResponse
+from typing import List, Optional, Tuple
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi import (
     APIRouter,
     Depends,
@@ -15,17 +14,24 @@ from fastapi import (
     HTTPException,
     status,
     Query,
+    Header,
 )
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.api.responses import FastJSONResponse
+from app.db.session import get_db, get_read_db
+from app.db.sharding import em_cada_shard, ha_shards, paginar_em_shards
 from app.models.user import User
 from app.models.cliente import Cliente
 from app.models.contrato import Contrato
 from app.dependencies.auth import get_current_user
 from app.dependencies.tenant import get_tenant_id, require_tenant
-from app.services.upload_service_v2 import UploadService
+from app.dependencies.etag import RotaComEtag, verificar_etag
+from app.services.importacao_scheduler import import_scheduler
+from app.services.export_service import ExportService, FormatoExportacao, MEDIA_TYPES
+from app.services.file_storage_service import FileStorageService, ler_intervalo
+from app.utils.helpers import content_disposition, parse_range
 from app.schemas.upload import (
     EstruturaCampos, PreviewUpload, ResultadoImportacao,
     ListaLogsImportacao, TipoImportacao, IniciarImportacaoRequest,
@@ -37,7 +43,8 @@ from sqlalchemy import func
 from decimal import Decimal
 
 
-router = APIRouter()
+# Só as rotas com verificar_etag recebem ETag
+router = APIRouter(route_class=RotaComEtag)
 
 
 # ==========================================
@@ -47,12 +54,16 @@ class BaseUploadResponse(BaseModel):
     id: str
     filename: str
     size_kb: float
+    sha256: str
+    deduplicado: bool = False
     uploaded_at: datetime
 
 
 class BaseFileResponse(BaseModel):
     id: str
     filename: str
+    size_kb: float
+    sha256: str
     uploaded_at: datetime
 
 
@@ -81,14 +92,19 @@ def ensure_upload_dir():
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
 
+def _upload_service(db: Session):
+    # pandas/NumPy só são carregados no primeiro uso das rotas de upload
+    from app.services.upload_service_v2 import UploadService
+    return UploadService(db)
+
+
 def validate_file(file: UploadFile):
-    allowed_extensions = [".csv", ".xlsx", ".xls"]
-    ext = os.path.splitext(file.filename)[1].lower()
+    from app.services.upload_service_v2 import FORMATOS_SUPORTADOS
 
-    if ext not in allowed_extensions:
+    if not (file.filename or "").lower().endswith(FORMATOS_SUPORTADOS):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Formato inválido. Use CSV ou Excel (.csv, .xlsx, .xls)",
+            detail="Formato inválido. Use CSV (.csv, .csv.gz, .zip), Excel (.xlsx, .xls), Parquet ou Feather",
         )
 
 
@@ -104,7 +120,7 @@ def get_estrutura_campos(
     Retorna a estrutura de campos esperados para o upload.
     Inclui campos obrigatórios e opcionais com exemplos.
     """
-    service = UploadService(db)
+    service = _upload_service(db)
     return service.get_estrutura_campos()
 
 
@@ -131,8 +147,12 @@ async def preview_upload(
     ensure_upload_dir()
     validate_file(file)
     
-    service = UploadService(db)
-    return await service.preview_upload(file, tenant_id, tipo)
+    # Guarda o arquivo para permitir retomar a importação confirmada
+    arquivo, _ = await FileStorageService(db).salvar(file, tenant_id, current_user.id)
+    await file.seek(0)
+    
+    service = _upload_service(db)
+    return await service.preview_upload(file, tenant_id, tipo, caminho_arquivo=arquivo.caminho)
 
 
 # ==========================================
@@ -151,7 +171,7 @@ async def confirmar_importacao(
     
     Use o preview_id retornado pelo endpoint de preview.
     """
-    service = UploadService(db)
+    service = _upload_service(db)
     return await service.confirmar_importacao(
         preview_id, tenant_id, current_user.id, sobrescrever
     )
@@ -183,27 +203,62 @@ async def upload_excel_direto(
     - numero_contrato, status, data_contrato
     - endereco, cidade, estado, cep
     """
-    ensure_upload_dir()
     validate_file(file)
     
-    # Salva o arquivo
-    content = await file.read()
+    # Salva o arquivo (streaming, deduplicado por conteúdo)
+    arquivo, _ = await FileStorageService(db).salvar(file, tenant_id, current_user.id)
     await file.seek(0)
     
-    file_id = str(uuid.uuid4())
-    safe_filename = f"{file_id}_{file.filename}"
-    file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-    
-    with open(file_path, "wb") as f:
-        f.write(content)
-    
     # Processa
-    service = UploadService(db)
+    service = _upload_service(db)
     return await service.importar_direto(
-        file, tenant_id, current_user.id, tipo, sobrescrever
+        file, tenant_id, current_user.id, tipo, sobrescrever,
+        caminho_arquivo=arquivo.caminho
     )
 
 
+@router.post("/logs/{importacao_id}/retomar", response_model=ResultadoImportacao)
+async def retomar_importacao(
+    importacao_id: str,
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(require_tenant),
+    db: Session = Depends(get_db),
+):
+    """
+    Retoma uma importação interrompida (erro ou queda do processo)
+    a partir do último bloco gravado.
+    """
+    service = _upload_service(db)
+    return await service.retomar_importacao(importacao_id, tenant_id)
+
+
+@router.post("/logs/{importacao_id}/cancelar", response_model=ResultadoImportacao)
+async def cancelar_importacao(
+    importacao_id: str,
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(require_tenant),
+    db: Session = Depends(get_db),
+):
+    """
+    Cancela uma importação na fila ou em andamento.
+    Em andamento, para ao fim do bloco corrente.
+    """
+    service = _upload_service(db)
+    return await service.cancelar_importacao(importacao_id, tenant_id)
+
+
+@router.get("/importacoes/fila")
+def get_fila_importacoes(
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+):
+    """
+    Profundidade da fila e tempos de espera das importações (neste processo).
+    Diretores veem a fila inteira; demais usuários, apenas a do seu tenant.
+    """
+    return import_scheduler.metricas(tenant_id)
+
+
 # ==========================================
 # LOGS DE IMPORTAÇÃO
 # ==========================================
@@ -213,7 +268,7 @@ def get_logs_importacao(
     por_pagina: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
     tenant_id: Optional[int] = Depends(get_tenant_id),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Lista histórico de importações.
@@ -221,22 +276,37 @@ def get_logs_importacao(
     Diretores veem todas as importações.
     Gerentes veem apenas do seu tenant.
     """
-    service = UploadService(db)
+    service = _upload_service(db)
     return service.get_logs_importacao(tenant_id, pagina, por_pagina)
 
 
 # ==========================================
 # ESTATÍSTICAS DA BASE
 # ==========================================
-@router.get("/estatisticas", response_model=EstatisticasBase)
+@router.get("/estatisticas", response_model=EstatisticasBase, dependencies=[Depends(verificar_etag)])
 def get_estatisticas_base(
     current_user: User = Depends(get_current_user),
     tenant_id: Optional[int] = Depends(get_tenant_id),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Retorna estatísticas gerais da base de dados.
     """
+    if tenant_id is None and ha_shards():
+        # Visão global com shards: cada banco em paralelo, somando os totais
+        parciais = em_cada_shard(lambda shard: _estatisticas_base(shard, None))
+        ultimas = [p.ultima_importacao for p in parciais if p.ultima_importacao]
+        return EstatisticasBase(
+            total_clientes=sum(p.total_clientes for p in parciais),
+            total_contratos=sum(p.total_contratos for p in parciais),
+            valor_total=sum(p.valor_total for p in parciais),
+            clientes_com_atraso=sum(p.clientes_com_atraso for p in parciais),
+            ultima_importacao=max(ultimas, default=None),
+        )
+    return _estatisticas_base(db, tenant_id)
+
+
+def _estatisticas_base(db: Session, tenant_id: Optional[int]) -> EstatisticasBase:
     from app.models.importacao_log import ImportacaoLog, StatusImportacao as StatusModel
     from app.models.contrato import StatusContrato
     
@@ -286,7 +356,7 @@ def get_estatisticas_base(
 # ==========================================
 # LISTAR CLIENTES DA BASE
 # ==========================================
-@router.get("/clientes", response_model=ListaClientesBase)
+@router.get("/clientes", response_model=ListaClientesBase, dependencies=[Depends(verificar_etag)])
 def listar_clientes_base(
     pagina: int = Query(1, ge=1),
     por_pagina: int = Query(20, ge=1, le=100),
@@ -294,20 +364,42 @@ def listar_clientes_base(
     status_filter: Optional[str] = Query(None, description="Filtro por status"),
     current_user: User = Depends(get_current_user),
     tenant_id: Optional[int] = Depends(get_tenant_id),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Lista clientes da base com informações resumidas.
     """
-    from app.models.contrato import StatusContrato
-    
+    if tenant_id is None and ha_shards():
+        # Visão global com shards: intercala as páginas de cada banco por nome
+        total, clientes = paginar_em_shards(
+            lambda shard, limite: _pagina_clientes(shard, None, busca, 0, limite),
+            pagina, por_pagina, chave=lambda c: c.nome,
+        )
+    else:
+        total, clientes = _pagina_clientes(db, tenant_id, busca, (pagina - 1) * por_pagina, por_pagina)
+
+    return FastJSONResponse(ListaClientesBase.model_construct(
+        clientes=clientes,
+        total=total,
+        pagina=pagina,
+        por_pagina=por_pagina
+    ))
+
+
+def _pagina_clientes(
+    db: Session, tenant_id: Optional[int], busca: Optional[str], inicio: int, limite: int
+) -> Tuple[int, List[ClienteBase]]:
+    """(total, clientes de inicio a inicio + limite) em ordem de nome"""
     # Subquery para totais de contratos
     subquery = db.query(
         Contrato.cliente_id,
         func.count(Contrato.id).label('total_contratos'),
         func.sum(Contrato.valor_original).label('valor_total'),
         func.max(Contrato.status).label('status')
-    ).group_by(Contrato.cliente_id).subquery()
+    )
+    if tenant_id:
+        subquery = subquery.filter(Contrato.tenant_id == tenant_id)
+    subquery = subquery.group_by(Contrato.cliente_id).subquery()
     
     # Query principal
     query = db.query(
@@ -332,9 +424,7 @@ def listar_clientes_base(
     total = query.count()
     
     # Paginação
-    results = query.order_by(Cliente.nome).offset(
-        (pagina - 1) * por_pagina
-    ).limit(por_pagina).all()
+    results = query.order_by(Cliente.nome).offset(inicio).limit(limite).all()
     
     clientes = []
     for cliente, total_contratos, valor_total, status_contrato in results:
@@ -348,7 +438,8 @@ def listar_clientes_base(
         else:
             status_str = "sem_contrato"
         
-        clientes.append(ClienteBase(
+        # Valores vindos do banco, já tipados: model_construct dispensa a validação
+        clientes.append(ClienteBase.model_construct(
             id=cliente.id,
             nome=cliente.nome,
             cpf_masked=cpf_masked,
@@ -360,12 +451,7 @@ def listar_clientes_base(
             data_cadastro=cliente.created_at
         ))
     
-    return ListaClientesBase(
-        clientes=clientes,
-        total=total,
-        pagina=pagina,
-        por_pagina=por_pagina
-    )
+    return total, clientes
 
 
 # ==========================================
@@ -423,6 +509,46 @@ def download_template(
         )
 
 
+# ==========================================
+# EXPORTAÇÃO (streaming)
+# ==========================================
+def _resposta_exportacao(entidade: str, formato: FormatoExportacao, conteudo) -> StreamingResponse:
+    nome = f"{entidade}_{datetime.now():%Y%m%d_%H%M%S}.{formato.value}"
+    return StreamingResponse(
+        conteudo,
+        media_type=MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f"attachment; filename={nome}"},
+    )
+
+
+@router.get("/export/clientes", dependencies=[Depends(verificar_etag)])
+def exportar_clientes(
+    formato: FormatoExportacao = Query(FormatoExportacao.CSV),
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+):
+    """
+    Exporta todos os clientes do tenant (CSV, XLSX ou Parquet).
+    As linhas são lidas com cursor no servidor e transmitidas em lotes,
+    com memória constante independente do tamanho da base.
+    """
+    ExportService.validar_formato(formato)
+    return _resposta_exportacao("clientes", formato, ExportService().exportar_clientes(tenant_id, formato))
+
+
+@router.get("/export/contratos", dependencies=[Depends(verificar_etag)])
+def exportar_contratos(
+    formato: FormatoExportacao = Query(FormatoExportacao.CSV),
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+):
+    """
+    Exporta todos os contratos do tenant, com CPF e nome do cliente.
+    """
+    ExportService.validar_formato(formato)
+    return _resposta_exportacao("contratos", formato, ExportService().exportar_contratos(tenant_id, formato))
+
+
 # ==========================================
 # UPLOAD SIMPLES (compatibilidade)
 # ==========================================
@@ -432,31 +558,22 @@ async def upload_base(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """Upload simples de arquivo (compatibilidade)"""
-    ensure_upload_dir()
+    """
+    Upload simples de arquivo (compatibilidade).
+    O arquivo é gravado em streaming e deduplicado pelo conteúdo (sha256).
+    """
     validate_file(file)
 
-    content = await file.read()
-    size_mb = len(content) / (1024 * 1024)
-
-    if size_mb > settings.MAX_UPLOAD_SIZE_MB:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Arquivo excede o tamanho máximo permitido",
-        )
-
-    file_id = str(uuid.uuid4())
-    safe_filename = f"{file_id}_{file.filename}"
-    file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-
-    with open(file_path, "wb") as f:
-        f.write(content)
+    service = FileStorageService(db)
+    arquivo, deduplicado = await service.salvar(file, current_user.tenant_id, current_user.id)
 
     return {
-        "id": file_id,
-        "filename": file.filename,
-        "size_kb": round(len(content) / 1024, 2),
-        "uploaded_at": datetime.utcnow(),
+        "id": arquivo.id,
+        "filename": arquivo.nome_original,
+        "size_kb": round(arquivo.tamanho / 1024, 2),
+        "sha256": arquivo.sha256,
+        "deduplicado": deduplicado,
+        "uploaded_at": arquivo.created_at,
     }
 
 
@@ -465,28 +582,24 @@ async def upload_base(
 # ==========================================
 @router.get("/files", response_model=List[BaseFileResponse])
 def list_uploaded_files(
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
 ):
-    """Lista arquivos enviados"""
-    ensure_upload_dir()
-    files = []
-
-    for filename in os.listdir(settings.UPLOAD_DIR):
-        if "_" in filename:
-            file_id, original = filename.split("_", 1)
-            files.append(
-                {
-                    "id": file_id,
-                    "filename": original,
-                    "uploaded_at": datetime.utcfromtimestamp(
-                        os.path.getctime(
-                            os.path.join(settings.UPLOAD_DIR, filename)
-                        )
-                    ),
-                }
-            )
-
-    return files
+    """Lista arquivos enviados (mais recentes primeiro)"""
+    service = FileStorageService(db)
+    return [
+        {
+            "id": arquivo.id,
+            "filename": arquivo.nome_original,
+            "size_kb": round(arquivo.tamanho / 1024, 2),
+            "sha256": arquivo.sha256,
+            "uploaded_at": arquivo.created_at,
+        }
+        for arquivo in service.listar(tenant_id, pagina, por_pagina)
+    ]
 
 
 # ==========================================
@@ -495,25 +608,44 @@ def list_uploaded_files(
 @router.get("/download/{file_id}")
 def download_file(
     file_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
 ):
-    """Download de arquivo por ID"""
-    ensure_upload_dir()
-
-    for filename in os.listdir(settings.UPLOAD_DIR):
-        if filename.startswith(file_id):
-            file_path = os.path.join(settings.UPLOAD_DIR, filename)
+    """
+    Download de arquivo por ID.
+    Suporta Range de intervalo único (206 Partial Content) para retomar downloads.
+    """
+    arquivo = FileStorageService(db).obter(file_id, tenant_id)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{arquivo.sha256}"',
+        "Content-Disposition": content_disposition(arquivo.nome_original),
+    }
 
-            if not os.path.isfile(file_path):
-                break
+    try:
+        intervalo = parse_range(range_header, arquivo.tamanho)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Intervalo inválido",
+            headers={"Content-Range": f"bytes */{arquivo.tamanho}"},
+        )
 
-            return FileResponse(
-                path=file_path,
-                filename=filename,
-                media_type="application/octet-stream",
-            )
+    if intervalo is None:
+        return FileResponse(
+            path=arquivo.caminho,
+            media_type="application/octet-stream",
+            headers=headers,
+        )
 
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail="Arquivo não encontrado",
+    inicio, fim = intervalo
+    headers["Content-Range"] = f"bytes {inicio}-{fim}/{arquivo.tamanho}"
+    headers["Content-Length"] = str(fim - inicio + 1)
+    return StreamingResponse(
+        ler_intervalo(arquivo.caminho, inicio, fim),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/octet-stream",
+        headers=headers,
     )
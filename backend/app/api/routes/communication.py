@@ -1,36 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Request, status
 from sqlalchemy.orm import Session
-from typing import List
-from uuid import uuid4
-from datetime import datetime
+from typing import List, Optional
 
+from app.core.security import verificar_assinatura
 from app.db.session import get_db
+from app.models.communication import CanalComunicacao
 from app.models.user import User
 from app.dependencies.auth import get_current_user
-
-from pydantic import BaseModel
-
-
-router = APIRouter(
-    prefix="/communication",
-    tags=["Communication"],
+from app.dependencies.tenant import get_tenant_id
+from app.core.exceptions import ForbiddenException, ServiceUnavailableException, UnauthorizedException
+from app.services.communication_service import CommunicationService, segredo_webhook
+from app.services.webhook_service import webhook_buffer, ORIGEM_COMUNICACAO
+from app.schemas.communication import (
+    CanalEnum, MessageCreate, MessageBatchCreate, MessageResponse, ResultadoEnfileiramento,
 )
 
-# ----------------------------------
-# Schemas (MVP)
-# ----------------------------------
-class MessageCreate(BaseModel):
-    channel: str  # whatsapp | voice | sms
-    to: str
-    message: str
-
 
-class MessageResponse(BaseModel):
-    id: str
-    channel: str
-    to: str
-    status: str
-    created_at: datetime
+router = APIRouter()
 
 
 # ----------------------------------
@@ -40,29 +26,29 @@ class MessageResponse(BaseModel):
 def send_message(
     payload: MessageCreate,
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
     db: Session = Depends(get_db),
 ):
-    if payload.channel not in ["whatsapp", "voice", "sms"]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Canal inválido",
-        )
-
-    message = {
-        "id": str(uuid4()),
-        "channel": payload.channel,
-        "to": payload.to,
-        "status": "sent",
-        "created_at": datetime.utcnow(),
-    }
+    """
+    Enfileira a mensagem na outbox. O envio é feito pelo dispatcher
+    (scripts/dispatch_worker.py), em lote e respeitando o limite do provedor.
+    """
+    service = CommunicationService(db)
+    return service.enviar(payload, tenant_id, current_user.id)
 
-    # 🔜 Futuro:
-    # - integrar RedeService
-    # - persistir envio no banco
-    # - tratar erros e retries
-    # - capturar webhooks
 
-    return message
+# ----------------------------------
+# Enviar em lote (campanha)
+# ----------------------------------
+@router.post("/send/lote", response_model=ResultadoEnfileiramento)
+def send_batch(
+    payload: MessageBatchCreate,
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
+):
+    service = CommunicationService(db)
+    return service.enviar_lote(payload, tenant_id, current_user.id)
 
 
 # ----------------------------------
@@ -70,25 +56,33 @@ def send_message(
 # ----------------------------------
 @router.get("/history", response_model=List[MessageResponse])
 def communication_history(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
 ):
-    return [
-        {
-            "id": str(uuid4()),
-            "channel": "whatsapp",
-            "to": "+55999999999",
-            "status": "delivered",
-            "created_at": datetime.utcnow(),
-        }
-    ]
+    service = CommunicationService(db)
+    return service.historico(tenant_id, page, page_size)
 
 
 # ----------------------------------
 # Webhook (retorno de status)
 # ----------------------------------
-@router.post("/webhook")
-def communication_webhook(payload: dict):
+@router.post("/webhook/{channel}", status_code=status.HTTP_202_ACCEPTED)
+async def communication_webhook(channel: CanalEnum, request: Request):
     """
-    Endpoint para receber callbacks da RedeService
+    Callbacks de status do provedor do canal, assinados com HMAC-SHA256 do
+    corpo no cabeçalho X-Signature (WHATSAPP_/SMS_/VOICE_WEBHOOK_SECRET).
+    Apenas enfileira o corpo bruto em memória; a gravação e a atualização
+    da outbox são feitas em lote pelo WebhookFlusher.
     """
-    return {"status": "received", "payload": payload}
+    segredo = segredo_webhook(CanalComunicacao(channel.value))
+    if not segredo:
+        raise ForbiddenException("Webhook do provedor não configurado")
+    corpo = await request.body()
+    if not verificar_assinatura(corpo, request.headers.get("X-Signature"), segredo):
+        raise UnauthorizedException("Assinatura do webhook inválida")
+    if not webhook_buffer.adicionar(ORIGEM_COMUNICACAO, corpo):
+        raise ServiceUnavailableException("Fila de webhooks cheia")
+    return {"status": "received"}
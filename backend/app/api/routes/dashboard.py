@@ -2,23 +2,26 @@ from typing import Optional, List
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.api.responses import FastJSONResponse
+from app.db.session import get_read_db
 from app.models.user import User, UserRole
 from app.dependencies.auth import get_current_user
+from app.dependencies.etag import RotaComEtag, verificar_etag
 from app.dependencies.tenant import get_tenant_filter, TenantFilter
 from app.services.dashboard_service import DashboardService
 from app.schemas.dashboard import DashboardPrincipal, DashboardAnaliseClientes
 
-router = APIRouter()
+# Leituras com ETag derivado da versão dos dados do tenant (304 sem agregar)
+router = APIRouter(route_class=RotaComEtag)
 
 
 # ----------------------------------
 # Dashboard Principal
 # ----------------------------------
-@router.get("/principal", response_model=DashboardPrincipal)
+@router.get("/principal", response_model=DashboardPrincipal, dependencies=[Depends(verificar_etag)])
 def dashboard_principal(
     tenant_filter: TenantFilter = Depends(get_tenant_filter),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Dashboard principal com métricas de contratos e devedores.
@@ -27,13 +30,14 @@ def dashboard_principal(
     - Diretores: Precisam especificar tenant_id via query param ou veem consolidado
     """
     service = DashboardService(db)
-    return service.get_dashboard_principal(tenant_filter.tenant_id)
+    # Model já validado pelo service: serializa direto, sem revalidar
+    return FastJSONResponse(service.get_dashboard_principal(tenant_filter.tenant_id))
 
 
-@router.get("/principal/consolidado", response_model=DashboardPrincipal)
+@router.get("/principal/consolidado", response_model=DashboardPrincipal, dependencies=[Depends(verificar_etag)])
 def dashboard_principal_consolidado(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Dashboard principal consolidado (todos os tenants).
@@ -54,10 +58,10 @@ def dashboard_principal_consolidado(
 # ----------------------------------
 # Dashboard de Análise de Clientes
 # ----------------------------------
-@router.get("/analise-clientes", response_model=DashboardAnaliseClientes)
+@router.get("/analise-clientes", response_model=DashboardAnaliseClientes, dependencies=[Depends(verificar_etag)])
 def dashboard_analise_clientes(
     tenant_filter: TenantFilter = Depends(get_tenant_filter),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Dashboard de Análise de Clientes com métricas demográficas e comportamentais.
@@ -66,16 +70,16 @@ def dashboard_analise_clientes(
     - Diretores: Precisam especificar tenant_id via query param ou veem consolidado
     """
     service = DashboardService(db)
-    return service.get_dashboard_analise_clientes(tenant_filter.tenant_id)
+    return FastJSONResponse(service.get_dashboard_analise_clientes(tenant_filter.tenant_id))
 
 
 # ----------------------------------
 # Dashboard por Tenant (para diretores)
 # ----------------------------------
-@router.get("/tenants")
+@router.get("/tenants", dependencies=[Depends(verificar_etag)])
 def list_tenants_overview(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Lista resumo de todos os tenants para visão do diretor.
@@ -116,10 +120,10 @@ def list_tenants_overview(
 # ----------------------------------
 # Dashboard do operador
 # ----------------------------------
-@router.get("/operator")
+@router.get("/operator", dependencies=[Depends(verificar_etag)])
 def dashboard_operator(
     tenant_filter: TenantFilter = Depends(get_tenant_filter),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     service = DashboardService(db)
     data = service.get_dashboard_principal(tenant_filter.tenant_id)
@@ -135,10 +139,10 @@ def dashboard_operator(
 # ----------------------------------
 # Dashboard do gestor
 # ----------------------------------
-@router.get("/manager")
+@router.get("/manager", dependencies=[Depends(verificar_etag)])
 def dashboard_manager(
     tenant_filter: TenantFilter = Depends(get_tenant_filter),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     service = DashboardService(db)
     data = service.get_dashboard_principal(tenant_filter.tenant_id)
@@ -155,10 +159,10 @@ def dashboard_manager(
 # ----------------------------------
 # Dashboard do diretor
 # ----------------------------------
-@router.get("/director")
+@router.get("/director", dependencies=[Depends(verificar_etag)])
 def dashboard_director(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     if current_user.role != UserRole.DIRETOR:
         from fastapi import HTTPException, status
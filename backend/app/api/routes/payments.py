@@ -1,83 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile, status
 from sqlalchemy.orm import Session
-from typing import List
-from uuid import uuid4
-from datetime import datetime
+from typing import List, Optional
 
+from app.core.config import settings
+from app.core.security import verificar_assinatura
 from app.db.session import get_db
 from app.models.user import User
 from app.dependencies.auth import get_current_user
+from app.dependencies.tenant import get_tenant_id, require_tenant
+from app.core.exceptions import ForbiddenException, ServiceUnavailableException, UnauthorizedException
+from app.services.webhook_service import webhook_buffer, ORIGEM_PAGAMENTO
+from app.schemas.payment import PaymentCreate, PaymentResponse, ResultadoConciliacao
 
 router = APIRouter()
 
-# ----------------------------------
-# Schemas locais simples (MVP)
-# ----------------------------------
-from pydantic import BaseModel
-
 
-class PaymentCreate(BaseModel):
-    amount: float
-    method: str  # pix | boleto | card
-    description: str | None = None
-
-
-class PaymentResponse(BaseModel):
-    id: str
-    amount: float
-    method: str
-    status: str
-    created_at: datetime
+def _conciliacao_service(db: Session):
+    # pandas só é carregado no primeiro uso das rotas de conciliação
+    from app.services.payment_service import ConciliacaoService
+    return ConciliacaoService(db)
 
 
 # ----------------------------------
-# Criar pagamento
+# Registrar pagamento (baixa manual)
 # ----------------------------------
 @router.post("/", response_model=PaymentResponse)
 def create_payment(
     payload: PaymentCreate,
     current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(require_tenant),
     db: Session = Depends(get_db),
 ):
-    if payload.amount <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Valor inválido",
-        )
-
-    payment = {
-        "id": str(uuid4()),
-        "amount": payload.amount,
-        "method": payload.method,
-        "status": "pending",
-        "created_at": datetime.utcnow(),
-    }
-
-    # 🔜 Futuro:
-    # - chamar gateway (Mercado Pago / PicPay)
-    # - persistir no banco
-    # - registrar webhook
-
-    return payment
+    """
+    Registra um pagamento e o concilia com o contrato
+    (pelo número do contrato ou, na falta dele, pelo CPF).
+    """
+    service = _conciliacao_service(db)
+    return service.registrar_manual(payload, tenant_id)
 
 
 # ----------------------------------
-# Listar pagamentos do usuário
+# Listar pagamentos
 # ----------------------------------
 @router.get("/", response_model=List[PaymentResponse])
 def list_payments(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
 ):
-    # Mock inicial
-    return [
-        {
-            "id": str(uuid4()),
-            "amount": 150.00,
-            "method": "pix",
-            "status": "paid",
-            "created_at": datetime.utcnow(),
-        }
-    ]
+    service = _conciliacao_service(db)
+    return service.listar(tenant_id, page, page_size)
+
+
+# ----------------------------------
+# Conciliar arquivo de liquidação
+# ----------------------------------
+@router.post("/conciliacao", response_model=ResultadoConciliacao)
+def reconcile_file(
+    file: UploadFile = File(..., description="Arquivo de liquidação (CSV, JSON ou Excel)"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(require_tenant),
+    db: Session = Depends(get_db),
+):
+    """
+    Concilia um arquivo de liquidação do gateway.
+    Pagamentos já registrados (mesmo identificador) são ignorados.
+    Rota síncrona: leitura (pandas) e conciliação rodam no threadpool,
+    sem bloquear o event loop.
+    """
+    # Arquivo temporário do upload (o corpo não é carregado inteiro na memória)
+    service = _conciliacao_service(db)
+    return service.conciliar_arquivo(file.file, file.filename, tenant_id)
+
+
+# ----------------------------------
+# Webhook do gateway de pagamento
+# ----------------------------------
+@router.post("/webhook", status_code=status.HTTP_202_ACCEPTED)
+async def payment_webhook(request: Request):
+    """
+    Callbacks do gateway, assinados com HMAC-SHA256 do corpo no cabeçalho
+    X-Signature (PAYMENT_WEBHOOK_SECRET). O corpo bruto é enfileirado em
+    memória e gravado em lote pelo WebhookFlusher.
+    """
+    if not settings.PAYMENT_WEBHOOK_SECRET:
+        raise ForbiddenException("Webhook de pagamento não configurado")
+    corpo = await request.body()
+    if not verificar_assinatura(corpo, request.headers.get("X-Signature"), settings.PAYMENT_WEBHOOK_SECRET):
+        raise UnauthorizedException("Assinatura do webhook inválida")
+    if not webhook_buffer.adicionar(ORIGEM_PAGAMENTO, corpo):
+        raise ServiceUnavailableException("Fila de webhooks cheia")
+    return {"status": "received"}
 
 
 # ----------------------------------
@@ -85,13 +100,10 @@ def list_payments(
 # ----------------------------------
 @router.get("/{payment_id}", response_model=PaymentResponse)
 def get_payment(
-    payment_id: str,
+    payment_id: int,
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
 ):
-    return {
-        "id": payment_id,
-        "amount": 200.00,
-        "method": "boleto",
-        "status": "pending",
-        "created_at": datetime.utcnow(),
-    }
+    service = _conciliacao_service(db)
+    return service.obter(payment_id, tenant_id)
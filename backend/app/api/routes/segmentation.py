@@ -1,34 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
-from uuid import uuid4
-from datetime import datetime
+from typing import List, Optional
 
 from app.db.session import get_db
 from app.models.user import User
 from app.dependencies.auth import get_current_user
-
-from pydantic import BaseModel
+from app.dependencies.tenant import get_tenant_id, require_tenant
+from app.services.segmentation_service import SegmentationService
+from app.schemas.segmentation import (
+    SegmentCreate, SegmentResponse, SimulacaoSegmento,
+    ResultadoAtualizacaoSegmentos, AudienciaSegmento,
+)
 
 
 router = APIRouter()
 
-# ----------------------------------
-# Schemas (MVP)
-# ----------------------------------
-class SegmentCreate(BaseModel):
-    name: str
-    min_days_overdue: int
-    max_days_overdue: int
-
-
-class SegmentResponse(BaseModel):
-    id: str
-    name: str
-    min_days_overdue: int
-    max_days_overdue: int
-    created_at: datetime
-
 
 # ----------------------------------
 # Criar segmento
@@ -37,85 +23,88 @@ class SegmentResponse(BaseModel):
 def create_segment(
     payload: SegmentCreate,
     current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(require_tenant),
     db: Session = Depends(get_db),
 ):
-    if payload.min_days_overdue < 0 or payload.max_days_overdue < 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Dias de atraso inválidos",
-        )
+    """
+    Cria um segmento de cobrança por faixa de D+.
+    Faixas sobrepostas dentro do mesmo tenant são rejeitadas.
+    """
+    service = SegmentationService(db)
+    return service.criar_segmento(payload, tenant_id)
 
-    if payload.min_days_overdue > payload.max_days_overdue:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Intervalo inválido",
-        )
 
-    segment = {
-        "id": str(uuid4()),
-        "name": payload.name,
-        "min_days_overdue": payload.min_days_overdue,
-        "max_days_overdue": payload.max_days_overdue,
-        "created_at": datetime.utcnow(),
-    }
+# ----------------------------------
+# Listar segmentos
+# ----------------------------------
+@router.get("/", response_model=List[SegmentResponse])
+def list_segments(
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
+):
+    service = SegmentationService(db)
+    return service.listar_segmentos(tenant_id)
 
-    # 🔜 Futuro:
-    # - persistir no banco
-    # - validar conflitos de faixa
-    # - associar a esteiras/scripts
 
-    return segment
+# ----------------------------------
+# Remover segmento
+# ----------------------------------
+@router.delete("/{segment_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_segment(
+    segment_id: int,
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
+):
+    service = SegmentationService(db)
+    service.remover_segmento(segment_id, tenant_id)
 
 
 # ----------------------------------
-# Listar segmentos
+# Recalcular associação contrato x segmento
 # ----------------------------------
-@router.get("/", response_model=List[SegmentResponse])
-def list_segments(
+@router.post("/atualizar", response_model=ResultadoAtualizacaoSegmentos)
+def refresh_segments(
     current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(require_tenant),
+    db: Session = Depends(get_db),
 ):
-    return [
-        {
-            "id": str(uuid4()),
-            "name": "Até 30 dias",
-            "min_days_overdue": 0,
-            "max_days_overdue": 30,
-            "created_at": datetime.utcnow(),
-        },
-        {
-            "id": str(uuid4()),
-            "name": "31 a 60 dias",
-            "min_days_overdue": 31,
-            "max_days_overdue": 60,
-            "created_at": datetime.utcnow(),
-        },
-    ]
+    service = SegmentationService(db)
+    return service.atualizar_membros(tenant_id)
+
+
+# ----------------------------------
+# Audiência de um segmento
+# ----------------------------------
+@router.get("/{segment_id}/contratos", response_model=AudienciaSegmento)
+def segment_audience(
+    segment_id: int,
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
+):
+    service = SegmentationService(db)
+    return service.get_audiencia(segment_id, tenant_id, pagina, por_pagina)
 
 
 # ----------------------------------
 # Simular segmentação de um cliente
 # ----------------------------------
-@router.get("/simulate/{days_overdue}")
+@router.get("/simulate/{days_overdue}", response_model=SimulacaoSegmento)
 def simulate_segmentation(
     days_overdue: int,
     current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_db),
 ):
-    if days_overdue < 0:
+    if tenant_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Dias inválidos",
+            detail="Informe o tenant_id para simular a segmentação",
         )
 
-    if days_overdue <= 30:
-        segment = "Até 30 dias"
-    elif days_overdue <= 60:
-        segment = "31 a 60 dias"
-    elif days_overdue <= 90:
-        segment = "61 a 90 dias"
-    else:
-        segment = "Acima de 90 dias"
-
-    return {
-        "days_overdue": days_overdue,
-        "segment": segment,
-    }
+    service = SegmentationService(db)
+    return service.simular(days_overdue, tenant_id)
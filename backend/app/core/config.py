@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -16,11 +16,20 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+    BCRYPT_ROUNDS: int = 12  # hashes com outro custo são refeitos no login
+    PASSWORD_HASH_WORKERS: int = 4  # threads dedicadas ao bcrypt
+    TOKEN_CACHE_SIZE: int = 10_000  # tokens verificados em cache (0 desliga)
 
     # ----------------------------------
     # Banco de Dados
     # ----------------------------------
     DATABASE_URL: str
+    READ_DATABASE_URL: Optional[str] = None  # réplica para dashboards e listagens (vazio = primário)
+    SHARD_DATABASE_URLS: Dict[str, str] = {}  # nome do shard -> URL (bancos dedicados a tenants grandes)
+    TENANT_SHARDS: Dict[int, str] = {}  # tenant_id -> nome do shard; os demais ficam no primário
+    SKIP_DDL: bool = False  # produção: não roda create_all no startup (schema via scripts)
+    STARTUP_WARMUP: bool = True  # aquece schemas e pool antes do /health/ready
+    DB_WARMUP_CONNECTIONS: int = 5
 
     # ----------------------------------
     # CORS
@@ -33,20 +42,64 @@ class Settings(BaseSettings):
     ENABLE_RATE_LIMIT: bool = False
     RATE_LIMIT_PER_MINUTE: int = 60
 
+    # ----------------------------------
+    # Compressão de respostas
+    # ----------------------------------
+    ENABLE_COMPRESSION: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024  # abaixo disso o ganho não paga a CPU
+
     # ----------------------------------
     # Integrações externas
     # ----------------------------------
     WHATSAPP_API_URL: str | None = None
     WHATSAPP_API_TOKEN: str | None = None
+    WHATSAPP_RATE_PER_SECOND: float = 80.0
+    WHATSAPP_WEBHOOK_SECRET: str | None = None  # HMAC-SHA256 dos callbacks de status (X-Signature)
+
+    SMS_API_URL: str | None = None
+    SMS_API_TOKEN: str | None = None
+    SMS_RATE_PER_SECOND: float = 100.0
+    SMS_WEBHOOK_SECRET: str | None = None  # HMAC-SHA256 dos callbacks de status (X-Signature)
+
+    VOICE_API_URL: str | None = None
+    VOICE_API_TOKEN: str | None = None
+    VOICE_RATE_PER_SECOND: float = 10.0
+    VOICE_WEBHOOK_SECRET: str | None = None  # HMAC-SHA256 dos callbacks de status (X-Signature)
 
     PAYMENT_GATEWAY_URL: str | None = None
     PAYMENT_GATEWAY_TOKEN: str | None = None
+    PAYMENT_WEBHOOK_SECRET: str | None = None  # HMAC-SHA256 do corpo (X-Signature); sem ele o webhook recusa tudo
+
+    # ----------------------------------
+    # Disparo de comunicações (outbox)
+    # ----------------------------------
+    DISPATCH_BATCH_SIZE: int = 1000  # mensagens reservadas por ciclo
+    DISPATCH_CONCURRENCY: int = 8  # chamadas simultâneas por provedor
+    DISPATCH_MAX_CONNECTIONS: int = 20  # pool httpx por provedor
+    DISPATCH_HTTP_RETRIES: int = 3
+    DISPATCH_MAX_TENTATIVAS: int = 5
+    DISPATCH_IDLE_SECONDS: float = 1.0
+
+    # ----------------------------------
+    # Webhooks (ingestão em buffer)
+    # ----------------------------------
+    WEBHOOK_BUFFER_SIZE: int = 100_000  # eventos em memória antes de responder 503
+    WEBHOOK_FLUSH_BATCH: int = 5000
+    WEBHOOK_FLUSH_INTERVAL: float = 0.5
+    WEBHOOK_REPROCESS_SECONDS: int = 60
 
     # ----------------------------------
     # Uploads
     # ----------------------------------
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE_MB: int = 10
+    MAX_UPLOAD_UNCOMPRESSED_MB: int = 200  # teto do conteúdo descompactado (.gz, .zip)
+    IMPORT_CHUNK_SIZE: int = 5000  # linhas por commit (checkpoint) na importação
+    IMPORT_WORKERS: int = 0  # processos da importação paralela (0 = nº de CPUs)
+    IMPORT_PARALLEL_MIN_ROWS: int = 200_000
+    IMPORT_MAX_CONCURRENT: int = 2  # importações simultâneas por processo
+    IMPORT_FAST_LANE_ROWS: int = 10_000  # até este tamanho, faixa rápida
+    IMPORT_AGING_SECONDS: int = 300  # espera após a qual a faixa normal é promovida
 
     # PYDANTIC V2
     model_config = SettingsConfigDict(
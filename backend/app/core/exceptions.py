@@ -54,6 +54,15 @@ class ExternalServiceException(AppException):
         super().__init__(status.HTTP_502_BAD_GATEWAY, detail)
 
 
+class ServiceUnavailableException(HTTPException):
+    def __init__(self, detail: str = "Serviço temporariamente indisponível", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
 # ======================================================
 # EXCEÇÕES DE AUTENTICAÇÃO
 # ======================================================
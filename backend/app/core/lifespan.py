@@ -0,0 +1,82 @@
+"""
+Ciclo de vida da aplicação
+
+Substitui os @app.on_event: o trabalho de inicialização fica em um passo
+explícito, fora do import do main.py, e cada etapa tem o tempo registrado
+no log.
+
+- configure_mappers: resolve os relacionamentos de todos os models agora,
+  e não na primeira consulta;
+- create_all: só fora do modo SKIP_DDL. Em produção o schema é mantido
+  pelos scripts, e o boot não paga a inspeção das tabelas;
+- aquecimento (STARTUP_WARMUP): schemas de resposta, OpenAPI e pool de
+  conexões, ver app/core/warmup.py;
+- shards (SHARD_DATABASE_URLS): schema das tabelas de tenant, junto do create_all;
+- flusher de webhooks e pools de threads (hash de senha, fan-out dos shards).
+
+app.state.pronto só fica verdadeiro após todas as etapas (/health/ready) e
+volta a falso no shutdown, para o balanceador parar de enviar tráfego.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+
+from fastapi import FastAPI
+from sqlalchemy.orm import configure_mappers
+
+from app.core.config import settings
+from app.core.security import shutdown_hash_executor
+from app.core.warmup import aquecer_pool, aquecer_schemas
+from app.db.base import Base
+from app.db.session import engine, shard_engines
+from app.db.sharding import criar_schema_shard, shutdown_shard_executor
+from app.services.webhook_service import webhook_flusher
+
+logger = logging.getLogger("app.logger")
+
+
+@contextmanager
+def _etapa(nome: str) -> Iterator[None]:
+    inicio = time.perf_counter()
+    yield
+    logger.info(f"Startup: {nome} em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+
+def preparar_banco() -> None:
+    with _etapa("configure_mappers"):
+        configure_mappers()
+
+    if settings.SKIP_DDL:
+        logger.info("Startup: SKIP_DDL ativo, create_all ignorado")
+        return
+    with _etapa("create_all"):
+        Base.metadata.create_all(bind=engine)
+    for nome, shard in shard_engines.items():
+        with _etapa(f"schema do shard {nome}"):
+            criar_schema_shard(shard)
+
+
+def aquecer(app: FastAPI) -> None:
+    with _etapa("schemas de resposta e OpenAPI"):
+        aquecer_schemas(app)
+    with _etapa("pool de conexões"):
+        aquecer_pool()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.pronto = False
+    preparar_banco()
+    if settings.STARTUP_WARMUP:
+        aquecer(app)
+    # Flusher de webhooks (buffer em memória → banco)
+    webhook_flusher.iniciar()
+    app.state.pronto = True
+    try:
+        yield
+    finally:
+        app.state.pronto = False
+        await webhook_flusher.parar()
+        shutdown_hash_executor()
+        shutdown_shard_executor()
@@ -1,10 +1,17 @@
+import asyncio
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Tuple
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.token_cache import token_cache
+from app.repositories.token_repository import TokenRevogadoRepository
 
 # ----------------------------------
 # Configuração de hash de senha
@@ -12,8 +19,14 @@ from app.core.config import settings
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
+    # Hashes gerados com outro custo passam a "precisar de atualização"
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
 )
 
+# O bcrypt libera o GIL; um pool próprio e limitado evita que um pico de
+# logins ocupe todas as threads do servidor ou bloqueie o event loop
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
 # ----------------------------------
 # Validação de senha
 # ----------------------------------
@@ -39,7 +52,8 @@ def create_access_token(
 
     to_encode: Dict[str, Any] = {
         "sub": subject,
-        "iat": now,
+        # Com fração de segundo: um login logo após a revogação do usuário vale
+        "iat": now.timestamp(),
         "exp": expire,
     }
 
@@ -51,14 +65,53 @@ def create_access_token(
 
 
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
-    try:
-        return jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-    except JWTError:
-        return None
+    """Claims verificadas (assinatura e exp). A revogação é conferida em get_current_user."""
+    chave = token_cache.chave(token)
+    payload = token_cache.obter(chave)
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM],
+            )
+        except JWTError:
+            return None
+        token_cache.guardar(chave, payload)
+    return payload
+
+
+def token_revogado(db: Session, token: str) -> bool:
+    return TokenRevogadoRepository(db).revogado(token_cache.chave(token).hex())
+
+
+def revoke_access_token(db: Session, token: str) -> bool:
+    """Logout: o token deixa de valer imediatamente, em todos os workers. False se já era inválido."""
+    payload = decode_access_token(token)
+    if not payload:
+        return False
+    chave = token_cache.chave(token)
+    TokenRevogadoRepository(db).revogar(chave.hex(), payload["exp"])
+    token_cache.descartar(chave)
+    return True
+
+
+def emitido_antes(payload: Dict[str, Any], instante: Optional[datetime]) -> bool:
+    """Token emitido estritamente antes de `instante` (ex.: users.tokens_invalidos_desde)"""
+    if instante is None:
+        return False
+    if instante.tzinfo is None:
+        # SQLite devolve sem fuso; o valor é gravado em UTC
+        instante = instante.replace(tzinfo=timezone.utc)
+    return float(payload.get("iat", 0)) < instante.timestamp()
+
+
+def verificar_assinatura(corpo: bytes, assinatura: Optional[str], segredo: str) -> bool:
+    """Assinatura HMAC-SHA256 (hex, com ou sem prefixo "sha256=") de um webhook"""
+    if not assinatura:
+        return False
+    esperada = hmac.new(segredo.encode(), corpo, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(esperada, assinatura.strip().removeprefix("sha256=").lower())
 
 
 # ----------------------------------
@@ -74,3 +127,48 @@ def verify_password(
 def get_password_hash(password: str) -> str:
     validate_password_bytes(password)
     return pwd_context.hash(password)
+
+
+def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e, se o hash usa parâmetros antigos (ex.: BCRYPT_ROUNDS
+    mudou), devolve também o novo hash para ser gravado.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password executado no pool de hash"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _obter_hash_executor(), verify_and_update_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash executado no pool de hash"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_obter_hash_executor(), get_password_hash, password)
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+def _obter_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash",
+        )
+    return _hash_executor
@@ -0,0 +1,86 @@
+"""
+Cache de tokens verificados
+
+Toda requisição autenticada passa por decode_access_token. O cache guarda
+as claims já verificadas (assinatura e exp) em um LRU indexado pelo SHA-256
+do token, até o exp do próprio token, evitando refazer o HMAC e o parse.
+
+O cache é do processo; a revogação não fica aqui. Ela está no banco, para
+valer em todos os workers, e é conferida em get_current_user:
+- por token (logout): tabela tokens_revogados, até o exp dele;
+- por usuário (desativação forçada): users.tokens_invalidos_desde.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class TokenCache:
+    """LRU de claims verificadas"""
+
+    def __init__(self, capacidade: int = settings.TOKEN_CACHE_SIZE):
+        self.capacidade = capacidade
+        self._entradas: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Dependências síncronas rodam no threadpool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def chave(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    # ----------------------------------
+    # Consulta
+    # ----------------------------------
+    def obter(self, chave: bytes) -> Optional[Dict[str, Any]]:
+        """Claims em cache ainda válidas, ou None (miss)"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[1] <= time.time():
+                if entrada is not None:
+                    del self._entradas[chave]
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.hits += 1
+            return dict(entrada[0])
+
+    def guardar(self, chave: bytes, payload: Dict[str, Any]) -> None:
+        if not self.capacidade or "exp" not in payload:
+            return
+        with self._lock:
+            self._entradas[chave] = (payload, float(payload["exp"]))
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    def descartar(self, chave: bytes) -> None:
+        """Remove o token do cache (ex.: revogado no logout)"""
+        with self._lock:
+            self._entradas.pop(chave, None)
+
+    # ----------------------------------
+    # Métricas
+    # ----------------------------------
+    def metricas(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "capacidade": self.capacidade,
+            "tamanho": len(self._entradas),
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self.hits = self.misses = 0
+
+
+token_cache = TokenCache()
@@ -0,0 +1,66 @@
+"""
+Aquecimento da aplicação no startup
+
+Sem aquecimento a primeira requisição após o deploy paga o que é feito sob
+demanda: conexões do pool, compilação dos statements do ORM e o schema
+OpenAPI. O lifespan executa estas etapas antes de marcar a aplicação como
+pronta (/health/ready).
+"""
+import logging
+from contextlib import ExitStack
+from typing import Any, Dict
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import PRINCIPAL, SessionLocal, engine, read_engine, shard_engines
+from app.models import Cliente, Contrato, ImportacaoLog, Pagamento, User
+
+logger = logging.getLogger("app.logger")
+
+# TypeAdapter de cada response_model das rotas, montado no startup
+ADAPTADORES_RESPOSTA: Dict[Any, TypeAdapter] = {}
+
+
+def aquecer_schemas(app: FastAPI) -> int:
+    """
+    Monta os TypeAdapters dos response_models (completando models com
+    referências adiadas) e gera o schema OpenAPI. Retorna quantos foram montados.
+    """
+    for rota in app.routes:
+        if isinstance(rota, APIRoute) and rota.response_model is not None:
+            if rota.response_model not in ADAPTADORES_RESPOSTA:
+                ADAPTADORES_RESPOSTA[rota.response_model] = TypeAdapter(rota.response_model)
+    app.openapi()
+    return len(ADAPTADORES_RESPOSTA)
+
+
+def aquecer_pool() -> int:
+    """
+    Abre DB_WARMUP_CONNECTIONS conexões ao mesmo tempo (limitadas ao tamanho
+    do pool), para que voltem ao pool já estabelecidas, e executa consultas
+    representativas para popular o cache de compilação do SQLAlchemy.
+    Réplica de leitura e shards, se configurados, têm os pools aquecidos também.
+    """
+    tamanho_pool = getattr(engine.pool, "size", lambda: 1)()
+    quantidade = max(1, min(settings.DB_WARMUP_CONNECTIONS, tamanho_pool))
+
+    for motor in (engine, read_engine, *shard_engines.values()):
+        if motor is None:
+            continue
+        with ExitStack() as pilha:
+            for _ in range(quantidade):
+                conexao = pilha.enter_context(motor.connect())
+                conexao.execute(text("SELECT 1"))
+
+    # Consultas sem filtro de tenant: o primário, explicitamente
+    db = SessionLocal(info={"shard": PRINCIPAL})
+    try:
+        for model in (User, Cliente, Contrato, Pagamento, ImportacaoLog):
+            db.query(model).limit(1).all()
+    finally:
+        db.close()
+    return quantidade
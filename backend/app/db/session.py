@@ -1,20 +1,154 @@
-from sqlalchemy import create_engine
+import logging
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
 
 from app.core.config import settings
 
+logger = logging.getLogger("app.logger")
+
 # ----------------------------------
-# Engine
+# Engines
 # ----------------------------------
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    future=True,
-    connect_args={"check_same_thread": False}
-    if settings.DATABASE_URL.startswith("sqlite")
-    else {},
+def _criar_engine(url: str) -> Engine:
+    engine = create_engine(
+        url,
+        echo=settings.DEBUG,
+        future=True,
+        connect_args={"check_same_thread": False}
+        if url.startswith("sqlite")
+        else {},
+    )
+
+    if engine.dialect.name == "sqlite":
+        # O pysqlite abre a transação por conta própria e um SAVEPOINT fora dela
+        # vira commit no RELEASE; BEGIN explícito faz begin_nested() funcionar
+        @event.listens_for(engine, "connect")
+        def _sqlite_connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _sqlite_begin(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+# Primário: escritas, importações e tudo que não for leitura de tela
+engine = _criar_engine(settings.DATABASE_URL)
+
+# Réplica de leitura (opcional): dashboards e listagens
+read_engine: Optional[Engine] = (
+    _criar_engine(settings.READ_DATABASE_URL) if settings.READ_DATABASE_URL else None
 )
 
+# ----------------------------------
+# Shards (tenants em bancos dedicados)
+# ----------------------------------
+PRINCIPAL = "principal"  # shard dos tenants fora de TENANT_SHARDS: o próprio primário
+
+shard_engines: Dict[str, Engine] = {
+    nome: _criar_engine(url) for nome, url in settings.SHARD_DATABASE_URLS.items()
+}
+
+_sem_url = set(settings.TENANT_SHARDS.values()) - set(shard_engines)
+if _sem_url:
+    raise ValueError(f"TENANT_SHARDS usa shards sem URL em SHARD_DATABASE_URLS: {sorted(_sem_url)}")
+
+# Ficam só no primário, inclusive para tenants em shard: cadastro (tenants,
+# users) e tabelas sem vínculo com os dados do tenant (arquivos, outbox, webhooks, tokens revogados)
+TABELAS_GLOBAIS = frozenset({
+    "tenants", "users", "uploaded_files", "mensagens_outbox", "webhook_eventos", "tokens_revogados",
+})
+
+
+def shards() -> List[str]:
+    return [PRINCIPAL, *shard_engines]
+
+
+def shard_do_tenant(tenant_id: Optional[int]) -> str:
+    # None (visão global) e -1 (usuário sem tenant) ficam no primário
+    return settings.TENANT_SHARDS.get(tenant_id, PRINCIPAL) if tenant_id else PRINCIPAL
+
+
+class ShardIndefinido(RuntimeError):
+    """Statement em tabela de tenant sem filtro de tenant numa sessão sem shard padrão"""
+
+
+class SessaoRoteada(Session):
+    """
+    Session que escolhe o banco a cada statement:
+
+    - tabelas globais: primário (o bind da sessão);
+    - demais tabelas: shard do tenant do filtro `tenant_id = X` do statement
+      (o que os repositórios já fazem em _base_query) ou, sem esse filtro,
+      o shard padrão da sessão (definir_tenant / em_cada_shard), usado por
+      inserts, lazy loads, db.get() e SQL textual.
+
+    Sem filtro e sem shard padrão, o statement falha com ShardIndefinido em
+    vez de ir para o primário: com tenants em shard, ler ou gravar só no
+    primário daria resultado incompleto sem erro algum.
+
+    Sem SHARD_DATABASE_URLS é uma Session comum.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if shard_engines:
+            tabela = _tabela(mapper, clause)
+            if tabela not in TABELAS_GLOBAIS:
+                nome = _shard_do_filtro(clause) or self.info.get("shard")
+                if nome is None:
+                    raise ShardIndefinido(
+                        f"Statement em {tabela or 'SQL textual'} sem filtro tenant_id e sem shard "
+                        "padrão na sessão (definir_tenant ou em_cada_shard)"
+                    )
+                if nome != PRINCIPAL:
+                    return shard_engines[nome]
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def definir_tenant(db: Session, tenant_id: Optional[int]) -> None:
+    """
+    Shard padrão da sessão: destino de inserts e statements sem filtro de
+    tenant. Na visão global (None) não há shard padrão: esses statements
+    falham e a consulta precisa passar por em_cada_shard.
+    """
+    if tenant_id is None:
+        db.info.pop("shard", None)
+    else:
+        db.info["shard"] = shard_do_tenant(tenant_id)
+
+
+def _tabela(mapper, clause) -> Optional[str]:
+    if mapper is not None:
+        return inspect(mapper).local_table.name
+    tabela = getattr(clause, "table", None)  # insert/update/delete do Core
+    if tabela is None and hasattr(clause, "get_final_froms"):
+        froms = clause.get_final_froms()
+        tabela = froms[0] if froms else None
+    return getattr(tabela, "name", None)
+
+
+def _shard_do_filtro(clause) -> Optional[str]:
+    """Shard do primeiro `tenant_id = <valor>` do statement (inclusive em subqueries)"""
+    if clause is None:
+        return None
+    for elemento in visitors.iterate(clause):
+        if (
+            isinstance(elemento, BinaryExpression)
+            and elemento.operator is operators.eq
+            and getattr(elemento.left, "name", None) == "tenant_id"
+            and isinstance(elemento.right, BindParameter)
+        ):
+            return shard_do_tenant(elemento.right.effective_value)
+    return None
+
 # ----------------------------------
 # Session factory
 # ----------------------------------
@@ -22,10 +156,16 @@ SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
-    class_=Session,
+    class_=SessaoRoteada,
     future=True,
 )
 
+ReadSessionLocal: Optional[sessionmaker] = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine, class_=SessaoRoteada, future=True)
+    if read_engine is not None
+    else None
+)
+
 # ----------------------------------
 # Dependency (FastAPI)
 # ----------------------------------
@@ -38,3 +178,55 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+# Marca de "tenant não resolvido na request" (None já é a visão global)
+_SEM_TENANT = object()
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)) -> Iterator[Session]:
+    """
+    Sessão para leituras de tela (dashboards e listagens).
+
+    Usa a réplica (READ_DATABASE_URL) quando ela já tem a versão atual dos
+    dados do tenant. Logo após uma importação a replicação pode estar
+    atrasada: enquanto as versões do tenant na réplica estiverem abaixo das do
+    primário, a leitura vai para o primário (a sessão `db` da request).
+
+    O tenant vem de get_tenant_id / get_tenant_filter, que precisam ser
+    resolvidos antes (declarados antes de get_read_db na rota); sem tenant
+    conhecido, ou sem réplica configurada, usa o primário. Tenants em shard
+    leem do próprio shard (a réplica é só do primário).
+    """
+    tenant_id = getattr(request.state, "tenant_id", _SEM_TENANT)
+    if ReadSessionLocal is None or tenant_id is _SEM_TENANT:
+        yield db
+        return
+
+    replica = ReadSessionLocal()
+    definir_tenant(replica, tenant_id)
+    try:
+        yield replica if replica_em_dia(db, replica, tenant_id) else db
+    finally:
+        replica.close()
+
+
+def replica_em_dia(primario: Session, replica: Session, tenant_id: Optional[int]) -> bool:
+    """A réplica já tem a versão dos dados do tenant (None = todos) que o primário tem?"""
+    from app.repositories.tenant_repository import TenantRepository
+
+    if tenant_id == -1:  # usuário sem tenant: não lê dado nenhum
+        return True
+    try:
+        versao_primario = TenantRepository(primario).versao_leituras(tenant_id)
+        versao_replica = TenantRepository(replica).versao_leituras(tenant_id)
+    except SQLAlchemyError:
+        logger.warning("Réplica de leitura indisponível; usando o primário", exc_info=True)
+        replica.rollback()
+        return False
+    return _como_tupla(versao_replica) >= _como_tupla(versao_primario)
+
+
+def _como_tupla(versao: str):
+    # "dados.segmentos" (tenant) ou "dados.segmentos:quantidade" (visão global)
+    return tuple(int(parte) for parte in versao.replace(":", ".").split("."))
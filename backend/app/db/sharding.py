@@ -0,0 +1,111 @@
+"""
+Visões globais com tenants em shards
+
+Com SHARD_DATABASE_URLS configurado, os dados de um tenant ficam no banco do
+seu shard (ver SessaoRoteada em app/db/session.py). Consultas de um tenant
+são roteadas sozinhas; já as visões globais do diretor (tenant_id=None)
+precisam consultar todos os bancos: em_cada_shard executa a mesma função
+em cada shard, em paralelo, e quem chama combina os resultados.
+
+Uso:
+    if ha_shards():
+        parciais = em_cada_shard(lambda db: ContratoRepository(db).count(None))
+        total = sum(parciais)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from heapq import merge
+from itertools import islice
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import MetaData
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import ForeignKeyConstraint
+
+from app.db import session as db_session
+from app.db.base import Base
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def ha_shards() -> bool:
+    return bool(db_session.shard_engines)
+
+
+def em_cada_shard(funcao: Callable[[Session], T]) -> List[T]:
+    """
+    Executa funcao(sessão) uma vez por shard, em paralelo, cada uma com a
+    própria sessão (shard padrão definido). Resultados na ordem de shards().
+    """
+    def executar(nome: str) -> T:
+        db = db_session.SessionLocal(info={"shard": nome})
+        try:
+            return funcao(db)
+        finally:
+            db.close()
+
+    return list(_obter_executor().map(executar, db_session.shards()))
+
+
+def paginar_em_shards(
+    consulta: Callable[[Session, int], Tuple[int, Sequence[T]]],
+    pagina: int,
+    por_pagina: int,
+    chave: Callable[[T], Any],
+    decrescente: bool = False,
+) -> Tuple[int, List[T]]:
+    """
+    Paginação global: consulta(db, limite) devolve (total do shard, primeiros
+    `limite` itens já ordenados por `chave`). Cada shard entrega até o fim da
+    página pedida; a intercalação ordenada dos shards dá a página global.
+    """
+    limite = pagina * por_pagina
+    parciais = em_cada_shard(lambda db: consulta(db, limite))
+    total = sum(p[0] for p in parciais)
+    itens = merge(*(p[1] for p in parciais), key=chave, reverse=decrescente)
+    return total, list(islice(itens, (pagina - 1) * por_pagina, limite))
+
+
+def criar_schema_shard(engine: Engine) -> None:
+    """
+    Cria no shard as tabelas de dados de tenant. As tabelas globais ficam só
+    no primário, então as FKs para elas (tenant_id, usuario_id) não existem
+    no shard: a integridade é garantida pelo primário.
+    """
+    metadata = MetaData()
+    for tabela in Base.metadata.sorted_tables:
+        if tabela.name in db_session.TABELAS_GLOBAIS:
+            continue
+        copia = tabela.to_metadata(metadata)
+        for restricao in list(copia.constraints):
+            if isinstance(restricao, ForeignKeyConstraint) and _aponta_para_global(restricao):
+                copia.constraints.discard(restricao)
+                for fk in restricao.elements:
+                    copia.foreign_keys.discard(fk)
+                    fk.parent.foreign_keys.discard(fk)
+    metadata.create_all(bind=engine)
+
+
+def shutdown_shard_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _aponta_para_global(restricao: ForeignKeyConstraint) -> bool:
+    return any(
+        fk.target_fullname.split(".")[0] in db_session.TABELAS_GLOBAIS for fk in restricao.elements
+    )
+
+
+def _obter_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=len(db_session.shards()),
+            thread_name_prefix="shard-fanout",
+        )
+    return _executor
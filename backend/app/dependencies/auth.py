@@ -2,7 +2,7 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_access_token
+from app.core.security import decode_access_token, emitido_antes, token_revogado
 from app.core.exceptions import UnauthorizedException
 from app.db.session import get_db
 from app.repositories.user_repository import UserRepository
@@ -16,14 +16,14 @@ def get_current_user(
 ):
     payload = decode_access_token(token)
 
-    if not payload or "sub" not in payload:
+    if not payload or "sub" not in payload or token_revogado(db, token):
         raise UnauthorizedException("Token inválido")
 
     user_id = payload["sub"]
 
     user = UserRepository(db).get_by_id(user_id)
 
-    if not user or not user.is_active:
+    if not user or not user.is_active or emitido_antes(payload, user.tokens_invalidos_desde):
         raise UnauthorizedException("Usuário não autorizado")
 
     return user
@@ -0,0 +1,88 @@
+"""
+GET condicional (ETag / 304) para as leituras de /dashboard e /base
+
+O ETag é derivado das versões do tenant (versao_dados e versao_segmentos,
+incrementadas a cada escrita), do dia corrente (o envelhecimento do D+ muda
+as faixas à meia-noite sem escrita alguma), do usuário, do caminho e da
+query string. A dependency
+consulta só a versão: se o If-None-Match bate, responde 304 antes de a rota
+rodar qualquer agregação.
+
+Uso:
+    router = APIRouter(route_class=RotaComEtag)
+
+    @router.get("/dados", dependencies=[Depends(verificar_etag)])
+    def listar_dados(...): ...
+"""
+import hashlib
+from datetime import date
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import get_read_db
+from app.dependencies.auth import get_current_user
+from app.dependencies.tenant import get_tenant_id
+from app.models.user import User
+from app.repositories.tenant_repository import TenantRepository
+
+
+def calcular_etag(request: Request, user_id, tenant_id: Optional[int], versao: str) -> str:
+    query = "&".join(sorted(f"{chave}={valor}" for chave, valor in request.query_params.multi_items()))
+    chave = (
+        f"{settings.APP_VERSION}|{request.url.path}?{query}|{user_id}|{tenant_id}|{versao}"
+        f"|{date.today().isoformat()}"
+    )
+    return '"' + hashlib.sha256(chave.encode()).hexdigest()[:32] + '"'
+
+
+def verificar_etag(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    tenant_id: Optional[int] = Depends(get_tenant_id),
+    db: Session = Depends(get_read_db),
+) -> str:
+    """
+    Responde 304 se o cliente já tem a versão atual; senão guarda o ETag para a resposta.
+
+    Lê a versão pela mesma sessão de leitura da rota (get_read_db é cacheada
+    por request): ETag e dados vêm sempre do mesmo banco.
+    """
+    versao = "0" if tenant_id == -1 else TenantRepository(db).versao_leituras(tenant_id)
+    etag = calcular_etag(request, current_user.id, tenant_id, versao)
+
+    if _corresponde(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+        )
+    request.state.etag = etag
+    return etag
+
+
+def _corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = {c.strip().removeprefix("W/") for c in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
+
+
+class RotaComEtag(APIRoute):
+    """Acrescenta o ETag calculado por verificar_etag às respostas 200"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def handler_com_etag(request: Request) -> Response:
+            response = await handler(request)
+            etag = getattr(request.state, "etag", None)
+            if etag and response.status_code == status.HTTP_200_OK:
+                response.headers["ETag"] = etag
+                # O navegador guarda, mas revalida a cada uso
+                response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return handler_com_etag
@@ -1,6 +1,8 @@
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
 
+from app.db.session import definir_tenant, get_db
 from app.models.user import User, UserRole
 from app.dependencies.auth import get_current_user
 
@@ -84,8 +86,10 @@ class TenantFilter:
 
 
 def get_tenant_filter(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    tenant_id: Optional[int] = None
+    tenant_id: Optional[int] = None,
+    db: Session = Depends(get_db),
 ) -> TenantFilter:
     """
     Dependency para injetar o filtro de tenant nas rotas.
@@ -97,12 +101,16 @@ def get_tenant_filter(
             # - None para diretores (visão global)
             # - tenant_id do usuário para outros cargos
     """
-    return TenantFilter(current_user, tenant_id)
+    tenant_filter = TenantFilter(current_user, tenant_id)
+    _registrar_tenant(request, db, tenant_filter.tenant_id)
+    return tenant_filter
 
 
 def get_tenant_id(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    tenant_id: Optional[int] = None
+    tenant_id: Optional[int] = None,
+    db: Session = Depends(get_db),
 ) -> Optional[int]:
     """
     Dependency simples que retorna apenas o tenant_id para filtrar queries.
@@ -114,13 +122,15 @@ def get_tenant_id(
     - Usuários SEM tenant: -1 (não vê nenhum dado)
     """
     if current_user.is_diretor:
-        return tenant_id  # None = todos, ou específico
-    
-    # Usuário sem tenant não vê nenhum dado
-    if current_user.tenant_id is None:
-        return -1  # ID inexistente = nenhum resultado
-    
-    return current_user.tenant_id
+        pass  # None = todos, ou específico
+    elif current_user.tenant_id is None:
+        # Usuário sem tenant não vê nenhum dado
+        tenant_id = -1  # ID inexistente = nenhum resultado
+    else:
+        tenant_id = current_user.tenant_id
+
+    _registrar_tenant(request, db, tenant_id)
+    return tenant_id
 
 
 def get_user_tenant_status(
@@ -140,7 +150,9 @@ def get_user_tenant_status(
 
 
 def require_tenant(
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
 ) -> int:
     """
     Dependency que exige que o usuário tenha um tenant associado.
@@ -153,4 +165,14 @@ def require_tenant(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Usuário não está associado a nenhum tenant"
         )
+    _registrar_tenant(request, db, current_user.tenant_id)
     return current_user.tenant_id
+
+
+def _registrar_tenant(request: Request, db: Session, tenant_id: Optional[int]) -> None:
+    """
+    Tenant da request: a sessão passa a usar o shard dele (inserts e SQL sem
+    filtro de tenant) e get_read_db escolhe réplica ou primário por ele.
+    """
+    definir_tenant(db, tenant_id)
+    request.state.tenant_id = tenant_id
@@ -0,0 +1,106 @@
+"""
+Contrato comum dos clientes de provedores de comunicação.
+
+Cada provedor recebe um httpx.AsyncClient compartilhado (pool de conexões
+criado pelo dispatcher) e envia mensagens em lotes do tamanho que a API aceita.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+
+import httpx
+
+
+@dataclass
+class MensagemEnvio:
+    """Mensagem a ser enviada por um provedor"""
+    id: int
+    destinatario: str
+    conteudo: str
+
+
+@dataclass
+class ResultadoEnvio:
+    """Resultado do envio de uma mensagem"""
+    id: int
+    sucesso: bool
+    provider_message_id: Optional[str] = None
+    erro: Optional[str] = None
+    retentavel: bool = True
+
+
+class ProviderError(Exception):
+    """Falha de chamada ao provedor. Erros retentáveis disparam backoff."""
+
+    def __init__(self, detail: str, retentavel: bool = True, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.retentavel = retentavel
+        self.retry_after = retry_after
+
+
+class ProviderClient(ABC):
+    """Cliente base de provedor"""
+
+    nome: str = "base"
+    # Quantidade máxima de mensagens por chamada à API (1 = sem lote)
+    tamanho_lote: int = 1
+
+    def __init__(self, base_url: str, token: Optional[str] = None, taxa_por_segundo: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.taxa_por_segundo = taxa_por_segundo
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    @abstractmethod
+    async def enviar_lote(
+        self,
+        client: httpx.AsyncClient,
+        mensagens: List[MensagemEnvio],
+    ) -> List[ResultadoEnvio]:
+        """Envia até tamanho_lote mensagens numa chamada; um resultado por mensagem"""
+
+    # ----------------------------------
+    # Auxiliares
+    # ----------------------------------
+    async def _post(self, client: httpx.AsyncClient, path: str, payload: dict) -> dict:
+        try:
+            response = await client.post(f"{self.base_url}{path}", json=payload)
+        except httpx.TransportError as e:
+            raise ProviderError(f"{self.nome}: falha de conexão ({e.__class__.__name__})")
+
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            raise ProviderError(
+                f"{self.nome}: limite de requisições",
+                retry_after=float(retry_after) if retry_after else None,
+            )
+        if response.status_code >= 500:
+            raise ProviderError(f"{self.nome}: erro {response.status_code}")
+        if response.status_code >= 400:
+            raise ProviderError(
+                f"{self.nome}: requisição rejeitada ({response.status_code})",
+                retentavel=False,
+            )
+        return response.json()
+
+    def _resultados_de_lote(self, mensagens: List[MensagemEnvio], data: dict) -> List[ResultadoEnvio]:
+        """
+        Converte a resposta padrão de lote:
+        {"results": [{"id": ..., "message_id": ..., "status": "accepted"|"rejected", "error": ...}]}
+        """
+        por_id = {str(r.get("id")): r for r in data.get("results", [])}
+        resultados = []
+        for m in mensagens:
+            r = por_id.get(str(m.id))
+            if r is None:
+                resultados.append(ResultadoEnvio(id=m.id, sucesso=False, erro="Sem retorno do provedor"))
+            elif r.get("status") == "accepted":
+                resultados.append(ResultadoEnvio(id=m.id, sucesso=True, provider_message_id=r.get("message_id")))
+            else:
+                resultados.append(ResultadoEnvio(
+                    id=m.id, sucesso=False, erro=r.get("error") or "Rejeitada", retentavel=False
+                ))
+        return resultados
@@ -1 +1,4 @@
 # SMS integration
+from app.integrations.sms.client import SMSClient
+
+__all__ = ["SMSClient"]
@@ -0,0 +1,26 @@
+from typing import List
+
+import httpx
+
+from app.integrations.base import ProviderClient, MensagemEnvio, ResultadoEnvio
+
+
+class SMSClient(ProviderClient):
+    """Cliente da API de SMS (envio em lote)"""
+
+    nome = "sms"
+    tamanho_lote = 500
+
+    async def enviar_lote(
+        self,
+        client: httpx.AsyncClient,
+        mensagens: List[MensagemEnvio],
+    ) -> List[ResultadoEnvio]:
+        payload = {
+            "messages": [
+                {"id": m.id, "to": m.destinatario, "body": m.conteudo}
+                for m in mensagens
+            ]
+        }
+        data = await self._post(client, "/sms/batch", payload)
+        return self._resultados_de_lote(mensagens, data)
@@ -1 +1,4 @@
 # Voice integration
+from app.integrations.voice.client import VoiceClient
+
+__all__ = ["VoiceClient"]
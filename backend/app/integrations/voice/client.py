@@ -0,0 +1,29 @@
+from typing import List
+
+import httpx
+
+from app.integrations.base import ProviderClient, MensagemEnvio, ResultadoEnvio
+
+
+class VoiceClient(ProviderClient):
+    """Cliente da API de voz (URA). A API não aceita lotes: uma chamada por mensagem."""
+
+    nome = "voice"
+    tamanho_lote = 1
+
+    async def enviar_lote(
+        self,
+        client: httpx.AsyncClient,
+        mensagens: List[MensagemEnvio],
+    ) -> List[ResultadoEnvio]:
+        resultados = []
+        for m in mensagens:
+            data = await self._post(
+                client, "/calls", {"id": m.id, "to": m.destinatario, "script": m.conteudo}
+            )
+            resultados.append(ResultadoEnvio(
+                id=m.id,
+                sucesso=True,
+                provider_message_id=data.get("call_id"),
+            ))
+        return resultados
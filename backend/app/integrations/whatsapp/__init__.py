@@ -1 +1,4 @@
 # WhatsApp integration
+from app.integrations.whatsapp.client import WhatsAppClient
+
+__all__ = ["WhatsAppClient"]
@@ -0,0 +1,26 @@
+from typing import List
+
+import httpx
+
+from app.integrations.base import ProviderClient, MensagemEnvio, ResultadoEnvio
+
+
+class WhatsAppClient(ProviderClient):
+    """Cliente da API de WhatsApp (envio em lote de mensagens de template)"""
+
+    nome = "whatsapp"
+    tamanho_lote = 100
+
+    async def enviar_lote(
+        self,
+        client: httpx.AsyncClient,
+        mensagens: List[MensagemEnvio],
+    ) -> List[ResultadoEnvio]:
+        payload = {
+            "messages": [
+                {"id": m.id, "to": m.destinatario, "type": "text", "text": m.conteudo}
+                for m in mensagens
+            ]
+        }
+        data = await self._post(client, "/messages/batch", payload)
+        return self._resultados_de_lote(mensagens, data)
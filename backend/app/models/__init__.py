@@ -1,14 +1,34 @@
-from app.models.tenant import Tenant
+from app.models.tenant import Tenant, TenantVersao
 from app.models.user import User, UserRole
 from app.models.cliente import Cliente, Sexo
 from app.models.contrato import Contrato, StatusContrato
+from app.models.segmentation import Segmento, SegmentoContrato
+from app.models.communication import MensagemOutbox, CanalComunicacao, StatusMensagem
+from app.models.webhook import WebhookEvento
+from app.models.payment import Pagamento, StatusPagamento
+from app.models.arquivo import ArquivoUpload
+from app.models.importacao_log import ImportacaoLog, ImportacaoFingerprint
+from app.models.token_revogado import TokenRevogado
 
 __all__ = [
     "Tenant",
+    "TenantVersao",
     "User",
     "UserRole",
     "Cliente",
     "Sexo",
     "Contrato",
     "StatusContrato",
+    "Segmento",
+    "SegmentoContrato",
+    "MensagemOutbox",
+    "CanalComunicacao",
+    "StatusMensagem",
+    "WebhookEvento",
+    "Pagamento",
+    "StatusPagamento",
+    "ArquivoUpload",
+    "ImportacaoLog",
+    "ImportacaoFingerprint",
+    "TokenRevogado",
 ]
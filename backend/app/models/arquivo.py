@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ArquivoUpload(Base):
+    """
+    Índice dos arquivos enviados.
+    O conteúdo fica em armazenamento endereçado por conteúdo (sha256):
+    uploads idênticos compartilham o mesmo arquivo em disco.
+    """
+    __tablename__ = "uploaded_files"
+    __table_args__ = (
+        Index("ix_uploaded_files_tenant_created", "tenant_id", "created_at"),
+        Index("ix_uploaded_files_tenant_sha256", "tenant_id", "sha256"),
+    )
+
+    # ----------------------------------
+    # Identificação
+    # ----------------------------------
+    id = Column(String(36), primary_key=True)
+
+    # ----------------------------------
+    # Tenant (Multi-tenancy)
+    # ----------------------------------
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    usuario_id = Column(
+        String(36),
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+    # ----------------------------------
+    # Arquivo
+    # ----------------------------------
+    nome_original = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    tamanho = Column(BigInteger, nullable=False)
+    caminho = Column(String(500), nullable=False)
+
+    # ----------------------------------
+    # Auditoria
+    # ----------------------------------
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArquivoUpload id={self.id} nome={self.nome_original}>"
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 import enum
 
 from app.db.base import Base
+from app.utils.validators import cpf_para_numero
 
 
 class Sexo(str, enum.Enum):
@@ -19,6 +20,9 @@ class Cliente(Base):
     Cada cliente pertence a um tenant específico.
     """
     __tablename__ = "clientes"
+    __table_args__ = (
+        Index("ix_clientes_tenant_cpf_numero", "tenant_id", "cpf_numero"),
+    )
 
     # ----------------------------------
     # Identificação
@@ -40,6 +44,7 @@ class Cliente(Base):
     # ----------------------------------
     nome = Column(String(255), nullable=False)
     cpf = Column(String(14), nullable=False, index=True)  # XXX.XXX.XXX-XX
+    cpf_numero = Column(BigInteger, nullable=True)  # CPF como inteiro (índice compacto)
     data_nascimento = Column(Date, nullable=True)
     sexo = Column(Enum(Sexo), nullable=True)
     
@@ -76,6 +81,11 @@ class Cliente(Base):
     tenant = relationship("Tenant", back_populates="clientes")
     contratos = relationship("Contrato", back_populates="cliente")
 
+    @validates("cpf")
+    def _sincronizar_cpf_numero(self, key, cpf):
+        self.cpf_numero = cpf_para_numero(cpf)
+        return cpf
+
     @property
     def cpf_mascarado(self) -> str:
         """Retorna CPF com apenas os últimos dígitos visíveis: ***.***XXX-XX"""
@@ -1 +1,86 @@
-# Communication model
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.sql import func
+import enum
+
+from app.db.base import Base
+
+
+class CanalComunicacao(str, enum.Enum):
+    """Canal de envio"""
+    WHATSAPP = "whatsapp"
+    SMS = "sms"
+    VOZ = "voice"
+
+
+class StatusMensagem(str, enum.Enum):
+    """Status de uma mensagem na outbox"""
+    PENDENTE = "pendente"
+    ENVIANDO = "enviando"
+    ENVIADA = "enviada"
+    ENTREGUE = "entregue"
+    LIDA = "lida"
+    FALHA = "falha"
+
+
+class MensagemOutbox(Base):
+    """
+    Outbox persistente de mensagens de cobrança.
+    O envio é feito de forma assíncrona pelo OutboundDispatcher.
+    """
+    __tablename__ = "mensagens_outbox"
+    __table_args__ = (
+        Index("ix_mensagens_outbox_fila", "status", "proxima_tentativa_em"),
+    )
+
+    # ----------------------------------
+    # Identificação
+    # ----------------------------------
+    id = Column(Integer, primary_key=True, index=True)
+
+    # ----------------------------------
+    # Tenant (Multi-tenancy)
+    # ----------------------------------
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True
+    )
+    usuario_id = Column(
+        String(36),
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+    # ----------------------------------
+    # Mensagem
+    # ----------------------------------
+    canal = Column(Enum(CanalComunicacao), nullable=False)
+    destinatario = Column(String(50), nullable=False)
+    conteudo = Column(Text, nullable=False)
+
+    # ----------------------------------
+    # Entrega
+    # ----------------------------------
+    status = Column(Enum(StatusMensagem), default=StatusMensagem.PENDENTE, nullable=False)
+    tentativas = Column(Integer, default=0, nullable=False)
+    proxima_tentativa_em = Column(DateTime(timezone=True), nullable=True)
+    provider_message_id = Column(String(100), nullable=True, index=True)
+    erro = Column(String(500), nullable=True)
+
+    # ----------------------------------
+    # Auditoria
+    # ----------------------------------
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        onupdate=func.now()
+    )
+    enviada_em = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<MensagemOutbox id={self.id} canal={self.canal} status={self.status}>"
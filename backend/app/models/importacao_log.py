@@ -1,7 +1,7 @@
 """
 Model para Log de Importação
 """
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Enum, ForeignKey, Text, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -14,6 +14,7 @@ class TipoImportacao(str, enum.Enum):
     NOVA_BASE = "nova_base"
     ATUALIZACAO = "atualizacao"
     INCREMENTAL = "incremental"
+    DELTA = "delta"
 
 
 class StatusImportacao(str, enum.Enum):
@@ -109,3 +110,26 @@ class ImportacaoLog(Base):
     # ----------------------------------
     tenant = relationship("Tenant", backref="importacoes")
     usuario = relationship("User", backref="importacoes")
+
+
+class ImportacaoFingerprint(Base):
+    """
+    Hash da última versão importada de cada linha (tenant, cpf, contrato).
+    Usado pela importação delta para gravar apenas o que mudou.
+    """
+    __tablename__ = "importacao_fingerprints"
+
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    cpf = Column(String(14), primary_key=True)
+    numero_contrato = Column(String(50), primary_key=True, default="")  # "" = sem número
+    hash = Column(BigInteger, nullable=False)
+    atualizado_em = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
@@ -1 +1,72 @@
-# Payment model
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, Enum, Index
+from sqlalchemy.sql import func
+import enum
+
+from app.db.base import Base
+
+
+class StatusPagamento(str, enum.Enum):
+    """Resultado da conciliação do pagamento"""
+    CONCILIADO = "conciliado"
+    NAO_ENCONTRADO = "nao_encontrado"
+
+
+class Pagamento(Base):
+    """
+    Pagamento recebido do gateway (arquivo de liquidação, webhook ou manual).
+    Conciliado com um contrato por número do contrato ou CPF.
+    """
+    __tablename__ = "pagamentos"
+    __table_args__ = (
+        # Idempotência: o mesmo identificador do gateway não é aplicado duas vezes
+        Index("ux_pagamentos_tenant_identificador", "tenant_id", "identificador_externo", unique=True),
+    )
+
+    # ----------------------------------
+    # Identificação
+    # ----------------------------------
+    id = Column(Integer, primary_key=True, index=True)
+    identificador_externo = Column(String(100), nullable=True)
+
+    # ----------------------------------
+    # Tenant (Multi-tenancy)
+    # ----------------------------------
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # ----------------------------------
+    # Conciliação
+    # ----------------------------------
+    contrato_id = Column(
+        Integer,
+        ForeignKey("contratos.id", ondelete="SET NULL"),
+        nullable=True,
+        index=True
+    )
+    numero_contrato = Column(String(50), nullable=True)
+    cpf = Column(String(14), nullable=True)
+    status = Column(Enum(StatusPagamento), nullable=False)
+
+    # ----------------------------------
+    # Valores
+    # ----------------------------------
+    valor = Column(Numeric(15, 2), nullable=False)
+    data_pagamento = Column(Date, nullable=False)
+    metodo = Column(String(20), nullable=True)  # pix | boleto | card
+    origem = Column(String(20), nullable=False)  # arquivo | webhook | manual
+
+    # ----------------------------------
+    # Auditoria
+    # ----------------------------------
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<Pagamento id={self.id} valor={self.valor} status={self.status}>"
@@ -1 +1,102 @@
-# Segmentation model
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class Segmento(Base):
+    """
+    Segmento de cobrança definido por uma faixa de dias de atraso (D+).
+    As faixas de um mesmo tenant não se sobrepõem.
+    """
+    __tablename__ = "segmentos"
+
+    # ----------------------------------
+    # Identificação
+    # ----------------------------------
+    id = Column(Integer, primary_key=True, index=True)
+
+    # ----------------------------------
+    # Tenant (Multi-tenancy)
+    # ----------------------------------
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # ----------------------------------
+    # Definição da faixa
+    # ----------------------------------
+    nome = Column(String(100), nullable=False)
+    min_dias_atraso = Column(Integer, nullable=False)
+    max_dias_atraso = Column(Integer, nullable=False)
+    ativo = Column(Boolean, default=True, nullable=False)
+
+    # ----------------------------------
+    # Auditoria
+    # ----------------------------------
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        onupdate=func.now()
+    )
+    membros_atualizados_em = Column(DateTime(timezone=True), nullable=True)
+
+    # ----------------------------------
+    # Relacionamentos
+    # ----------------------------------
+    membros = relationship(
+        "SegmentoContrato",
+        back_populates="segmento",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    def __repr__(self) -> str:
+        return f"<Segmento id={self.id} nome={self.nome} faixa={self.min_dias_atraso}-{self.max_dias_atraso}>"
+
+
+class SegmentoContrato(Base):
+    """
+    Tabela de associação materializada: contratos pertencentes a cada segmento.
+    Recalculada incrementalmente pelo SegmentationService.
+    """
+    __tablename__ = "segmento_contratos"
+    __table_args__ = (
+        Index("ix_segmento_contratos_tenant_segmento", "tenant_id", "segmento_id"),
+    )
+
+    segmento_id = Column(
+        Integer,
+        ForeignKey("segmentos.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    contrato_id = Column(
+        Integer,
+        ForeignKey("contratos.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True
+    )
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    # ----------------------------------
+    # Relacionamentos
+    # ----------------------------------
+    segmento = relationship("Segmento", back_populates="membros")
+    contrato = relationship("Contrato")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -33,7 +33,7 @@ class Tenant(Base):
     # Status
     # ----------------------------------
     ativo = Column(Boolean, default=True)
-    
+
     # ----------------------------------
     # Auditoria
     # ----------------------------------
@@ -56,3 +56,28 @@ class Tenant(Base):
 
     def __repr__(self) -> str:
         return f"<Tenant id={self.id} nome={self.nome}>"
+
+
+class TenantVersao(Base):
+    """
+    Versões dos dados do tenant (ETag, réplica de leitura, importação delta).
+    Fica junto dos dados, no shard do tenant, e não em tenants (primário):
+    o incremento é commitado no mesmo banco e na mesma transação que a
+    escrita que o causou.
+    """
+    __tablename__ = "tenant_versoes"
+
+    tenant_id = Column(
+        Integer,
+        ForeignKey("tenants.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+
+    # Incrementada a cada escrita em clientes/contratos/pagamentos do tenant
+    versao_dados = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Incrementada a cada escrita em segmentos e na associação contrato x segmento.
+    # Separada de versao_dados para não invalidar os fingerprints da importação delta
+    versao_segmentos = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<TenantVersao tenant_id={self.tenant_id} dados={self.versao_dados}>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime
+
+from app.db.base import Base
+
+
+class TokenRevogado(Base):
+    """
+    Tokens revogados no logout, compartilhados por todos os workers.
+    Cada linha só importa até o exp do token; as expiradas são removidas
+    a cada nova revogação.
+    """
+    __tablename__ = "tokens_revogados"
+
+    chave = Column(String(64), primary_key=True)  # SHA-256 (hex) do token
+    expira_em = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<TokenRevogado chave={self.chave[:12]} expira_em={self.expira_em}>"
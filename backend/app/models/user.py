@@ -62,6 +62,8 @@ class User(Base):
 
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
+    # Tokens emitidos antes disso deixam de valer (desativação forçada)
+    tokens_invalidos_desde = Column(DateTime(timezone=True), nullable=True)
 
     # ----------------------------------
     # Auditoria
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class WebhookEvento(Base):
+    """
+    Log append-only dos callbacks recebidos (comunicação e pagamentos).
+    Gravado em lote pelo WebhookFlusher; o payload é mantido bruto para auditoria
+    e reprocessamento.
+    """
+    __tablename__ = "webhook_eventos"
+    __table_args__ = (
+        Index("ix_webhook_eventos_origem_recebido", "origem", "recebido_em"),
+    )
+
+    # ----------------------------------
+    # Identificação
+    # ----------------------------------
+    id = Column(Integer, primary_key=True, index=True)
+    origem = Column(String(30), nullable=False)  # communication | payment
+
+    # ----------------------------------
+    # Evento
+    # ----------------------------------
+    payload = Column(Text, nullable=False)
+    recebido_em = Column(DateTime(timezone=True), nullable=False)
+    processado_em = Column(DateTime(timezone=True), nullable=True)
+    erro = Column(String(500), nullable=True)
+
+    # ----------------------------------
+    # Auditoria
+    # ----------------------------------
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<WebhookEvento id={self.id} origem={self.origem}>"
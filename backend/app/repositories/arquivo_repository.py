@@ -0,0 +1,45 @@
+from typing import Optional, List
+
+from sqlalchemy.orm import Session
+
+from app.models.arquivo import ArquivoUpload
+
+
+class ArquivoUploadRepository:
+    """Camada de acesso a dados para o índice de arquivos enviados"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _base_query(self, tenant_id: Optional[int] = None):
+        """Query base com filtro opcional de tenant"""
+        query = self.db.query(ArquivoUpload)
+        if tenant_id is not None:
+            query = query.filter(ArquivoUpload.tenant_id == tenant_id)
+        return query
+
+    def get_by_id(self, arquivo_id: str, tenant_id: Optional[int] = None) -> Optional[ArquivoUpload]:
+        return self._base_query(tenant_id).filter(ArquivoUpload.id == arquivo_id).first()
+
+    def get_by_sha256(self, sha256: str, tenant_id: Optional[int]) -> Optional[ArquivoUpload]:
+        query = self.db.query(ArquivoUpload).filter(ArquivoUpload.sha256 == sha256)
+        if tenant_id is None:
+            query = query.filter(ArquivoUpload.tenant_id.is_(None))
+        else:
+            query = query.filter(ArquivoUpload.tenant_id == tenant_id)
+        return query.first()
+
+    def list(self, tenant_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[ArquivoUpload]:
+        return (
+            self._base_query(tenant_id)
+            .order_by(ArquivoUpload.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def create(self, arquivo: ArquivoUpload) -> ArquivoUpload:
+        self.db.add(arquivo)
+        self.db.commit()
+        self.db.refresh(arquivo)
+        return arquivo
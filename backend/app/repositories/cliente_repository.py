@@ -1,10 +1,11 @@
-from typing import Optional, List
+from typing import Optional, List, Set
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.models.cliente import Cliente
 from app.schemas.cliente import ClienteCreate
+from app.utils.helpers import em_lotes
 
 
 class ClienteRepository:
@@ -30,6 +31,28 @@ class ClienteRepository:
             .first()
         )
 
+    # Acima disso, uma varredura dos CPFs do tenant sai mais barata que os lotes de IN
+    LIMITE_CONSULTA_IN = 10_000
+
+    def cpfs_existentes(self, cpfs: List[str], tenant_id: int) -> Set[str]:
+        """CPFs da lista que já existem no tenant (IN em lotes ou varredura única)"""
+        query = self.db.query(Cliente.cpf).filter(Cliente.tenant_id == tenant_id)
+        if len(cpfs) > self.LIMITE_CONSULTA_IN:
+            return {r.cpf for r in query.all()} & set(cpfs)
+
+        existentes = set()
+        for lote in em_lotes(cpfs):
+            existentes.update(r.cpf for r in query.filter(Cliente.cpf.in_(lote)).all())
+        return existentes
+
+    def list_by_cpfs(self, cpfs: List[str], tenant_id: int) -> List[Cliente]:
+        clientes = []
+        for lote in em_lotes(cpfs):
+            clientes.extend(
+                self.db.query(Cliente).filter(Cliente.tenant_id == tenant_id, Cliente.cpf.in_(lote)).all()
+            )
+        return clientes
+
     def list(
         self, 
         tenant_id: Optional[int] = None,
@@ -179,6 +202,7 @@ class ClienteRepository:
     def get_top_maior_inadimplencia(self, tenant_id: Optional[int] = None, limit: int = 5) -> List[dict]:
         """Retorna top clientes com maior inadimplência"""
         from app.models.contrato import Contrato, StatusContrato
+        from app.repositories.contrato_repository import cliente_do_contrato
         
         query = self.db.query(
             Cliente.nome,
@@ -186,7 +210,7 @@ class ClienteRepository:
             func.sum(Contrato.valor_original).label('valor_total'),
             func.count(Contrato.id).label('total_contratos'),
         ).join(
-            Contrato, Cliente.id == Contrato.cliente_id
+            Contrato, cliente_do_contrato()
         ).filter(
             Contrato.status == StatusContrato.ATRASADO
         )
@@ -214,6 +238,7 @@ class ClienteRepository:
     def get_top_melhor_comportamento(self, tenant_id: Optional[int] = None, limit: int = 5) -> List[dict]:
         """Retorna top clientes com melhor comportamento (pagam em dia)"""
         from app.models.contrato import Contrato, StatusContrato
+        from app.repositories.contrato_repository import cliente_do_contrato
         
         query = self.db.query(
             Cliente.nome,
@@ -221,7 +246,7 @@ class ClienteRepository:
             func.sum(Contrato.valor_original).label('valor_total'),
             func.count(Contrato.id).label('total_contratos'),
         ).join(
-            Contrato, Cliente.id == Contrato.cliente_id
+            Contrato, cliente_do_contrato()
         ).filter(
             Contrato.status == StatusContrato.PAGO
         )
@@ -1 +1,157 @@
-# Communication repository
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_, insert, update
+
+from app.models.communication import MensagemOutbox, StatusMensagem
+from app.utils.helpers import em_lotes
+
+
+class MensagemOutboxRepository:
+    """Camada de acesso a dados para a outbox de mensagens"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _base_query(self, tenant_id: Optional[int] = None):
+        """Query base com filtro opcional de tenant"""
+        query = self.db.query(MensagemOutbox)
+        if tenant_id is not None:
+            query = query.filter(MensagemOutbox.tenant_id == tenant_id)
+        return query
+
+    def get_by_id(self, mensagem_id: int, tenant_id: Optional[int] = None) -> Optional[MensagemOutbox]:
+        return self._base_query(tenant_id).filter(MensagemOutbox.id == mensagem_id).first()
+
+    def list(
+        self,
+        tenant_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[MensagemOutbox]:
+        return (
+            self._base_query(tenant_id)
+            .order_by(MensagemOutbox.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    # ----------------------------------
+    # Enfileiramento
+    # ----------------------------------
+    def enfileirar(self, mensagem: MensagemOutbox) -> MensagemOutbox:
+        self.db.add(mensagem)
+        self.db.commit()
+        self.db.refresh(mensagem)
+        return mensagem
+
+    def enfileirar_lote(self, mensagens: List[Dict[str, Any]]) -> int:
+        """Insere mensagens em lote (executemany). Retorna quantidade enfileirada."""
+        for lote in em_lotes(mensagens, 5000):
+            self.db.execute(insert(MensagemOutbox), lote)
+        self.db.commit()
+        return len(mensagens)
+
+    # ----------------------------------
+    # Consumo pelo dispatcher
+    # ----------------------------------
+    def reservar(self, limite: int, lease: timedelta) -> List[MensagemOutbox]:
+        """
+        Reserva até `limite` mensagens prontas para envio, marcando-as como ENVIANDO.
+
+        A reserva tem validade (lease): mensagens presas em ENVIANDO após uma queda
+        do worker voltam a ser elegíveis quando o lease expira.
+        No PostgreSQL usa FOR UPDATE SKIP LOCKED para permitir vários workers.
+        """
+        agora = datetime.now()
+        ids = [
+            r.id for r in
+            self.db.query(MensagemOutbox.id)
+            .filter(
+                or_(
+                    and_(
+                        MensagemOutbox.status == StatusMensagem.PENDENTE,
+                        or_(
+                            MensagemOutbox.proxima_tentativa_em.is_(None),
+                            MensagemOutbox.proxima_tentativa_em <= agora,
+                        ),
+                    ),
+                    and_(
+                        MensagemOutbox.status == StatusMensagem.ENVIANDO,
+                        MensagemOutbox.proxima_tentativa_em < agora,
+                    ),
+                )
+            )
+            .order_by(MensagemOutbox.id)
+            .limit(limite)
+            .with_for_update(skip_locked=True)
+            .all()
+        ]
+        if not ids:
+            self.db.commit()
+            return []
+
+        for lote in em_lotes(ids):
+            self.db.execute(
+                update(MensagemOutbox)
+                .where(MensagemOutbox.id.in_(lote))
+                .values(status=StatusMensagem.ENVIANDO, proxima_tentativa_em=agora + lease)
+                .execution_options(synchronize_session=False)
+            )
+        self.db.commit()
+
+        # Carregado após o commit para que os objetos não fiquem expirados
+        mensagens = []
+        for lote in em_lotes(ids):
+            mensagens.extend(
+                self.db.query(MensagemOutbox).filter(MensagemOutbox.id.in_(lote)).populate_existing().all()
+            )
+        return mensagens
+
+    def aplicar_resultados(self, atualizacoes: List[Dict[str, Any]]) -> None:
+        """UPDATE em lote por chave primária (cada dict contém 'id' + colunas)"""
+        if not atualizacoes:
+            return
+        self.db.execute(update(MensagemOutbox), atualizacoes)
+        self.db.commit()
+
+    # ----------------------------------
+    # Retorno dos provedores (webhooks)
+    # ----------------------------------
+    def existentes_por_provider_id(self, provider_ids: List[str]) -> set:
+        """Retorna os provider_message_id que existem na outbox"""
+        existentes = set()
+        for lote in em_lotes(provider_ids):
+            existentes.update(
+                r.provider_message_id for r in
+                self.db.query(MensagemOutbox.provider_message_id)
+                .filter(MensagemOutbox.provider_message_id.in_(lote))
+                .all()
+            )
+        return existentes
+
+    def atualizar_status_por_provider_id(
+        self,
+        status: StatusMensagem,
+        provider_ids: List[str],
+        status_anteriores: List[StatusMensagem],
+    ) -> int:
+        """
+        UPDATE em conjunto por provider_message_id. Só avança mensagens que estão
+        em um dos `status_anteriores`, evitando regressão por callbacks fora de ordem.
+        """
+        atualizadas = 0
+        for lote in em_lotes(provider_ids):
+            result = self.db.execute(
+                update(MensagemOutbox)
+                .where(
+                    MensagemOutbox.provider_message_id.in_(lote),
+                    MensagemOutbox.status.in_(status_anteriores),
+                )
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+            )
+            atualizadas += result.rowcount or 0
+        return atualizadas
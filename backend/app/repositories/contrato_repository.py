@@ -9,6 +9,15 @@ from app.models.cliente import Cliente
 from app.schemas.contrato import ContratoCreate, ContratoUpdate
 
 
+def cliente_do_contrato():
+    """
+    Condição de join contrato/cliente. O tenant_id igual nos dois lados não
+    muda o resultado, mas deixa o PostgreSQL levar o filtro de tenant às duas
+    tabelas (poda de partições, ver scripts/particionar_tabelas.py).
+    """
+    return and_(Cliente.id == Contrato.cliente_id, Cliente.tenant_id == Contrato.tenant_id)
+
+
 class ContratoRepository:
     """Camada de acesso a dados para Contratos"""
 
@@ -212,7 +221,7 @@ class ContratoRepository:
                 func.julianday(func.current_date()) - func.julianday(Contrato.data_vencimento)
             ).label('max_atraso')
         ).join(
-            Contrato, Cliente.id == Contrato.cliente_id
+            Contrato, cliente_do_contrato()
         ).filter(
             Contrato.status != StatusContrato.PAGO
         )
@@ -267,7 +276,7 @@ class ContratoRepository:
         from sqlalchemy import exists, and_
         
         subquery = self.db.query(Cliente.id).join(
-            Contrato, Cliente.id == Contrato.cliente_id
+            Contrato, cliente_do_contrato()
         ).filter(
             Contrato.status == StatusContrato.PAGO
         ).group_by(Cliente.id)
@@ -283,7 +292,7 @@ class ContratoRepository:
             Cliente.id,
             func.count(Contrato.id).label('qtd_atrasados')
         ).join(
-            Contrato, Cliente.id == Contrato.cliente_id
+            Contrato, cliente_do_contrato()
         ).filter(
             Contrato.status == StatusContrato.ATRASADO
         )
@@ -524,7 +533,7 @@ class ContratoRepository:
                 func.sum(case((Cliente.sexo == 'M', 1), else_=0)).label('sexo_m'),
                 func.sum(case((Cliente.sexo == 'F', 1), else_=0)).label('sexo_f'),
             ).join(
-                Cliente, Contrato.cliente_id == Cliente.id
+                Cliente, cliente_do_contrato()
             ).filter(*base_filter)
             
             if tenant_id:
@@ -547,6 +556,13 @@ class ContratoRepository:
         
         return resultados
 
+    def count_clientes_com_contrato(self, tenant_id: Optional[int] = None) -> int:
+        """Clientes distintos com ao menos um contrato"""
+        query = self.db.query(func.count(func.distinct(Contrato.cliente_id)))
+        if tenant_id:
+            query = query.filter(Contrato.tenant_id == tenant_id)
+        return query.scalar() or 0
+
     def get_perfil_risco(self, tenant_id: Optional[int] = None) -> List[Dict]:
         """Retorna distribuição de clientes por perfil de risco"""
         from datetime import date
@@ -561,10 +577,7 @@ class ContratoRepository:
         ]
         
         # Total de clientes para cálculo de percentual
-        total_query = self.db.query(func.count(func.distinct(Contrato.cliente_id)))
-        if tenant_id:
-            total_query = total_query.filter(Contrato.tenant_id == tenant_id)
-        total_clientes = total_query.scalar() or 1  # Evita divisão por zero
+        total_clientes = self.count_clientes_com_contrato(tenant_id) or 1  # Evita divisão por zero
         
         resultados = []
         
@@ -0,0 +1,140 @@
+from typing import Optional, List, Dict, Any
+
+import pandas as pd
+from sqlalchemy.orm import Session
+from sqlalchemy import update, delete, and_, bindparam
+
+from app.models.importacao_log import ImportacaoFingerprint, ImportacaoLog, StatusImportacao, TipoImportacao
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato
+from app.utils.helpers import em_lotes
+
+
+class ImportacaoDeltaRepository:
+    """Acesso a dados da importação delta: fingerprints e gravação em lote de clientes/contratos"""
+
+    TAMANHO_LOTE_ESCRITA = 5000
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ----------------------------------
+    # Fingerprints
+    # ----------------------------------
+    def carregar_fingerprints(self, tenant_id: int) -> pd.DataFrame:
+        """Fingerprints do tenant como DataFrame (cpf, numero_contrato, hash)"""
+        rows = self.db.query(
+            ImportacaoFingerprint.cpf,
+            ImportacaoFingerprint.numero_contrato,
+            ImportacaoFingerprint.hash,
+        ).filter(ImportacaoFingerprint.tenant_id == tenant_id).all()
+        return pd.DataFrame(
+            rows, columns=["cpf", "numero_contrato", "hash"]
+        ).astype({"cpf": object, "numero_contrato": object, "hash": "int64"})
+
+    def versao_fingerprints(self, tenant_id: int) -> Optional[str]:
+        """
+        Versão dos dados do tenant registrada pela última importação delta
+        concluída. Se a versão atual for outra, alguma escrita fora da delta
+        (importação completa, COPY, conciliação) tornou os fingerprints obsoletos.
+        """
+        configuracao = self.db.query(ImportacaoLog.configuracao).filter(
+            ImportacaoLog.tenant_id == tenant_id,
+            ImportacaoLog.tipo == TipoImportacao.DELTA,
+            ImportacaoLog.status == StatusImportacao.CONCLUIDO,
+        ).order_by(ImportacaoLog.id.desc()).limit(1).scalar()
+        return (configuracao or {}).get("versao_fingerprints")
+
+    def limpar_fingerprints(self, tenant_id: int) -> None:
+        """Descarta os fingerprints do tenant (sem commit)"""
+        self.db.execute(
+            delete(ImportacaoFingerprint).where(ImportacaoFingerprint.tenant_id == tenant_id)
+        )
+
+    def inserir_fingerprints(self, tenant_id: int, registros: List[Dict[str, Any]]) -> int:
+        """registros: dicts com cpf, numero_contrato e hash (sem commit)"""
+        tabela = ImportacaoFingerprint.__table__
+        for lote in em_lotes(registros, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(tabela.insert(), [{"tenant_id": tenant_id, **r} for r in lote])
+        return len(registros)
+
+    def atualizar_fingerprints(self, tenant_id: int, registros: List[Dict[str, Any]]) -> int:
+        tabela = ImportacaoFingerprint.__table__
+        stmt = update(tabela).where(and_(
+            tabela.c.tenant_id == tenant_id,
+            tabela.c.cpf == bindparam("b_cpf"),
+            tabela.c.numero_contrato == bindparam("b_numero"),
+        )).values(hash=bindparam("b_hash"))
+        for lote in em_lotes(registros, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(stmt, [
+                {"b_cpf": r["cpf"], "b_numero": r["numero_contrato"], "b_hash": r["hash"]} for r in lote
+            ])
+        return len(registros)
+
+    def remover_fingerprints(self, tenant_id: int, chaves: List[Dict[str, Any]]) -> int:
+        tabela = ImportacaoFingerprint.__table__
+        stmt = delete(tabela).where(and_(
+            tabela.c.tenant_id == tenant_id,
+            tabela.c.cpf == bindparam("b_cpf"),
+            tabela.c.numero_contrato == bindparam("b_numero"),
+        ))
+        for lote in em_lotes(chaves, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(stmt, [{"b_cpf": c["cpf"], "b_numero": c["numero_contrato"]} for c in lote])
+        return len(chaves)
+
+    # ----------------------------------
+    # Clientes
+    # ----------------------------------
+    def ids_clientes_por_cpf(self, tenant_id: int, cpfs: List[str]) -> Dict[str, int]:
+        ids: Dict[str, int] = {}
+        query = self.db.query(Cliente.cpf, Cliente.id).filter(Cliente.tenant_id == tenant_id)
+        for lote in em_lotes(cpfs):
+            # Em caso de CPF repetido na base, fica o cliente mais antigo
+            for r in query.filter(Cliente.cpf.in_(lote)).order_by(Cliente.id.desc()).all():
+                ids[r.cpf] = r.id
+        return ids
+
+    def inserir_clientes(self, clientes: List[Dict[str, Any]]) -> int:
+        # Core executemany: o bulk insert do ORM agrupa por colunas nulas e fragmenta o lote
+        for lote in em_lotes(clientes, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(Cliente.__table__.insert(), lote)
+        return len(clientes)
+
+    def atualizar_clientes(self, atualizacoes: List[Dict[str, Any]]) -> int:
+        """UPDATE em lote por chave primária (cada dict contém 'id' + colunas), sem commit"""
+        for lote in em_lotes(atualizacoes, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(update(Cliente), lote)
+        return len(atualizacoes)
+
+    # ----------------------------------
+    # Contratos
+    # ----------------------------------
+    def ids_contratos_por_numero(self, tenant_id: int, numeros: List[str]) -> Dict[str, int]:
+        ids: Dict[str, int] = {}
+        query = self.db.query(Contrato.numero_contrato, Contrato.id).filter(Contrato.tenant_id == tenant_id)
+        for lote in em_lotes(numeros):
+            for r in query.filter(Contrato.numero_contrato.in_(lote)).order_by(Contrato.id.desc()).all():
+                ids[r.numero_contrato] = r.id
+        return ids
+
+    def ids_contratos_sem_numero(self, tenant_id: int, cliente_ids: List[int]) -> Dict[int, int]:
+        """Contrato sem número de cada cliente (chave cliente_id)"""
+        ids: Dict[int, int] = {}
+        query = self.db.query(Contrato.cliente_id, Contrato.id).filter(
+            Contrato.tenant_id == tenant_id,
+            Contrato.numero_contrato.is_(None),
+        )
+        for lote in em_lotes(cliente_ids):
+            for r in query.filter(Contrato.cliente_id.in_(lote)).order_by(Contrato.id.desc()).all():
+                ids[r.cliente_id] = r.id
+        return ids
+
+    def inserir_contratos(self, contratos: List[Dict[str, Any]]) -> int:
+        for lote in em_lotes(contratos, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(Contrato.__table__.insert(), lote)
+        return len(contratos)
+
+    def atualizar_contratos(self, atualizacoes: List[Dict[str, Any]]) -> int:
+        for lote in em_lotes(atualizacoes, self.TAMANHO_LOTE_ESCRITA):
+            self.db.execute(update(Contrato), lote)
+        return len(atualizacoes)
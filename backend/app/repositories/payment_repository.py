@@ -1 +1,174 @@
-# Payment repository
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Set, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, func, literal, or_, update
+
+from app.models.payment import Pagamento
+from app.models.contrato import Contrato, StatusContrato
+from app.models.cliente import Cliente
+from app.repositories.contrato_repository import cliente_do_contrato
+from app.utils.helpers import em_lotes
+
+
+class PagamentoRepository:
+    """Camada de acesso a dados para Pagamentos e sua aplicação nos contratos"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _base_query(self, tenant_id: Optional[int] = None):
+        """Query base com filtro opcional de tenant"""
+        query = self.db.query(Pagamento)
+        if tenant_id is not None:
+            query = query.filter(Pagamento.tenant_id == tenant_id)
+        return query
+
+    def get_by_id(self, pagamento_id: int, tenant_id: Optional[int] = None) -> Optional[Pagamento]:
+        return self._base_query(tenant_id).filter(Pagamento.id == pagamento_id).first()
+
+    def list(
+        self,
+        tenant_id: Optional[int] = None,
+        contrato_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Pagamento]:
+        query = self._base_query(tenant_id)
+        if contrato_id is not None:
+            query = query.filter(Pagamento.contrato_id == contrato_id)
+        return query.order_by(Pagamento.id.desc()).offset(skip).limit(limit).all()
+
+    def identificadores_existentes(self, tenant_id: int, identificadores: Optional[List[str]] = None) -> Set[str]:
+        """Identificadores do gateway já registrados (todos, ou apenas os informados)"""
+        query = self.db.query(Pagamento.identificador_externo).filter(
+            Pagamento.tenant_id == tenant_id,
+            Pagamento.identificador_externo.isnot(None),
+        )
+        if identificadores is None:
+            return {r.identificador_externo for r in query.all()}
+
+        existentes = set()
+        for lote in em_lotes(identificadores):
+            existentes.update(
+                r.identificador_externo
+                for r in query.filter(Pagamento.identificador_externo.in_(lote)).all()
+            )
+        return existentes
+
+    def inserir_lote(self, pagamentos: List[Dict[str, Any]]) -> int:
+        """Insere pagamentos em lote (executemany), sem commit"""
+        for lote in em_lotes(pagamentos, 5000):
+            # Core executemany: o bulk insert do ORM agrupa por colunas nulas e fragmenta o lote
+            self.db.execute(Pagamento.__table__.insert(), lote)
+        return len(pagamentos)
+
+    # ----------------------------------
+    # Contratos
+    # ----------------------------------
+    def tenants_por_numero_contrato(self, numeros: List[str]) -> List[Tuple[str, int]]:
+        """(número, tenant) dos contratos com esses números, em todos os tenants"""
+        rows = []
+        for lote in em_lotes(numeros):
+            rows.extend(
+                self.db.query(Contrato.numero_contrato, Contrato.tenant_id)
+                .filter(Contrato.numero_contrato.in_(lote))
+                .distinct()
+                .all()
+            )
+        return rows
+
+    def tenants_por_cpf(self, cpfs: List[str]) -> List[Tuple[str, int]]:
+        """(CPF, tenant) dos clientes com esses CPFs, em todos os tenants"""
+        rows = []
+        for lote in em_lotes(cpfs):
+            rows.extend(
+                self.db.query(Cliente.cpf, Cliente.tenant_id)
+                .filter(Cliente.cpf.in_(lote))
+                .distinct()
+                .all()
+            )
+        return rows
+
+    def list_contratos_para_conciliacao(
+        self,
+        tenant_id: int,
+        numeros: Optional[List[str]] = None,
+        cpfs: Optional[List[str]] = None,
+    ) -> List:
+        """
+        Contratos conciliáveis do tenant com o CPF do cliente.
+        Sem filtros, carrega o tenant inteiro (arquivos grandes); com filtros,
+        apenas os contratos dos números/CPFs informados (lotes pequenos).
+        """
+        query = self.db.query(
+            Contrato.id,
+            Contrato.numero_contrato,
+            Cliente.cpf,
+            Contrato.valor_original,
+            Contrato.valor_atualizado,
+            Contrato.valor_pago,
+            Contrato.data_pagamento,
+            Contrato.data_vencimento,
+            Contrato.status,
+        ).join(
+            Cliente, cliente_do_contrato()
+        ).filter(
+            Contrato.tenant_id == tenant_id,
+            Contrato.status != StatusContrato.CANCELADO,
+        )
+        if numeros is None and cpfs is None:
+            return query.all()
+
+        rows = {}
+        for lote in em_lotes(numeros or []):
+            rows.update((r.id, r) for r in query.filter(Contrato.numero_contrato.in_(lote)).all())
+        for lote in em_lotes(cpfs or []):
+            rows.update((r.id, r) for r in query.filter(Cliente.cpf.in_(lote)).all())
+        return list(rows.values())
+
+    def aplicar_em_contratos(self, tenant_id: int, incrementos: List[Dict[str, Any]]) -> int:
+        """
+        Soma pagamentos aos contratos em lote, sem commit. Cada dict contém
+        'contrato_id', 'valor' (a somar em valor_pago) e 'data' (do pagamento).
+
+        O UPDATE é relativo ao valor corrente da linha e o status é derivado
+        do valor resultante no próprio banco: webhook, arquivo e baixa manual
+        no mesmo contrato ao mesmo tempo se somam em vez de um sobrescrever
+        o outro (o lock de linha do UPDATE serializa as escritas).
+        """
+        contratos = Contrato.__table__
+        valor_pago = func.coalesce(contratos.c.valor_pago, 0) + bindparam("valor", type_=contratos.c.valor_pago.type)
+        devido = func.coalesce(func.nullif(contratos.c.valor_atualizado, 0), contratos.c.valor_original, 0)
+        data = bindparam("data", type_=contratos.c.data_pagamento.type)
+        stmt = (
+            update(contratos)
+            .where(contratos.c.tenant_id == tenant_id, contratos.c.id == bindparam("contrato_id"))
+            .values(
+                valor_pago=valor_pago,
+                data_pagamento=case(
+                    (or_(contratos.c.data_pagamento.is_(None), contratos.c.data_pagamento < data), data),
+                    else_=contratos.c.data_pagamento,
+                ),
+                status=case(
+                    (valor_pago >= devido - Decimal("0.005"), literal(StatusContrato.PAGO, contratos.c.status.type)),
+                    else_=contratos.c.status,
+                ),
+            )
+        )
+        for lote in em_lotes(incrementos, 5000):
+            self.db.execute(stmt, [{**i, "valor": Decimal(str(i["valor"]))} for i in lote])
+        return len(incrementos)
+
+    def contratos_pagos(self, tenant_id: int, ids: List[int]) -> List[int]:
+        """Dentre os contratos informados, os que estão com status PAGO"""
+        pagos = []
+        for lote in em_lotes(ids):
+            pagos.extend(
+                r.id for r in self.db.query(Contrato.id).filter(
+                    Contrato.tenant_id == tenant_id,
+                    Contrato.id.in_(lote),
+                    Contrato.status == StatusContrato.PAGO,
+                ).all()
+            )
+        return pagos
@@ -0,0 +1,174 @@
+from typing import Optional, List, Dict, Tuple
+from datetime import date
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, delete, insert
+
+from app.models.segmentation import Segmento, SegmentoContrato
+from app.models.contrato import Contrato, StatusContrato
+from app.models.cliente import Cliente
+from app.repositories.contrato_repository import cliente_do_contrato
+from app.utils.helpers import em_lotes
+
+
+class SegmentoRepository:
+    """Camada de acesso a dados para Segmentos e sua associação com contratos"""
+
+    # Contratos nesses status nunca entram em audiências de cobrança
+    STATUS_FORA_DE_COBRANCA = (StatusContrato.PAGO, StatusContrato.CANCELADO)
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _base_query(self, tenant_id: Optional[int] = None):
+        """Query base com filtro opcional de tenant"""
+        query = self.db.query(Segmento)
+        if tenant_id is not None:
+            query = query.filter(Segmento.tenant_id == tenant_id)
+        return query
+
+    # ----------------------------------
+    # Segmentos
+    # ----------------------------------
+    def get_by_id(self, segmento_id: int, tenant_id: Optional[int] = None) -> Optional[Segmento]:
+        return self._base_query(tenant_id).filter(Segmento.id == segmento_id).first()
+
+    def list(self, tenant_id: Optional[int] = None, only_active: bool = True) -> List[Segmento]:
+        query = self._base_query(tenant_id)
+        if only_active:
+            query = query.filter(Segmento.ativo == True)
+        return query.order_by(Segmento.tenant_id, Segmento.min_dias_atraso).all()
+
+    def create(self, tenant_id: int, nome: str, min_dias: int, max_dias: int) -> Segmento:
+        segmento = Segmento(
+            tenant_id=tenant_id,
+            nome=nome,
+            min_dias_atraso=min_dias,
+            max_dias_atraso=max_dias,
+            ativo=True,
+        )
+        self.db.add(segmento)
+        self.db.commit()
+        self.db.refresh(segmento)
+        return segmento
+
+    def delete(self, segmento: Segmento) -> None:
+        self.db.execute(
+            delete(SegmentoContrato).where(SegmentoContrato.segmento_id == segmento.id)
+        )
+        self.db.delete(segmento)
+        self.db.commit()
+
+    def tenants_com_segmentos(self) -> List[int]:
+        rows = self.db.query(Segmento.tenant_id).filter(Segmento.ativo == True).distinct().all()
+        return [r.tenant_id for r in rows]
+
+    # ----------------------------------
+    # Contratos elegíveis
+    # ----------------------------------
+    def list_contratos_para_avaliacao(
+        self,
+        tenant_id: int,
+        contrato_ids: Optional[List[int]] = None,
+    ) -> List[Tuple[int, date]]:
+        """Retorna (id, data_vencimento) dos contratos em cobrança do tenant"""
+        query = self.db.query(Contrato.id, Contrato.data_vencimento).filter(
+            Contrato.tenant_id == tenant_id,
+            Contrato.status.notin_(self.STATUS_FORA_DE_COBRANCA),
+        )
+        if contrato_ids is None:
+            return [(r.id, r.data_vencimento) for r in query.all()]
+
+        resultado = []
+        for lote in em_lotes(contrato_ids):
+            resultado.extend(
+                (r.id, r.data_vencimento)
+                for r in query.filter(Contrato.id.in_(lote)).all()
+            )
+        return resultado
+
+    # ----------------------------------
+    # Associação materializada
+    # ----------------------------------
+    def get_membros(
+        self,
+        tenant_id: int,
+        contrato_ids: Optional[List[int]] = None,
+    ) -> Dict[int, int]:
+        """Retorna {contrato_id: segmento_id} atualmente materializado"""
+        query = self.db.query(SegmentoContrato.contrato_id, SegmentoContrato.segmento_id).filter(
+            SegmentoContrato.tenant_id == tenant_id
+        )
+        if contrato_ids is None:
+            return {r.contrato_id: r.segmento_id for r in query.all()}
+
+        membros = {}
+        for lote in em_lotes(contrato_ids):
+            membros.update(
+                (r.contrato_id, r.segmento_id)
+                for r in query.filter(SegmentoContrato.contrato_id.in_(lote)).all()
+            )
+        return membros
+
+    def remover_membros(self, tenant_id: int, contrato_ids: List[int]) -> int:
+        removidos = 0
+        for lote in em_lotes(contrato_ids):
+            result = self.db.execute(
+                delete(SegmentoContrato).where(
+                    SegmentoContrato.tenant_id == tenant_id,
+                    SegmentoContrato.contrato_id.in_(lote),
+                )
+            )
+            removidos += result.rowcount or 0
+        return removidos
+
+    def inserir_membros(self, tenant_id: int, membros: Dict[int, int]) -> int:
+        if not membros:
+            return 0
+        self.db.execute(
+            insert(SegmentoContrato),
+            [
+                {"segmento_id": segmento_id, "contrato_id": contrato_id, "tenant_id": tenant_id}
+                for contrato_id, segmento_id in membros.items()
+            ],
+        )
+        return len(membros)
+
+    def count_membros(self, tenant_id: Optional[int] = None) -> Dict[int, int]:
+        query = self.db.query(
+            SegmentoContrato.segmento_id,
+            func.count(SegmentoContrato.contrato_id).label('quantidade')
+        )
+        if tenant_id is not None:
+            query = query.filter(SegmentoContrato.tenant_id == tenant_id)
+        result = query.group_by(SegmentoContrato.segmento_id).all()
+        return {r.segmento_id: r.quantidade for r in result}
+
+    def get_audiencia(
+        self,
+        segmento_id: int,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Tuple[int, List]:
+        """Contratos (com dados do cliente) de um segmento, via índice da associação"""
+        query = self.db.query(
+            Contrato.id.label('contrato_id'),
+            Contrato.numero_contrato,
+            Contrato.valor_original,
+            Contrato.data_vencimento,
+            Cliente.id.label('cliente_id'),
+            Cliente.nome,
+            Cliente.cpf,
+            Cliente.telefone,
+            Cliente.email,
+        ).select_from(SegmentoContrato).join(
+            Contrato, Contrato.id == SegmentoContrato.contrato_id
+        ).join(
+            Cliente, cliente_do_contrato()
+        ).filter(
+            SegmentoContrato.segmento_id == segmento_id
+        )
+
+        total = query.count()
+        rows = query.order_by(Contrato.id).offset(skip).limit(limit).all()
+        return total, rows
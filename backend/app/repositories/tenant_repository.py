@@ -1,8 +1,11 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 
-from app.models.tenant import Tenant
+from app.db.session import definir_tenant
+from app.db.sharding import em_cada_shard, ha_shards
+from app.models.tenant import Tenant, TenantVersao
 from app.schemas.tenant import TenantCreate, TenantUpdate
 
 
@@ -24,6 +27,65 @@ class TenantRepository:
             query = query.filter(Tenant.ativo == True)
         return query.offset(skip).limit(limit).all()
 
+    # ----------------------------------
+    # Versões (tenant_versoes, no shard do tenant)
+    # ----------------------------------
+    def versao_dados(self, tenant_id: int) -> str:
+        """Versão dos dados (clientes/contratos/pagamentos) do tenant"""
+        versao = self.db.query(TenantVersao.versao_dados).filter(
+            TenantVersao.tenant_id == tenant_id
+        ).scalar()
+        return str(versao or 0)
+
+    def versao_leituras(self, tenant_id: Optional[int]) -> str:
+        """
+        Versão de tudo que as leituras com ETag mostram: dados e segmentação.
+        Na visão global (None), somas de todos os shards e quantidade de
+        tenants: muda quando qualquer um deles muda ou é criado.
+        """
+        if tenant_id is None:
+            quantidade = self.db.query(func.count(Tenant.id)).scalar()
+            parciais = (
+                em_cada_shard(lambda db: TenantRepository(db)._somar_versoes())
+                if ha_shards() else [self._somar_versoes()]
+            )
+            dados = sum(p[0] for p in parciais)
+            segmentos = sum(p[1] for p in parciais)
+            return f"{dados}.{segmentos}:{quantidade}"
+        versoes = self.db.query(TenantVersao.versao_dados, TenantVersao.versao_segmentos).filter(
+            TenantVersao.tenant_id == tenant_id
+        ).first()
+        return f"{versoes[0]}.{versoes[1]}" if versoes else "0.0"
+
+    def incrementar_versao(self, tenant_id: int) -> None:
+        """Na transação corrente: o incremento é visível junto com os dados"""
+        self._incrementar(tenant_id, "versao_dados")
+
+    def incrementar_versao_segmentos(self, tenant_id: int) -> None:
+        """Na transação corrente, junto com a escrita em segmentos"""
+        self._incrementar(tenant_id, "versao_segmentos")
+
+    def _incrementar(self, tenant_id: int, coluna: str) -> None:
+        tabela = TenantVersao.__table__
+        atualizadas = self.db.execute(
+            update(tabela)
+            .where(tabela.c.tenant_id == tenant_id)
+            .values({coluna: tabela.c[coluna] + 1})
+        ).rowcount
+        if not atualizadas:
+            # Primeira escrita do tenant: a linha nasce no shard dele
+            definir_tenant(self.db, tenant_id)
+            self.db.execute(insert(tabela).values(tenant_id=tenant_id, **{coluna: 1}))
+
+    def _somar_versoes(self) -> Tuple[int, int]:
+        return self.db.query(
+            func.coalesce(func.sum(TenantVersao.versao_dados), 0),
+            func.coalesce(func.sum(TenantVersao.versao_segmentos), 0),
+        ).one()
+
+    # ----------------------------------
+    # Cadastro
+    # ----------------------------------
     def create(self, tenant_in: TenantCreate) -> Tenant:
         tenant = Tenant(
             nome=tenant_in.nome,
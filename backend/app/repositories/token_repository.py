@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+from sqlalchemy import delete
+
+from app.models.token_revogado import TokenRevogado
+
+
+class TokenRevogadoRepository:
+    """Lista de tokens revogados (logout), no banco para valer em todos os workers"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def revogado(self, chave: str) -> bool:
+        return self.db.query(TokenRevogado.chave).filter(TokenRevogado.chave == chave).first() is not None
+
+    def revogar(self, chave: str, exp: float) -> None:
+        """Revoga até o exp do token, descartando as revogações já expiradas"""
+        self.db.execute(delete(TokenRevogado).where(TokenRevogado.expira_em <= datetime.now(timezone.utc)))
+        self.db.merge(TokenRevogado(chave=chave, expira_em=datetime.fromtimestamp(exp, timezone.utc)))
+        self.db.commit()
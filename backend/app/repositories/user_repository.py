@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from typing import Optional, List
 
 from sqlalchemy.orm import Session
@@ -76,10 +77,15 @@ class UserRepository:
             if hasattr(user, key) and value is not None:
                 setattr(user, key, value)
 
+        # Desativação forçada: tokens já emitidos deixam de valer
+        if kwargs.get("is_active") is False:
+            user.tokens_invalidos_desde = datetime.now(timezone.utc)
+
         self.db.commit()
         self.db.refresh(user)
         return user
 
     def delete(self, user: User) -> None:
+        # Tokens do usuário excluído já são recusados: get_current_user não o encontra
         self.db.delete(user)
         self.db.commit()
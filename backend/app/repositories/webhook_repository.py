@@ -0,0 +1,48 @@
+from typing import List, Dict, Any
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+
+from app.models.webhook import WebhookEvento
+from app.utils.helpers import em_lotes
+
+
+class WebhookEventoRepository:
+    """Camada de acesso a dados para o log de webhooks"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def inserir_lote(self, eventos: List[Dict[str, Any]]) -> int:
+        """Insere eventos em lote (executemany), sem commit"""
+        for lote in em_lotes(eventos, 5000):
+            # Core executemany: o bulk insert do ORM agrupa por colunas nulas e fragmenta o lote
+            self.db.execute(WebhookEvento.__table__.insert(), lote)
+        return len(eventos)
+
+    def list_pendentes(
+        self, origem: str, desde: datetime, apos_id: int = 0, limit: int = 5000
+    ) -> List[WebhookEvento]:
+        """Eventos ainda não aplicados (ex.: callback chegou antes do envio ser persistido)"""
+        return (
+            self.db.query(WebhookEvento)
+            .filter(
+                WebhookEvento.origem == origem,
+                WebhookEvento.processado_em.is_(None),
+                WebhookEvento.recebido_em >= desde,
+                WebhookEvento.id > apos_id,
+            )
+            .order_by(WebhookEvento.id)
+            .limit(limit)
+            .all()
+        )
+
+    def marcar_processados(self, ids: List[int], quando: datetime) -> None:
+        for lote in em_lotes(ids):
+            self.db.execute(
+                update(WebhookEvento)
+                .where(WebhookEvento.id.in_(lote))
+                .values(processado_em=quando, erro=None)
+                .execution_options(synchronize_session=False)
+            )
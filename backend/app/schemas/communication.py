@@ -1 +1,48 @@
-# Communication schemas
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from enum import Enum
+
+
+class CanalEnum(str, Enum):
+    WHATSAPP = "whatsapp"
+    SMS = "sms"
+    VOZ = "voice"
+
+
+class MessageCreate(BaseModel):
+    """Mensagem avulsa a ser enfileirada"""
+    channel: CanalEnum
+    to: str = Field(..., min_length=8, max_length=50)
+    message: str = Field(..., min_length=1)
+
+
+class DestinatarioLote(BaseModel):
+    """Destinatário de um disparo em lote"""
+    to: str = Field(..., min_length=8, max_length=50)
+    message: Optional[str] = None  # sobrescreve a mensagem padrão do lote
+
+
+class MessageBatchCreate(BaseModel):
+    """Disparo em lote (campanha)"""
+    channel: CanalEnum
+    message: str = Field(..., min_length=1)
+    destinatarios: List[DestinatarioLote] = Field(..., min_length=1, max_length=100000)
+
+
+class MessageResponse(BaseModel):
+    """Mensagem da outbox"""
+    id: int
+    channel: str
+    to: str
+    status: str
+    tentativas: int = 0
+    erro: Optional[str] = None
+    created_at: datetime
+    enviada_em: Optional[datetime] = None
+
+
+class ResultadoEnfileiramento(BaseModel):
+    """Resultado do enfileiramento de um lote"""
+    channel: str
+    enfileiradas: int
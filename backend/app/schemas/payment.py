@@ -1 +1,46 @@
-# Payment schemas
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from datetime import date, datetime
+
+
+class PaymentCreate(BaseModel):
+    """Pagamento manual (baixa avulsa)"""
+    amount: float = Field(..., gt=0)
+    method: str  # pix | boleto | card
+    description: Optional[str] = None
+    contract_number: Optional[str] = None
+    cpf: Optional[str] = None
+    paid_at: Optional[date] = None
+
+    @model_validator(mode="after")
+    def validar_referencia(self):
+        if not self.contract_number and not self.cpf:
+            raise ValueError("Informe contract_number ou cpf")
+        return self
+
+
+class PaymentResponse(BaseModel):
+    """Pagamento registrado"""
+    id: int
+    amount: float
+    method: Optional[str] = None
+    status: str
+    origem: str
+    contrato_id: Optional[int] = None
+    numero_contrato: Optional[str] = None
+    data_pagamento: date
+    created_at: datetime
+
+
+class ResultadoConciliacao(BaseModel):
+    """Resultado de uma conciliação de pagamentos"""
+    total: int
+    conciliados: int
+    nao_encontrados: int
+    duplicados: int
+    invalidos: int
+    contratos_atualizados: int
+    contratos_quitados: int
+    valor_conciliado: float
+    tempo_segundos: float
+    pagamentos_por_segundo: float
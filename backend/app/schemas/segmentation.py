@@ -1 +1,62 @@
-# Segmentation schemas
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date, datetime
+from decimal import Decimal
+
+
+class SegmentCreate(BaseModel):
+    """Schema para criação de Segmento"""
+    name: str = Field(..., min_length=1, max_length=100)
+    min_days_overdue: int
+    max_days_overdue: int
+
+
+class SegmentResponse(BaseModel):
+    """Schema de resposta para Segmento"""
+    id: int
+    name: str
+    min_days_overdue: int
+    max_days_overdue: int
+    total_contratos: int = 0
+    tenant_id: Optional[int] = None
+    created_at: datetime
+    membros_atualizados_em: Optional[datetime] = None
+
+
+class SimulacaoSegmento(BaseModel):
+    """Resultado da simulação de segmentação para um D+"""
+    days_overdue: int
+    segment: Optional[str] = None
+    segment_id: Optional[int] = None
+
+
+class ResultadoAtualizacaoSegmentos(BaseModel):
+    """Resultado da atualização da associação contrato x segmento"""
+    tenant_id: int
+    contratos_avaliados: int
+    adicionados: int
+    removidos: int
+    total_membros: int
+
+
+class ContratoAudiencia(BaseModel):
+    """Contrato pertencente à audiência de um segmento"""
+    contrato_id: int
+    numero_contrato: Optional[str] = None
+    cliente_id: int
+    cliente_nome: str
+    cpf_mascarado: str
+    telefone: Optional[str] = None
+    email: Optional[str] = None
+    valor_original: Decimal
+    data_vencimento: date
+    dias_atraso: int
+
+
+class AudienciaSegmento(BaseModel):
+    """Audiência paginada de um segmento"""
+    segmento_id: int
+    contratos: List[ContratoAudiencia]
+    total: int
+    pagina: int
+    por_pagina: int
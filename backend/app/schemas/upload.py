@@ -13,6 +13,7 @@ class TipoImportacao(str, Enum):
     NOVA_BASE = "nova_base"
     ATUALIZACAO = "atualizacao"
     INCREMENTAL = "incremental"
+    DELTA = "delta"
 
 
 class StatusImportacao(str, Enum):
@@ -104,6 +105,8 @@ class ResultadoImportacao(BaseModel):
     clientes_atualizados: int
     contratos_criados: int
     contratos_atualizados: int
+    linhas_inalteradas: int = 0  # importação delta
+    linhas_removidas: int = 0  # importação delta: chaves ausentes do arquivo
     total_erros: int
     erros: List[str] = []
     data_inicio: datetime
@@ -1 +1,429 @@
-# Communication service (WhatsApp, Voice, SMS)
+"""
+Serviço de Comunicação (WhatsApp, Voz, SMS)
+
+- CommunicationService: enfileira mensagens na outbox persistente
+- OutboundDispatcher: workers assíncronos que consomem a outbox e enviam
+  pelos provedores, com pool httpx compartilhado por provedor, envio em lote,
+  throttling por token bucket e retentativas com backoff exponencial.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.integrations.base import ProviderClient, ProviderError, MensagemEnvio, ResultadoEnvio
+from app.integrations.whatsapp import WhatsAppClient
+from app.integrations.sms import SMSClient
+from app.integrations.voice import VoiceClient
+from app.models.communication import MensagemOutbox, CanalComunicacao, StatusMensagem
+from app.repositories.communication_repository import MensagemOutboxRepository
+from app.schemas.communication import (
+    MessageCreate, MessageBatchCreate, MessageResponse, ResultadoEnfileiramento,
+)
+from app.utils.helpers import em_lotes
+
+logger = logging.getLogger("app.logger")
+
+
+# ==========================================
+# ENFILEIRAMENTO
+# ==========================================
+
+class CommunicationService:
+    """Enfileiramento e consulta de mensagens"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = MensagemOutboxRepository(db)
+
+    def enviar(self, payload: MessageCreate, tenant_id: Optional[int], usuario_id: str) -> MessageResponse:
+        mensagem = self.repo.enfileirar(MensagemOutbox(
+            tenant_id=tenant_id,
+            usuario_id=usuario_id,
+            canal=CanalComunicacao(payload.channel.value),
+            destinatario=payload.to,
+            conteudo=payload.message,
+            status=StatusMensagem.PENDENTE,
+            tentativas=0,
+        ))
+        return self._to_response(mensagem)
+
+    def enviar_lote(
+        self,
+        payload: MessageBatchCreate,
+        tenant_id: Optional[int],
+        usuario_id: str,
+    ) -> ResultadoEnfileiramento:
+        canal = CanalComunicacao(payload.channel.value)
+        total = self.repo.enfileirar_lote([
+            {
+                "tenant_id": tenant_id,
+                "usuario_id": usuario_id,
+                "canal": canal,
+                "destinatario": d.to,
+                "conteudo": d.message or payload.message,
+                "status": StatusMensagem.PENDENTE,
+                "tentativas": 0,
+            }
+            for d in payload.destinatarios
+        ])
+        return ResultadoEnfileiramento(channel=canal.value, enfileiradas=total)
+
+    def historico(self, tenant_id: Optional[int], pagina: int = 1, por_pagina: int = 100) -> List[MessageResponse]:
+        mensagens = self.repo.list(tenant_id, skip=(pagina - 1) * por_pagina, limit=por_pagina)
+        return [self._to_response(m) for m in mensagens]
+
+    @staticmethod
+    def _to_response(mensagem: MensagemOutbox) -> MessageResponse:
+        return MessageResponse(
+            id=mensagem.id,
+            channel=mensagem.canal.value,
+            to=mensagem.destinatario,
+            status=mensagem.status.value,
+            tentativas=mensagem.tentativas or 0,
+            erro=mensagem.erro,
+            created_at=mensagem.created_at,
+            enviada_em=mensagem.enviada_em,
+        )
+
+
+# ==========================================
+# THROTTLING
+# ==========================================
+
+class TokenBucket:
+    """
+    Token bucket assíncrono: `taxa` tokens/s, acumulando até `capacidade`.
+    Um pedido maior que o saldo fica "devendo" e aguarda o tempo de reposição,
+    o que mantém a taxa média mesmo com lotes grandes.
+    """
+
+    def __init__(self, taxa: float, capacidade: Optional[float] = None):
+        self.taxa = taxa
+        self.capacidade = capacidade if capacidade is not None else max(taxa, 1.0)
+        self._tokens = self.capacidade
+        self._atualizado = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self, quantidade: float = 1) -> None:
+        async with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            self._tokens -= quantidade
+            espera = -self._tokens / self.taxa if self._tokens < 0 else 0.0
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+# ==========================================
+# DISPATCHER
+# ==========================================
+
+JANELA_LATENCIAS = 10_000
+
+
+@dataclass
+class MetricasDispatcher:
+    """Métricas acumuladas do dispatcher"""
+    enviadas: int = 0
+    falhas: int = 0
+    reagendadas: int = 0
+    chamadas: int = 0
+    # Janela das últimas chamadas: o worker roda por dias, a lista não pode crescer sem limite
+    latencias: Deque[float] = field(default_factory=lambda: deque(maxlen=JANELA_LATENCIAS))
+    inicio: float = field(default_factory=time.perf_counter)
+
+    def resumo(self) -> dict:
+        decorrido = time.perf_counter() - self.inicio
+        ordenadas = sorted(self.latencias)
+
+        def percentil(p: float) -> float:
+            if not ordenadas:
+                return 0.0
+            return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))] * 1000
+
+        return {
+            "enviadas": self.enviadas,
+            "falhas": self.falhas,
+            "reagendadas": self.reagendadas,
+            "chamadas": self.chamadas,
+            "mensagens_por_segundo": round(self.enviadas / decorrido, 1) if decorrido > 0 else 0.0,
+            "latencia_p50_ms": round(percentil(0.50), 2),
+            "latencia_p99_ms": round(percentil(0.99), 2),
+        }
+
+
+def _backoff(tentativa: int, base: float = 0.5, maximo: float = 30.0) -> float:
+    """Backoff exponencial com jitter"""
+    return min(maximo, base * (2 ** tentativa)) * random.uniform(0.5, 1.5)
+
+
+def providers_configurados() -> Dict[CanalComunicacao, ProviderClient]:
+    """Instancia os provedores que possuem URL configurada"""
+    providers: Dict[CanalComunicacao, ProviderClient] = {}
+    if settings.WHATSAPP_API_URL:
+        providers[CanalComunicacao.WHATSAPP] = WhatsAppClient(
+            settings.WHATSAPP_API_URL, settings.WHATSAPP_API_TOKEN, settings.WHATSAPP_RATE_PER_SECOND
+        )
+    if settings.SMS_API_URL:
+        providers[CanalComunicacao.SMS] = SMSClient(
+            settings.SMS_API_URL, settings.SMS_API_TOKEN, settings.SMS_RATE_PER_SECOND
+        )
+    if settings.VOICE_API_URL:
+        providers[CanalComunicacao.VOZ] = VoiceClient(
+            settings.VOICE_API_URL, settings.VOICE_API_TOKEN, settings.VOICE_RATE_PER_SECOND
+        )
+    return providers
+
+
+def segredo_webhook(canal: CanalComunicacao) -> Optional[str]:
+    """Segredo HMAC com que o provedor do canal assina os callbacks de status"""
+    return {
+        CanalComunicacao.WHATSAPP: settings.WHATSAPP_WEBHOOK_SECRET,
+        CanalComunicacao.SMS: settings.SMS_WEBHOOK_SECRET,
+        CanalComunicacao.VOZ: settings.VOICE_WEBHOOK_SECRET,
+    }.get(canal)
+
+
+class OutboundDispatcher:
+    """
+    Consome a outbox e envia as mensagens pelos provedores.
+
+    Uso:
+        async with OutboundDispatcher() as dispatcher:
+            await dispatcher.executar(parar)
+    """
+
+    LEASE = timedelta(minutes=5)
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        providers: Optional[Dict[CanalComunicacao, ProviderClient]] = None,
+        tamanho_reserva: int = settings.DISPATCH_BATCH_SIZE,
+        concorrencia: int = settings.DISPATCH_CONCURRENCY,
+        max_conexoes: int = settings.DISPATCH_MAX_CONNECTIONS,
+        retentativas_http: int = settings.DISPATCH_HTTP_RETRIES,
+        max_tentativas: int = settings.DISPATCH_MAX_TENTATIVAS,
+    ):
+        self.session_factory = session_factory
+        self.providers = providers if providers is not None else providers_configurados()
+        self.tamanho_reserva = tamanho_reserva
+        self.concorrencia = concorrencia
+        self.max_conexoes = max_conexoes
+        self.retentativas_http = retentativas_http
+        self.max_tentativas = max_tentativas
+        self.metricas = MetricasDispatcher()
+
+        self._clients: Dict[CanalComunicacao, httpx.AsyncClient] = {}
+        self._buckets: Dict[CanalComunicacao, TokenBucket] = {}
+        self._semaforos: Dict[CanalComunicacao, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "OutboundDispatcher":
+        for canal, provider in self.providers.items():
+            # Um pool de conexões por provedor, reaproveitado por todos os workers
+            self._clients[canal] = httpx.AsyncClient(
+                headers=provider.headers,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_conexoes,
+                    max_keepalive_connections=self.max_conexoes,
+                ),
+            )
+            self._buckets[canal] = TokenBucket(provider.taxa_por_segundo)
+            self._semaforos[canal] = asyncio.Semaphore(self.concorrencia)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await asyncio.gather(*(c.aclose() for c in self._clients.values()))
+        self._clients.clear()
+
+    # ----------------------------------
+    # Loop principal
+    # ----------------------------------
+    async def executar(self, parar: Optional[asyncio.Event] = None) -> None:
+        parar = parar or asyncio.Event()
+        while not parar.is_set():
+            processadas = await self.executar_ciclo()
+            if processadas == 0:
+                try:
+                    await asyncio.wait_for(parar.wait(), timeout=settings.DISPATCH_IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def executar_ciclo(self) -> int:
+        """Reserva um lote da outbox, envia e persiste os resultados"""
+        mensagens = await asyncio.to_thread(self._reservar)
+        if not mensagens:
+            return 0
+
+        por_canal: Dict[CanalComunicacao, List[MensagemEnvio]] = {}
+        tentativas: Dict[int, int] = {}
+        sem_provider: List[ResultadoEnvio] = []
+        for m in mensagens:
+            tentativas[m.id] = m.tentativas or 0
+            if m.canal not in self.providers:
+                sem_provider.append(ResultadoEnvio(
+                    id=m.id, sucesso=False, erro="Canal não configurado", retentavel=False
+                ))
+                continue
+            por_canal.setdefault(m.canal, []).append(
+                MensagemEnvio(id=m.id, destinatario=m.destinatario, conteudo=m.conteudo)
+            )
+
+        tarefas = [
+            self._enviar_lote(canal, lote)
+            for canal, lista in por_canal.items()
+            for lote in em_lotes(lista, self.providers[canal].tamanho_lote)
+        ]
+        resultados = sem_provider
+        for parcial in await asyncio.gather(*tarefas):
+            resultados.extend(parcial)
+
+        await asyncio.to_thread(self._persistir, resultados, tentativas)
+        return len(mensagens)
+
+    # ----------------------------------
+    # Envio
+    # ----------------------------------
+    async def _enviar_lote(self, canal: CanalComunicacao, lote: List[MensagemEnvio]) -> List[ResultadoEnvio]:
+        provider = self.providers[canal]
+        client = self._clients[canal]
+
+        async with self._semaforos[canal]:
+            for tentativa in range(self.retentativas_http + 1):
+                await self._buckets[canal].adquirir(len(lote))
+                inicio = time.perf_counter()
+                try:
+                    resultados = await provider.enviar_lote(client, lote)
+                    self.metricas.latencias.append(time.perf_counter() - inicio)
+                    self.metricas.chamadas += 1
+                    return resultados
+                except ProviderError as e:
+                    self.metricas.chamadas += 1
+                    if not e.retentavel or tentativa == self.retentativas_http:
+                        return [
+                            ResultadoEnvio(id=m.id, sucesso=False, erro=str(e), retentavel=e.retentavel)
+                            for m in lote
+                        ]
+                    await asyncio.sleep(e.retry_after or _backoff(tentativa))
+        return []
+
+    # ----------------------------------
+    # Persistência (executada fora do event loop)
+    # ----------------------------------
+    def _reservar(self) -> List[MensagemOutbox]:
+        db = self.session_factory()
+        try:
+            mensagens = MensagemOutboxRepository(db).reservar(self.tamanho_reserva, self.LEASE)
+            db.expunge_all()
+            return mensagens
+        finally:
+            db.close()
+
+    def _persistir(self, resultados: List[ResultadoEnvio], tentativas: Dict[int, int]) -> None:
+        agora = datetime.now()
+        atualizacoes = []
+        for r in resultados:
+            numero = tentativas.get(r.id, 0) + 1
+            if r.sucesso:
+                self.metricas.enviadas += 1
+                atualizacoes.append({
+                    "id": r.id,
+                    "status": StatusMensagem.ENVIADA,
+                    "tentativas": numero,
+                    "provider_message_id": r.provider_message_id,
+                    "proxima_tentativa_em": None,
+                    "erro": None,
+                    "enviada_em": agora,
+                })
+            elif r.retentavel and numero < self.max_tentativas:
+                self.metricas.reagendadas += 1
+                atualizacoes.append({
+                    "id": r.id,
+                    "status": StatusMensagem.PENDENTE,
+                    "tentativas": numero,
+                    "proxima_tentativa_em": agora + timedelta(seconds=30 * (2 ** numero)),
+                    "erro": (r.erro or "")[:500],
+                })
+            else:
+                self.metricas.falhas += 1
+                atualizacoes.append({
+                    "id": r.id,
+                    "status": StatusMensagem.FALHA,
+                    "tentativas": numero,
+                    "proxima_tentativa_em": None,
+                    "erro": (r.erro or "")[:500],
+                })
+
+        db = self.session_factory()
+        try:
+            MensagemOutboxRepository(db).aplicar_resultados(atualizacoes)
+        finally:
+            db.close()
+
+
+# ==========================================
+# RETORNO DOS PROVEDORES (WEBHOOK)
+# ==========================================
+
+# Status informado pelo provedor -> status da outbox
+STATUS_PROVEDOR = {
+    "sent": StatusMensagem.ENVIADA,
+    "enviada": StatusMensagem.ENVIADA,
+    "delivered": StatusMensagem.ENTREGUE,
+    "entregue": StatusMensagem.ENTREGUE,
+    "read": StatusMensagem.LIDA,
+    "lida": StatusMensagem.LIDA,
+    "failed": StatusMensagem.FALHA,
+    "undelivered": StatusMensagem.FALHA,
+    "falha": StatusMensagem.FALHA,
+}
+
+# Ordem de aplicação e status a partir dos quais cada transição é permitida
+TRANSICOES_WEBHOOK = [
+    (StatusMensagem.ENVIADA, [StatusMensagem.ENVIANDO]),
+    (StatusMensagem.FALHA, [StatusMensagem.ENVIANDO, StatusMensagem.ENVIADA]),
+    (StatusMensagem.ENTREGUE, [StatusMensagem.ENVIANDO, StatusMensagem.ENVIADA]),
+    (StatusMensagem.LIDA, [StatusMensagem.ENVIANDO, StatusMensagem.ENVIADA, StatusMensagem.ENTREGUE]),
+]
+
+
+def aplicar_status_mensagens(db: Session, eventos: List[dict]) -> List[bool]:
+    """
+    Aplica callbacks de status na outbox com um UPDATE por status
+    (não por evento). Retorna, para cada evento, se ele foi aplicado;
+    eventos de mensagens ainda não conhecidas ficam para reprocessamento.
+    """
+    repo = MensagemOutboxRepository(db)
+
+    alvos: List[Optional[tuple]] = []
+    for evento in eventos:
+        provider_id = evento.get("message_id") or evento.get("id")
+        status = STATUS_PROVEDOR.get(str(evento.get("status", "")).lower())
+        alvos.append((str(provider_id), status) if provider_id and status else None)
+
+    ids = {a[0] for a in alvos if a}
+    existentes = repo.existentes_por_provider_id(list(ids)) if ids else set()
+
+    por_status: Dict[StatusMensagem, set] = {}
+    for alvo in alvos:
+        if alvo and alvo[0] in existentes:
+            por_status.setdefault(alvo[1], set()).add(alvo[0])
+
+    for status, anteriores in TRANSICOES_WEBHOOK:
+        if status in por_status:
+            repo.atualizar_status_por_provider_id(status, list(por_status[status]), anteriores)
+
+    # Eventos inválidos são dados como processados (não há o que reaplicar)
+    return [alvo is None or alvo[0] in existentes for alvo in alvos]
@@ -1,8 +1,11 @@
-from typing import Optional, List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from decimal import Decimal
+from itertools import chain
 
 from sqlalchemy.orm import Session
 
+from app.db.sharding import em_cada_shard, ha_shards
+
 from app.repositories.contrato_repository import ContratoRepository
 from app.repositories.cliente_repository import ClienteRepository
 from app.repositories.tenant_repository import TenantRepository
@@ -45,8 +48,16 @@ class DashboardService:
         """
         Retorna dados do Dashboard Principal.
         
-        Se tenant_id for None, retorna dados de todos os tenants (visão diretor).
+        Se tenant_id for None, retorna dados de todos os tenants (visão diretor);
+        com shards, cada um é calculado em paralelo e os resultados combinados.
         """
+        if tenant_id is None and ha_shards():
+            return _combinar_principal(
+                em_cada_shard(lambda db: DashboardService(db)._dashboard_principal(None))
+            )
+        return self._dashboard_principal(tenant_id)
+
+    def _dashboard_principal(self, tenant_id: Optional[int]) -> DashboardPrincipal:
         # KPIs principais
         total_contratos = self.contrato_repo.count_total(tenant_id)
         total_devedores = self.cliente_repo.count(tenant_id)
@@ -129,6 +140,11 @@ class DashboardService:
         """
         Retorna dados do Dashboard de Análise de Clientes.
         """
+        if tenant_id is None and ha_shards():
+            return _combinar_analise_clientes(em_cada_shard(_analise_clientes_do_shard))
+        return self._dashboard_analise_clientes(tenant_id)
+
+    def _dashboard_analise_clientes(self, tenant_id: Optional[int]) -> DashboardAnaliseClientes:
         # KPIs principais
         d_plus_medio = self.contrato_repo.get_d_plus_medio(tenant_id)
         bons_pagadores = self.contrato_repo.count_bons_pagadores(tenant_id)
@@ -230,3 +246,173 @@ class DashboardService:
             tenant_id=tenant_id,
             tenant_nome=tenant_nome,
         )
+
+
+# ==========================================
+# Visão global com shards: combinação dos parciais
+# ==========================================
+# Contagens e valores somam (cada tenant está em um único shard); médias são
+# ponderadas pela base de cada shard; percentuais e rankings são recalculados.
+
+def _combinar_principal(parciais: List[DashboardPrincipal]) -> DashboardPrincipal:
+    return DashboardPrincipal(
+        total_contratos=sum(p.total_contratos for p in parciais),
+        total_devedores=sum(p.total_devedores for p in parciais),
+        contratos_ativos=sum(p.contratos_ativos for p in parciais),
+        contratos_pagos=sum(p.contratos_pagos for p in parciais),
+        contratos_atrasados=sum(p.contratos_atrasados for p in parciais),
+        valor_total=sum((p.valor_total for p in parciais), Decimal("0")),
+        media_atraso=_media((p.media_atraso, p.contratos_atrasados) for p in parciais),
+        distribuicao_status=[
+            DistribuicaoStatus(**d)
+            for d in _somar_por([p.distribuicao_status for p in parciais], "status", ("quantidade", "valor_total"), casas=None)
+        ],
+        faixas_atraso=[
+            FaixaAtraso(**d)
+            for d in _somar_por([p.faixas_atraso for p in parciais], "faixa", ("quantidade", "valor_total"), casas=None)
+        ],
+        top_devedores=_maiores(
+            [p.top_devedores for p in parciais], lambda t: t.valor_pendente, 10
+        ),
+    )
+
+
+def _analise_clientes_do_shard(db: Session) -> Tuple[DashboardAnaliseClientes, int, int]:
+    """Parcial do shard e as bases das médias: contratos e clientes com contrato"""
+    service = DashboardService(db)
+    return (
+        service._dashboard_analise_clientes(None),
+        service.contrato_repo.count(None),
+        service.contrato_repo.count_clientes_com_contrato(None),
+    )
+
+
+def _combinar_analise_clientes(
+    parciais: List[Tuple[DashboardAnaliseClientes, int, int]]
+) -> DashboardAnaliseClientes:
+    dashboards = [d for d, _, _ in parciais]
+    demograficos = [d.perfil_demografico for d in dashboards]
+    comportamentais = [d.perfil_comportamental for d in dashboards]
+    total_clientes = sum(clientes for _, _, clientes in parciais)
+
+    # Bases das médias: contratos vencidos e não pagos (D+), clientes com data de nascimento (idade)
+    vencidos = [
+        sum(p.quantidade for p in c.pontualidade_pagamento if p.categoria != "Em dia") for c in comportamentais
+    ]
+    com_idade = [sum(f.quantidade for f in d.distribuicao_faixa_etaria) for d in demograficos]
+
+    evolucao = []
+    for mes, itens in _agrupar([d.propensao_pagamento.evolucao_comportamento for d in dashboards], "mes").items():
+        novos = sum(e.novos_inadimplentes for e in itens)
+        recuperados = sum(e.recuperados for e in itens)
+        evolucao.append(EvolucaoMensal(
+            mes=mes,
+            novos_inadimplentes=novos,
+            recuperados=recuperados,
+            taxa_recuperacao=round(recuperados / novos * 100, 2) if novos > 0 else 0,
+        ))
+
+    perfil_risco = []
+    for nivel, itens in _agrupar([d.propensao_pagamento.perfil_risco for d in dashboards], "nivel").items():
+        quantidade = sum(p.quantidade for p in itens)
+        perfil_risco.append(PerfilRisco(
+            nivel=nivel,
+            descricao=itens[0].descricao,
+            quantidade=quantidade,
+            percentual=round(quantidade / (total_clientes or 1) * 100, 1),
+        ))
+
+    analise_por_faixa = []
+    for faixa, itens in _agrupar([d.analise_por_faixa for d in dashboards], "faixa_d_plus").items():
+        analise_por_faixa.append(AnaliseClientePorFaixa(
+            faixa_d_plus=faixa,
+            total_clientes=sum(a.total_clientes for a in itens),
+            valor_total=sum((a.valor_total for a in itens), Decimal("0")),
+            idade_media=round(_media((a.idade_media, a.total_clientes) for a in itens), 1),
+            sexo_m=sum(a.sexo_m for a in itens),
+            sexo_f=sum(a.sexo_f for a in itens),
+            reincidencia=_media((a.reincidencia, a.total_clientes) for a in itens),
+        ))
+
+    return DashboardAnaliseClientes(
+        d_plus_medio=round(_media(zip((d.d_plus_medio for d in dashboards), vencidos)), 1),
+        bons_pagadores=sum(d.bons_pagadores for d in dashboards),
+        reincidentes=sum(d.reincidentes for d in dashboards),
+        inadimplentes=sum(d.inadimplentes for d in dashboards),
+        ticket_medio=Decimal(round(_media((d.ticket_medio, c) for d, c, _ in parciais), 2)),
+        idade_media=_media(zip((d.idade_media for d in dashboards), com_idade)),
+        perfil_demografico=PerfilDemografico(
+            distribuicao_faixa_etaria=[
+                DistribuicaoFaixaEtaria(**d)
+                for d in _somar_por([p.distribuicao_faixa_etaria for p in demograficos], "faixa")
+            ],
+            distribuicao_sexo=[
+                DistribuicaoSexo(**d) for d in _somar_por([p.distribuicao_sexo for p in demograficos], "sexo")
+            ],
+            top_5_maior_inadimplencia=_maiores(
+                [p.top_5_maior_inadimplencia for p in demograficos], lambda c: c.valor_total, 5
+            ),
+            top_5_melhor_comportamento=_maiores(
+                [p.top_5_melhor_comportamento for p in demograficos], lambda c: c.total_contratos, 5
+            ),
+        ),
+        perfil_comportamental=PerfilComportamental(
+            pontualidade_pagamento=[
+                PontualidadePagamento(**d)
+                for d in _somar_por([c.pontualidade_pagamento for c in comportamentais], "categoria")
+            ],
+            distribuicao_reincidencia=[
+                DistribuicaoReincidencia(**d)
+                for d in _somar_por([c.distribuicao_reincidencia for c in comportamentais], "categoria")
+            ],
+        ),
+        perfil_financeiro=[
+            InadimplenciaPorFaixa(**d)
+            for d in _somar_por([d.perfil_financeiro for d in dashboards], "faixa_valor", ("quantidade", "valor_total"))
+        ],
+        propensao_pagamento=PropensaoPagamento(
+            evolucao_comportamento=evolucao,
+            perfil_risco=perfil_risco,
+        ),
+        analise_por_faixa=analise_por_faixa,
+    )
+
+
+def _agrupar(listas: Iterable[Sequence[Any]], chave: str) -> Dict[Any, List[Any]]:
+    """Itens de todas as listas agrupados por `chave`, na ordem em que aparecem"""
+    grupos: Dict[Any, List[Any]] = {}
+    for item in chain.from_iterable(listas):
+        grupos.setdefault(getattr(item, chave), []).append(item)
+    return grupos
+
+
+def _somar_por(
+    listas: Iterable[Sequence[Any]],
+    chave: str,
+    campos: Tuple[str, ...] = ("quantidade",),
+    casas: Optional[int] = 2,
+) -> List[dict]:
+    """Soma `campos` por `chave` e recalcula o percentual sobre o total de quantidade"""
+    somados = []
+    for itens in _agrupar(listas, chave).values():
+        dados = itens[0].model_dump()
+        for campo in campos:
+            dados[campo] = sum(getattr(i, campo) for i in itens)
+        somados.append(dados)
+
+    total = sum(d["quantidade"] for d in somados)
+    for dados in somados:
+        percentual = dados["quantidade"] / total * 100 if total > 0 else 0
+        dados["percentual"] = round(percentual, casas) if casas is not None else percentual
+    return somados
+
+
+def _maiores(listas: Iterable[Sequence[Any]], chave, limite: int) -> List[Any]:
+    return sorted(chain.from_iterable(listas), key=chave, reverse=True)[:limite]
+
+
+def _media(pares: Iterable[Tuple[Any, int]]) -> float:
+    """Média ponderada de (valor, peso)"""
+    pares = list(pares)
+    peso_total = sum(peso for _, peso in pares)
+    return sum(float(valor) * peso for valor, peso in pares) / peso_total if peso_total else 0.0
@@ -0,0 +1,268 @@
+"""
+Serviço de Exportação da Base
+
+Exporta clientes e contratos de um tenant em CSV, XLSX ou Parquet com memória
+constante: as linhas são lidas com cursor no servidor (yield_per/stream_results)
+e escritas lote a lote, sem materializar o resultado.
+"""
+import csv
+import io
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Enum as SAEnum, select
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import BadRequestException
+from app.db import session as db_session
+from app.db.session import SessionLocal
+from app.db.sharding import ha_shards
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato
+from app.repositories.contrato_repository import cliente_do_contrato
+
+logger = logging.getLogger("app.logger")
+
+
+class FormatoExportacao(str, Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+    PARQUET = "parquet"
+
+
+MEDIA_TYPES = {
+    FormatoExportacao.CSV: "text/csv",
+    FormatoExportacao.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    FormatoExportacao.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+# (cabeçalho, coluna)
+COLUNAS_CLIENTES = [
+    ("id", Cliente.id),
+    ("cpf", Cliente.cpf),
+    ("nome", Cliente.nome),
+    ("data_nascimento", Cliente.data_nascimento),
+    ("sexo", Cliente.sexo),
+    ("telefone", Cliente.telefone),
+    ("email", Cliente.email),
+    ("endereco", Cliente.endereco),
+    ("cidade", Cliente.cidade),
+    ("estado", Cliente.estado),
+    ("cep", Cliente.cep),
+    ("created_at", Cliente.created_at),
+]
+
+COLUNAS_CONTRATOS = [
+    ("id", Contrato.id),
+    ("numero_contrato", Contrato.numero_contrato),
+    ("cliente_id", Contrato.cliente_id),
+    ("cpf", Cliente.cpf),
+    ("nome", Cliente.nome),
+    ("valor_original", Contrato.valor_original),
+    ("valor_atualizado", Contrato.valor_atualizado),
+    ("valor_pago", Contrato.valor_pago),
+    ("data_contrato", Contrato.data_contrato),
+    ("data_vencimento", Contrato.data_vencimento),
+    ("data_pagamento", Contrato.data_pagamento),
+    ("status", Contrato.status),
+]
+
+
+class ExportService:
+    """Exportação em streaming de clientes e contratos"""
+
+    # Linhas por ida ao banco / por bloco escrito
+    TAMANHO_LOTE = 5000
+    # Tamanho dos pedaços enviados ao cliente ao transmitir arquivos temporários
+    TAMANHO_CHUNK = 1024 * 1024
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        # A resposta é transmitida depois que as dependências do request já
+        # encerraram; o gerador abre e fecha a própria sessão.
+        self.session_factory = session_factory
+
+    # ==========================================
+    # API PÚBLICA
+    # ==========================================
+
+    def exportar_clientes(self, tenant_id: Optional[int], formato: FormatoExportacao) -> Iterator[bytes]:
+        stmt = select(*[c for _, c in COLUNAS_CLIENTES]).order_by(Cliente.id)
+        if tenant_id is not None:
+            stmt = stmt.where(Cliente.tenant_id == tenant_id)
+        return self._exportar("clientes", tenant_id, stmt, COLUNAS_CLIENTES, formato)
+
+    def exportar_contratos(self, tenant_id: Optional[int], formato: FormatoExportacao) -> Iterator[bytes]:
+        stmt = (
+            select(*[c for _, c in COLUNAS_CONTRATOS])
+            .join(Cliente, cliente_do_contrato())
+            .order_by(Contrato.id)
+        )
+        if tenant_id is not None:
+            stmt = stmt.where(Contrato.tenant_id == tenant_id)
+        return self._exportar("contratos", tenant_id, stmt, COLUNAS_CONTRATOS, formato)
+
+    @staticmethod
+    def validar_formato(formato: FormatoExportacao) -> None:
+        """Falha antes de iniciar a resposta se o formato não estiver disponível"""
+        if formato == FormatoExportacao.PARQUET:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise BadRequestException("Exportação em Parquet requer o pacote pyarrow")
+
+    # ==========================================
+    # PIPELINE
+    # ==========================================
+
+    def _exportar(
+        self,
+        entidade: str,
+        tenant_id: Optional[int],
+        stmt,
+        colunas: List[Tuple[str, Any]],
+        formato: FormatoExportacao,
+    ) -> Iterator[bytes]:
+        escritor = {
+            FormatoExportacao.CSV: self._csv,
+            FormatoExportacao.XLSX: self._xlsx,
+            FormatoExportacao.PARQUET: self._parquet,
+        }[formato]
+
+        inicio = time.perf_counter()
+        contador = [0]
+        # Visão global com shards: um banco depois do outro, no mesmo arquivo
+        if tenant_id is None and ha_shards():
+            shards: List[Optional[str]] = db_session.shards()
+        else:
+            shards = [None]
+
+        def lotes() -> Iterator[Sequence[Tuple]]:
+            for shard in shards:
+                db = self.session_factory()
+                if shard is not None:
+                    db.info["shard"] = shard
+                try:
+                    result = db.execute(stmt.execution_options(yield_per=self.TAMANHO_LOTE, stream_results=True))
+                    for lote in result.partitions():
+                        contador[0] += len(lote)
+                        yield lote
+                finally:
+                    db.close()
+
+        fonte = lotes()
+        try:
+            yield from escritor(colunas, fonte)
+        finally:
+            fonte.close()  # fecha a sessão aberta se o cliente desconectar no meio
+            tempo = time.perf_counter() - inicio
+            logger.info(
+                f"Exportação {entidade} ({formato.value}) tenant={tenant_id}: "
+                f"{contador[0]} linhas em {tempo:.2f}s ({contador[0] / tempo if tempo else 0:.0f} linhas/s)"
+            )
+
+    # ----------------------------------
+    # Escritores
+    # ----------------------------------
+    def _csv(self, colunas: List[Tuple[str, Any]], lotes: Iterable[Sequence[Tuple]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([nome for nome, _ in colunas])
+        # Só as colunas enum precisam de conversão (str() de um enum traz o nome da classe)
+        enums = [i for i, (_, coluna) in enumerate(colunas) if isinstance(coluna.type, SAEnum)]
+        for lote in lotes:
+            if enums:
+                lote = [list(row) for row in lote]
+                for row in lote:
+                    for i in enums:
+                        if row[i] is not None:
+                            row[i] = row[i].value
+            writer.writerows(lote)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _xlsx(self, colunas: List[Tuple[str, Any]], lotes: Iterable[Sequence[Tuple]]) -> Iterator[bytes]:
+        # XLSX é um zip: é gerado em arquivo temporário (modo write-only do
+        # openpyxl, memória constante) e transmitido em pedaços ao final
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Dados")
+        ws.append([nome for nome, _ in colunas])
+        for lote in lotes:
+            for row in lote:
+                ws.append([_valor_planilha(v) for v in row])
+
+        fd, caminho = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            wb.save(caminho)
+            yield from self._transmitir_arquivo(caminho)
+        finally:
+            os.unlink(caminho)
+
+    def _parquet(self, colunas: List[Tuple[str, Any]], lotes: Iterable[Sequence[Tuple]]) -> Iterator[bytes]:
+        # Um row group por lote; o schema vem dos tipos das colunas
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(nome, _tipo_arrow(pa, coluna.type)) for nome, coluna in colunas])
+        fd, caminho = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        try:
+            with pq.ParquetWriter(caminho, schema) as writer:
+                for lote in lotes:
+                    writer.write_table(pa.Table.from_arrays(
+                        [
+                            pa.array([v.value if isinstance(v, Enum) else v for v in valores], type=campo.type)
+                            for valores, campo in zip(zip(*lote), schema)
+                        ],
+                        schema=schema,
+                    ))
+            yield from self._transmitir_arquivo(caminho)
+        finally:
+            os.unlink(caminho)
+
+    def _transmitir_arquivo(self, caminho: str) -> Iterator[bytes]:
+        with open(caminho, "rb") as f:
+            while chunk := f.read(self.TAMANHO_CHUNK):
+                yield chunk
+
+
+# ==========================================
+# CONVERSÃO DE VALORES
+# ==========================================
+
+def _valor_planilha(valor):
+    if isinstance(valor, Enum):
+        return valor.value
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, datetime) and valor.tzinfo is not None:
+        # openpyxl não aceita datetime com fuso
+        return valor.replace(tzinfo=None)
+    return valor
+
+
+def _tipo_arrow(pa, tipo):
+    """Tipo Arrow equivalente ao tipo SQLAlchemy da coluna"""
+    from sqlalchemy import Date, DateTime, Integer, Numeric
+
+    if isinstance(tipo, Integer):
+        return pa.int64()
+    if isinstance(tipo, Numeric):
+        return pa.decimal128(tipo.precision or 18, tipo.scale or 2)
+    if isinstance(tipo, DateTime):
+        return pa.timestamp("us", tz="UTC" if tipo.timezone else None)
+    if isinstance(tipo, Date):
+        return pa.date32()
+    return pa.string()
@@ -0,0 +1,122 @@
+"""
+Armazenamento de arquivos enviados
+
+O conteúdo é gravado em disco endereçado pelo sha256
+(UPLOAD_DIR/objetos/ab/cd/<sha256>), calculado em streaming durante a
+gravação. Uploads idênticos compartilham o mesmo objeto; a tabela
+uploaded_files indexa os arquivos por id e tenant.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import NotFoundException
+from app.models.arquivo import ArquivoUpload
+from app.repositories.arquivo_repository import ArquivoUploadRepository
+
+TAMANHO_CHUNK = 1024 * 1024
+
+
+class FileStorageService:
+    """Gravação, deduplicação e leitura dos arquivos enviados"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = ArquivoUploadRepository(db)
+
+    # ----------------------------------
+    # Gravação
+    # ----------------------------------
+    async def salvar(
+        self,
+        file: UploadFile,
+        tenant_id: Optional[int],
+        usuario_id: Optional[str],
+    ) -> Tuple[ArquivoUpload, bool]:
+        """
+        Grava o upload em streaming (sem carregá-lo inteiro em memória).
+        Retorna (arquivo, deduplicado); deduplicado=True quando o tenant
+        já havia enviado um arquivo com o mesmo conteúdo.
+        """
+        limite = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+        diretorio_tmp = os.path.join(settings.UPLOAD_DIR, "tmp")
+        os.makedirs(diretorio_tmp, exist_ok=True)
+
+        fd, caminho_tmp = tempfile.mkstemp(dir=diretorio_tmp)
+        sha256 = hashlib.sha256()
+        tamanho = 0
+        try:
+            with os.fdopen(fd, "wb") as destino:
+                while chunk := await file.read(TAMANHO_CHUNK):
+                    tamanho += len(chunk)
+                    if tamanho > limite:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail="Arquivo excede o tamanho máximo permitido",
+                        )
+                    sha256.update(chunk)
+                    destino.write(chunk)
+
+            digest = sha256.hexdigest()
+            existente = self.repo.get_by_sha256(digest, tenant_id)
+            if existente and os.path.isfile(existente.caminho):
+                os.unlink(caminho_tmp)
+                return existente, True
+
+            caminho = self.caminho_objeto(digest)
+            if os.path.isfile(caminho):
+                os.unlink(caminho_tmp)
+            else:
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                os.replace(caminho_tmp, caminho)
+        except BaseException:
+            if os.path.exists(caminho_tmp):
+                os.unlink(caminho_tmp)
+            raise
+
+        arquivo = self.repo.create(ArquivoUpload(
+            id=str(uuid.uuid4()),
+            tenant_id=tenant_id,
+            usuario_id=usuario_id,
+            nome_original=os.path.basename(file.filename or "arquivo"),
+            content_type=file.content_type,
+            sha256=digest,
+            tamanho=tamanho,
+            caminho=caminho,
+        ))
+        return arquivo, False
+
+    @staticmethod
+    def caminho_objeto(sha256: str) -> str:
+        return os.path.join(settings.UPLOAD_DIR, "objetos", sha256[:2], sha256[2:4], sha256)
+
+    # ----------------------------------
+    # Consulta
+    # ----------------------------------
+    def listar(self, tenant_id: Optional[int], pagina: int = 1, por_pagina: int = 100) -> List[ArquivoUpload]:
+        return self.repo.list(tenant_id, skip=(pagina - 1) * por_pagina, limit=por_pagina)
+
+    def obter(self, arquivo_id: str, tenant_id: Optional[int]) -> ArquivoUpload:
+        arquivo = self.repo.get_by_id(arquivo_id, tenant_id)
+        if not arquivo or not os.path.isfile(arquivo.caminho):
+            raise NotFoundException("Arquivo não encontrado")
+        return arquivo
+
+
+def ler_intervalo(caminho: str, inicio: int, fim: int) -> Iterator[bytes]:
+    """Lê os bytes [inicio, fim] (inclusivo) em pedaços"""
+    with open(caminho, "rb") as f:
+        f.seek(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            chunk = f.read(min(TAMANHO_CHUNK, restante))
+            if not chunk:
+                break
+            restante -= len(chunk)
+            yield chunk
@@ -0,0 +1,179 @@
+"""
+Importação Delta
+
+Os tenants reenviam a base inteira todos os dias com poucas linhas alteradas.
+Cada linha normalizada recebe um hash (pd.util.hash_pandas_object, vetorizado)
+guardado por (tenant, cpf, numero_contrato). A comparação com os hashes da
+importação anterior separa, com merges, as linhas novas, alteradas,
+inalteradas e removidas; apenas as novas e alteradas são gravadas.
+"""
+import logging
+from typing import Any, Dict, List
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.cliente import Sexo
+from app.models.contrato import StatusContrato
+from app.repositories.importacao_repository import ImportacaoDeltaRepository
+from app.repositories.tenant_repository import TenantRepository
+from app.services.importacao_lote import (
+    CHAVE, COLUNAS_CLIENTE, COLUNAS_CONTRATO, ResultadoLote,
+    normalizar_base, separar_invalidas, registros,
+)
+
+logger = logging.getLogger("app.logger")
+
+# Colunas que compõem o fingerprint da linha
+COLUNAS_HASH = CHAVE + COLUNAS_CONTRATO[1:] + COLUNAS_CLIENTE
+
+
+class DeltaImportService:
+    """Calcula e grava o delta entre o arquivo recebido e a última importação do tenant"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = ImportacaoDeltaRepository(db)
+
+    # ==========================================
+    # API PÚBLICA
+    # ==========================================
+
+    def aplicar(self, df: pd.DataFrame, col_map: Dict[str, str], tenant_id: int) -> ResultadoLote:
+        """
+        Grava o delta do arquivo (sem commit). Linhas alteradas sempre
+        sobrescrevem os dados existentes. Contratos ausentes do arquivo são
+        mantidos; apenas seus fingerprints são descartados e contados como removidos.
+
+        Os fingerprints só são usados se a versão dos dados do tenant for a
+        registrada pela última delta; caso contrário são descartados e todas
+        as linhas do arquivo são regravadas.
+        """
+        resultado = ResultadoLote()
+        resultado.versao_dados = TenantRepository(self.db).versao_dados(tenant_id)
+        if self.repo.versao_fingerprints(tenant_id) != resultado.versao_dados:
+            logger.info(f"Importação delta tenant={tenant_id}: fingerprints obsoletos, regravando a base")
+            self.repo.limpar_fingerprints(tenant_id)
+
+        dados, resultado.erros = separar_invalidas(normalizar_base(df, col_map))
+        dados["hash"] = self.fingerprint(dados)
+
+        anterior = self.repo.carregar_fingerprints(tenant_id).rename(columns={"hash": "hash_anterior"})
+        classificado = dados.merge(anterior.astype({"hash_anterior": "Int64"}), on=CHAVE, how="left")
+        novas = classificado["hash_anterior"].isna()
+        alteradas = ~novas & classificado["hash"].ne(classificado["hash_anterior"]).fillna(False)
+        removidas = anterior.merge(dados[CHAVE], on=CHAVE, how="left", indicator=True)
+        removidas = removidas[removidas["_merge"] == "left_only"]
+
+        resultado.detalhes = {
+            "novas": int(novas.sum()),
+            "alteradas": int(alteradas.sum()),
+            "inalteradas": int((~novas & ~alteradas).sum()),
+            "removidas": len(removidas),
+        }
+        resultado.linhas_gravadas = resultado.detalhes["novas"] + resultado.detalhes["alteradas"]
+        resultado.inalteradas = resultado.detalhes["inalteradas"]
+        resultado.removidas = resultado.detalhes["removidas"]
+
+        gravar = classificado[novas | alteradas]
+        if not gravar.empty:
+            cliente_ids = self._gravar_clientes(gravar, tenant_id, resultado)
+            self._gravar_contratos(gravar, cliente_ids, tenant_id, resultado)
+
+        self.repo.inserir_fingerprints(tenant_id, _chaves(classificado[novas], com_hash=True))
+        self.repo.atualizar_fingerprints(tenant_id, _chaves(classificado[alteradas], com_hash=True))
+        self.repo.remover_fingerprints(tenant_id, _chaves(removidas))
+
+        logger.info(
+            f"Importação delta tenant={tenant_id}: {resultado.detalhes}, {len(resultado.erros)} inválidas"
+        )
+        return resultado
+
+    # ----------------------------------
+    # Fingerprint
+    # ----------------------------------
+    @staticmethod
+    def fingerprint(dados: pd.DataFrame) -> pd.Series:
+        """Hash de 64 bits por linha (armazenado como inteiro com sinal)"""
+        hashes = pd.util.hash_pandas_object(dados[COLUNAS_HASH], index=False)
+        return pd.Series(hashes.to_numpy().view("int64"), index=dados.index)
+
+    # ----------------------------------
+    # Gravação
+    # ----------------------------------
+    def _gravar_clientes(self, gravar: pd.DataFrame, tenant_id: int, resultado: ResultadoLote) -> Dict[str, int]:
+        por_cpf = gravar.drop_duplicates("cpf")
+        ids = self.repo.ids_clientes_por_cpf(tenant_id, por_cpf["cpf"].tolist())
+
+        novos, atualizacoes = [], []
+        for cpf, cpf_numero, registro in zip(
+            por_cpf["cpf"], por_cpf["cpf_numero"], registros(por_cpf, COLUNAS_CLIENTE)
+        ):
+            registro["sexo"] = Sexo(registro["sexo"]) if registro["sexo"] else None
+            if cpf in ids:
+                # Campos vazios no arquivo não apagam o que já existe
+                atualizacoes.append({
+                    "id": ids[cpf], "cpf_numero": int(cpf_numero),
+                    **{k: v for k, v in registro.items() if v is not None},
+                })
+            else:
+                novos.append({"tenant_id": tenant_id, "cpf": cpf, "cpf_numero": int(cpf_numero), **registro})
+
+        resultado.clientes_atualizados = self.repo.atualizar_clientes(atualizacoes)
+        resultado.clientes_criados = self.repo.inserir_clientes(novos)
+        if novos:
+            ids.update(self.repo.ids_clientes_por_cpf(tenant_id, [c["cpf"] for c in novos]))
+        return ids
+
+    def _gravar_contratos(
+        self, gravar: pd.DataFrame, cliente_ids: Dict[str, int], tenant_id: int, resultado: ResultadoLote
+    ) -> None:
+        gravar = gravar.assign(cliente_id=gravar["cpf"].map(cliente_ids))
+        com_numero = gravar["numero_contrato"] != ""
+        por_numero = self.repo.ids_contratos_por_numero(
+            tenant_id, gravar.loc[com_numero, "numero_contrato"].tolist()
+        )
+        sem_numero = self.repo.ids_contratos_sem_numero(
+            tenant_id, gravar.loc[~com_numero, "cliente_id"].astype(int).tolist()
+        )
+        contrato_id = gravar["numero_contrato"].map(por_numero).where(
+            com_numero, gravar["cliente_id"].map(sem_numero)
+        )
+
+        novos, atualizacoes = [], []
+        for id_existente, r in zip(contrato_id, registros(gravar, ["cliente_id"] + COLUNAS_CONTRATO)):
+            status = StatusContrato(r["status"])
+            if pd.isna(id_existente):
+                novos.append({
+                    "tenant_id": tenant_id,
+                    "cliente_id": int(r["cliente_id"]),
+                    "numero_contrato": r["numero_contrato"] or None,
+                    "valor_original": r["valor"],
+                    "data_vencimento": r["vencimento"],
+                    "data_contrato": r["data_contrato"],
+                    "status": status,
+                    "valor_pago": 0,
+                })
+            else:
+                atualizacoes.append({
+                    "id": int(id_existente),
+                    "valor_original": r["valor"],
+                    "data_vencimento": r["vencimento"],
+                    "status": status,
+                })
+
+        resultado.contratos_atualizados = self.repo.atualizar_contratos(atualizacoes)
+        resultado.contratos_criados = self.repo.inserir_contratos(novos)
+
+
+# ==========================================
+# AUXILIARES
+# ==========================================
+
+def _chaves(df: pd.DataFrame, com_hash: bool = False) -> List[Dict[str, Any]]:
+    colunas = CHAVE + (["hash"] if com_hash else [])
+    registros = df[colunas].to_dict("records")
+    if com_hash:
+        for r in registros:
+            r["hash"] = int(r["hash"])
+    return registros
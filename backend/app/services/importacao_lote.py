@@ -0,0 +1,133 @@
+"""
+Base comum das importações vetorizadas (delta e COPY)
+
+Normaliza o arquivo inteiro de uma vez para colunas canônicas com tipos
+estáveis e separa as linhas inválidas, sem iterar linha a linha.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.models.contrato import StatusContrato
+from app.utils.validators import cpfs_para_numero, formatar_cpfs, validar_cpfs
+
+# Uma linha do arquivo = um contrato de um cliente
+CHAVE = ["cpf", "numero_contrato"]
+
+COLUNAS_CLIENTE = ["nome", "data_nascimento", "sexo", "telefone", "email", "endereco", "cidade", "estado", "cep"]
+COLUNAS_CONTRATO = ["numero_contrato", "valor", "vencimento", "data_contrato", "status"]
+COLUNAS_DATA = ["vencimento", "data_contrato", "data_nascimento"]
+
+SEXO = {
+    "M": "M", "MASCULINO": "M", "MASC": "M", "MALE": "M",
+    "F": "F", "FEMININO": "F", "FEM": "F", "FEMALE": "F",
+}
+
+STATUS = {
+    "pago": "pago", "quitado": "pago", "paid": "pago",
+    "atrasado": "atrasado", "atraso": "atrasado", "vencido": "atrasado", "late": "atrasado", "overdue": "atrasado",
+    "cancelado": "cancelado", "cancelled": "cancelado",
+    "negociado": "negociado", "renegociado": "negociado",
+}
+
+
+@dataclass
+class ResultadoLote:
+    """Contagens de uma importação vetorizada"""
+    linhas_gravadas: int = 0
+    inalteradas: int = 0
+    removidas: int = 0
+    clientes_criados: int = 0
+    clientes_atualizados: int = 0
+    contratos_criados: int = 0
+    contratos_atualizados: int = 0
+    erros: List[str] = field(default_factory=list)
+    detalhes: Dict[str, int] = field(default_factory=dict)
+    versao_dados: Optional[str] = None  # versão do tenant lida antes da gravação (delta)
+
+
+# ==========================================
+# NORMALIZAÇÃO
+# ==========================================
+
+def normalizar_base(df: pd.DataFrame, col_map: Dict[str, str]) -> pd.DataFrame:
+    """
+    Colunas canônicas (cpf, numero_contrato, dados do cliente e do contrato)
+    mais "linha", o número da linha no arquivo, e "cpf_numero" (Int64).
+    numero_contrato ausente vira "" para poder compor a chave; datas ficam
+    como datetime64.
+    """
+    def coluna(nome: str) -> pd.Series:
+        if nome in col_map:
+            return df[col_map[nome]].reset_index(drop=True)
+        return pd.Series([None] * len(df), dtype=object)
+
+    dados = pd.DataFrame({"linha": df.index.to_numpy() + 2})
+
+    # CPF com dígitos verificadores inválidos (ou repetidos) vira None
+    numero = cpfs_para_numero(coluna("cpf"))
+    numero = numero.where(validar_cpfs(numero))
+    dados["cpf"] = formatar_cpfs(numero)
+    dados["cpf_numero"] = numero
+    dados["numero_contrato"] = texto(coluna("numero_contrato")).fillna("")
+
+    for nome in ["nome", "telefone", "email", "endereco", "cidade", "cep"]:
+        dados[nome] = texto(coluna(nome))
+    dados["estado"] = texto(texto(coluna("estado")).astype("string").str[:2].str.upper())
+
+    valor = coluna("valor")
+    if not pd.api.types.is_numeric_dtype(valor):
+        valor = valor.astype("string").str.replace("R$", "", regex=False).str.strip()
+        decimal_virgula = valor.str.contains(",", regex=False, na=False)
+        valor = valor.where(
+            ~decimal_virgula,
+            valor.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+        )
+    dados["valor"] = pd.to_numeric(valor, errors="coerce").round(2)
+
+    for nome in COLUNAS_DATA:
+        datas = pd.to_datetime(coluna(nome), errors="coerce", format="mixed", dayfirst=True)
+        dados[nome] = datas.dt.normalize()
+
+    sexo = texto(coluna("sexo")).astype("string").str.upper()
+    mapeado = sexo.map(SEXO)
+    dados["sexo"] = mapeado.astype(object).where(sexo.isna() | mapeado.notna(), "O").where(sexo.notna(), None)
+    status = texto(coluna("status")).astype("string").str.lower()
+    dados["status"] = status.map(STATUS).fillna(StatusContrato.ATIVO.value).astype(object)
+    return dados
+
+
+def separar_invalidas(dados: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """Remove linhas sem os campos obrigatórios e as repetidas (mesma chave)"""
+    invalidas = (
+        dados["cpf"].isna() | dados["nome"].isna()
+        | ~(dados["valor"] > 0) | dados["vencimento"].isna()
+    )
+    erros = [f"Linha {n}: Dados obrigatórios inválidos" for n in dados.loc[invalidas, "linha"]]
+    return dados[~invalidas].drop_duplicates(CHAVE, keep="first"), erros
+
+
+# ==========================================
+# AUXILIARES
+# ==========================================
+
+def texto(serie: pd.Series) -> pd.Series:
+    """Texto sem espaços nas pontas; vazio vira None. Floats inteiros perdem o '.0'"""
+    if serie.isna().all():
+        # Coluna opcional ausente do arquivo
+        return pd.Series([None] * len(serie), index=serie.index, dtype=object)
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype("Int64")
+    serie = serie.astype("string").str.strip()
+    return serie.astype(object).where((serie != "").fillna(False), None)
+
+
+def registros(df: pd.DataFrame, colunas: List[str]) -> List[Dict[str, Any]]:
+    """Linhas como dicts com tipos Python (datas como date, nulos como None)"""
+    saida = df[colunas].copy()
+    for nome in colunas:
+        if pd.api.types.is_datetime64_any_dtype(saida[nome]):
+            saida[nome] = saida[nome].dt.date
+    saida = saida.astype(object).where(saida.notna(), None)
+    return saida.to_dict("records")
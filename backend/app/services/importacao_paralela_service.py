@@ -0,0 +1,155 @@
+"""
+Importação Paralela
+
+Para bases muito grandes a normalização (pandas) e a validação dominam o
+tempo e rodam em um único núcleo. O arquivo é particionado pelo CPF normalizado
+em N shards processados em um ProcessPoolExecutor; cada worker abre a própria
+sessão e grava o seu shard pelo CopyImportService. Todas as linhas de um
+cliente caem no mesmo shard, então os workers não disputam os mesmos clientes.
+
+Cada shard é gravado e commitado de forma independente. Se um shard falhar,
+os demais permanecem gravados e a importação termina com erro; como a carga é
+um upsert, reenviar o arquivo completa apenas o que faltou.
+"""
+import logging
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.services.importacao_copy_service import CopyImportService
+from app.services.importacao_lote import ResultadoLote
+from app.utils.validators import cpfs_para_numero
+
+logger = logging.getLogger("app.logger")
+
+CONTAGENS = [
+    "linhas_gravadas", "clientes_criados", "clientes_atualizados",
+    "contratos_criados", "contratos_atualizados",
+]
+
+
+class ParallelImportService:
+    """Importação de base nova particionada por CPF entre processos"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def workers() -> int:
+        return settings.IMPORT_WORKERS or os.cpu_count() or 1
+
+    @classmethod
+    def disponivel(cls, db: Session, total_linhas: int) -> bool:
+        """
+        Só compensa com mais de um núcleo e bases grandes. SQLite aceita um
+        único escritor por vez, então fica sempre no caminho serial.
+        """
+        return (
+            cls.workers() > 1
+            and total_linhas >= settings.IMPORT_PARALLEL_MIN_ROWS
+            and CopyImportService.disponivel(db)
+        )
+
+    # ==========================================
+    # API PÚBLICA
+    # ==========================================
+
+    def aplicar(
+        self, df: pd.DataFrame, col_map: Dict[str, str], tenant_id: int, sobrescrever: bool = False
+    ) -> ResultadoLote:
+        """
+        Grava o arquivo em shards paralelos (cada um com commit próprio) e
+        soma os resultados. Erros de shard entram em `erros`.
+        """
+        inicio = time.perf_counter()
+        shards = particionar(df, col_map["cpf"], self.workers())
+        url = self.db.get_bind().url.render_as_string(hide_password=False)
+
+        # spawn: o worker não herda o pool de conexões do processo pai
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(shards), mp_context=contexto) as executor:
+            futuros = [
+                executor.submit(_importar_shard, url, shard, col_map, tenant_id, sobrescrever)
+                for shard in shards
+            ]
+            parciais: List[ResultadoLote] = []
+            for numero, futuro in enumerate(futuros):
+                try:
+                    parciais.append(futuro.result())
+                except Exception as e:
+                    logger.exception("Falha no shard %s da importação do tenant %s", numero, tenant_id)
+                    parciais.append(ResultadoLote(erros=[f"Shard {numero}: {e}"]))
+
+        resultado = combinar(parciais)
+        tempo = time.perf_counter() - inicio
+        logger.info(
+            f"Importação paralela tenant={tenant_id}: {len(df)} linhas em {len(shards)} shards, "
+            f"{tempo:.2f}s ({len(df) / tempo if tempo else 0:.0f} linhas/s)"
+        )
+
+        falhas = [e for e in resultado.erros if e.startswith("Shard ")]
+        if falhas:
+            raise RuntimeError("; ".join(falhas))
+        return resultado
+
+
+# ==========================================
+# PARTICIONAMENTO
+# ==========================================
+
+def particionar(df: pd.DataFrame, coluna_cpf: str, n: int) -> List[pd.DataFrame]:
+    """
+    Divide o DataFrame em até n shards pelo CPF normalizado como na gravação
+    (cpfs_para_numero): o mesmo CPF com máscara, sem máscara ou lido como
+    float ("11144477735.0") cai no mesmo shard, senão dois workers criariam
+    o mesmo cliente. CPFs inválidos vão para o shard 0 (viram erro de linha).
+    O índice original é mantido para que os erros apontem a linha certa.
+    """
+    shard = (cpfs_para_numero(df[coluna_cpf]).fillna(0) % n).astype("int64")
+    return [parte for _, parte in df.groupby(shard, sort=True)]
+
+
+def combinar(parciais: List[ResultadoLote]) -> ResultadoLote:
+    """Soma as contagens dos shards; erros voltam em ordem de linha"""
+    resultado = ResultadoLote()
+    for parcial in parciais:
+        for campo in CONTAGENS:
+            setattr(resultado, campo, getattr(resultado, campo) + getattr(parcial, campo))
+        resultado.erros.extend(parcial.erros)
+    resultado.erros.sort(key=_numero_linha)
+    return resultado
+
+
+def _numero_linha(erro: str) -> int:
+    encontrado = re.match(r"Linha (\d+)", erro)
+    return int(encontrado.group(1)) if encontrado else 0
+
+
+# ==========================================
+# WORKER
+# ==========================================
+
+def _importar_shard(
+    url: str, shard: pd.DataFrame, col_map: Dict[str, str], tenant_id: int, sobrescrever: bool
+) -> ResultadoLote:
+    """Executa em outro processo: sessão própria, um commit por shard"""
+    engine = create_engine(url, pool_size=1, max_overflow=0)
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    try:
+        resultado = CopyImportService(db).aplicar(shard, col_map, tenant_id, sobrescrever)
+        db.commit()
+        return resultado
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,194 @@
+"""
+Agendador de Importações
+
+Controla a admissão das importações no processo:
+- uma importação por tenant de cada vez (duas cargas do mesmo tenant
+  disputariam os mesmos CPFs);
+- limite global de importações simultâneas, para que uma base enorme não
+  ocupe o servidor inteiro;
+- duas faixas de prioridade: arquivos pequenos passam na frente dos grandes.
+  Um pedido da faixa normal que espera mais que IMPORT_AGING_SECONDS é
+  promovido, então arquivos grandes não ficam parados indefinidamente.
+
+O cancelamento de um pedido ainda na fila é imediato. Importações em
+andamento são canceladas pelo status no banco (CANCELADO), verificado pelo
+UploadService a cada bloco.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.logger")
+
+FAIXA_RAPIDA = "rapida"
+FAIXA_NORMAL = "normal"
+
+
+class ImportacaoCancelada(Exception):
+    """A importação foi cancelada enquanto aguardava na fila"""
+    pass
+
+
+@dataclass
+class PedidoImportacao:
+    importacao_id: str
+    tenant_id: int
+    faixa: str
+    enfileirado_em: float
+    cancelado: bool = False
+
+
+class ImportScheduler:
+    """Fila de importações com exclusão por tenant e limite global"""
+
+    def __init__(
+        self,
+        max_concorrentes: int = settings.IMPORT_MAX_CONCURRENT,
+        limite_faixa_rapida: int = settings.IMPORT_FAST_LANE_ROWS,
+        envelhecimento: float = settings.IMPORT_AGING_SECONDS,
+    ):
+        self.max_concorrentes = max_concorrentes
+        self.limite_faixa_rapida = limite_faixa_rapida
+        self.envelhecimento = envelhecimento
+
+        self._fila: List[PedidoImportacao] = []
+        self._executando: Dict[str, PedidoImportacao] = {}
+        self._tenants_ativos: Set[int] = set()
+        self._esperas: Deque[float] = deque(maxlen=1000)
+        self._concluidas = 0
+        self._canceladas = 0
+
+        self._condicao: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ----------------------------------
+    # Admissão
+    # ----------------------------------
+    @asynccontextmanager
+    async def reservar(self, tenant_id: int, importacao_id: str, linhas: int) -> AsyncIterator[None]:
+        """
+        Aguarda a vez da importação e mantém a vaga até o fim do bloco.
+        Levanta ImportacaoCancelada se for cancelada ainda na fila.
+        """
+        pedido = PedidoImportacao(
+            importacao_id=importacao_id,
+            tenant_id=tenant_id,
+            faixa=FAIXA_RAPIDA if linhas <= self.limite_faixa_rapida else FAIXA_NORMAL,
+            enfileirado_em=time.monotonic(),
+        )
+        condicao = self._obter_condicao()
+
+        async with condicao:
+            self._fila.append(pedido)
+            try:
+                await condicao.wait_for(lambda: pedido.cancelado or self._proximo() is pedido)
+            finally:
+                self._fila.remove(pedido)
+                # Libera a vez para o próximo (inclusive se a tarefa foi cancelada)
+                condicao.notify_all()
+
+            if pedido.cancelado:
+                self._canceladas += 1
+                raise ImportacaoCancelada(importacao_id)
+
+            self._executando[importacao_id] = pedido
+            self._tenants_ativos.add(tenant_id)
+            self._esperas.append(time.monotonic() - pedido.enfileirado_em)
+
+        try:
+            yield
+        finally:
+            async with condicao:
+                self._executando.pop(importacao_id, None)
+                self._tenants_ativos.discard(tenant_id)
+                self._concluidas += 1
+                condicao.notify_all()
+
+    async def cancelar(self, importacao_id: str) -> bool:
+        """Retira um pedido da fila. Retorna False se não estava aguardando."""
+        condicao = self._obter_condicao()
+        async with condicao:
+            for pedido in self._fila:
+                if pedido.importacao_id == importacao_id:
+                    pedido.cancelado = True
+                    condicao.notify_all()
+                    return True
+        return False
+
+    def contem(self, importacao_id: str) -> bool:
+        """Se a importação está na fila ou em execução neste processo"""
+        return importacao_id in self._executando or any(
+            p.importacao_id == importacao_id for p in self._fila
+        )
+
+    # ----------------------------------
+    # Métricas
+    # ----------------------------------
+    def metricas(self, tenant_id: Optional[int] = None) -> Dict[str, Any]:
+        agora = time.monotonic()
+        fila = [p for p in self._fila if tenant_id is None or p.tenant_id == tenant_id]
+        ordenadas = sorted(self._esperas)
+
+        def percentil(p: float) -> float:
+            if not ordenadas:
+                return 0.0
+            return round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p))], 2)
+
+        return {
+            "max_concorrentes": self.max_concorrentes,
+            "executando": len(self._executando),
+            "na_fila": len(fila),
+            "na_fila_por_faixa": {
+                faixa: sum(1 for p in fila if p.faixa == faixa) for faixa in (FAIXA_RAPIDA, FAIXA_NORMAL)
+            },
+            "maior_espera_atual_s": round(max((agora - p.enfileirado_em for p in fila), default=0.0), 2),
+            "espera_p50_s": percentil(0.50),
+            "espera_p99_s": percentil(0.99),
+            "concluidas": self._concluidas,
+            "canceladas_na_fila": self._canceladas,
+            "fila": [
+                {
+                    "importacao_id": p.importacao_id,
+                    "tenant_id": p.tenant_id,
+                    "faixa": p.faixa,
+                    "esperando_s": round(agora - p.enfileirado_em, 2),
+                }
+                for p in fila
+            ],
+        }
+
+    # ----------------------------------
+    # Auxiliares
+    # ----------------------------------
+    def _proximo(self) -> Optional[PedidoImportacao]:
+        """
+        Próximo pedido a ser admitido: entre os de tenants sem importação
+        ativa, primeiro a faixa rápida (ou promovida), depois ordem de chegada.
+        """
+        if len(self._executando) >= self.max_concorrentes:
+            return None
+        agora = time.monotonic()
+
+        def prioridade(p: PedidoImportacao):
+            rapida = p.faixa == FAIXA_RAPIDA or agora - p.enfileirado_em >= self.envelhecimento
+            return (0 if rapida else 1, p.enfileirado_em)
+
+        elegiveis = [p for p in self._fila if not p.cancelado and p.tenant_id not in self._tenants_ativos]
+        return min(elegiveis, key=prioridade, default=None)
+
+    def _obter_condicao(self) -> asyncio.Condition:
+        # A Condition fica presa ao event loop em que foi usada pela primeira vez
+        loop = asyncio.get_running_loop()
+        if self._condicao is None or self._loop is not loop:
+            self._condicao = asyncio.Condition()
+            self._loop = loop
+        return self._condicao
+
+
+import_scheduler = ImportScheduler()
@@ -1 +1,444 @@
-# Payment service
+"""
+Serviço de Pagamentos e Conciliação
+
+Recebe pagamentos de arquivos de liquidação do gateway (CSV/JSON/Excel),
+de webhooks ou de baixas manuais, concilia com os contratos do tenant por
+número do contrato ou CPF e aplica valor_pago, data_pagamento e status em lote.
+
+O processamento é vetorizado (pandas): o casamento usa índices hash por tenant
+(dict número -> contrato e CPF -> contrato) e a aplicação nos contratos é um
+único UPDATE em lote por chave primária. O UPDATE soma o valor do lote ao
+valor_pago corrente da linha (e deriva o status do resultado no banco), de
+modo que conciliações concorrentes no mesmo contrato não se sobrescrevem.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import date
+from io import BytesIO
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+from uuid import uuid4
+
+import pandas as pd
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import NotFoundException
+from app.db.session import definir_tenant
+from app.db.sharding import em_cada_shard, ha_shards
+from app.models.contrato import StatusContrato
+from app.models.payment import Pagamento, StatusPagamento
+from app.repositories.payment_repository import PagamentoRepository
+from app.repositories.tenant_repository import TenantRepository
+from app.schemas.payment import PaymentCreate, PaymentResponse, ResultadoConciliacao
+
+logger = logging.getLogger("app.logger")
+
+
+class IndiceContratos:
+    """Índices hash dos contratos conciliáveis de um tenant"""
+
+    def __init__(self, rows: List):
+        contratos = pd.DataFrame(
+            [
+                (
+                    r.id, r.numero_contrato, r.cpf,
+                    float(r.valor_atualizado or r.valor_original or 0),
+                    float(r.valor_pago or 0),
+                    r.data_pagamento, r.data_vencimento, r.status,
+                )
+                for r in rows
+            ],
+            columns=[
+                "id", "numero_contrato", "cpf", "valor_devido", "valor_pago",
+                "data_pagamento", "data_vencimento", "status",
+            ],
+        )
+        self.contratos = contratos.set_index("id")
+
+        com_numero = contratos[contratos["numero_contrato"].notna()]
+        self.por_numero: Dict[str, int] = dict(zip(com_numero["numero_contrato"], com_numero["id"]))
+
+        # Pagamento identificado só pelo CPF abate o contrato em aberto mais antigo
+        em_aberto = contratos[contratos["status"] != StatusContrato.PAGO]
+        mais_antigo = em_aberto.sort_values("data_vencimento").drop_duplicates("cpf")
+        self.por_cpf: Dict[str, int] = dict(zip(mais_antigo["cpf"], mais_antigo["id"]))
+
+    def localizar(self, numeros: pd.Series, cpfs: pd.Series) -> pd.Series:
+        """Contrato de cada pagamento (número do contrato tem precedência sobre CPF)"""
+        return numeros.map(self.por_numero).fillna(cpfs.map(self.por_cpf)).astype("Int64")
+
+class ConciliacaoService:
+    """Conciliação de pagamentos com contratos"""
+
+    # Acima deste volume o índice do tenant é carregado inteiro (uma query);
+    # abaixo, apenas os contratos referenciados no lote (IN em lotes)
+    LIMIAR_INDICE_COMPLETO = 20_000
+
+    COLUNAS = {
+        "identificador": ["identificador", "id_pagamento", "id", "transaction_id", "txid", "nsu"],
+        "numero_contrato": ["numero_contrato", "contrato", "num_contrato", "contract", "nro_contrato"],
+        "cpf": ["cpf", "cpf_cnpj", "documento", "doc"],
+        "valor": ["valor", "valor_pago", "amount", "value"],
+        "data_pagamento": ["data_pagamento", "dt_pagamento", "data", "paid_at", "payment_date"],
+        "metodo": ["metodo", "method", "forma_pagamento"],
+    }
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = PagamentoRepository(db)
+
+    # ==========================================
+    # ENTRADAS
+    # ==========================================
+
+    def conciliar_arquivo(
+        self, conteudo: Union[bytes, BinaryIO], filename: str, tenant_id: int
+    ) -> ResultadoConciliacao:
+        """Concilia um arquivo de liquidação do gateway (bytes ou arquivo aberto)"""
+        return self.conciliar(self._ler_arquivo(conteudo, filename), tenant_id, origem="arquivo")
+
+    def registrar_manual(self, payload: PaymentCreate, tenant_id: int) -> PaymentResponse:
+        identificador = f"manual-{uuid4()}"
+        self.conciliar(
+            pd.DataFrame([{
+                "identificador": identificador,
+                "numero_contrato": payload.contract_number,
+                "cpf": payload.cpf,
+                "valor": payload.amount,
+                "data_pagamento": payload.paid_at or date.today(),
+                "metodo": payload.method,
+            }]),
+            tenant_id,
+            origem="manual",
+        )
+        pagamento = self.repo._base_query(tenant_id).filter(
+            Pagamento.identificador_externo == identificador
+        ).first()
+        return self._to_response(pagamento)
+
+    def listar(self, tenant_id: Optional[int], pagina: int = 1, por_pagina: int = 100) -> List[PaymentResponse]:
+        pagamentos = self.repo.list(tenant_id, skip=(pagina - 1) * por_pagina, limit=por_pagina)
+        return [self._to_response(p) for p in pagamentos]
+
+    def obter(self, pagamento_id: int, tenant_id: Optional[int]) -> PaymentResponse:
+        pagamento = self.repo.get_by_id(pagamento_id, tenant_id)
+        if not pagamento:
+            raise NotFoundException("Pagamento não encontrado")
+        return self._to_response(pagamento)
+
+    # ==========================================
+    # CONCILIAÇÃO
+    # ==========================================
+
+    def conciliar(
+        self,
+        df: pd.DataFrame,
+        tenant_id: int,
+        origem: str,
+        commit: bool = True,
+    ) -> ResultadoConciliacao:
+        """
+        Concilia um lote de pagamentos já com as colunas canônicas
+        (identificador, numero_contrato, cpf, valor, data_pagamento, metodo).
+        Com commit=False, apenas executa as escritas na transação corrente.
+        """
+        inicio = time.perf_counter()
+        # Inserts sem critério de tenant (pagamentos) vão para o shard do tenant
+        definir_tenant(self.db, tenant_id)
+        total = len(df)
+        df = self._normalizar(df)
+
+        invalidos = df["valor"].isna() | (df["valor"] <= 0) | (
+            df["numero_contrato"].isna() & df["cpf"].isna()
+        )
+        df = df[~invalidos]
+
+        # Idempotência: repetidos no próprio lote ou já registrados
+        tem_id = df["identificador"].notna()
+        indice_completo = len(df) > self.LIMIAR_INDICE_COMPLETO
+        existentes = self.repo.identificadores_existentes(
+            tenant_id,
+            None if indice_completo else df.loc[tem_id, "identificador"].unique().tolist(),
+        )
+        duplicados = tem_id & (df["identificador"].duplicated() | df["identificador"].isin(existentes))
+        df = df[~duplicados]
+
+        if indice_completo:
+            rows = self.repo.list_contratos_para_conciliacao(tenant_id)
+        else:
+            rows = self.repo.list_contratos_para_conciliacao(
+                tenant_id,
+                numeros=df["numero_contrato"].dropna().unique().tolist(),
+                cpfs=df["cpf"].dropna().unique().tolist(),
+            )
+        indice = IndiceContratos(rows)
+        df = df.assign(contrato_id=indice.localizar(df["numero_contrato"], df["cpf"]))
+        conciliados = df[df["contrato_id"].notna()]
+
+        agregado = conciliados.groupby("contrato_id").agg(
+            valor=("valor", "sum"), data_pagamento=("data_pagamento", "max")
+        )
+        agregado.index = agregado.index.astype("int64")
+
+        self.repo.inserir_lote(self._registros_pagamento(df, tenant_id, origem))
+        # Incremento relativo: o snapshot do índice serve só para localizar os contratos
+        self.repo.aplicar_em_contratos(tenant_id, [
+            {"contrato_id": int(contrato_id), "valor": round(float(valor), 2), "data": data_pagamento.date()}
+            for contrato_id, valor, data_pagamento in zip(
+                agregado.index, agregado["valor"], agregado["data_pagamento"]
+            )
+        ])
+        # Quitados pelo lote: PAGO depois do UPDATE e ainda em aberto no snapshot
+        em_aberto = indice.contratos.index[indice.contratos["status"] != StatusContrato.PAGO]
+        quitados = sorted(
+            self.repo.contratos_pagos(tenant_id, agregado.index.intersection(em_aberto).tolist())
+        )
+        TenantRepository(self.db).incrementar_versao(tenant_id)
+        if commit:
+            self.db.commit()
+
+        if commit and quitados:
+            self._atualizar_segmentos(tenant_id, quitados)
+
+        tempo = time.perf_counter() - inicio
+        resultado = ResultadoConciliacao(
+            total=total,
+            conciliados=len(conciliados),
+            nao_encontrados=len(df) - len(conciliados),
+            duplicados=int(duplicados.sum()),
+            invalidos=int(invalidos.sum()),
+            contratos_atualizados=len(agregado),
+            contratos_quitados=len(quitados),
+            valor_conciliado=round(float(conciliados["valor"].sum()), 2),
+            tempo_segundos=round(tempo, 3),
+            pagamentos_por_segundo=round(total / tempo, 1) if tempo > 0 else 0.0,
+        )
+        logger.info(
+            f"Conciliação tenant={tenant_id} origem={origem}: {total} pagamentos, "
+            f"{resultado.conciliados} conciliados em {tempo:.2f}s ({resultado.pagamentos_por_segundo:.0f}/s)"
+        )
+        return resultado
+
+    # ==========================================
+    # MÉTODOS AUXILIARES PRIVADOS
+    # ==========================================
+
+    def _ler_arquivo(self, conteudo: Union[bytes, BinaryIO], filename: str) -> pd.DataFrame:
+        """Lê CSV, JSON ou Excel e mapeia as colunas para os nomes canônicos"""
+        nome = filename.lower()
+        arquivo = BytesIO(conteudo) if isinstance(conteudo, bytes) else conteudo
+        try:
+            if nome.endswith(".csv"):
+                primeira_linha = arquivo.read(4096).split(b"\n", 1)[0]
+                sep = ";" if primeira_linha.count(b";") > primeira_linha.count(b",") else ","
+                for encoding in ["utf-8", "latin-1"]:
+                    try:
+                        arquivo.seek(0)
+                        df = pd.read_csv(arquivo, sep=sep, dtype=str, encoding=encoding)
+                        break
+                    except UnicodeDecodeError:
+                        continue
+            elif nome.endswith(".json"):
+                data = json.load(arquivo)
+                if isinstance(data, dict):
+                    data = data.get("payments") or data.get("pagamentos") or data.get("results") or []
+                df = pd.DataFrame(data, dtype=str)
+            elif nome.endswith((".xlsx", ".xls")):
+                df = pd.read_excel(arquivo, dtype=str)
+            else:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Formato não suportado. Use CSV, JSON ou Excel",
+                )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Erro ao ler arquivo: {str(e)}",
+            )
+
+        colunas = {c.lower().strip(): c for c in df.columns}
+        mapeamento = {}
+        for campo, alternativas in self.COLUNAS.items():
+            for nome_coluna in alternativas:
+                if nome_coluna in colunas:
+                    mapeamento[colunas[nome_coluna]] = campo
+                    break
+
+        if "valor" not in mapeamento.values() or not {"numero_contrato", "cpf"} & set(mapeamento.values()):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O arquivo deve conter a coluna de valor e o número do contrato ou o CPF",
+            )
+        return df[list(mapeamento)].rename(columns=mapeamento)
+
+    def _normalizar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normaliza tipos de forma vetorizada"""
+        df = df.reindex(columns=list(self.COLUNAS)).reset_index(drop=True)
+
+        def texto(serie: pd.Series) -> pd.Series:
+            serie = serie.astype("string").str.strip()
+            return serie.where(serie.notna() & (serie != ""), None).astype(object)
+
+        df["identificador"] = texto(df["identificador"])
+        df["numero_contrato"] = texto(df["numero_contrato"])
+        df["metodo"] = texto(df["metodo"])
+
+        digitos = df["cpf"].astype("string").str.replace(r"\D", "", regex=True).str.zfill(11)
+        cpf = (
+            digitos.str[:3] + "." + digitos.str[3:6] + "." + digitos.str[6:9] + "-" + digitos.str[9:]
+        )
+        df["cpf"] = cpf.where(digitos.str.len() == 11, None).astype(object)
+
+        valor = df["valor"]
+        if not pd.api.types.is_numeric_dtype(valor):
+            valor = valor.astype("string").str.replace("R$", "", regex=False).str.strip()
+            decimal_virgula = valor.str.contains(",", regex=False, na=False)
+            valor = valor.where(
+                ~decimal_virgula,
+                valor.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+            )
+        df["valor"] = pd.to_numeric(valor, errors="coerce").round(2)
+
+        datas = pd.to_datetime(df["data_pagamento"], errors="coerce", format="mixed", dayfirst=True)
+        df["data_pagamento"] = datas.dt.normalize().fillna(pd.Timestamp(date.today()))
+        return df
+
+    def _registros_pagamento(self, df: pd.DataFrame, tenant_id: int, origem: str) -> List[dict]:
+        conciliado = df["contrato_id"].notna()
+        registros = pd.DataFrame({
+            "tenant_id": tenant_id,
+            "identificador_externo": df["identificador"],
+            "contrato_id": df["contrato_id"].astype(object).where(conciliado, None),
+            "numero_contrato": df["numero_contrato"],
+            "cpf": df["cpf"],
+            "status": conciliado.map({True: StatusPagamento.CONCILIADO, False: StatusPagamento.NAO_ENCONTRADO}),
+            "valor": df["valor"],
+            "data_pagamento": df["data_pagamento"].dt.date,
+            "metodo": df["metodo"],
+            "origem": origem,
+        })
+        return registros.to_dict("records")
+
+    def _atualizar_segmentos(self, tenant_id: int, contrato_ids: List[int]) -> None:
+        """Remove das audiências os contratos quitados"""
+        from app.services.segmentation_service import SegmentationService
+
+        try:
+            SegmentationService(self.db).atualizar_membros(tenant_id, contrato_ids=contrato_ids)
+        except Exception:
+            self.db.rollback()
+            logger.exception(f"Falha ao atualizar segmentos do tenant {tenant_id}")
+
+    @staticmethod
+    def _to_response(pagamento: Pagamento) -> PaymentResponse:
+        return PaymentResponse(
+            id=pagamento.id,
+            amount=float(pagamento.valor),
+            method=pagamento.metodo,
+            status=pagamento.status.value,
+            origem=pagamento.origem,
+            contrato_id=pagamento.contrato_id,
+            numero_contrato=pagamento.numero_contrato,
+            data_pagamento=pagamento.data_pagamento,
+            created_at=pagamento.created_at,
+        )
+
+
+# ==========================================
+# WEBHOOK DO GATEWAY
+# ==========================================
+
+STATUS_PAGO_GATEWAY = {"paid", "approved", "pago", "aprovado", "settled"}
+
+
+def aplicar_eventos_pagamento(db: Session, eventos: List[dict]) -> List[bool]:
+    """
+    Aplicador do WebhookFlusher para callbacks do gateway.
+
+    Só eventos com status de pagamento confirmado são conciliados; sem
+    status, ou com status desconhecido, o evento é apenas registrado. O
+    tenant nunca vem do corpo: é o do contrato casado pelo número (ou, na
+    falta dele, pelo CPF). Eventos que não casam com exatamente um tenant
+    ficam pendentes e são reprocessados enquanto estiverem na janela.
+
+    Cada tenant é conciliado e commitado à parte, no banco (shard) dele; o
+    log dos eventos é gravado depois, no primário. Reaplicar um evento é
+    inofensivo: o identificador do pagamento é único por tenant.
+    """
+    aplicados = [True] * len(eventos)
+    posicoes = [
+        i for i, evento in enumerate(eventos)
+        if str(evento.get("status") or "").lower() in STATUS_PAGO_GATEWAY
+    ]
+    if not posicoes:
+        return aplicados
+
+    pagamentos = [
+        {
+            "identificador": _identificador_do_evento(eventos[i]),
+            "numero_contrato": eventos[i].get("numero_contrato") or eventos[i].get("contract_number"),
+            "cpf": eventos[i].get("cpf"),
+            "valor": eventos[i].get("valor") or eventos[i].get("amount"),
+            "data_pagamento": eventos[i].get("data_pagamento") or eventos[i].get("paid_at"),
+            "metodo": eventos[i].get("metodo") or eventos[i].get("method"),
+        }
+        for i in posicoes
+    ]
+    service = ConciliacaoService(db)
+    tenants = _tenants_dos_pagamentos(db, service._normalizar(pd.DataFrame(pagamentos)))
+
+    por_tenant: Dict[int, List[Tuple[int, dict]]] = {}
+    for i, pagamento, tenant_id in zip(posicoes, pagamentos, tenants):
+        if tenant_id is None:
+            aplicados[i] = False
+        else:
+            por_tenant.setdefault(tenant_id, []).append((i, pagamento))
+
+    for tenant_id, lote in por_tenant.items():
+        try:
+            service.conciliar(pd.DataFrame([p for _, p in lote]), tenant_id, origem="webhook")
+        except Exception:
+            db.rollback()
+            logger.exception(f"Falha ao conciliar webhooks do tenant {tenant_id}")
+            for i, _ in lote:
+                aplicados[i] = False
+    return aplicados
+
+
+def _identificador_do_evento(evento: dict) -> str:
+    identificador = evento.get("id") or evento.get("transaction_id")
+    if identificador:
+        return str(identificador)
+    # Sem id do gateway: hash do corpo, para que reaplicar o evento não duplique o pagamento
+    corpo = json.dumps(evento, sort_keys=True, ensure_ascii=False, default=str)
+    return "webhook-" + hashlib.sha256(corpo.encode()).hexdigest()[:32]
+
+
+def _tenants_dos_pagamentos(db: Session, df: pd.DataFrame) -> List[Optional[int]]:
+    """Tenant de cada pagamento normalizado; None se nenhum ou mais de um casar"""
+    numeros = df["numero_contrato"].dropna().unique().tolist()
+    cpfs = df["cpf"].dropna().unique().tolist()
+
+    def consultar(sessao: Session):
+        repo = PagamentoRepository(sessao)
+        return repo.tenants_por_numero_contrato(numeros), repo.tenants_por_cpf(cpfs)
+
+    por_numero, por_cpf = defaultdict(set), defaultdict(set)
+    for numero_tenant, cpf_tenant in (em_cada_shard(consultar) if ha_shards() else [consultar(db)]):
+        for numero, tenant_id in numero_tenant:
+            por_numero[numero].add(tenant_id)
+        for cpf, tenant_id in cpf_tenant:
+            por_cpf[cpf].add(tenant_id)
+
+    tenants = []
+    for numero, cpf in zip(df["numero_contrato"], df["cpf"]):
+        candidatos = por_numero.get(numero) if numero is not None else None
+        if not candidatos and cpf is not None:
+            candidatos = por_cpf.get(cpf)
+        tenants.append(next(iter(candidatos)) if candidatos and len(candidatos) == 1 else None)
+    return tenants
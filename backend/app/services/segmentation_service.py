@@ -1 +1,258 @@
-# Segmentation service
+"""
+Serviço de Segmentação
+Avalia a pertinência de contratos a segmentos (faixas de D+) e materializa
+a associação na tabela segmento_contratos.
+"""
+import logging
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import List, Optional, Dict, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import BadRequestException, ConflictException, NotFoundException
+from app.db.session import definir_tenant
+from app.db.sharding import em_cada_shard, ha_shards
+from app.models.segmentation import Segmento
+from app.repositories.segmentation_repository import SegmentoRepository
+from app.repositories.tenant_repository import TenantRepository
+from app.schemas.segmentation import (
+    SegmentCreate, SegmentResponse, SimulacaoSegmento,
+    ResultadoAtualizacaoSegmentos, ContratoAudiencia, AudienciaSegmento,
+)
+
+logger = logging.getLogger("app.logger")
+
+
+class IndiceSegmentos:
+    """
+    Índice ordenado de faixas [min, max] sem sobreposição.
+    A busca é feita com bisect sobre os inícios das faixas: O(log n) por contrato.
+    """
+
+    def __init__(self, segmentos: Sequence[Segmento]):
+        ordenados = sorted(segmentos, key=lambda s: s.min_dias_atraso)
+        self._inicios = [s.min_dias_atraso for s in ordenados]
+        self._fins = [s.max_dias_atraso for s in ordenados]
+        self._segmentos = list(ordenados)
+
+    def __len__(self) -> int:
+        return len(self._segmentos)
+
+    def localizar(self, dias_atraso: int) -> Optional[Segmento]:
+        """Retorna o segmento cuja faixa contém dias_atraso"""
+        pos = bisect_right(self._inicios, dias_atraso) - 1
+        if pos >= 0 and dias_atraso <= self._fins[pos]:
+            return self._segmentos[pos]
+        return None
+
+    def conflitos(self, min_dias: int, max_dias: int) -> List[Segmento]:
+        """Retorna os segmentos cuja faixa se sobrepõe a [min_dias, max_dias]"""
+        pos = bisect_right(self._inicios, max_dias)
+        return [
+            s for s in self._segmentos[:pos]
+            if s.max_dias_atraso >= min_dias
+        ]
+
+
+class SegmentationService:
+    """Serviço para gestão de segmentos e de suas audiências"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repo = SegmentoRepository(db)
+
+    # ==========================================
+    # SEGMENTOS
+    # ==========================================
+
+    def criar_segmento(self, payload: SegmentCreate, tenant_id: int) -> SegmentResponse:
+        if payload.min_days_overdue < 0 or payload.max_days_overdue < 0:
+            raise BadRequestException("Dias de atraso inválidos")
+        if payload.min_days_overdue > payload.max_days_overdue:
+            raise BadRequestException("Intervalo inválido")
+
+        indice = IndiceSegmentos(self.repo.list(tenant_id))
+        conflitos = indice.conflitos(payload.min_days_overdue, payload.max_days_overdue)
+        if conflitos:
+            nomes = ", ".join(s.nome for s in conflitos)
+            raise ConflictException(f"Faixa sobreposta a segmentos existentes: {nomes}")
+
+        TenantRepository(self.db).incrementar_versao_segmentos(tenant_id)  # commitado pelo create
+        segmento = self.repo.create(
+            tenant_id, payload.name, payload.min_days_overdue, payload.max_days_overdue
+        )
+        self.atualizar_membros(tenant_id)
+        self.db.refresh(segmento)
+        return self._to_response(segmento, self.repo.count_membros(tenant_id))
+
+    def listar_segmentos(self, tenant_id: Optional[int] = None) -> List[SegmentResponse]:
+        contagem = self.repo.count_membros(tenant_id)
+        return [self._to_response(s, contagem) for s in self.repo.list(tenant_id)]
+
+    def remover_segmento(self, segmento_id: int, tenant_id: Optional[int] = None) -> None:
+        segmento = self.repo.get_by_id(segmento_id, tenant_id)
+        if not segmento:
+            raise NotFoundException("Segmento não encontrado")
+        # Commitado junto com a exclusão
+        TenantRepository(self.db).incrementar_versao_segmentos(segmento.tenant_id)
+        self.repo.delete(segmento)
+
+    def simular(self, dias_atraso: int, tenant_id: int) -> SimulacaoSegmento:
+        if dias_atraso < 0:
+            raise BadRequestException("Dias inválidos")
+        segmento = IndiceSegmentos(self.repo.list(tenant_id)).localizar(dias_atraso)
+        return SimulacaoSegmento(
+            days_overdue=dias_atraso,
+            segment=segmento.nome if segmento else None,
+            segment_id=segmento.id if segmento else None,
+        )
+
+    # ==========================================
+    # AVALIAÇÃO E MATERIALIZAÇÃO
+    # ==========================================
+
+    def avaliar(
+        self,
+        indice: IndiceSegmentos,
+        contratos: Sequence[Tuple[int, date]],
+        hoje: Optional[date] = None,
+    ) -> Dict[int, int]:
+        """
+        Avalia, em uma única passada, a qual segmento pertence cada contrato.
+        Retorna {contrato_id: segmento_id} apenas para contratos com segmento.
+        """
+        hoje = hoje or date.today()
+        membros = {}
+        if not len(indice):
+            return membros
+
+        for contrato_id, vencimento in contratos:
+            dias = (hoje - vencimento).days if vencimento and hoje > vencimento else 0
+            segmento = indice.localizar(dias)
+            if segmento is not None:
+                membros[contrato_id] = segmento.id
+        return membros
+
+    def atualizar_membros(
+        self,
+        tenant_id: int,
+        contrato_ids: Optional[List[int]] = None,
+        hoje: Optional[date] = None,
+    ) -> ResultadoAtualizacaoSegmentos:
+        """
+        Recalcula a associação contrato x segmento do tenant.
+
+        A atualização é incremental: apenas contratos cujo segmento mudou são
+        removidos/inseridos. Se contrato_ids for informado, só esses contratos
+        são reavaliados (ex.: contratos tocados por uma importação).
+        """
+        # Inserts e flush dos segmentos vão para o shard do tenant
+        definir_tenant(self.db, tenant_id)
+        segmentos = self.repo.list(tenant_id)
+        indice = IndiceSegmentos(segmentos)
+
+        contratos = self.repo.list_contratos_para_avaliacao(tenant_id, contrato_ids)
+        desejado = self.avaliar(indice, contratos, hoje)
+        atual = self.repo.get_membros(tenant_id, contrato_ids)
+
+        alterados = [
+            contrato_id for contrato_id, segmento_id in atual.items()
+            if desejado.get(contrato_id) != segmento_id
+        ]
+        novos = {
+            contrato_id: segmento_id for contrato_id, segmento_id in desejado.items()
+            if atual.get(contrato_id) != segmento_id
+        }
+
+        removidos = self.repo.remover_membros(tenant_id, alterados)
+        adicionados = self.repo.inserir_membros(tenant_id, novos)
+
+        agora = datetime.now()
+        for segmento in segmentos:
+            segmento.membros_atualizados_em = agora
+        if removidos or adicionados:
+            TenantRepository(self.db).incrementar_versao_segmentos(tenant_id)
+        self.db.commit()
+
+        total_membros = sum(self.repo.count_membros(tenant_id).values())
+
+        logger.info(
+            "Segmentação tenant=%s | avaliados=%s | +%s -%s",
+            tenant_id, len(contratos), adicionados, removidos,
+        )
+
+        return ResultadoAtualizacaoSegmentos(
+            tenant_id=tenant_id,
+            contratos_avaliados=len(contratos),
+            adicionados=adicionados,
+            removidos=removidos,
+            total_membros=total_membros,
+        )
+
+    def atualizar_todos(self, hoje: Optional[date] = None) -> List[ResultadoAtualizacaoSegmentos]:
+        """Reavalia todos os tenants com segmentos (envelhecimento diário do D+)"""
+        if ha_shards():
+            por_shard = em_cada_shard(lambda db: SegmentoRepository(db).tenants_com_segmentos())
+            tenants = [tenant_id for parcial in por_shard for tenant_id in parcial]
+        else:
+            tenants = self.repo.tenants_com_segmentos()
+        return [self.atualizar_membros(tenant_id, hoje=hoje) for tenant_id in tenants]
+
+    # ==========================================
+    # AUDIÊNCIA
+    # ==========================================
+
+    def get_audiencia(
+        self,
+        segmento_id: int,
+        tenant_id: Optional[int] = None,
+        pagina: int = 1,
+        por_pagina: int = 100,
+    ) -> AudienciaSegmento:
+        segmento = self.repo.get_by_id(segmento_id, tenant_id)
+        if not segmento:
+            raise NotFoundException("Segmento não encontrado")
+
+        total, rows = self.repo.get_audiencia(
+            segmento_id, skip=(pagina - 1) * por_pagina, limit=por_pagina
+        )
+        hoje = date.today()
+
+        return AudienciaSegmento(
+            segmento_id=segmento_id,
+            contratos=[
+                ContratoAudiencia(
+                    contrato_id=r.contrato_id,
+                    numero_contrato=r.numero_contrato,
+                    cliente_id=r.cliente_id,
+                    cliente_nome=r.nome,
+                    cpf_mascarado=f"***.***.{r.cpf[-7:]}" if r.cpf and len(r.cpf) >= 7 else "***.***.***-**",
+                    telefone=r.telefone,
+                    email=r.email,
+                    valor_original=r.valor_original,
+                    data_vencimento=r.data_vencimento,
+                    dias_atraso=max(0, (hoje - r.data_vencimento).days),
+                )
+                for r in rows
+            ],
+            total=total,
+            pagina=pagina,
+            por_pagina=por_pagina,
+        )
+
+    # ==========================================
+    # AUXILIARES
+    # ==========================================
+
+    def _to_response(self, segmento: Segmento, contagem: Dict[int, int]) -> SegmentResponse:
+        return SegmentResponse(
+            id=segmento.id,
+            name=segmento.nome,
+            min_days_overdue=segmento.min_dias_atraso,
+            max_days_overdue=segmento.max_dias_atraso,
+            total_contratos=contagem.get(segmento.id, 0),
+            tenant_id=segmento.tenant_id,
+            created_at=segmento.created_at,
+            membros_atualizados_em=segmento.membros_atualizados_em,
+        )
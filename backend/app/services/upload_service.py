@@ -2,7 +2,6 @@ import pandas as pd
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from datetime import datetime, date
-from io import BytesIO
 
 from sqlalchemy.orm import Session
 from fastapi import UploadFile, HTTPException, status
@@ -11,6 +10,8 @@ from app.models.cliente import Cliente, Sexo
 from app.models.contrato import Contrato, StatusContrato
 from app.repositories.cliente_repository import ClienteRepository
 from app.repositories.contrato_repository import ContratoRepository
+from app.repositories.tenant_repository import TenantRepository
+from app.utils.validators import cpf_para_numero, validar_cpf
 
 
 class UploadService:
@@ -97,13 +98,12 @@ class UploadService:
         """Normaliza CPF"""
         if pd.isna(value) or value is None:
             return ""
-        cpf = str(value).strip()
-        # Remove caracteres não numéricos
-        cpf_nums = ''.join(filter(str.isdigit, cpf))
+        # Dígitos verificadores inválidos: tratado como CPF ausente
+        if not validar_cpf(value):
+            return ""
+        cpf_nums = f"{cpf_para_numero(value):011d}"
         # Formata XXX.XXX.XXX-XX
-        if len(cpf_nums) == 11:
-            return f"{cpf_nums[:3]}.{cpf_nums[3:6]}.{cpf_nums[6:9]}-{cpf_nums[9:]}"
-        return cpf
+        return f"{cpf_nums[:3]}.{cpf_nums[3:6]}.{cpf_nums[6:9]}-{cpf_nums[9:]}"
 
     def _parse_sexo(self, value) -> Optional[Sexo]:
         """Converte valor para Sexo"""
@@ -150,8 +150,8 @@ class UploadService:
         
         # Lê o arquivo
         try:
-            contents = await file.read()
-            df = pd.read_excel(BytesIO(contents))
+            await file.seek(0)
+            df = pd.read_excel(file.file)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -222,7 +222,8 @@ class UploadService:
             except Exception as e:
                 erros.append(f"Linha {idx + 2}: {str(e)}")
         
-        # Commit
+        # Commit (a nova versão invalida ETags e fingerprints da importação delta)
+        TenantRepository(self.db).incrementar_versao(tenant_id)
         self.db.commit()
         
         return {
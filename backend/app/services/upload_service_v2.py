@@ -2,22 +2,38 @@
 Serviço Completo para Upload e Gestão de Base
 Inclui: Preview, Validação, Importação, Atualização
 """
+import asyncio
+import gzip
+import io
+import logging
+import os
 import pandas as pd
 import uuid
-from typing import List, Dict, Any, Optional, Tuple
+import zipfile
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Tuple, Callable, Union, BinaryIO
 from decimal import Decimal
-from datetime import datetime, date
-from io import BytesIO
+from datetime import datetime, date, timedelta
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, update
 from fastapi import UploadFile, HTTPException, status
 
+from app.core.config import settings
+from app.db.sharding import ha_shards, paginar_em_shards
 from app.models.cliente import Cliente, Sexo
 from app.models.contrato import Contrato, StatusContrato
 from app.models.importacao_log import ImportacaoLog, TipoImportacao as TipoImportacaoModel, StatusImportacao as StatusImportacaoModel
 from app.repositories.cliente_repository import ClienteRepository
 from app.repositories.contrato_repository import ContratoRepository
+from app.repositories.tenant_repository import TenantRepository
+from app.services.segmentation_service import SegmentationService
+from app.services.importacao_delta_service import DeltaImportService
+from app.services.importacao_copy_service import CopyImportService
+from app.services.importacao_paralela_service import ParallelImportService
+from app.services.importacao_scheduler import ImportacaoCancelada, import_scheduler
+from app.services.importacao_lote import ResultadoLote, normalizar_base
+from app.utils.validators import cpf_para_numero, validar_cpf
 from app.schemas.upload import (
     TipoImportacao, StatusImportacao, StatusValidacao,
     CampoObrigatorio, CampoOpcional, EstruturaCampos,
@@ -25,6 +41,11 @@ from app.schemas.upload import (
     LogImportacao, ListaLogsImportacao
 )
 
+logger = logging.getLogger("app.logger")
+
+# Extensões aceitas no upload de base
+FORMATOS_SUPORTADOS = (".csv", ".csv.gz", ".zip", ".xlsx", ".xls", ".parquet", ".feather")
+
 
 class UploadService:
     """Serviço completo para processamento de uploads de base"""
@@ -130,6 +151,16 @@ class UploadService:
     # Cache de preview para confirmar importação
     _preview_cache: Dict[str, Dict] = {}
 
+    # Importação em PROCESSANDO sem checkpoint novo há mais que isso é
+    # considerada interrompida e pode ser retomada
+    TEMPO_SEM_AVANCO = timedelta(minutes=10)
+
+    # Contadores do ImportacaoLog atualizados a cada checkpoint
+    CONTADORES_LOG = [
+        'linhas_processadas', 'clientes_criados', 'clientes_atualizados',
+        'contratos_criados', 'contratos_atualizados',
+    ]
+
     def __init__(self, db: Session):
         self.db = db
         self.cliente_repo = ClienteRepository(db)
@@ -169,7 +200,8 @@ class UploadService:
         self, 
         file: UploadFile, 
         tenant_id: int,
-        tipo_importacao: TipoImportacao = TipoImportacao.INCREMENTAL
+        tipo_importacao: TipoImportacao = TipoImportacao.INCREMENTAL,
+        caminho_arquivo: Optional[str] = None
     ) -> PreviewUpload:
         """
         Gera preview do upload sem importar.
@@ -181,74 +213,68 @@ class UploadService:
         # Mapeia colunas
         col_map = self._map_columns(df)
         
-        # Analisa cada linha
-        preview_linhas = []
-        novos = 0
-        atualizacoes = 0
-        duplicados = 0
-        invalidos = 0
+        # Classificação em conjunto: normalização vetorizada e uma única
+        # consulta (IN em lotes) pelos CPFs já existentes no tenant
+        dados = normalizar_base(df, col_map)
+        sem_cpf = dados['cpf'].isna()
+        erros_por_campo = {
+            "CPF inválido": sem_cpf,
+            "Nome obrigatório": dados['nome'].isna(),
+            "Valor deve ser maior que zero": ~(dados['valor'] > 0),
+            "Data de vencimento inválida": dados['vencimento'].isna(),
+        }
+        duplicado = dados['cpf'].duplicated() & ~sem_cpf
+        invalido = ~duplicado & pd.concat(erros_por_campo, axis=1).any(axis=1)
+        candidatos = ~duplicado & ~invalido
         
-        cpfs_vistos = set()
+        existentes = self.cliente_repo.cpfs_existentes(
+            dados.loc[candidatos, 'cpf'].tolist(), tenant_id
+        )
+        atualizar = candidatos & dados['cpf'].isin(existentes)
+        novo = candidatos & ~atualizar
         
-        for idx, row in df.iterrows():
-            linha_num = idx + 2  # +2 porque Excel começa em 1 e tem header
-            
-            # Valida e extrai dados
-            erros = []
-            cpf = self._parse_cpf(row.get(col_map.get('cpf')))
-            nome = str(row.get(col_map.get('nome'), '')).strip()
-            valor = self._parse_decimal(row.get(col_map.get('valor')))
-            vencimento = self._parse_date(row.get(col_map.get('vencimento')))
-            
-            # Validações
-            if not cpf or len(cpf.replace('.', '').replace('-', '')) != 11:
-                erros.append("CPF inválido")
-            if not nome:
-                erros.append("Nome obrigatório")
-            if valor <= 0:
-                erros.append("Valor deve ser maior que zero")
-            if not vencimento:
-                erros.append("Data de vencimento inválida")
-            
-            # Verifica duplicado no arquivo
-            if cpf in cpfs_vistos:
-                status_val = StatusValidacao.DUPLICADO
-                acao = "ignorar"
-                duplicados += 1
-            elif erros:
-                status_val = StatusValidacao.ERRO
-                acao = "ignorar"
-                invalidos += 1
+        duplicados = int(duplicado.sum())
+        invalidos = int(invalido.sum())
+        atualizacoes = int(atualizar.sum())
+        novos = int(novo.sum())
+        
+        # Só as linhas exibidas (limite de 100) viram LinhaPreview
+        amostra = dados.head(100)
+        cpf_bruto = df[col_map['cpf']].head(100).tolist()
+        clientes_existentes = {
+            c.cpf: c for c in self.cliente_repo.list_by_cpfs(
+                amostra.loc[atualizar.head(100), 'cpf'].tolist(), tenant_id
+            )
+        }
+        
+        preview_linhas = []
+        for i, linha in enumerate(amostra.itertuples(index=False)):
+            erros = [mensagem for mensagem, mascara in erros_por_campo.items() if mascara.iat[i]]
+            if duplicado.iat[i]:
+                status_val, acao = StatusValidacao.DUPLICADO, "ignorar"
+            elif invalido.iat[i]:
+                status_val, acao = StatusValidacao.ERRO, "ignorar"
+            elif atualizar.iat[i]:
+                status_val, acao = StatusValidacao.ATUALIZAR, "atualizar"
             else:
-                # Verifica se existe no banco
-                cliente_existente = self.cliente_repo.get_by_cpf(cpf, tenant_id) if cpf else None
-                
-                if cliente_existente:
-                    status_val = StatusValidacao.ATUALIZAR
-                    acao = "atualizar"
-                    atualizacoes += 1
-                else:
-                    status_val = StatusValidacao.NOVO
-                    acao = "criar"
-                    novos += 1
+                status_val, acao = StatusValidacao.NOVO, "criar"
             
-            cpfs_vistos.add(cpf)
-            
-            # Dados existentes para preview
             dados_existentes = None
-            if status_val == StatusValidacao.ATUALIZAR and cliente_existente:
+            cliente_existente = clientes_existentes.get(linha.cpf) if status_val == StatusValidacao.ATUALIZAR else None
+            if cliente_existente:
                 dados_existentes = {
                     "nome": cliente_existente.nome,
                     "telefone": cliente_existente.telefone,
                     "email": cliente_existente.email,
                 }
             
+            cpf = linha.cpf or self._parse_cpf(cpf_bruto[i])
             preview_linhas.append(LinhaPreview(
-                linha=linha_num,
+                linha=linha.linha,
                 cpf=self._mask_cpf(cpf) if cpf else None,
-                nome=nome[:50] if nome else None,
-                valor=valor if valor > 0 else None,
-                vencimento=vencimento,
+                nome=linha.nome[:50] if linha.nome else None,
+                valor=Decimal(str(linha.valor)) if linha.valor > 0 else None,
+                vencimento=linha.vencimento.date() if not pd.isna(linha.vencimento) else None,
                 status_validacao=status_val,
                 acao=acao,
                 erros=erros,
@@ -263,6 +289,7 @@ class UploadService:
             'tenant_id': tenant_id,
             'tipo_importacao': tipo_importacao,
             'arquivo': file.filename,
+            'caminho_arquivo': caminho_arquivo,
             'timestamp': datetime.now()
         }
         
@@ -274,7 +301,7 @@ class UploadService:
             novos_clientes=novos,
             atualizacoes=atualizacoes,
             duplicados=duplicados,
-            preview=preview_linhas[:100],  # Limita a 100 linhas no preview
+            preview=preview_linhas,
             colunas_encontradas=list(df.columns),
             colunas_mapeadas=col_map
         )
@@ -310,16 +337,18 @@ class UploadService:
             usuario_id=usuario_id,
             nome_arquivo=arquivo,
             tipo=TipoImportacaoModel(tipo_importacao.value),
-            status=StatusImportacaoModel.PROCESSANDO,
+            status=StatusImportacaoModel.PENDENTE,
             total_linhas=len(df),
+            caminho_arquivo=cache.get('caminho_arquivo'),
             colunas_mapeadas=col_map,
+            configuracao={"sobrescrever": sobrescrever},
             data_inicio=datetime.now()
         )
         self.db.add(log)
-        self.db.flush()
+        self.db.commit()
         
         # Processa importação
-        resultado = await self._processar_importacao(
+        resultado = await self._executar_agendado(
             df, col_map, tenant_id, usuario_id, sobrescrever, log
         )
         
@@ -334,10 +363,13 @@ class UploadService:
         tenant_id: int,
         usuario_id: int,
         tipo_importacao: TipoImportacao = TipoImportacao.INCREMENTAL,
-        sobrescrever: bool = False
+        sobrescrever: bool = False,
+        caminho_arquivo: Optional[str] = None
     ) -> ResultadoImportacao:
         """
         Importa arquivo diretamente sem preview.
+        Com caminho_arquivo (cópia armazenada do upload), a importação pode
+        ser retomada do último checkpoint em caso de falha.
         """
         # Lê o arquivo
         df = await self._read_file(file)
@@ -353,19 +385,106 @@ class UploadService:
             usuario_id=usuario_id,
             nome_arquivo=file.filename,
             tipo=TipoImportacaoModel(tipo_importacao.value),
-            status=StatusImportacaoModel.PROCESSANDO,
+            status=StatusImportacaoModel.PENDENTE,
             total_linhas=len(df),
+            caminho_arquivo=caminho_arquivo,
             colunas_mapeadas=col_map,
+            configuracao={"sobrescrever": sobrescrever},
             data_inicio=datetime.now()
         )
         self.db.add(log)
-        self.db.flush()
+        self.db.commit()
         
         # Processa
-        return await self._processar_importacao(
+        return await self._executar_agendado(
             df, col_map, tenant_id, usuario_id, sobrescrever, log
         )
 
+    async def retomar_importacao(
+        self,
+        importacao_id: str,
+        tenant_id: int,
+    ) -> ResultadoImportacao:
+        """
+        Retoma uma importação que falhou ou foi interrompida a partir do
+        último checkpoint gravado em ImportacaoLog.configuracao.
+        """
+        log = self._obter_log(importacao_id, tenant_id)
+        
+        if log.status == StatusImportacaoModel.CONCLUIDO:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Importação já concluída"
+            )
+        if import_scheduler.contem(importacao_id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Importação ainda em andamento"
+            )
+        if log.status == StatusImportacaoModel.PROCESSANDO:
+            # Só é considerada interrompida se não avança há algum tempo
+            checkpoint = (log.configuracao or {}).get("checkpoint") or {}
+            ultimo_avanco = checkpoint.get("atualizado_em") or log.data_inicio.isoformat()
+            if datetime.fromisoformat(ultimo_avanco).replace(tzinfo=None) > datetime.now() - self.TEMPO_SEM_AVANCO:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Importação ainda em andamento"
+                )
+        if not log.caminho_arquivo or not os.path.isfile(log.caminho_arquivo):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Arquivo da importação não está disponível. Faça upload novamente."
+            )
+        
+        df = self._read_contents(log.caminho_arquivo, log.nome_arquivo)
+        
+        log.status = StatusImportacaoModel.PENDENTE
+        log.data_fim = None
+        self.db.commit()
+        
+        return await self._executar_agendado(
+            df,
+            log.colunas_mapeadas,
+            tenant_id,
+            log.usuario_id or 0,
+            bool((log.configuracao or {}).get("sobrescrever")),
+            log
+        )
+
+    async def cancelar_importacao(
+        self,
+        importacao_id: str,
+        tenant_id: int,
+    ) -> ResultadoImportacao:
+        """
+        Cancela uma importação na fila ou em andamento. Em andamento, o
+        processamento para ao fim do bloco corrente (os blocos já gravados
+        permanecem e a importação pode ser retomada).
+        """
+        log = self._obter_log(importacao_id, tenant_id)
+        
+        if log.status not in (StatusImportacaoModel.PENDENTE, StatusImportacaoModel.PROCESSANDO):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Importação não está em andamento"
+            )
+        
+        # Condicional: a importação pode ter terminado depois da leitura acima
+        if not self._mudar_status(
+            log, StatusImportacaoModel.CANCELADO,
+            (StatusImportacaoModel.PENDENTE, StatusImportacaoModel.PROCESSANDO),
+        ):
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Importação não está em andamento"
+            )
+        log.data_fim = datetime.now()
+        self.db.commit()
+        await import_scheduler.cancelar(importacao_id)
+        
+        return self._resultado_log(log, log.usuario_id or 0)
+
     def get_logs_importacao(
         self,
         tenant_id: Optional[int] = None,
@@ -373,7 +492,28 @@ class UploadService:
         por_pagina: int = 20
     ) -> ListaLogsImportacao:
         """Retorna logs de importação"""
-        query = self.db.query(ImportacaoLog)
+        if tenant_id is None and ha_shards():
+            # Visão global com shards: intercala os logs de cada banco por data
+            total, logs = paginar_em_shards(
+                lambda db, limite: self._pagina_logs(db, None, 0, limite),
+                pagina, por_pagina, chave=lambda log: log.data, decrescente=True,
+            )
+        else:
+            total, logs = self._pagina_logs(self.db, tenant_id, (pagina - 1) * por_pagina, por_pagina)
+
+        return ListaLogsImportacao(
+            logs=logs,
+            total=total,
+            pagina=pagina,
+            por_pagina=por_pagina
+        )
+
+    @staticmethod
+    def _pagina_logs(
+        db: Session, tenant_id: Optional[int], inicio: int, limite: int
+    ) -> Tuple[int, List[LogImportacao]]:
+        """(total, logs de inicio a inicio + limite), mais recentes primeiro"""
+        query = db.query(ImportacaoLog)
         
         if tenant_id:
             query = query.filter(ImportacaoLog.tenant_id == tenant_id)
@@ -382,58 +522,71 @@ class UploadService:
         
         logs = query.order_by(
             ImportacaoLog.data_inicio.desc()
-        ).offset(
-            (pagina - 1) * por_pagina
-        ).limit(por_pagina).all()
+        ).offset(inicio).limit(limite).all()
         
-        return ListaLogsImportacao(
-            logs=[
-                LogImportacao(
-                    id=log.uuid,
-                    arquivo=log.nome_arquivo,
-                    tipo=TipoImportacao(log.tipo.value),
-                    status=StatusImportacao(log.status.value),
-                    total_linhas=log.total_linhas,
-                    processados=log.linhas_processadas,
-                    erros=log.total_erros,
-                    data=log.data_inicio,
-                    usuario=log.usuario.nome if log.usuario else "Sistema",
-                    tenant_nome=log.tenant.nome if log.tenant else None
-                )
-                for log in logs
-            ],
-            total=total,
-            pagina=pagina,
-            por_pagina=por_pagina
-        )
+        return total, [
+            LogImportacao(
+                id=log.uuid,
+                arquivo=log.nome_arquivo,
+                tipo=TipoImportacao(log.tipo.value),
+                status=StatusImportacao(log.status.value),
+                total_linhas=log.total_linhas,
+                processados=log.linhas_processadas,
+                erros=log.total_erros,
+                data=log.data_inicio,
+                usuario=log.usuario.nome if log.usuario else "Sistema",
+                tenant_nome=log.tenant.nome if log.tenant else None
+            )
+            for log in logs
+        ]
 
     # ==========================================
     # MÉTODOS AUXILIARES PRIVADOS
     # ==========================================
 
+    def _obter_log(self, importacao_id: str, tenant_id: int) -> ImportacaoLog:
+        log = self.db.query(ImportacaoLog).filter(
+            ImportacaoLog.uuid == importacao_id,
+            ImportacaoLog.tenant_id == tenant_id
+        ).first()
+        if not log:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Importação não encontrada"
+            )
+        return log
+
     async def _read_file(self, file: UploadFile) -> pd.DataFrame:
         """Lê arquivo Excel ou CSV"""
-        filename = file.filename.lower()
-        contents = await file.read()
+        # Lê direto do arquivo temporário do upload, sem trazer o corpo para a memória
+        await file.seek(0)
+        return self._read_contents(file.file, file.filename)
+
+    def _read_contents(self, fonte: Union[str, BinaryIO], filename: str) -> pd.DataFrame:
+        """
+        Converte um arquivo (caminho ou arquivo aberto) em DataFrame.
+        Aceita CSV (também .csv.gz e .zip, descompactados em streaming),
+        Excel e, com pyarrow instalado, Parquet e Feather.
+        """
+        filename = filename.lower()
         
         try:
-            if filename.endswith('.csv'):
-                # Tenta diferentes encodings
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        df = pd.read_csv(BytesIO(contents), encoding=encoding)
-                        break
-                    except:
-                        continue
+            with (open(fonte, "rb") if isinstance(fonte, str) else nullcontext(fonte)) as arquivo:
+                if filename.endswith('.csv'):
+                    df = self._read_csv(arquivo, lambda bruto: bruto)
+                elif filename.endswith('.gz'):
+                    df = self._read_csv(arquivo, lambda bruto: _LeitorLimitado(gzip.GzipFile(fileobj=bruto, mode="rb")))
+                elif filename.endswith('.zip'):
+                    df = self._read_zip(arquivo)
+                elif filename.endswith(('.xlsx', '.xls')):
+                    df = pd.read_excel(arquivo)
+                elif filename.endswith(('.parquet', '.feather')):
+                    df = self._read_colunar(arquivo, filename)
                 else:
-                    raise ValueError("Não foi possível ler o arquivo CSV")
-            elif filename.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(BytesIO(contents))
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Formato não suportado. Use Excel (.xlsx, .xls) ou CSV (.csv)"
-                )
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Formato não suportado. Use CSV (.csv, .csv.gz, .zip), Excel (.xlsx, .xls), Parquet ou Feather"
+                    )
         except HTTPException:
             raise
         except Exception as e:
@@ -450,6 +603,52 @@ class UploadService:
         
         return df
 
+    def _read_csv(self, arquivo: BinaryIO, abrir: Callable[[BinaryIO], BinaryIO]) -> pd.DataFrame:
+        """
+        Lê CSV tentando diferentes encodings. A cada tentativa o arquivo volta
+        ao início e `abrir` monta o fluxo (ex.: descompressão gzip em streaming).
+        """
+        for encoding in ['utf-8', 'latin-1', 'cp1252']:
+            try:
+                arquivo.seek(0)
+                return pd.read_csv(abrir(arquivo), encoding=encoding)
+            except HTTPException:
+                raise
+            except:
+                continue
+        raise ValueError("Não foi possível ler o arquivo CSV")
+
+    def _read_zip(self, arquivo: BinaryIO) -> pd.DataFrame:
+        """Lê o único CSV de um .zip, descompactado em streaming"""
+        with zipfile.ZipFile(arquivo) as zf:
+            membros = [
+                m for m in zf.infolist()
+                if not m.is_dir() and not m.filename.startswith("__MACOSX/")
+            ]
+            if len(membros) != 1 or not membros[0].filename.lower().endswith(".csv"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="O arquivo .zip deve conter um único arquivo CSV"
+                )
+            membro = membros[0]
+            if membro.file_size > settings.MAX_UPLOAD_UNCOMPRESSED_MB * 1024 * 1024:
+                raise _conteudo_excedido()
+            with zf.open(membro) as conteudo:
+                return self._read_csv(conteudo, _LeitorLimitado)
+
+    def _read_colunar(self, arquivo: BinaryIO, filename: str) -> pd.DataFrame:
+        """Parquet e Feather dependem do pyarrow (opcional)"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Importação de Parquet/Feather requer o pacote pyarrow"
+            )
+        if filename.endswith('.parquet'):
+            return pd.read_parquet(arquivo)
+        return pd.read_feather(arquivo)
+
     def _find_column(self, df_columns: List[str], possible_names: List[str]) -> Optional[str]:
         """Encontra o nome da coluna no DataFrame"""
         df_columns_lower = [c.lower().strip() for c in df_columns]
@@ -504,14 +703,14 @@ class UploadService:
             return Decimal("0")
 
     def _parse_cpf(self, value) -> str:
-        """Normaliza CPF"""
+        """Normaliza CPF (recupera zeros à esquerda perdidos em planilhas)"""
         if pd.isna(value) or value is None:
             return ""
-        cpf = str(value).strip()
-        cpf_nums = ''.join(filter(str.isdigit, cpf))
-        if len(cpf_nums) == 11:
-            return f"{cpf_nums[:3]}.{cpf_nums[3:6]}.{cpf_nums[6:9]}-{cpf_nums[9:]}"
-        return cpf
+        numero = cpf_para_numero(value)
+        if numero is None:
+            return str(value).strip()
+        cpf_nums = f"{numero:011d}"
+        return f"{cpf_nums[:3]}.{cpf_nums[3:6]}.{cpf_nums[6:9]}-{cpf_nums[9:]}"
 
     def _mask_cpf(self, cpf: str) -> str:
         """Mascara CPF para exibição"""
@@ -548,7 +747,46 @@ class UploadService:
             return StatusContrato.NEGOCIADO
         return StatusContrato.ATIVO
 
-    async def _processar_importacao(
+    def _atualizar_segmentos(self, tenant_id: int) -> None:
+        """Reavalia a associação contrato x segmento após a importação"""
+        try:
+            SegmentationService(self.db).atualizar_membros(tenant_id)
+        except Exception:
+            self.db.rollback()
+            logger.exception("Falha ao atualizar segmentos do tenant %s", tenant_id)
+
+    async def _executar_agendado(
+        self,
+        df: pd.DataFrame,
+        col_map: Dict[str, str],
+        tenant_id: int,
+        usuario_id: int,
+        sobrescrever: bool,
+        log: ImportacaoLog
+    ) -> ResultadoImportacao:
+        """
+        Aguarda a vez no agendador (uma importação por tenant, limite global)
+        e processa em uma thread, sem bloquear o event loop.
+        """
+        try:
+            async with import_scheduler.reservar(tenant_id, log.uuid, len(df)):
+                iniciada = self._mudar_status(
+                    log, StatusImportacaoModel.PROCESSANDO, (StatusImportacaoModel.PENDENTE,)
+                )
+                self.db.commit()
+                if not iniciada:
+                    # Cancelada enquanto aguardava na fila
+                    self.db.refresh(log)
+                    return self._resultado_log(log, usuario_id)
+                
+                return await asyncio.to_thread(
+                    self._processar_importacao, df, col_map, tenant_id, usuario_id, sobrescrever, log
+                )
+        except ImportacaoCancelada:
+            self.db.refresh(log)
+            return self._resultado_log(log, usuario_id)
+
+    def _processar_importacao(
         self,
         df: pd.DataFrame,
         col_map: Dict[str, str],
@@ -558,18 +796,41 @@ class UploadService:
         log: ImportacaoLog
     ) -> ResultadoImportacao:
         """Processa a importação efetivamente"""
-        clientes_criados = 0
-        clientes_atualizados = 0
-        contratos_criados = 0
-        contratos_atualizados = 0
-        erros = []
-        linhas_processadas = 0
+        if log.tipo == TipoImportacaoModel.DELTA:
+            return self._processar_em_lote(
+                lambda: DeltaImportService(self.db).aplicar(df, col_map, tenant_id),
+                tenant_id, usuario_id, log
+            )
+        if log.tipo == TipoImportacaoModel.NOVA_BASE and ParallelImportService.disponivel(self.db, len(df)):
+            return self._processar_em_lote(
+                lambda: ParallelImportService(self.db).aplicar(df, col_map, tenant_id, sobrescrever),
+                tenant_id, usuario_id, log, commitado=True
+            )
+        if log.tipo == TipoImportacaoModel.NOVA_BASE and CopyImportService.disponivel(self.db):
+            return self._processar_em_lote(
+                lambda: CopyImportService(self.db).aplicar(df, col_map, tenant_id, sobrescrever),
+                tenant_id, usuario_id, log
+            )
+
+        # Contadores acumulados no log (retomada a partir do checkpoint)
+        configuracao = dict(log.configuracao or {})
+        inicio = (configuracao.get("checkpoint") or {}).get("proxima_linha", 0)
+        contadores = {
+            campo: (getattr(log, campo) or 0) if inicio else 0
+            for campo in self.CONTADORES_LOG
+        }
+        total_erros = (log.total_erros or 0) if inicio else 0
+        erros = list(log.erros_detalhes or []) if inicio else []
         
-        cpfs_processados = set()
+        # CPFs já vistos antes do checkpoint continuam sendo ignorados
+        cpfs_processados = {
+            self._parse_cpf(valor) for valor in df[col_map['cpf']].iloc[:inicio]
+        } if inicio else set()
         
         try:
-            for idx, row in df.iterrows():
-                try:
+            for offset in range(inicio, len(df), settings.IMPORT_CHUNK_SIZE):
+                bloco = df.iloc[offset:offset + settings.IMPORT_CHUNK_SIZE]
+                for idx, row in bloco.iterrows():
                     cpf = self._parse_cpf(row.get(col_map.get('cpf')))
                     
                     if not cpf or cpf in cpfs_processados:
@@ -577,123 +838,314 @@ class UploadService:
                     
                     cpfs_processados.add(cpf)
                     
-                    # Dados do cliente
-                    nome = str(row.get(col_map.get('nome'), '')).strip()
-                    valor = self._parse_decimal(row.get(col_map.get('valor')))
-                    vencimento = self._parse_date(row.get(col_map.get('vencimento')))
-                    
-                    if not nome or valor <= 0 or not vencimento:
-                        erros.append(f"Linha {idx + 2}: Dados obrigatórios inválidos")
+                    # Savepoint por linha: uma linha com erro não desfaz o bloco
+                    try:
+                        with self.db.begin_nested():
+                            resultado_linha = self._importar_linha(row, cpf, col_map, tenant_id, sobrescrever)
+                    except Exception as e:
+                        total_erros += 1
+                        if len(erros) < 50:
+                            erros.append(f"Linha {idx + 2}: {str(e)}")
                         continue
                     
-                    # Busca cliente existente
-                    cliente = self.cliente_repo.get_by_cpf(cpf, tenant_id)
-                    
-                    if cliente:
-                        # Atualiza se sobrescrever
-                        if sobrescrever:
-                            cliente.nome = nome
-                            if 'telefone' in col_map:
-                                cliente.telefone = str(row.get(col_map['telefone'], '')).strip() or cliente.telefone
-                            if 'email' in col_map:
-                                cliente.email = str(row.get(col_map['email'], '')).strip() or cliente.email
-                            if 'data_nascimento' in col_map:
-                                cliente.data_nascimento = self._parse_date(row.get(col_map['data_nascimento'])) or cliente.data_nascimento
-                            if 'sexo' in col_map:
-                                cliente.sexo = self._parse_sexo(row.get(col_map['sexo'])) or cliente.sexo
-                            clientes_atualizados += 1
-                    else:
-                        # Cria novo cliente
-                        cliente = Cliente(
-                            tenant_id=tenant_id,
-                            nome=nome,
-                            cpf=cpf,
-                            data_nascimento=self._parse_date(row.get(col_map.get('data_nascimento'))),
-                            sexo=self._parse_sexo(row.get(col_map.get('sexo'))),
-                            telefone=str(row.get(col_map.get('telefone'), '')).strip() or None,
-                            email=str(row.get(col_map.get('email'), '')).strip() or None,
-                            endereco=str(row.get(col_map.get('endereco'), '')).strip() or None,
-                            cidade=str(row.get(col_map.get('cidade'), '')).strip() or None,
-                            estado=str(row.get(col_map.get('estado'), '')).strip()[:2].upper() or None,
-                            cep=str(row.get(col_map.get('cep'), '')).strip() or None,
-                        )
-                        self.db.add(cliente)
-                        self.db.flush()
-                        clientes_criados += 1
-                    
-                    # Cria contrato
-                    numero_contrato = str(row.get(col_map.get('numero_contrato'), '')).strip() or None
-                    
-                    # Verifica se contrato já existe
-                    contrato_existente = None
-                    if numero_contrato:
-                        contrato_existente = self.db.query(Contrato).filter(
-                            Contrato.tenant_id == tenant_id,
-                            Contrato.numero_contrato == numero_contrato
-                        ).first()
-                    
-                    if contrato_existente and sobrescrever:
-                        contrato_existente.valor_original = valor
-                        contrato_existente.data_vencimento = vencimento
-                        contrato_existente.status = self._parse_status(row.get(col_map.get('status')))
-                        contratos_atualizados += 1
-                    elif not contrato_existente:
-                        contrato = Contrato(
-                            tenant_id=tenant_id,
-                            cliente_id=cliente.id,
-                            numero_contrato=numero_contrato,
-                            valor_original=valor,
-                            data_vencimento=vencimento,
-                            data_contrato=self._parse_date(row.get(col_map.get('data_contrato'))),
-                            status=self._parse_status(row.get(col_map.get('status'))),
-                            valor_pago=Decimal("0"),
-                        )
-                        self.db.add(contrato)
-                        contratos_criados += 1
-                    
-                    linhas_processadas += 1
-                    
-                except Exception as e:
-                    erros.append(f"Linha {idx + 2}: {str(e)}")
+                    for campo in resultado_linha:
+                        contadores[campo] += 1
+                    contadores['linhas_processadas'] += 1
+                
+                # Commit do bloco com o checkpoint
+                for campo, valor in contadores.items():
+                    setattr(log, campo, valor)
+                log.total_erros = total_erros
+                log.erros_detalhes = erros
+                configuracao["checkpoint"] = {
+                    "proxima_linha": offset + len(bloco),
+                    "atualizado_em": datetime.now().isoformat(),
+                }
+                log.configuracao = dict(configuracao)
+                TenantRepository(self.db).incrementar_versao(tenant_id)
+                self.db.commit()
+                
+                # Cancelamento cooperativo: para na fronteira do bloco
+                if self._cancelada(log):
+                    log.status = StatusImportacaoModel.CANCELADO
+                    log.data_fim = datetime.now()
+                    self.db.commit()
+                    return self._resultado_log(log, usuario_id)
             
-            # Commit
+            # Atualiza log (um cancelamento após o último bloco prevalece)
+            concluida = self._mudar_status(
+                log, StatusImportacaoModel.CONCLUIDO, (StatusImportacaoModel.PROCESSANDO,)
+            )
+            log.data_fim = datetime.now()
+            TenantRepository(self.db).incrementar_versao(tenant_id)
             self.db.commit()
             
-            # Atualiza log
-            log.status = StatusImportacaoModel.CONCLUIDO
-            log.linhas_processadas = linhas_processadas
-            log.clientes_criados = clientes_criados
-            log.clientes_atualizados = clientes_atualizados
-            log.contratos_criados = contratos_criados
-            log.contratos_atualizados = contratos_atualizados
-            log.total_erros = len(erros)
-            log.erros_detalhes = erros[:50]
+            if not concluida:
+                self.db.refresh(log)
+                return self._resultado_log(log, usuario_id)
+            self._atualizar_segmentos(tenant_id)
+            
+        except Exception as e:
+            # Desfaz só o bloco corrente; os anteriores e o checkpoint ficam
+            self.db.rollback()
+            log.status = StatusImportacaoModel.ERRO
+            log.erros_detalhes = list(log.erros_detalhes or []) + [str(e)]
             log.data_fim = datetime.now()
+            TenantRepository(self.db).incrementar_versao(tenant_id)
             self.db.commit()
-            
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro durante importação: {str(e)}"
+            )
+        
+        return self._resultado_log(log, usuario_id)
+
+    def _cancelada(self, log: ImportacaoLog) -> bool:
+        """Lê o status direto do banco (o cancelamento vem de outra sessão)"""
+        atual = self.db.query(ImportacaoLog.status).filter(
+            ImportacaoLog.tenant_id == log.tenant_id, ImportacaoLog.id == log.id
+        ).scalar()
+        return atual == StatusImportacaoModel.CANCELADO
+
+    def _mudar_status(
+        self,
+        log: ImportacaoLog,
+        novo: StatusImportacaoModel,
+        de: Tuple[StatusImportacaoModel, ...],
+    ) -> bool:
+        """
+        Muda o status só se o do banco ainda estiver em `de` (UPDATE
+        condicional, sem commit). Cancelamento e conclusão rodam em sessões
+        diferentes; assim um não sobrescreve o outro.
+        """
+        mudou = self.db.execute(
+            update(ImportacaoLog)
+            .where(
+                ImportacaoLog.tenant_id == log.tenant_id,
+                ImportacaoLog.id == log.id,
+                ImportacaoLog.status.in_(de),
+            )
+            .values(status=novo)
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1
+        if mudou:
+            log.status = novo
+        return mudou
+
+    def _registrar_contagens(self, log: ImportacaoLog, delta: ResultadoLote):
+        log.linhas_processadas = delta.linhas_gravadas
+        log.clientes_criados = delta.clientes_criados
+        log.clientes_atualizados = delta.clientes_atualizados
+        log.contratos_criados = delta.contratos_criados
+        log.contratos_atualizados = delta.contratos_atualizados
+        log.total_erros = len(delta.erros)
+        log.erros_detalhes = delta.erros[:50]
+
+    def _registrar_cancelamento_commitado(self, log: ImportacaoLog, delta: ResultadoLote, tenant_id: int):
+        """
+        Cancelamento que chegou depois dos commits dos shards: o rollback não
+        desfaz nada, então o log (que segue CANCELADO) registra o que foi
+        gravado e a versão do tenant avança como em qualquer escrita, senão
+        ETag, verificação de réplica e fingerprints do delta ficam defasados.
+        """
+        self._registrar_contagens(log, delta)
+        log.erros_detalhes = [
+            f"Cancelada após a gravação: {delta.linhas_gravadas} linha(s) já gravadas permanecem",
+            *delta.erros[:49],
+        ]
+        if log.data_fim is None:
+            log.data_fim = datetime.now()
+        TenantRepository(self.db).incrementar_versao(tenant_id)
+        self.db.commit()
+
+        if delta.linhas_gravadas:
+            self._atualizar_segmentos(tenant_id)
+
+    def _resultado_log(self, log: ImportacaoLog, usuario_id: int) -> ResultadoImportacao:
+        """Resultado a partir dos contadores gravados no log"""
+        return ResultadoImportacao(
+            id_importacao=log.uuid,
+            arquivo=log.nome_arquivo,
+            tipo_importacao=TipoImportacao(log.tipo.value),
+            status=StatusImportacao(log.status.value),
+            total_linhas=log.total_linhas,
+            clientes_criados=log.clientes_criados or 0,
+            clientes_atualizados=log.clientes_atualizados or 0,
+            contratos_criados=log.contratos_criados or 0,
+            contratos_atualizados=log.contratos_atualizados or 0,
+            total_erros=log.total_erros or 0,
+            erros=(log.erros_detalhes or [])[:20],
+            data_inicio=log.data_inicio,
+            data_fim=log.data_fim,
+            tenant_id=log.tenant_id,
+            usuario_id=usuario_id
+        )
+
+    def _importar_linha(
+        self,
+        row: pd.Series,
+        cpf: str,
+        col_map: Dict[str, str],
+        tenant_id: int,
+        sobrescrever: bool
+    ) -> List[str]:
+        """
+        Importa uma linha (cliente + contrato). Retorna os contadores do log
+        a incrementar; levanta exceção se a linha for inválida.
+        """
+        contadores = []
+        
+        if not validar_cpf(cpf):
+            raise ValueError("CPF inválido")
+        
+        # Dados do cliente
+        nome = str(row.get(col_map.get('nome'), '')).strip()
+        valor = self._parse_decimal(row.get(col_map.get('valor')))
+        vencimento = self._parse_date(row.get(col_map.get('vencimento')))
+        
+        if not nome or valor <= 0 or not vencimento:
+            raise ValueError("Dados obrigatórios inválidos")
+        
+        # Busca cliente existente
+        cliente = self.cliente_repo.get_by_cpf(cpf, tenant_id)
+        
+        if cliente:
+            # Atualiza se sobrescrever
+            if sobrescrever:
+                cliente.nome = nome
+                if 'telefone' in col_map:
+                    cliente.telefone = str(row.get(col_map['telefone'], '')).strip() or cliente.telefone
+                if 'email' in col_map:
+                    cliente.email = str(row.get(col_map['email'], '')).strip() or cliente.email
+                if 'data_nascimento' in col_map:
+                    cliente.data_nascimento = self._parse_date(row.get(col_map['data_nascimento'])) or cliente.data_nascimento
+                if 'sexo' in col_map:
+                    cliente.sexo = self._parse_sexo(row.get(col_map['sexo'])) or cliente.sexo
+                contadores.append('clientes_atualizados')
+        else:
+            # Cria novo cliente
+            cliente = Cliente(
+                tenant_id=tenant_id,
+                nome=nome,
+                cpf=cpf,
+                data_nascimento=self._parse_date(row.get(col_map.get('data_nascimento'))),
+                sexo=self._parse_sexo(row.get(col_map.get('sexo'))),
+                telefone=str(row.get(col_map.get('telefone'), '')).strip() or None,
+                email=str(row.get(col_map.get('email'), '')).strip() or None,
+                endereco=str(row.get(col_map.get('endereco'), '')).strip() or None,
+                cidade=str(row.get(col_map.get('cidade'), '')).strip() or None,
+                estado=str(row.get(col_map.get('estado'), '')).strip()[:2].upper() or None,
+                cep=str(row.get(col_map.get('cep'), '')).strip() or None,
+            )
+            self.db.add(cliente)
+            self.db.flush()
+            contadores.append('clientes_criados')
+        
+        # Cria contrato
+        numero_contrato = str(row.get(col_map.get('numero_contrato'), '')).strip() or None
+        
+        # Verifica se contrato já existe
+        contrato_existente = None
+        if numero_contrato:
+            contrato_existente = self.db.query(Contrato).filter(
+                Contrato.tenant_id == tenant_id,
+                Contrato.numero_contrato == numero_contrato
+            ).first()
+        
+        if contrato_existente and sobrescrever:
+            contrato_existente.valor_original = valor
+            contrato_existente.data_vencimento = vencimento
+            contrato_existente.status = self._parse_status(row.get(col_map.get('status')))
+            contadores.append('contratos_atualizados')
+        elif not contrato_existente:
+            contrato = Contrato(
+                tenant_id=tenant_id,
+                cliente_id=cliente.id,
+                numero_contrato=numero_contrato,
+                valor_original=valor,
+                data_vencimento=vencimento,
+                data_contrato=self._parse_date(row.get(col_map.get('data_contrato'))),
+                status=self._parse_status(row.get(col_map.get('status'))),
+                valor_pago=Decimal("0"),
+            )
+            self.db.add(contrato)
+            contadores.append('contratos_criados')
+        
+        # Grava dentro do savepoint para que erros de banco caiam na linha
+        self.db.flush()
+        return contadores
+
+    def _processar_em_lote(
+        self,
+        aplicar: Callable[[], ResultadoLote],
+        tenant_id: int,
+        usuario_id: int,
+        log: ImportacaoLog,
+        commitado: bool = False
+    ) -> ResultadoImportacao:
+        """
+        Importações vetorizadas (delta, COPY e paralela): `aplicar` grava o
+        lote inteiro na transação corrente e retorna as contagens. Com
+        commitado=True (paralela) os shards já foram commitados cada um na
+        sua sessão quando `aplicar` retorna.
+        """
+        try:
+            delta = aplicar()
+
+            # Cancelada durante a carga (o UPDATE condicional cobre um cancelamento
+            # entre a verificação e a conclusão): descarta o lote
+            if self._cancelada(log) or not self._mudar_status(
+                log, StatusImportacaoModel.CONCLUIDO, (StatusImportacaoModel.PROCESSANDO,)
+            ):
+                self.db.rollback()
+                self.db.refresh(log)
+                if commitado:
+                    self._registrar_cancelamento_commitado(log, delta, tenant_id)
+                return self._resultado_log(log, usuario_id)
+
+            self._registrar_contagens(log, delta)
+            if delta.detalhes:
+                log.configuracao = {**(log.configuracao or {}), "delta": delta.detalhes}
+            log.data_fim = datetime.now()
+            tenants = TenantRepository(self.db)
+            tenants.incrementar_versao(tenant_id)
+            if delta.versao_dados is not None:
+                # Fingerprints valem para a versão gerada por esta importação; se outra
+                # escrita do tenant entrou no meio, a próxima delta os descarta
+                versao = tenants.versao_dados(tenant_id)
+                if int(versao) == int(delta.versao_dados) + 1:
+                    log.configuracao = {**(log.configuracao or {}), "versao_fingerprints": versao}
+            self.db.commit()
+
+            if delta.linhas_gravadas:
+                self._atualizar_segmentos(tenant_id)
+
         except Exception as e:
             self.db.rollback()
             log.status = StatusImportacaoModel.ERRO
             log.erros_detalhes = [str(e)]
             log.data_fim = datetime.now()
+            TenantRepository(self.db).incrementar_versao(tenant_id)
             self.db.commit()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro durante importação: {str(e)}"
             )
-        
+
         return ResultadoImportacao(
             id_importacao=log.uuid,
             arquivo=log.nome_arquivo,
             tipo_importacao=TipoImportacao(log.tipo.value),
             status=StatusImportacao(log.status.value),
             total_linhas=log.total_linhas,
-            clientes_criados=clientes_criados,
-            clientes_atualizados=clientes_atualizados,
-            contratos_criados=contratos_criados,
-            contratos_atualizados=contratos_atualizados,
-            total_erros=len(erros),
-            erros=erros[:20],
+            clientes_criados=delta.clientes_criados,
+            clientes_atualizados=delta.clientes_atualizados,
+            contratos_criados=delta.contratos_criados,
+            contratos_atualizados=delta.contratos_atualizados,
+            linhas_inalteradas=delta.inalteradas,
+            linhas_removidas=delta.removidas,
+            total_erros=len(delta.erros),
+            erros=delta.erros[:20],
             data_inicio=log.data_inicio,
             data_fim=log.data_fim,
             tenant_id=tenant_id,
@@ -714,3 +1166,33 @@ async def process_excel(db: Session, file: UploadFile, tenant_id: int) -> Dict[s
         "erros": resultado.erros,
         "total_erros": resultado.total_erros,
     }
+
+
+class _LeitorLimitado(io.RawIOBase):
+    """
+    Envolve um fluxo descompactado e interrompe a leitura com 413 quando o
+    conteúdo passa de MAX_UPLOAD_UNCOMPRESSED_MB (proteção contra zip bomb).
+    """
+
+    def __init__(self, fluxo: BinaryIO):
+        self.fluxo = fluxo
+        self.lidos = 0
+        self.limite = settings.MAX_UPLOAD_UNCOMPRESSED_MB * 1024 * 1024
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        dados = self.fluxo.read(len(buffer))
+        self.lidos += len(dados)
+        if self.lidos > self.limite:
+            raise _conteudo_excedido()
+        buffer[:len(dados)] = dados
+        return len(dados)
+
+
+def _conteudo_excedido() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Conteúdo descompactado excede {settings.MAX_UPLOAD_UNCOMPRESSED_MB}MB"
+    )
@@ -0,0 +1,310 @@
+"""
+Ingestão de webhooks em alta vazão
+
+Os endpoints apenas anexam o corpo bruto a um buffer em memória (O(1), sem
+conexão com o banco). Um flusher em background drena o buffer, aplica as
+atualizações de status com UPDATEs em conjunto, via um aplicador por origem,
+e grava os eventos em lote no log append-only (webhook_eventos).
+
+Os aplicadores commitam o que aplicam, cada transação num único banco (o de
+pagamentos, uma por tenant, no shard dele); o log vai depois, no primário.
+Se o log falhar, o lote volta ao buffer e é reaplicado: os aplicadores são
+idempotentes.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.repositories.webhook_repository import WebhookEventoRepository
+from app.services.communication_service import aplicar_status_mensagens
+
+logger = logging.getLogger("app.logger")
+
+# Recebe a sessão e os eventos de uma origem; retorna se cada evento foi aplicado.
+# O que não for commitado pelo próprio aplicador é commitado logo depois dele
+Aplicador = Callable[[Session, List[dict]], List[bool]]
+
+ORIGEM_COMUNICACAO = "communication"
+ORIGEM_PAGAMENTO = "payment"
+
+
+# ==========================================
+# BUFFER
+# ==========================================
+
+class WebhookBuffer:
+    """Buffer limitado de eventos brutos: (origem, recebido_em, corpo)"""
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._itens: Deque[Tuple[str, datetime, bytes]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def adicionar(self, origem: str, corpo: bytes) -> bool:
+        """Retorna False quando o buffer está cheio (o provedor deve reenviar)"""
+        if len(self._itens) >= self.capacidade:
+            return False
+        self._itens.append((origem, datetime.now(), corpo))
+        return True
+
+    def drenar(self, limite: int) -> List[Tuple[str, datetime, bytes]]:
+        itens = []
+        while self._itens and len(itens) < limite:
+            itens.append(self._itens.popleft())
+        return itens
+
+    def devolver(self, itens: List[Tuple[str, datetime, bytes]]) -> None:
+        """Recoloca no início, na ordem original, itens drenados que não foram gravados"""
+        # Já foram aceitos (202): entram mesmo acima da capacidade
+        self._itens.extendleft(reversed(itens))
+
+
+def extrair_eventos(corpo: bytes) -> List[dict]:
+    """
+    Aceita um evento, uma lista de eventos ou {"events": [...]}.
+    Corpos inválidos viram um evento com a chave "_invalido".
+    """
+    try:
+        data = json.loads(corpo)
+    except (ValueError, UnicodeDecodeError):
+        return [{"_invalido": corpo.decode("utf-8", errors="replace")[:2000]}]
+
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        data = data["events"]
+    if isinstance(data, list):
+        return [e for e in data if isinstance(e, dict)]
+    if isinstance(data, dict):
+        return [data]
+    return [{"_invalido": str(data)[:2000]}]
+
+
+# ==========================================
+# FLUSHER
+# ==========================================
+
+class WebhookFlusher:
+    """Tarefa em background que persiste e aplica os eventos do buffer"""
+
+    # Eventos pendentes são reaplicados por até 1 hora; depois ficam só no log
+    JANELA_REPROCESSAMENTO = timedelta(hours=1)
+    LOTE_REPROCESSAMENTO = 5000
+    ESPERA_MAXIMA_FALHA = 30.0
+    TENTATIVAS_AO_PARAR = 3
+
+    def __init__(
+        self,
+        buffer: WebhookBuffer,
+        aplicadores: Dict[str, Aplicador],
+        session_factory: Callable[[], Session] = SessionLocal,
+        tamanho_lote: int = settings.WEBHOOK_FLUSH_BATCH,
+        intervalo: float = settings.WEBHOOK_FLUSH_INTERVAL,
+    ):
+        self.buffer = buffer
+        self.aplicadores = aplicadores
+        self.session_factory = session_factory
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._tarefa: Optional[asyncio.Task] = None
+        self._parar = asyncio.Event()
+        self._ultimo_reprocessamento = time.monotonic()
+
+    # ----------------------------------
+    # Ciclo de vida
+    # ----------------------------------
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._parar = asyncio.Event()
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self) -> None:
+        """Interrompe o loop e grava o que ainda estiver no buffer"""
+        self._parar.set()
+        if self._tarefa is not None:
+            await self._tarefa
+            self._tarefa = None
+
+        falhas = 0
+        while len(self.buffer) and falhas < self.TENTATIVAS_AO_PARAR:
+            if await self._persistir(self.buffer.drenar(self.tamanho_lote)):
+                falhas = 0
+            else:
+                falhas += 1
+                await asyncio.sleep(falhas)
+
+        if len(self.buffer):
+            # Banco indisponível no encerramento: os corpos vão para o log, para reenvio manual
+            itens = self.buffer.drenar(len(self.buffer))
+            logger.error(f"{len(itens)} webhooks não gravados no encerramento")
+            for origem, recebido_em, corpo in itens:
+                logger.error(
+                    f"Webhook não gravado origem={origem} recebido_em={recebido_em.isoformat()} "
+                    f"corpo={corpo.decode('utf-8', errors='replace')}"
+                )
+
+    async def _executar(self) -> None:
+        espera = self.intervalo
+        while not self._parar.is_set():
+            if len(self.buffer) < self.tamanho_lote or espera > self.intervalo:
+                try:
+                    await asyncio.wait_for(self._parar.wait(), timeout=espera)
+                except asyncio.TimeoutError:
+                    pass
+
+            itens = self.buffer.drenar(self.tamanho_lote)
+            if itens and not await self._persistir(itens):
+                # Backoff enquanto o banco não aceita a gravação
+                espera = min(espera * 2, self.ESPERA_MAXIMA_FALHA)
+                continue
+            espera = self.intervalo
+
+            if time.monotonic() - self._ultimo_reprocessamento >= settings.WEBHOOK_REPROCESS_SECONDS:
+                self._ultimo_reprocessamento = time.monotonic()
+                try:
+                    await asyncio.to_thread(self.reprocessar_pendentes)
+                except Exception:
+                    logger.exception("Falha ao reprocessar webhooks pendentes")
+
+    async def _persistir(self, itens: List[Tuple[str, datetime, bytes]]) -> bool:
+        """
+        Grava um lote drenado. Em falha os itens voltam ao início do buffer:
+        o provedor já recebeu 202 e não vai reenviar.
+        """
+        try:
+            await asyncio.to_thread(self.gravar, itens)
+            return True
+        except Exception:
+            logger.exception(f"Falha ao gravar {len(itens)} webhooks; devolvidos ao buffer")
+            self.buffer.devolver(itens)
+            return False
+
+    # ----------------------------------
+    # Persistência (executada fora do event loop)
+    # ----------------------------------
+    def gravar(self, itens: List[Tuple[str, datetime, bytes]]) -> int:
+        """Aplica as atualizações e grava os eventos em lote (transações separadas)"""
+        por_origem: Dict[str, List[Tuple[datetime, dict]]] = {}
+        for origem, recebido_em, corpo in itens:
+            for evento in extrair_eventos(corpo):
+                por_origem.setdefault(origem, []).append((recebido_em, evento))
+
+        db = self.session_factory()
+        try:
+            linhas = []
+            for origem, eventos in por_origem.items():
+                linhas.extend(self._aplicar(db, origem, eventos))
+            WebhookEventoRepository(db).inserir_lote(linhas)
+            db.commit()
+            return len(linhas)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _aplicar(self, db: Session, origem: str, eventos: List[Tuple[datetime, dict]]) -> List[dict]:
+        agora = datetime.now()
+        aplicador = self.aplicadores.get(origem)
+        validos = [e for _, e in eventos if "_invalido" not in e]
+        aplicados: List[bool] = []
+        erro = None
+
+        if aplicador and validos:
+            try:
+                aplicados = aplicador(db, validos)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.exception(f"Falha ao aplicar webhooks de {origem}")
+                erro = str(e)[:500]
+                aplicados = []
+
+        linhas = []
+        posicao = 0
+        for recebido_em, evento in eventos:
+            if "_invalido" in evento:
+                linhas.append({
+                    "origem": origem, "payload": evento["_invalido"], "recebido_em": recebido_em,
+                    "processado_em": agora, "erro": "Payload inválido",
+                })
+                continue
+            aplicado = posicao < len(aplicados) and aplicados[posicao]
+            posicao += 1
+            linhas.append({
+                "origem": origem,
+                "payload": json.dumps(evento, ensure_ascii=False, default=str),
+                "recebido_em": recebido_em,
+                "processado_em": agora if aplicado else None,
+                "erro": erro,
+            })
+        return linhas
+
+    def reprocessar_pendentes(self) -> int:
+        """
+        Reaplica eventos recentes ainda não aplicados. Percorre todos os
+        pendentes da janela em páginas por id: eventos que nunca se resolvem
+        não impedem que os mais novos sejam reaplicados.
+        """
+        agora = datetime.now()
+        total = 0
+        db = self.session_factory()
+        try:
+            repo = WebhookEventoRepository(db)
+            for origem, aplicador in self.aplicadores.items():
+                ultimo_id = 0
+                while True:
+                    pendentes = repo.list_pendentes(
+                        origem, agora - self.JANELA_REPROCESSAMENTO,
+                        apos_id=ultimo_id, limit=self.LOTE_REPROCESSAMENTO,
+                    )
+                    if not pendentes:
+                        break
+                    # Lidos antes de aplicar: os commits do aplicador expiram os objetos
+                    ids_pagina = [p.id for p in pendentes]
+                    eventos = [json.loads(p.payload) for p in pendentes]
+                    ultimo_id = ids_pagina[-1]
+                    try:
+                        aplicados = aplicador(db, eventos)
+                        db.commit()
+                    except Exception:
+                        db.rollback()
+                        logger.exception(f"Falha ao reaplicar webhooks de {origem} (até id {ultimo_id})")
+                        continue
+                    ids = [i for i, ok in zip(ids_pagina, aplicados) if ok]
+                    repo.marcar_processados(ids, agora)
+                    db.commit()
+                    total += len(ids)
+            return total
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def _aplicar_eventos_pagamento(db: Session, eventos: List[dict]) -> List[bool]:
+    # Import tardio: a conciliação depende do pandas, carregado só no primeiro lote
+    from app.services.payment_service import aplicar_eventos_pagamento
+    return aplicar_eventos_pagamento(db, eventos)
+
+
+# ----------------------------------
+# Instâncias do processo
+# ----------------------------------
+webhook_buffer = WebhookBuffer(settings.WEBHOOK_BUFFER_SIZE)
+webhook_flusher = WebhookFlusher(
+    webhook_buffer,
+    aplicadores={
+        ORIGEM_COMUNICACAO: aplicar_status_mensagens,
+        ORIGEM_PAGAMENTO: _aplicar_eventos_pagamento,
+    },
+)
@@ -1 +1,54 @@
 # Helper functions
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import quote
+
+T = TypeVar("T")
+
+# Limite de parâmetros por cláusula IN (SQLite antigo aceita 999)
+TAMANHO_LOTE_IN = 500
+
+
+def em_lotes(valores: Sequence[T], tamanho: int = TAMANHO_LOTE_IN) -> Iterable[List[T]]:
+    """Divide uma sequência em lotes de no máximo `tamanho` itens"""
+    for i in range(0, len(valores), tamanho):
+        yield list(valores[i:i + tamanho])
+
+
+def parse_range(header: Optional[str], tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta um cabeçalho HTTP Range de intervalo único ("bytes=0-99",
+    "bytes=100-", "bytes=-100"). Retorna (inicio, fim) inclusivo, ou None se o
+    cabeçalho estiver ausente, malformado ou não suportado (resposta completa).
+    Levanta ValueError se o intervalo for insatisfazível.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    inicio_txt, _, fim_txt = header[len("bytes="):].strip().partition("-")
+    if not (inicio_txt.isdigit() or inicio_txt == "") or not (fim_txt.isdigit() or fim_txt == ""):
+        return None
+
+    if inicio_txt == "":
+        if not fim_txt or int(fim_txt) == 0 or tamanho == 0:
+            raise ValueError("Intervalo insatisfazível")
+        return max(0, tamanho - int(fim_txt)), tamanho - 1
+
+    inicio = int(inicio_txt)
+    fim = int(fim_txt) if fim_txt else tamanho - 1
+    if inicio >= tamanho or fim < inicio:
+        raise ValueError("Intervalo insatisfazível")
+    return inicio, min(fim, tamanho - 1)
+
+
+def content_disposition(nome: str) -> str:
+    """
+    Content-Disposition de download para um nome vindo do usuário. Nomes
+    com acentos, aspas ou quebras de linha vão codificados em filename*
+    (RFC 5987), com um nome ASCII de reserva para clientes antigos.
+    """
+    reserva = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    reserva = re.sub(r'[\x00-\x1f\x7f"\\]', "_", reserva) or "arquivo"
+    if reserva == nome:
+        return f'attachment; filename="{nome}"'
+    return f"attachment; filename=\"{reserva}\"; filename*=UTF-8''{quote(nome, safe='')}"
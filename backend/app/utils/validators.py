@@ -1 +1,128 @@
 # Validation utilities
+#
+# NumPy/pandas só são importados pelas versões vetorizadas: o model Cliente
+# usa a versão escalar, e importar os models não deve carregar o pandas.
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Pesos dos dígitos verificadores do CPF
+PESOS_DV1 = list(range(10, 1, -1))
+PESOS_DV2 = list(range(11, 1, -1))
+
+# Posições dos dígitos em XXX.XXX.XXX-XX
+POSICOES_MASCARA = [0, 1, 2, 4, 5, 6, 8, 9, 10, 12, 13]
+
+
+def cpfs_para_numero(valores: "pd.Series") -> "pd.Series":
+    """
+    Converte uma coluna de CPFs (com ou sem máscara, texto ou número) para
+    inteiro (Int64) sem laço em Python: os textos viram uma matriz de code
+    points e os dígitos são somados por posição. Aceita de 9 a 11 dígitos
+    (planilhas perdem os zeros à esquerda), senão <NA>. Não valida os
+    dígitos verificadores.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(valores) and not pd.api.types.is_bool_dtype(valores):
+        numeros = pd.Series(valores, dtype="Float64").round()
+        return numeros.where((numeros >= 10**8) & (numeros < 10**11)).astype("Int64")
+    if len(valores) == 0:
+        return pd.Series([], index=valores.index, dtype="Int64")
+
+    textos = np.asarray(valores.to_numpy(dtype=object), dtype=str)
+    codigos = textos.view(np.uint32).reshape(len(textos), textos.dtype.itemsize // 4)
+    digito = codigos - 48
+    eh_digito = digito <= 9
+
+    # Números lidos como float em colunas mistas chegam como "11144477735.0"
+    tamanho = (codigos != 0).sum(axis=1)
+    linhas = np.arange(len(textos))
+    ultimo = np.maximum(tamanho - 1, 0)
+    ponto_zero = (
+        (tamanho >= 2)
+        & (codigos[linhas, ultimo] == 48)
+        & (codigos[linhas, np.maximum(tamanho - 2, 0)] == 46)
+    )
+    eh_digito[linhas[ponto_zero], ultimo[ponto_zero]] = False
+
+    quantidade = eh_digito.sum(axis=1)
+    expoente = np.minimum(quantidade[:, None] - eh_digito.cumsum(axis=1), 18)
+    potencias = 10 ** np.arange(19, dtype=np.int64)
+    numeros = np.einsum(
+        "ij,ij->i", np.where(eh_digito, digito, 0).astype(np.int64), potencias[expoente]
+    )
+    return pd.Series(numeros, index=valores.index, dtype="Int64").where(
+        (quantidade >= 9) & (quantidade <= 11)
+    )
+
+
+def validar_cpfs(numeros) -> "np.ndarray":
+    """
+    Valida em bloco CPFs representados como inteiros (array ou Series;
+    nulos são inválidos). Calcula os dois dígitos verificadores sobre uma
+    matriz (n, 11) de dígitos e rejeita sequências repetidas (111.111.111-11).
+    """
+    import numpy as np
+    import pandas as pd
+
+    serie = pd.Series(numeros, dtype="Int64")
+    digitos = _digitos(serie.fillna(0).to_numpy(dtype=np.int64))
+
+    dv1 = (digitos[:, :9] @ np.array(PESOS_DV1, dtype=np.int32)) * 10 % 11 % 10
+    dv2 = (digitos[:, :10] @ np.array(PESOS_DV2, dtype=np.int32)) * 10 % 11 % 10
+    repetido = (digitos == digitos[:, :1]).all(axis=1)
+
+    return (
+        serie.notna().to_numpy()
+        & (dv1 == digitos[:, 9]) & (dv2 == digitos[:, 10]) & ~repetido
+    )
+
+
+def formatar_cpfs(numeros: "pd.Series") -> "pd.Series":
+    """Inteiros (Int64) para XXX.XXX.XXX-XX; nulos viram None"""
+    import numpy as np
+    import pandas as pd
+
+    digitos = _digitos(numeros.fillna(0).to_numpy(dtype=np.int64))
+    caracteres = np.full((len(digitos), 14), ord("."), dtype=np.uint8)
+    caracteres[:, 11] = ord("-")
+    caracteres[:, POSICOES_MASCARA] = digitos + 48
+    formatado = caracteres.view("S14").ravel().astype("U14").astype(object)
+    return pd.Series(formatado, index=numeros.index).where(numeros.notna().to_numpy(), None)
+
+
+def cpf_para_numero(cpf) -> Optional[int]:
+    """Versão escalar de cpfs_para_numero"""
+    if isinstance(cpf, float) and cpf.is_integer():
+        cpf = int(cpf)
+    digitos = "".join(filter(str.isdigit, str(cpf if cpf is not None else "")))
+    return int(digitos) if 9 <= len(digitos) <= 11 else None
+
+
+def validar_cpf(cpf) -> bool:
+    """Versão escalar de validar_cpfs"""
+    numero = cpf_para_numero(cpf)
+    if numero is None:
+        return False
+    digitos = [int(d) for d in f"{numero:011d}"]
+    if len(set(digitos)) == 1:
+        return False
+    dv1 = sum(d * p for d, p in zip(digitos[:9], PESOS_DV1)) * 10 % 11 % 10
+    dv2 = sum(d * p for d, p in zip(digitos[:10], PESOS_DV2)) * 10 % 11 % 10
+    return dv1 == digitos[9] and dv2 == digitos[10]
+
+
+def _digitos(numeros: "np.ndarray") -> "np.ndarray":
+    """Matriz (n, 11) com os dígitos de cada CPF (int32 em duas metades)"""
+    import numpy as np
+
+    alto = (numeros // 1_000_000).astype(np.int32)
+    baixo = (numeros % 1_000_000).astype(np.int32)
+    return np.concatenate([
+        alto[:, None] // (10 ** np.arange(4, -1, -1, dtype=np.int32)) % 10,
+        baixo[:, None] // (10 ** np.arange(5, -1, -1, dtype=np.int32)) % 10,
+    ], axis=1)
@@ -1,8 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.exceptions import register_exception_handlers
+from app.core.lifespan import lifespan
 
 from app.api.routes import (
     auth,
@@ -16,14 +18,8 @@ from app.api.routes import base_v2 as base
 
 from app.api.middlewares.logging import LoggingMiddleware
 from app.api.middlewares.rate_limit import RateLimitMiddleware
-
-# 🔹 IMPORTS DO BANCO
-from app.db.base import Base
-from app.db.session import engine
-
-# 🔹 IMPORTAR MODELS (OBRIGATÓRIO)
-from app.models import User  # noqa: F401
-from app.models.importacao_log import ImportacaoLog  # noqa: F401
+from app.api.middlewares.compression import CompressionMiddleware
+from app.api.middlewares.upload_limit import UploadSizeLimitMiddleware
 
 # -------------------------------------------------
 # Inicialização da aplicação
@@ -32,20 +28,28 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="API Backend do Sistema",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    # Mappers, DDL e tarefas de fundo: ver app/core/lifespan.py
+    lifespan=lifespan,
 )
 
-# -------------------------------------------------
-# Evento de startup → cria tabelas
-# -------------------------------------------------
-@app.on_event("startup")
-def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-
 # -------------------------------------------------
 # Middlewares
 # -------------------------------------------------
 
+app.add_middleware(LoggingMiddleware)
+
+if settings.ENABLE_RATE_LIMIT:
+    app.add_middleware(RateLimitMiddleware)
+
+if settings.ENABLE_COMPRESSION:
+    app.add_middleware(CompressionMiddleware)
+
+# Adicionado por último = mais externo. O limite de upload recusa corpos
+# grandes antes de qualquer leitura; o CORS fica por fora dele para que o 413
+# saia com os cabeçalhos CORS (senão o navegador reporta erro de CORS)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -54,11 +58,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(LoggingMiddleware)
-
-if settings.ENABLE_RATE_LIMIT:
-    app.add_middleware(RateLimitMiddleware)
-
 # -------------------------------------------------
 # Handlers de exceção
 # -------------------------------------------------
@@ -85,3 +84,14 @@ def health_check():
         "app": settings.APP_NAME,
         "version": settings.APP_VERSION
     }
+
+
+@app.get("/health/ready", tags=["Health"])
+def readiness_check(request: Request):
+    """Pronto para tráfego só após o lifespan (incluindo o aquecimento)"""
+    if not getattr(request.app.state, "pronto", False):
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting"},
+        )
+    return {"status": "ready"}
@@ -0,0 +1,37 @@
+"""
+Script para criar a revogação de tokens no banco em bases existentes.
+
+O create_all não altera tabelas já criadas. Cria a tabela tokens_revogados
+(logout) e a coluna users.tokens_invalidos_desde (desativação forçada),
+consultadas por get_current_user em todos os workers.
+
+Uso:
+    python -m scripts.adicionar_revogacao_tokens
+"""
+import sys
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+from app.models.token_revogado import TokenRevogado
+
+
+def main():
+    TokenRevogado.__table__.create(bind=engine, checkfirst=True)
+    print("Tabela tokens_revogados pronta.")
+
+    colunas = {c["name"] for c in inspect(engine).get_columns("users")}
+    if "tokens_invalidos_desde" in colunas:
+        print("Coluna users.tokens_invalidos_desde já existe.")
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN tokens_invalidos_desde TIMESTAMP WITH TIME ZONE"))
+    print("Coluna users.tokens_invalidos_desde criada.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Script para criar tenant_versoes (versões de dados do tenant) em bancos existentes.
+
+O create_all não altera bancos já criados. A tabela guarda as versões do
+tenant usadas no ETag das leituras de /dashboard e /base: versao_dados é
+incrementada a cada importação, conciliação ou webhook de pagamento;
+versao_segmentos a cada escrita em segmentos e na associação contrato x
+segmento.
+
+A linha de cada tenant fica no shard do tenant, junto com os dados, para
+que a versão seja gravada na mesma transação que os dados. Se o banco
+ainda tiver as colunas antigas tenants.versao_dados/versao_segmentos, os
+valores são copiados; depois da migração elas podem ser removidas
+(ALTER TABLE tenants DROP COLUMN ...).
+
+Uso:
+    python -m scripts.adicionar_versao_dados
+"""
+import sys
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import inspect, insert, select, text
+
+from app.db.session import engine, shard_do_tenant, shard_engines
+from app.db.sharding import criar_schema_shard
+from app.models import TenantVersao
+
+COLUNAS_ANTIGAS = ["versao_dados", "versao_segmentos"]
+
+
+def main():
+    TenantVersao.__table__.create(bind=engine, checkfirst=True)
+    for nome, shard in shard_engines.items():
+        criar_schema_shard(shard)  # create_all: só cria o que falta
+        print(f"Schema do shard {nome} atualizado.")
+
+    existentes = {c["name"] for c in inspect(engine).get_columns("tenants")}
+    antigas = [c for c in COLUNAS_ANTIGAS if c in existentes]
+    with engine.connect() as conn:
+        tenants = conn.execute(text(f"SELECT {', '.join(['id', *antigas])} FROM tenants")).mappings().all()
+
+    criadas = 0
+    for tenant in tenants:
+        destino = shard_engines.get(shard_do_tenant(tenant["id"]), engine)
+        with destino.begin() as conn:
+            if conn.scalar(select(TenantVersao.tenant_id).where(TenantVersao.tenant_id == tenant["id"])):
+                continue
+            conn.execute(
+                insert(TenantVersao).values(
+                    tenant_id=tenant["id"],
+                    **{coluna: tenant[coluna] or 0 for coluna in antigas},
+                )
+            )
+            criadas += 1
+    print(f"{criadas} linha(s) criada(s) em tenant_versoes ({len(tenants)} tenant(s)).")
+    if antigas:
+        print(f"Colunas antigas copiadas e já podem ser removidas: tenants.{', tenants.'.join(antigas)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Script para reavaliar a segmentação de todos os tenants.
+Deve ser agendado diariamente (cron), pois o D+ dos contratos envelhece
+a cada dia e contratos mudam de faixa sem nenhuma escrita no banco.
+
+Uso:
+    python -m scripts.atualizar_segmentos
+"""
+import sys
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.session import SessionLocal
+from app.services.segmentation_service import SegmentationService
+
+
+def atualizar_segmentos():
+    db = SessionLocal()
+    try:
+        resultados = SegmentationService(db).atualizar_todos()
+        for r in resultados:
+            print(
+                f"  ✓ tenant {r.tenant_id}: {r.contratos_avaliados} avaliados, "
+                f"+{r.adicionados} / -{r.removidos}, {r.total_membros} membros"
+            )
+        print(f"Segmentação atualizada para {len(resultados)} tenant(s).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    atualizar_segmentos()
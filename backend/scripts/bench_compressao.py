@@ -0,0 +1,123 @@
+"""
+Benchmark da compressão das respostas (CompressionMiddleware).
+
+Para payloads representativos de cada endpoint, passa a resposta pelo
+middleware (em chunks, como no streaming) e mede bytes enviados e tempo de
+CPU da compressão, sem compressão, em gzip e, se o pacote brotli estiver
+instalado, em brotli.
+
+Uso:
+    python -m scripts.bench_compressao --itens 100 --linhas-export 200000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from scripts.bench_serializacao import exemplo
+
+TAMANHO_CHUNK = 64 * 1024
+
+
+def payloads(itens: int, linhas_export: int):
+    """(endpoint, content-type, chunks) com dados de exemplo"""
+    from app.api.responses import FastJSONResponse
+    from app.schemas.dashboard import DashboardAnaliseClientes
+    from app.schemas.upload import ListaClientesBase, ListaLogsImportacao
+
+    def json(model):
+        return [FastJSONResponse(exemplo(model, itens)).body]
+
+    def export():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(["id", "nome", "cpf", "telefone", "email", "cidade", "uf"])
+        chunks = []
+        for i in range(linhas_export):
+            escritor.writerow([
+                i, f"Cliente {i}", f"{i % 999:03d}.{i % 997:03d}.{i % 991:03d}-{i % 97:02d}",
+                f"(11) 9{i % 10000:04d}-{i % 9973:04d}", f"cliente{i}@exemplo.com.br", "São Paulo", "SP",
+            ])
+            if buffer.tell() >= TAMANHO_CHUNK:
+                chunks.append(buffer.getvalue().encode())
+                buffer.seek(0)
+                buffer.truncate()
+        chunks.append(buffer.getvalue().encode())
+        return chunks
+
+    return [
+        ("/dashboard/analise-clientes", "application/json", json(DashboardAnaliseClientes)),
+        ("/base/clientes", "application/json", json(ListaClientesBase)),
+        ("/base/logs", "application/json", json(ListaLogsImportacao)),
+        ("/base/export/clientes", "text/csv", export()),
+    ]
+
+
+async def passar(middleware_cls, content_type: str, chunks, accept_encoding: str):
+    """Envia a resposta pelo middleware; retorna (bytes enviados, segundos de CPU)"""
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", content_type.encode())],
+        })
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    enviados = 0
+
+    async def send(message):
+        nonlocal enviados
+        if message["type"] == "http.response.body":
+            enviados += len(message.get("body", b""))
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+    }
+    inicio = time.process_time()
+    await middleware_cls(app)(scope, receive, send)
+    return enviados, time.process_time() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--itens", type=int, default=100, help="elementos por lista nos JSON")
+    parser.add_argument("--linhas-export", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from app.api.middlewares import compression
+    from app.api.middlewares.compression import CompressionMiddleware
+
+    codificacoes = [("identidade", ""), ("gzip", "gzip")]
+    if compression.brotli is not None:
+        codificacoes.append(("brotli", "br"))
+    else:
+        print("(pacote brotli não instalado: apenas gzip)\n")
+
+    print(f"{'endpoint':30} {'codificação':>11} {'bytes':>12} {'razão':>7} {'CPU (ms)':>10} {'MB/s':>8}")
+    for endpoint, content_type, chunks in payloads(args.itens, args.linhas_export):
+        original = sum(len(c) for c in chunks)
+        for nome, accept in codificacoes:
+            enviados, cpu = asyncio.run(passar(CompressionMiddleware, content_type, chunks, accept))
+            vazao = original / cpu / 1e6 if cpu else float("inf")
+            print(
+                f"{endpoint:30} {nome:>11} {enviados:>12,} {original / enviados:>6.1f}x "
+                f"{cpu * 1000:>10.1f} {vazao:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark da conciliação de pagamentos.
+
+Cria um SQLite temporário com um tenant e N contratos, gera um arquivo
+sintético de liquidação (por padrão 1M pagamentos, mistura de número do
+contrato, CPF e pagamentos sem contrato) e mede a vazão da conciliação.
+
+Uso:
+    python -m scripts.bench_conciliacao --pagamentos 1000000 --contratos 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+import pandas as pd
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pagamentos", type=int, default=1_000_000)
+    parser.add_argument("--contratos", type=int, default=200_000)
+    parser.add_argument("--database-url", default=None, help="padrão: SQLite temporário")
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db.base import Base
+    from app.models import Tenant, Cliente, Contrato, StatusContrato
+    from app.services.payment_service import ConciliacaoService
+
+    url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_conciliacao.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+
+    rng = np.random.default_rng(42)
+    n = args.contratos
+
+    tenant = Tenant(nome="Bench Conciliação", cnpj=f"{rng.integers(10**13):014d}"[:18])
+    db.add(tenant)
+    db.commit()
+
+    print(f"Gerando {n} contratos...")
+    cpfs = [f"{i:011d}" for i in range(10_000_000_000, 10_000_000_000 + n)]
+    cpfs_fmt = [f"{c[:3]}.{c[3:6]}.{c[6:9]}-{c[9:]}" for c in cpfs]
+    db.execute(insert(Cliente), [
+        {"tenant_id": tenant.id, "nome": f"Cliente {i}", "cpf": cpfs_fmt[i]} for i in range(n)
+    ])
+    primeiro_cliente = db.query(Cliente.id).filter(Cliente.tenant_id == tenant.id).order_by(Cliente.id).first().id
+    hoje = date.today()
+    valores = rng.uniform(100, 5000, n).round(2)
+    db.execute(insert(Contrato), [
+        {
+            "tenant_id": tenant.id,
+            "cliente_id": primeiro_cliente + i,
+            "numero_contrato": f"BENCH-{i:08d}",
+            "valor_original": float(valores[i]),
+            "valor_pago": 0,
+            "data_vencimento": hoje - timedelta(days=int(i % 365)),
+            "status": StatusContrato.ATRASADO,
+        }
+        for i in range(n)
+    ])
+    db.commit()
+
+    print(f"Gerando arquivo com {args.pagamentos} pagamentos...")
+    m = args.pagamentos
+    alvo = rng.integers(0, n, m)
+    tipo = rng.random(m)  # < 0.6 número do contrato, < 0.95 CPF, resto sem contrato
+    df = pd.DataFrame({
+        "id": [f"tx-{i}" for i in range(m)],
+        "numero_contrato": np.where(
+            tipo < 0.6, pd.Series(alvo).map(lambda i: f"BENCH-{i:08d}"),
+            np.where(tipo >= 0.95, "INEXISTENTE", ""),
+        ),
+        "cpf": np.where((tipo >= 0.6) & (tipo < 0.95), pd.Series(alvo).map(cpfs.__getitem__), ""),
+        "valor": rng.uniform(10, 800, m).round(2),
+        "data_pagamento": (pd.Timestamp(hoje) - pd.to_timedelta(rng.integers(0, 30, m), unit="D")).strftime("%Y-%m-%d"),
+    })
+    conteudo = df.to_csv(index=False).encode()
+    print(f"Arquivo: {len(conteudo) / 1024 / 1024:.1f} MB")
+
+    inicio = time.perf_counter()
+    resultado = ConciliacaoService(db).conciliar_arquivo(conteudo, "liquidacao.csv", tenant.id)
+    decorrido = time.perf_counter() - inicio
+    db.close()
+
+    print(f"Tempo total: {decorrido:.2f}s ({m / decorrido:,.0f} pagamentos/s)")
+    for chave, valor in resultado.model_dump().items():
+        print(f"  {chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
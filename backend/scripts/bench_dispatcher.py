@@ -0,0 +1,142 @@
+"""
+Benchmark do dispatcher de comunicações contra um provedor simulado local.
+
+Sobe um servidor HTTP (uvicorn) que implementa as APIs de lote dos provedores
+com latência e taxa de falha configuráveis, popula a outbox de um SQLite
+temporário e mede mensagens/s e latência (p50/p99) das chamadas.
+
+Uso:
+    python -m scripts.bench_dispatcher --mensagens 20000 --latencia-ms 50 --falhas 0.01
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def criar_provedor_simulado(latencia: float, taxa_falha: float):
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def lote(request: Request):
+        await asyncio.sleep(latencia)
+        if random.random() < taxa_falha:
+            return JSONResponse({"detail": "indisponível"}, status_code=503)
+        data = await request.json()
+        return JSONResponse({
+            "results": [
+                {"id": m["id"], "message_id": f"sim-{m['id']}", "status": "accepted"}
+                for m in data["messages"]
+            ]
+        })
+
+    async def chamada(request: Request):
+        await asyncio.sleep(latencia)
+        if random.random() < taxa_falha:
+            return JSONResponse({"detail": "indisponível"}, status_code=503)
+        data = await request.json()
+        return JSONResponse({"call_id": f"sim-{data['id']}"})
+
+    return Starlette(routes=[
+        Route("/messages/batch", lote, methods=["POST"]),
+        Route("/sms/batch", lote, methods=["POST"]),
+        Route("/calls", chamada, methods=["POST"]),
+    ])
+
+
+def iniciar_servidor(app, porta: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, port=porta, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mensagens", type=int, default=20000)
+    parser.add_argument("--canal", choices=["whatsapp", "sms", "voice"], default="whatsapp")
+    parser.add_argument("--latencia-ms", type=float, default=50.0)
+    parser.add_argument("--falhas", type=float, default=0.0)
+    parser.add_argument("--taxa", type=float, default=5000.0, help="limite do provedor (msg/s)")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db.base import Base
+    from app.models import User, MensagemOutbox, CanalComunicacao, StatusMensagem
+    from app.integrations.whatsapp import WhatsAppClient
+    from app.integrations.sms import SMSClient
+    from app.integrations.voice import VoiceClient
+    from app.services.communication_service import OutboundDispatcher
+
+    servidor = iniciar_servidor(
+        criar_provedor_simulado(args.latencia_ms / 1000, args.falhas), args.porta
+    )
+    url = f"http://127.0.0.1:{args.porta}"
+
+    caminho = Path(tempfile.mkdtemp()) / "bench_dispatcher.db"
+    engine = create_engine(f"sqlite:///{caminho}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    canal = CanalComunicacao(args.canal)
+    db = Session()
+    db.add(User(id="bench", email="bench@local", name="Bench", hashed_password="x"))
+    db.commit()
+    db.execute(insert(MensagemOutbox), [
+        {
+            "usuario_id": "bench",
+            "canal": canal,
+            "destinatario": f"+5511{i:09d}",
+            "conteudo": "Mensagem de teste",
+            "status": StatusMensagem.PENDENTE,
+            "tentativas": 0,
+        }
+        for i in range(args.mensagens)
+    ])
+    db.commit()
+    db.close()
+
+    providers = {
+        CanalComunicacao.WHATSAPP: WhatsAppClient(url, taxa_por_segundo=args.taxa),
+        CanalComunicacao.SMS: SMSClient(url, taxa_por_segundo=args.taxa),
+        CanalComunicacao.VOZ: VoiceClient(url, taxa_por_segundo=args.taxa),
+    }
+
+    async def executar():
+        async with OutboundDispatcher(session_factory=Session, providers=providers) as dispatcher:
+            while await dispatcher.executar_ciclo():
+                pass
+            return dispatcher.metricas.resumo()
+
+    inicio = time.perf_counter()
+    resumo = asyncio.run(executar())
+    decorrido = time.perf_counter() - inicio
+    servidor.should_exit = True
+
+    print(f"Mensagens: {args.mensagens} ({args.canal}), latência simulada {args.latencia_ms} ms")
+    print(f"Tempo total: {decorrido:.2f}s")
+    for chave, valor in resumo.items():
+        print(f"  {chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
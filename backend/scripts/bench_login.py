@@ -0,0 +1,133 @@
+"""
+Benchmark do login sob carga concorrente.
+
+Sobe a API (uvicorn) com um SQLite temporário, cria usuários e dispara
+logins simultâneos, medindo logins/s e latência (p50/p99). Em paralelo,
+sonda o /health para mostrar se o event loop continua respondendo enquanto
+o bcrypt trabalha. Use para dimensionar PASSWORD_HASH_WORKERS e BCRYPT_ROUNDS.
+
+Uso:
+    python -m scripts.bench_login --logins 500 --concorrencia 100 --workers 4 --rounds 12
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "bench")
+
+
+def percentil(valores, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))] * 1000
+
+
+def iniciar_servidor(app, porta: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, port=porta, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concorrencia", type=int, default=100)
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS")
+    parser.add_argument("--porta", type=int, default=8766)
+    args = parser.parse_args()
+
+    # Configuração precisa estar no ambiente antes de importar o app
+    caminho = Path(tempfile.mkdtemp()) / "bench_login.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{caminho}"
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["ENABLE_RATE_LIMIT"] = "false"
+
+    import httpx
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.security import get_password_hash
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.models import User
+    from main import app
+
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    hashed = get_password_hash("senha-bench")
+    db.add_all([
+        User(name=f"Bench {i}", email=f"bench{i}@local", hashed_password=hashed, is_active=True)
+        for i in range(args.usuarios)
+    ])
+    db.commit()
+    db.close()
+
+    servidor = iniciar_servidor(app, args.porta)
+    url = f"http://127.0.0.1:{args.porta}"
+
+    async def executar():
+        latencias, sondas, falhas = [], [], 0
+        fila = asyncio.Queue()
+        for i in range(args.logins):
+            fila.put_nowait(i)
+        terminou = asyncio.Event()
+
+        limites = httpx.Limits(max_connections=args.concorrencia + 1)
+        async with httpx.AsyncClient(base_url=url, limits=limites, timeout=120) as client:
+
+            async def operador():
+                nonlocal falhas
+                while not fila.empty():
+                    i = fila.get_nowait()
+                    inicio = time.perf_counter()
+                    resposta = await client.post("/auth/login", data={
+                        "username": f"bench{i % args.usuarios}@local",
+                        "password": "senha-bench",
+                    })
+                    latencias.append(time.perf_counter() - inicio)
+                    falhas += resposta.status_code != 200
+
+            async def sonda():
+                while not terminou.is_set():
+                    inicio = time.perf_counter()
+                    await client.get("/health")
+                    sondas.append(time.perf_counter() - inicio)
+                    await asyncio.sleep(0.05)
+
+            tarefa_sonda = asyncio.create_task(sonda())
+            inicio = time.perf_counter()
+            await asyncio.gather(*(operador() for _ in range(args.concorrencia)))
+            decorrido = time.perf_counter() - inicio
+            terminou.set()
+            await tarefa_sonda
+        return latencias, sondas, falhas, decorrido
+
+    latencias, sondas, falhas, decorrido = asyncio.run(executar())
+    servidor.should_exit = True
+
+    print(f"Logins: {args.logins} ({args.concorrencia} simultâneos), "
+          f"workers={args.workers}, rounds={args.rounds}")
+    print(f"Tempo total: {decorrido:.2f}s  ({args.logins / decorrido:.1f} logins/s)")
+    print(f"Latência login: p50={percentil(latencias, 0.50):.0f} ms  p99={percentil(latencias, 0.99):.0f} ms")
+    print(f"Latência /health durante a carga: p50={percentil(sondas, 0.50):.1f} ms  "
+          f"p99={percentil(sondas, 0.99):.1f} ms")
+    print(f"Falhas: {falhas}")
+
+
+if __name__ == "__main__":
+    main()
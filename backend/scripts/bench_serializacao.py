@@ -0,0 +1,104 @@
+"""
+Benchmark da serialização das respostas grandes.
+
+Para cada endpoint, monta um payload representativo do response_model e
+compara o caminho padrão do FastAPI (dump + revalidação contra o
+response_model + jsonable_encoder + json.dumps) com o FastJSONResponse
+(serializador Rust do Pydantic, sem revalidação). Confere também que os
+dois produzem o mesmo JSON.
+
+Uso:
+    python -m scripts.bench_serializacao --itens 50 --repeticoes 200
+"""
+import argparse
+import asyncio
+import enum
+import json
+import os
+import sys
+import time
+import typing
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from pydantic import BaseModel
+
+ENDPOINTS = ["/dashboard/principal", "/dashboard/analise-clientes", "/base/clientes"]
+
+
+def exemplo(tipo, itens: int, i: int = 0):
+    """Valor de exemplo para uma anotação de tipo (listas com `itens` elementos)"""
+    origem = typing.get_origin(tipo)
+    if origem is typing.Union:
+        return exemplo(next(t for t in typing.get_args(tipo) if t is not type(None)), itens, i)
+    if origem in (list, typing.List):
+        return [exemplo(typing.get_args(tipo)[0], itens, j) for j in range(itens)]
+    if isinstance(tipo, type) and issubclass(tipo, enum.Enum):
+        membros = list(tipo)
+        return membros[i % len(membros)]
+    if isinstance(tipo, type) and issubclass(tipo, BaseModel):
+        return tipo(**{
+            nome: exemplo(campo.annotation, itens, i) for nome, campo in tipo.model_fields.items()
+        })
+    valores = {
+        int: i, float: i * 1.5, Decimal: Decimal(i) + Decimal("0.37"), str: f"Cliente Número {i} – São Paulo",
+        bool: i % 2 == 0, datetime: datetime(2024, 1, 1, 12, i % 60), date: date(2024, 1, 1),
+    }
+    return valores[tipo]
+
+
+def medir(funcao, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--itens", type=int, default=50, help="elementos por lista")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import APIRoute, serialize_response
+
+    from app.api.responses import FastJSONResponse
+    from main import app
+
+    rotas = {r.path: r for r in app.routes if isinstance(r, APIRoute)}
+    loop = asyncio.new_event_loop()
+
+    print(f"{'endpoint':32} {'bytes':>9} {'padrão (ms)':>12} {'rápido (ms)':>12} {'ganho':>7}")
+    for caminho in ENDPOINTS:
+        rota = rotas[caminho]
+        model = exemplo(rota.response_model, args.itens)
+
+        def padrao():
+            conteudo = loop.run_until_complete(
+                serialize_response(field=rota.response_field, response_content=model, is_coroutine=False)
+            )
+            return JSONResponse(conteudo).body
+
+        def rapido():
+            return FastJSONResponse(model).body
+
+        if json.loads(padrao()) != json.loads(rapido()):
+            print(f"{caminho}: saídas diferentes!")
+            sys.exit(1)
+
+        t_padrao = medir(padrao, args.repeticoes)
+        t_rapido = medir(rapido, args.repeticoes)
+        print(f"{caminho:32} {len(rapido()):>9} {t_padrao:>12.3f} {t_rapido:>12.3f} {t_padrao / t_rapido:>6.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Worker de disparo de comunicações.
+Consome a outbox (mensagens_outbox) e envia pelos provedores configurados,
+em lote, com pool de conexões por provedor e limite de taxa.
+
+Vários workers podem rodar em paralelo no PostgreSQL (SKIP LOCKED).
+
+Uso:
+    python -m scripts.dispatch_worker
+"""
+import asyncio
+import signal
+import sys
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.communication_service import OutboundDispatcher
+
+
+async def main():
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, parar.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    async with OutboundDispatcher() as dispatcher:
+        canais = ", ".join(c.value for c in dispatcher.providers) or "nenhum"
+        print(f"Dispatcher iniciado (canais: {canais})")
+        await dispatcher.executar(parar)
+        print(f"Dispatcher finalizado: {dispatcher.metricas.resumo()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
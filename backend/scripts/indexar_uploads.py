@@ -0,0 +1,129 @@
+"""
+Script para indexar os arquivos enviados antes da tabela uploaded_files.
+
+Arquivos legados ficam em UPLOAD_DIR como "<uuid>_<nome>". Cada um é movido
+para o armazenamento endereçado por conteúdo e registrado na tabela,
+mantendo o mesmo id (os links de download continuam válidos).
+
+O nome legado não guarda o tenant: ele é recuperado da importação feita com
+o arquivo (importacao_logs com o mesmo nome, iniciada perto da gravação do
+arquivo). Arquivos sem importação correspondente, ou que casam com mais de
+um tenant, não são indexados: ficam em UPLOAD_DIR e são listados no final.
+Com --tenant, esses arquivos são atribuídos ao tenant informado.
+
+Uso:
+    python -m scripts.indexar_uploads
+    python -m scripts.indexar_uploads --tenant 3
+"""
+import argparse
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.sharding import em_cada_shard, ha_shards
+from app.models import ArquivoUpload
+from app.models.importacao_log import ImportacaoLog
+from app.services.file_storage_service import FileStorageService, TAMANHO_CHUNK
+
+# O upload legado gravava o arquivo e iniciava a importação na mesma requisição
+JANELA_IMPORTACAO = timedelta(minutes=15)
+
+
+def origem_do_arquivo(db, nome_original: str, gravado_em: datetime) -> Optional[Tuple[int, Optional[str]]]:
+    """(tenant, usuário) da importação feita com o arquivo; None se ausente ou ambígua"""
+    def consultar(sessao):
+        return (
+            sessao.query(ImportacaoLog.tenant_id, ImportacaoLog.usuario_id)
+            .filter(
+                ImportacaoLog.nome_arquivo == nome_original,
+                ImportacaoLog.data_inicio.between(gravado_em - JANELA_IMPORTACAO, gravado_em + JANELA_IMPORTACAO),
+            )
+            .distinct()
+            .all()
+        )
+
+    # Sem filtro de tenant: com shards, procura em todos os bancos
+    logs = [log for parcial in em_cada_shard(consultar) for log in parcial] if ha_shards() else consultar(db)
+    tenants = {log.tenant_id for log in logs}
+    if len(tenants) != 1:
+        return None
+    usuarios = {log.usuario_id for log in logs}
+    return tenants.pop(), usuarios.pop() if len(usuarios) == 1 else None
+
+
+def indexar_uploads(tenant_padrao: Optional[int] = None):
+    if not os.path.isdir(settings.UPLOAD_DIR):
+        print("Diretório de uploads inexistente.")
+        return
+
+    db = SessionLocal()
+    indexados = 0
+    sem_tenant = []
+    try:
+        for nome in sorted(os.listdir(settings.UPLOAD_DIR)):
+            caminho_legado = os.path.join(settings.UPLOAD_DIR, nome)
+            if not os.path.isfile(caminho_legado) or "_" not in nome:
+                continue
+            arquivo_id, nome_original = nome.split("_", 1)
+            if db.get(ArquivoUpload, arquivo_id):
+                continue
+
+            gravado_em = datetime.fromtimestamp(os.path.getmtime(caminho_legado))
+            origem = origem_do_arquivo(db, nome_original, gravado_em)
+            if origem is None and tenant_padrao is not None:
+                origem = (tenant_padrao, None)
+            if origem is None:
+                sem_tenant.append(nome)
+                continue
+            tenant_id, usuario_id = origem
+
+            sha256 = hashlib.sha256()
+            with open(caminho_legado, "rb") as f:
+                while chunk := f.read(TAMANHO_CHUNK):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+
+            caminho = FileStorageService.caminho_objeto(digest)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            tamanho = os.path.getsize(caminho_legado)
+            if os.path.isfile(caminho):
+                os.unlink(caminho_legado)
+            else:
+                os.replace(caminho_legado, caminho)
+
+            db.add(ArquivoUpload(
+                id=arquivo_id,
+                tenant_id=tenant_id,
+                usuario_id=usuario_id,
+                nome_original=nome_original,
+                sha256=digest,
+                tamanho=tamanho,
+                caminho=caminho,
+                created_at=gravado_em,
+            ))
+            db.commit()
+            indexados += 1
+            print(f"  ✓ {nome_original} ({digest[:12]}) → tenant {tenant_id}")
+        print(f"{indexados} arquivo(s) indexado(s).")
+        if sem_tenant:
+            print(f"{len(sem_tenant)} arquivo(s) sem tenant identificado (mantidos em {settings.UPLOAD_DIR}):")
+            for nome in sem_tenant:
+                print(f"  ? {nome}")
+            print("Reexecute com --tenant ID para atribuí-los a um tenant.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenant", type=int, help="tenant dos arquivos sem importação correspondente")
+    args = parser.parse_args()
+    indexar_uploads(args.tenant)
@@ -0,0 +1,78 @@
+"""
+Script para adicionar e preencher clientes.cpf_numero em bancos existentes.
+
+O create_all não altera tabelas já criadas: o script cria a coluna e o
+índice (tenant_id, cpf_numero) se faltarem e preenche cpf_numero em lotes,
+com a validação vetorizada. Clientes com CPF inválido (dígitos verificadores)
+ficam com cpf_numero nulo e são listados por tenant.
+
+Uso:
+    python -m scripts.normalizar_cpfs
+"""
+import sys
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+from app.utils.validators import cpfs_para_numero, validar_cpfs
+
+TAMANHO_LOTE = 50_000
+
+
+def criar_coluna():
+    colunas = {c["name"] for c in inspect(engine).get_columns("clientes")}
+    with engine.begin() as conn:
+        if "cpf_numero" not in colunas:
+            conn.execute(text("ALTER TABLE clientes ADD COLUMN cpf_numero BIGINT"))
+            print("Coluna clientes.cpf_numero criada.")
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_clientes_tenant_cpf_numero ON clientes (tenant_id, cpf_numero)"
+        ))
+
+
+def preencher():
+    atualizar = text("UPDATE clientes SET cpf_numero = :numero WHERE id = :id_cliente")
+    ultimo_id = 0
+    preenchidos = 0
+    invalidos = {}
+    while True:
+        with engine.begin() as conn:
+            lote = pd.read_sql(
+                text(
+                    "SELECT id, tenant_id, cpf FROM clientes "
+                    "WHERE id > :ultimo AND cpf_numero IS NULL ORDER BY id LIMIT :limite"
+                ),
+                conn,
+                params={"ultimo": ultimo_id, "limite": TAMANHO_LOTE},
+            )
+            if lote.empty:
+                break
+            ultimo_id = int(lote["id"].iloc[-1])
+
+            numero = cpfs_para_numero(lote["cpf"])
+            valido = validar_cpfs(numero)
+            for tenant_id, total in lote.loc[~valido, "tenant_id"].value_counts().items():
+                invalidos[tenant_id] = invalidos.get(tenant_id, 0) + int(total)
+
+            registros = [
+                {"numero": int(n), "id_cliente": int(i)}
+                for i, n in zip(lote.loc[valido, "id"], numero[valido])
+            ]
+            if registros:
+                conn.execute(atualizar, registros)
+            preenchidos += len(registros)
+            print(f"  até id {ultimo_id}: {preenchidos} preenchidos")
+
+    print(f"\n{preenchidos} clientes com cpf_numero preenchido.")
+    for tenant_id, total in sorted(invalidos.items()):
+        print(f"  tenant {tenant_id}: {total} clientes com CPF inválido")
+
+
+if __name__ == "__main__":
+    criar_coluna()
+    preencher()
@@ -0,0 +1,416 @@
+"""
+Particionamento declarativo de clientes e contratos por tenant_id (PostgreSQL).
+
+Com as tabelas particionadas, vacuum, índices e as consultas filtradas por
+tenant trabalham só na partição do tenant. Os models não mudam: a tabela
+particionada mantém o nome, as colunas e os índices (a PK passa a ser
+(id, tenant_id), exigência do PostgreSQL; id continua vindo da mesma sequence).
+
+A migração é online, em quatro etapas:
+
+    preparar  cria clientes_part/contratos_part particionadas (hash em N
+              partições ou lista com uma partição por tenant + DEFAULT),
+              copia os índices e instala triggers que espelham nelas toda
+              escrita feita nas tabelas atuais;
+    copiar    copia as linhas existentes em lotes por faixa de id, cada lote
+              na sua transação (pode ser interrompido e repetido);
+    trocar    confere as contagens e, numa transação curta com lock, remove
+              os triggers e troca as tabelas pelos nomes (as antigas ficam
+              como *_antiga); toda FK que aponta para elas é recriada
+              composta com tenant_id e validada depois, sem lock (se
+              alguma não puder ser recriada, nada é alterado);
+    explicar  mostra o plano de consultas de dashboard de um tenant, para
+              conferir a poda de partições.
+
+Em modo lista, tenants criados depois caem na partição DEFAULT; crie a
+partição dedicada antes da primeira importação com `nova-particao`.
+
+Uso:
+    python -m scripts.particionar_tabelas preparar --modo hash --particoes 16
+    python -m scripts.particionar_tabelas copiar --lote 50000
+    python -m scripts.particionar_tabelas copiar --tabela contratos --desde 1200000
+    python -m scripts.particionar_tabelas trocar
+    python -m scripts.particionar_tabelas explicar --tenant 3
+    python -m scripts.particionar_tabelas nova-particao --tenant 42
+    python -m scripts.particionar_tabelas --shard grandes preparar  (banco de um shard)
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.session import engine as engine_principal, shard_engines
+
+# Ordem importa: contratos referencia clientes
+TABELAS = ("clientes", "contratos")
+TAMANHO_LOTE = 50_000
+
+# pg_constraint.confdeltype / confupdtype -> cláusula SQL
+ACOES_FK = {"a": "NO ACTION", "r": "RESTRICT", "c": "CASCADE", "n": "SET NULL", "d": "SET DEFAULT"}
+
+
+def nova(tabela: str) -> str:
+    return f"{tabela}_part"
+
+
+def antiga(tabela: str) -> str:
+    return f"{tabela}_antiga"
+
+
+def existe(conn: Connection, tabela: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": tabela}).scalar()
+
+
+# ----------------------------------
+# preparar
+# ----------------------------------
+def preparar(engine: Engine, modo: str, particoes: int):
+    with engine.begin() as conn:
+        for tabela in TABELAS:
+            if existe(conn, nova(tabela)):
+                print(f"{nova(tabela)} já existe.")
+                continue
+            estrategia = "HASH" if modo == "hash" else "LIST"
+            conn.execute(text(
+                f"CREATE TABLE {nova(tabela)} ("
+                f"LIKE {tabela} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE, "
+                f"PRIMARY KEY (id, tenant_id), "
+                f"FOREIGN KEY (tenant_id) REFERENCES tenants (id) ON DELETE CASCADE"
+                f") PARTITION BY {estrategia} (tenant_id)"
+            ))
+            criar_particoes(conn, tabela, modo, particoes)
+            copiar_indices(conn, tabela)
+            instalar_espelho(conn, tabela)
+            print(f"{nova(tabela)} criada ({modo}) com trigger de espelhamento em {tabela}.")
+
+
+def criar_particoes(conn: Connection, tabela: str, modo: str, particoes: int):
+    if modo == "hash":
+        for resto in range(particoes):
+            conn.execute(text(
+                f"CREATE TABLE {tabela}_p{resto} PARTITION OF {nova(tabela)} "
+                f"FOR VALUES WITH (MODULUS {particoes}, REMAINDER {resto})"
+            ))
+        return
+    for (tenant_id,) in conn.execute(text("SELECT id FROM tenants ORDER BY id")):
+        conn.execute(text(
+            f"CREATE TABLE {tabela}_t{tenant_id} PARTITION OF {nova(tabela)} FOR VALUES IN ({tenant_id})"
+        ))
+    conn.execute(text(f"CREATE TABLE {tabela}_padrao PARTITION OF {nova(tabela)} DEFAULT"))
+
+
+def copiar_indices(conn: Connection, tabela: str):
+    """
+    Recria na tabela nova os índices da atual (exceto a PK), com sufixo _part.
+
+    Índice único em tabela particionada precisa conter a chave de partição.
+    Um único sem tenant_id não tem equivalente e a unicidade que ele garante
+    se perderia em silêncio: a preparação é abortada (a transação desfaz
+    tudo) até o índice ser trocado por um que inclua tenant_id.
+    """
+    indices = conn.execute(text(
+        "SELECT i.relname, pg_get_indexdef(i.oid), x.indisunique, "
+        "ARRAY(SELECT a.attname FROM pg_attribute a "
+        "      WHERE a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey)) "
+        "FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+        "WHERE x.indrelid = CAST(:t AS regclass) AND NOT x.indisprimary"
+    ), {"t": tabela}).all()
+    sem_tenant = [nome for nome, _, unico, colunas in indices if unico and "tenant_id" not in colunas]
+    if sem_tenant:
+        raise SystemExit(
+            f"{tabela}: índice(s) único(s) sem tenant_id não podem existir na tabela particionada: "
+            f"{', '.join(sem_tenant)}. Inclua tenant_id no índice (ou remova-o) e rode `preparar` de novo."
+        )
+    for nome, definicao, _, _ in indices:
+        definicao = re.sub(rf" ON (ONLY )?(\S+\.)?{tabela} ", f" ON {nova(tabela)} ", definicao, count=1)
+        definicao = definicao.replace(f"INDEX {nome} ", f"INDEX {nome}_part ", 1)
+        conn.execute(text(definicao))
+
+
+def instalar_espelho(conn: Connection, tabela: str):
+    """
+    Trigger AFTER na tabela atual: toda escrita vai também para a nova, na
+    mesma transação. O upsert torna indiferente a ordem em relação à cópia
+    em lotes (a versão mais recente da linha sempre prevalece).
+    """
+    colunas = conn.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :t ORDER BY ordinal_position"
+    ), {"t": tabela}).scalars().all()
+    atribuicoes = ", ".join(f"{c} = EXCLUDED.{c}" for c in colunas if c not in ("id", "tenant_id"))
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION espelhar_{tabela}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.tenant_id <> NEW.tenant_id) THEN
+                DELETE FROM {nova(tabela)} WHERE id = OLD.id AND tenant_id = OLD.tenant_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {nova(tabela)} VALUES (NEW.*)
+                ON CONFLICT (id, tenant_id) DO UPDATE SET {atribuicoes};
+            END IF;
+            RETURN NULL;
+        END $$
+    """))
+    conn.execute(text(
+        f"CREATE TRIGGER espelhar_{tabela} AFTER INSERT OR UPDATE OR DELETE ON {tabela} "
+        f"FOR EACH ROW EXECUTE FUNCTION espelhar_{tabela}()"
+    ))
+
+
+# ----------------------------------
+# copiar
+# ----------------------------------
+def copiar(engine: Engine, tabelas, lote: int, desde: int, pausa: float):
+    for tabela in tabelas:
+        with engine.connect() as conn:
+            if not existe(conn, nova(tabela)):
+                raise SystemExit(f"{nova(tabela)} não existe; rode `preparar` antes.")
+            maximo = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}")).scalar()
+
+        # Linhas com id acima de `maximo` nasceram depois do trigger: já estão na nova
+        copiar_lote = text(
+            f"INSERT INTO {nova(tabela)} SELECT * FROM {tabela} "
+            f"WHERE id > :inicio AND id <= :fim ON CONFLICT (id, tenant_id) DO NOTHING"
+        )
+        inicio = desde
+        copiadas = 0
+        while inicio < maximo:
+            fim = min(inicio + lote, maximo)
+            with engine.begin() as conn:
+                copiadas += conn.execute(copiar_lote, {"inicio": inicio, "fim": fim}).rowcount
+            print(f"  {tabela}: até id {fim:,} de {maximo:,} ({copiadas:,} linhas copiadas)")
+            inicio = fim
+            if pausa:
+                time.sleep(pausa)
+
+        with engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {nova(tabela)}"))
+        print(f"{tabela}: cópia concluída.")
+
+
+# ----------------------------------
+# trocar
+# ----------------------------------
+def trocar(engine: Engine, remover_antigas: bool):
+    # Mesmo snapshot para as duas contagens (o trigger mantém ambas iguais)
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+        for tabela in TABELAS:
+            if not existe(conn, nova(tabela)):
+                raise SystemExit(f"{nova(tabela)} não existe; rode `preparar` e `copiar` antes.")
+            atual = conn.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+            copia = conn.execute(text(f"SELECT COUNT(*) FROM {nova(tabela)}")).scalar()
+            if atual != copia:
+                raise SystemExit(f"{tabela}: {atual:,} linhas, {nova(tabela)}: {copia:,}. Rode `copiar` de novo.")
+
+    with engine.begin() as conn:
+        versao = conn.execute(text("SHOW server_version_num")).scalar()
+        # Não fica na fila atrás de transações longas: falha e pode ser repetido
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        conn.execute(text(f"LOCK TABLE {', '.join(TABELAS)} IN ACCESS EXCLUSIVE MODE"))
+
+        # Antes de qualquer alteração: se alguma FK não puder ser recriada, aborta
+        # aqui e a transação não muda nada
+        referencias = planejar_referencias(conn, int(versao))
+
+        for tabela in TABELAS:
+            conn.execute(text(f"DROP TRIGGER espelhar_{tabela} ON {tabela}"))
+            conn.execute(text(f"DROP FUNCTION espelhar_{tabela}()"))
+
+        # FKs simples (id) para as tabelas atuais: não podem apontar para as particionadas
+        for tabela, constraint, _ in referencias:
+            conn.execute(text(f'ALTER TABLE {tabela} DROP CONSTRAINT "{constraint}"'))
+
+        for tabela in TABELAS:
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": tabela}).scalar()
+            if sequence:
+                # Sem isso o DROP da tabela antiga levaria a sequence junto
+                conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {nova(tabela)}.id"))
+            renomear_indices = conn.execute(text(
+                "SELECT i.relname FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid "
+                "WHERE x.indrelid = CAST(:t AS regclass)"
+            ), {"t": tabela}).scalars().all()
+            conn.execute(text(f"ALTER TABLE {tabela} RENAME TO {antiga(tabela)}"))
+            conn.execute(text(f"ALTER TABLE {nova(tabela)} RENAME TO {tabela}"))
+            conn.execute(text(f"ALTER TABLE {tabela} RENAME CONSTRAINT {nova(tabela)}_pkey TO {tabela}_pkey_part"))
+            for indice in renomear_indices:
+                conn.execute(text(f"ALTER INDEX {indice} RENAME TO {indice}_antiga"))
+                if indice == f"{tabela}_pkey":
+                    conn.execute(text(f"ALTER INDEX {tabela}_pkey_part RENAME TO {tabela}_pkey"))
+                elif existe(conn, f"{indice}_part"):
+                    conn.execute(text(f"ALTER INDEX {indice}_part RENAME TO {indice}"))
+
+        # Toda FK removida volta, com o mesmo nome, composta com tenant_id
+        for tabela, constraint, definicao in referencias:
+            conn.execute(text(f'ALTER TABLE {tabela} ADD CONSTRAINT "{constraint}" {definicao} NOT VALID'))
+    print("Tabelas trocadas.")
+
+    # Validação fora do lock exclusivo (SHARE UPDATE EXCLUSIVE: leituras e escritas seguem)
+    for tabela, constraint, _ in referencias:
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {tabela} VALIDATE CONSTRAINT {constraint}"))
+        print(f"  {constraint} validada.")
+
+    if remover_antigas:
+        with engine.begin() as conn:
+            for tabela in reversed(TABELAS):
+                conn.execute(text(f"DROP TABLE {antiga(tabela)}"))
+        print("Tabelas antigas removidas.")
+    else:
+        print(f"Tabelas antigas mantidas ({', '.join(antiga(t) for t in TABELAS)}); remova com DROP TABLE.")
+
+
+def planejar_referencias(conn: Connection, versao: int):
+    """
+    Lê em pg_constraint todas as FKs que apontam para as tabelas atuais e
+    devolve (tabela, constraint, definição) da FK composta equivalente:
+    (colunas, tenant_id) -> (id, tenant_id), com as mesmas ações.
+
+    Aborta se alguma não tiver equivalente: tabela sem tenant_id, FK para
+    outra coluna que não id, ou SET NULL/SET DEFAULT em PostgreSQL < 15
+    (a ação precisa se limitar às colunas originais, já que tenant_id é
+    NOT NULL, e a lista de colunas no ON DELETE só existe a partir do 15).
+    """
+    fks = conn.execute(text(
+        "SELECT c.conrelid::regclass::text, c.conname, c.confrelid::regclass::text, "
+        "ARRAY(SELECT a.attname FROM unnest(c.conkey) WITH ORDINALITY k(n, i) "
+        "      JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.n ORDER BY k.i), "
+        "ARRAY(SELECT a.attname FROM unnest(c.confkey) WITH ORDINALITY k(n, i) "
+        "      JOIN pg_attribute a ON a.attrelid = c.confrelid AND a.attnum = k.n ORDER BY k.i), "
+        "c.confdeltype, c.confupdtype, c.condeferrable, c.condeferred, "
+        "EXISTS (SELECT 1 FROM pg_attribute a WHERE a.attrelid = c.conrelid "
+        "        AND a.attname = 'tenant_id' AND NOT a.attisdropped) "
+        "FROM pg_constraint c "
+        "WHERE c.contype = 'f' AND c.confrelid IN (CAST(:a AS regclass), CAST(:b AS regclass)) "
+        "ORDER BY 1, 2"
+    ), {"a": TABELAS[0], "b": TABELAS[1]}).all()
+
+    referencias, problemas = [], []
+    for tabela, constraint, referenciada, colunas, alvo, ao_remover, ao_atualizar, adiavel, adiada, tem_tenant in fks:
+        colunas, alvo = list(colunas), list(alvo)
+        if not tem_tenant:
+            problemas.append(f"{tabela}.{constraint}: {tabela} não tem tenant_id")
+            continue
+        if alvo == ["id"]:
+            colunas, alvo = colunas + ["tenant_id"], ["id", "tenant_id"]
+        elif sorted(alvo) != ["id", "tenant_id"]:
+            problemas.append(f"{tabela}.{constraint}: referencia {referenciada} ({', '.join(alvo)}), não id")
+            continue
+        originais = [c for c in colunas if c != "tenant_id"]
+
+        acao_remover = ACOES_FK[ao_remover]
+        if ao_remover in ("n", "d"):
+            if versao < 150000:
+                problemas.append(
+                    f"{tabela}.{constraint}: ON DELETE {acao_remover} só nas colunas originais "
+                    f"requer PostgreSQL 15"
+                )
+                continue
+            acao_remover += f" ({', '.join(originais)})"
+        if ao_atualizar in ("n", "d"):
+            # Sem lista de colunas no ON UPDATE: anularia também tenant_id
+            problemas.append(f"{tabela}.{constraint}: ON UPDATE {ACOES_FK[ao_atualizar]} não suportado")
+            continue
+
+        definicao = (
+            f"FOREIGN KEY ({', '.join(colunas)}) REFERENCES {referenciada} ({', '.join(alvo)}) "
+            f"ON DELETE {acao_remover} ON UPDATE {ACOES_FK[ao_atualizar]}"
+        )
+        if adiavel:
+            definicao += " DEFERRABLE INITIALLY DEFERRED" if adiada else " DEFERRABLE"
+        referencias.append((tabela, constraint, definicao))
+
+    if problemas:
+        raise SystemExit(
+            "Troca abortada; estas FKs não podem ser recriadas para as tabelas particionadas:\n  "
+            + "\n  ".join(problemas)
+        )
+    return referencias
+
+
+# ----------------------------------
+# nova-particao / explicar
+# ----------------------------------
+def nova_particao(engine: Engine, tenant_id: int):
+    """Partição dedicada para um tenant novo (modo lista)"""
+    with engine.begin() as conn:
+        for tabela in TABELAS:
+            estrategia = conn.execute(text(
+                "SELECT partstrat FROM pg_partitioned_table WHERE partrelid = CAST(:t AS regclass)"
+            ), {"t": tabela}).scalar()
+            if estrategia != "l":
+                raise SystemExit(f"{tabela} não está particionada por lista.")
+            # Falha se a DEFAULT já tiver linhas do tenant (importação feita antes)
+            conn.execute(text(
+                f"CREATE TABLE {tabela}_t{tenant_id} PARTITION OF {tabela} FOR VALUES IN ({tenant_id})"
+            ))
+    print(f"Partições do tenant {tenant_id} criadas.")
+
+
+def explicar(engine: Engine, tenant_id: int):
+    """Plano de consultas no formato das do dashboard: só a partição do tenant deve aparecer"""
+    consultas = {
+        "contagem por status": (
+            "SELECT status, COUNT(*) FROM contratos WHERE tenant_id = :t GROUP BY status"
+        ),
+        "top devedores (join)": (
+            "SELECT cl.id, SUM(ct.valor_original) FROM clientes cl "
+            "JOIN contratos ct ON cl.id = ct.cliente_id AND cl.tenant_id = ct.tenant_id "
+            "WHERE ct.tenant_id = :t GROUP BY cl.id ORDER BY 2 DESC LIMIT 10"
+        ),
+    }
+    with engine.connect() as conn:
+        for nome, sql in consultas.items():
+            print(f"-- {nome}")
+            for (linha,) in conn.execute(text(f"EXPLAIN (COSTS OFF) {sql}"), {"t": tenant_id}):
+                print(linha)
+            print()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shard", help="nome do shard (SHARD_DATABASE_URLS); padrão: primário")
+    etapas = parser.add_subparsers(dest="etapa", required=True)
+
+    p = etapas.add_parser("preparar")
+    p.add_argument("--modo", choices=["hash", "lista"], default="hash")
+    p.add_argument("--particoes", type=int, default=16, help="partições no modo hash")
+
+    p = etapas.add_parser("copiar")
+    p.add_argument("--lote", type=int, default=TAMANHO_LOTE, help="faixa de ids por transação")
+    p.add_argument("--tabela", choices=TABELAS, help="só esta tabela (para retomar com --desde)")
+    p.add_argument("--desde", type=int, default=0, help="retoma a partir deste id")
+    p.add_argument("--pausa", type=float, default=0.0, help="segundos entre lotes")
+
+    p = etapas.add_parser("trocar")
+    p.add_argument("--remover-antigas", action="store_true")
+
+    for nome in ("explicar", "nova-particao"):
+        etapas.add_parser(nome).add_argument("--tenant", type=int, required=True)
+
+    args = parser.parse_args()
+
+    engine = shard_engines[args.shard] if args.shard else engine_principal
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Particionamento declarativo requer PostgreSQL.")
+
+    if args.etapa == "preparar":
+        preparar(engine, args.modo, args.particoes)
+    elif args.etapa == "copiar":
+        copiar(engine, [args.tabela] if args.tabela else TABELAS, args.lote, args.desde, args.pausa)
+    elif args.etapa == "trocar":
+        trocar(engine, args.remover_antigas)
+    elif args.etapa == "explicar":
+        explicar(engine, args.tenant)
+    else:
+        nova_particao(engine, args.tenant)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ from datetime import date, timedelta
 from decimal import Decimal
 import random
 
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, definir_tenant
 from app.models.tenant import Tenant
 from app.models.user import User, UserRole
 from app.models.cliente import Cliente, Sexo
@@ -124,7 +124,8 @@ def seed_database():
                 clientes_por_tenant[tenant.id] = db.query(Cliente).filter(Cliente.tenant_id == tenant.id).all()
                 continue
             
-            # Cria 50 clientes por tenant
+            # Cria 50 clientes por tenant (no shard do tenant)
+            definir_tenant(db, tenant.id)
             for j in range(50):
                 is_male = random.random() > 0.5
                 nome = random.choice(nomes_masculinos if is_male else nomes_femininos)
@@ -165,6 +166,7 @@ def seed_database():
                 continue
             
             contratos_criados = 0
+            definir_tenant(db, tenant.id)
             
             for cliente in clientes_por_tenant[tenant.id]:
                 # 1-3 contratos por cliente
@@ -209,6 +211,7 @@ def seed_database():
                     db.add(contrato)
                     contratos_criados += 1
             
+            db.flush()
             print(f"   ✅ {tenant.nome}: {contratos_criados} contratos criados")
         
         # =====================================================
@@ -0,0 +1,97 @@
+"""
+Relatório de tempo de startup da API.
+
+Importa o main.py em um processo novo com `python -X importtime` e lista os
+módulos mais caros (tempo próprio e acumulado, agrupado por pacote), indica
+se dependências pesadas (pandas, NumPy, openpyxl) foram carregadas no import
+e mede o lifespan (configure_mappers, create_all, tarefas de fundo).
+
+Sai com código 1 se o cold start (import + lifespan) passar do alvo.
+
+Uso:
+    python -m scripts.startup_profile --alvo-ms 1500 --top 15
+    SKIP_DDL=true python -m scripts.startup_profile
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Adiciona o diretório backend ao path
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+os.environ.setdefault("SECRET_KEY", "profile")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'startup.db'}")
+
+PESADOS = ["pandas", "numpy", "openpyxl", "pyarrow"]
+
+
+def medir_imports():
+    """Executa o import do main em processo novo e devolve [(modulo, proprio_us, acumulado_us)]"""
+    verificacao = f"import sys, main; print(','.join(m for m in {PESADOS!r} if m in sys.modules))"
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", verificacao],
+        cwd=BACKEND, env=os.environ.copy(), capture_output=True, text=True, check=True,
+    )
+    modulos = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|")
+        modulos.append((nome.strip(), int(proprio), int(acumulado)))
+    carregados = [m for m in processo.stdout.strip().split(",") if m]
+    return modulos, carregados
+
+
+def medir_lifespan() -> float:
+    from main import app
+    from app.core.lifespan import lifespan
+
+    async def ciclo():
+        inicio = time.perf_counter()
+        async with lifespan(app):
+            return time.perf_counter() - inicio
+
+    return asyncio.run(ciclo())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alvo-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    modulos, carregados = medir_imports()
+    total_import = next((acumulado for nome, _, acumulado in modulos if nome == "main"), 0) / 1000
+
+    print(f"Import do main.py: {total_import:.0f} ms")
+    print("\nMódulos com maior tempo acumulado:")
+    for nome, proprio, acumulado in sorted(modulos, key=lambda m: -m[2])[:args.top]:
+        print(f"  {acumulado / 1000:8.1f} ms  (próprio {proprio / 1000:6.1f} ms)  {nome}")
+
+    por_pacote = defaultdict(int)
+    for nome, proprio, _ in modulos:
+        por_pacote[nome.split(".")[0]] += proprio
+    print("\nPor pacote (tempo próprio somado):")
+    for pacote, proprio in sorted(por_pacote.items(), key=lambda p: -p[1])[:args.top]:
+        print(f"  {proprio / 1000:8.1f} ms  {pacote}")
+
+    print(f"\nDependências pesadas carregadas no import: {', '.join(carregados) or 'nenhuma'}")
+
+    tempo_lifespan = medir_lifespan() * 1000
+    print(f"Lifespan (SKIP_DDL={os.environ.get('SKIP_DDL', 'false')}): {tempo_lifespan:.0f} ms")
+
+    total = total_import + tempo_lifespan
+    print(f"\nCold start: {total:.0f} ms (alvo {args.alvo_ms:.0f} ms)")
+    if total > args.alvo_ms:
+        print("ACIMA DO ALVO")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api.middlewares.compression import CompressionMiddleware, escolher_codificacao
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimo_bytes=100)
+
+    @app.get("/pequeno")
+    def pequeno():
+        return {"status": "ok"}
+
+    @app.get("/grande")
+    def grande():
+        return JSONResponse([{"cliente": i, "cidade": "São Paulo"} for i in range(200)], headers={"ETag": '"v1"'})
+
+    @app.get("/export")
+    def export():
+        linhas = (f"{i};Cliente {i};SP\n".encode() for i in range(5000))
+        return StreamingResponse(linhas, media_type="text/csv")
+
+    return app
+
+
+def test_comprime_json_e_export_em_streaming():
+    client = TestClient(_app())
+
+    grande = client.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert grande.headers["content-encoding"] == "gzip"
+    assert grande.headers["vary"] == "Accept-Encoding"
+    assert grande.headers["etag"] == 'W/"v1"'
+    assert grande.json()[199]["cliente"] == 199
+
+    export = client.get("/export", headers={"Accept-Encoding": "gzip"})
+    assert export.headers["content-encoding"] == "gzip"
+    assert export.text.splitlines()[4999] == "4999;Cliente 4999;SP"
+
+
+def test_nao_comprime_corpo_pequeno_nem_sem_accept_encoding():
+    client = TestClient(_app())
+
+    pequeno = client.get("/pequeno", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in pequeno.headers
+
+    sem_gzip = client.get("/grande", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sem_gzip.headers
+    assert sem_gzip.headers["etag"] == '"v1"'
+
+
+def test_escolher_codificacao_respeita_q_zero():
+    assert escolher_codificacao("gzip, deflate") == "gzip"
+    assert escolher_codificacao("gzip;q=0, deflate") is None
+    assert escolher_codificacao("*") == "gzip"
@@ -0,0 +1,164 @@
+import hashlib
+import hmac
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.core.config import settings
+from tests.conftest import TestingSessionLocal
+
+from app.models.tenant import Tenant
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato, StatusContrato
+from app.models.payment import Pagamento, StatusPagamento
+from app.repositories.payment_repository import PagamentoRepository
+from app.services.payment_service import ConciliacaoService, aplicar_eventos_pagamento
+from app.services.webhook_service import webhook_buffer
+
+
+def test_conciliar_arquivo_por_numero_e_cpf(db_session):
+    tenant = Tenant(nome="Tenant Conciliação", cnpj="99.999.999/0001-29")
+    db_session.add(tenant)
+    db_session.flush()
+    fulano = Cliente(tenant_id=tenant.id, nome="Fulano", cpf="111.444.777-35")
+    ciclano = Cliente(tenant_id=tenant.id, nome="Ciclano", cpf="529.982.247-25")
+    db_session.add_all([fulano, ciclano])
+    db_session.flush()
+
+    hoje = date.today()
+    quitado = Contrato(
+        tenant_id=tenant.id, cliente_id=fulano.id, numero_contrato="CONC-001",
+        valor_original=Decimal("100.00"), data_vencimento=hoje - timedelta(days=40),
+        status=StatusContrato.ATRASADO,
+    )
+    mais_antigo = Contrato(
+        tenant_id=tenant.id, cliente_id=ciclano.id, numero_contrato="CONC-002",
+        valor_original=Decimal("500.00"), data_vencimento=hoje - timedelta(days=60),
+        status=StatusContrato.ATRASADO,
+    )
+    mais_recente = Contrato(
+        tenant_id=tenant.id, cliente_id=ciclano.id, numero_contrato="CONC-003",
+        valor_original=Decimal("300.00"), data_vencimento=hoje - timedelta(days=5),
+        status=StatusContrato.ATRASADO,
+    )
+    db_session.add_all([quitado, mais_antigo, mais_recente])
+    db_session.commit()
+
+    arquivo = (
+        "id;numero_contrato;cpf;valor;data_pagamento\n"
+        "tx-1;CONC-001;;100,00;05/01/2025\n"
+        "tx-2;;52998224725;150.5;2025-01-06\n"
+        "tx-2;;52998224725;150.5;2025-01-06\n"
+        "tx-3;CONC-999;;10;2025-01-06\n"
+        "tx-4;;;20;2025-01-06\n"
+    ).encode()
+
+    service = ConciliacaoService(db_session)
+    resultado = service.conciliar_arquivo(arquivo, "liquidacao.csv", tenant.id)
+
+    assert resultado.total == 5
+    assert resultado.conciliados == 2
+    assert resultado.nao_encontrados == 1
+    assert resultado.duplicados == 1
+    assert resultado.invalidos == 1
+    assert resultado.contratos_quitados == 1
+
+    db_session.expire_all()
+    assert quitado.status == StatusContrato.PAGO
+    assert quitado.data_pagamento == date(2025, 1, 5)
+    # Sem número do contrato, o CPF abate o contrato em aberto mais antigo
+    assert float(mais_antigo.valor_pago) == 150.5
+    assert mais_antigo.status == StatusContrato.ATRASADO
+    assert float(mais_recente.valor_pago or 0) == 0
+
+    # Reenvio do mesmo arquivo é idempotente
+    repetido = service.conciliar_arquivo(arquivo, "liquidacao.csv", tenant.id)
+    assert repetido.duplicados == 4
+    assert repetido.conciliados == 0
+    assert db_session.query(Pagamento).filter(
+        Pagamento.tenant_id == tenant.id, Pagamento.status == StatusPagamento.NAO_ENCONTRADO
+    ).count() == 1
+
+
+def test_pagamento_concorrente_no_mesmo_contrato_nao_e_perdido(db_session, monkeypatch):
+    tenant = Tenant(nome="Tenant Concorrência", cnpj="99.999.999/0001-41")
+    db_session.add(tenant)
+    db_session.flush()
+    cliente = Cliente(tenant_id=tenant.id, nome="Beltrano", cpf="111.444.777-35")
+    db_session.add(cliente)
+    db_session.flush()
+    contrato = Contrato(
+        tenant_id=tenant.id, cliente_id=cliente.id, numero_contrato="CONC-CONC-1",
+        valor_original=Decimal("300.00"), data_vencimento=date.today() - timedelta(days=10),
+        status=StatusContrato.ATRASADO,
+    )
+    db_session.add(contrato)
+    db_session.commit()
+
+    # Outra conciliação (webhook) grava no contrato depois do snapshot desta
+    original = PagamentoRepository.list_contratos_para_conciliacao
+
+    def snapshot_e_escrita_concorrente(self, *args, **kwargs):
+        rows = original(self, *args, **kwargs)
+        outra = TestingSessionLocal()
+        try:
+            outra.query(Contrato).filter(Contrato.id == contrato.id).update(
+                {Contrato.valor_pago: Decimal("100.00")}, synchronize_session=False
+            )
+            outra.commit()
+        finally:
+            outra.close()
+        return rows
+
+    monkeypatch.setattr(PagamentoRepository, "list_contratos_para_conciliacao", snapshot_e_escrita_concorrente)
+    arquivo = "id;numero_contrato;valor\ntx-conc-1;CONC-CONC-1;200\n".encode()
+    resultado = ConciliacaoService(db_session).conciliar_arquivo(arquivo, "liquidacao.csv", tenant.id)
+
+    db_session.expire_all()
+    assert float(contrato.valor_pago) == 300.0
+    assert contrato.status == StatusContrato.PAGO
+    assert resultado.contratos_quitados == 1
+
+
+def test_webhook_usa_tenant_do_contrato_e_exige_status_pago(db_session):
+    dono = Tenant(nome="Tenant Dono Webhook", cnpj="12.121.212/0001-12")
+    outro = Tenant(nome="Tenant Outro Webhook", cnpj="13.131.313/0001-13")
+    db_session.add_all([dono, outro])
+    db_session.flush()
+    cliente = Cliente(tenant_id=dono.id, nome="Beltrano", cpf="390.533.447-05")
+    db_session.add(cliente)
+    db_session.flush()
+    contrato = Contrato(
+        tenant_id=dono.id, cliente_id=cliente.id, numero_contrato="WH-PAG-001",
+        valor_original=Decimal("80.00"), data_vencimento=date.today() - timedelta(days=10),
+        status=StatusContrato.ATRASADO,
+    )
+    db_session.add(contrato)
+    db_session.commit()
+
+    aplicados = aplicar_eventos_pagamento(db_session, [
+        # Sem status: não é pagamento confirmado
+        {"id": "wh-sem-status", "tenant_id": outro.id, "numero_contrato": "WH-PAG-001", "valor": 80},
+        # tenant_id do corpo é ignorado: vale o do contrato
+        {"id": "wh-pago", "status": "paid", "tenant_id": outro.id, "numero_contrato": "WH-PAG-001", "valor": 30},
+        # Contrato desconhecido: fica pendente para reprocessamento
+        {"id": "wh-orfao", "status": "paid", "numero_contrato": "WH-NAO-EXISTE", "valor": 10},
+    ])
+    db_session.commit()
+
+    assert aplicados == [True, True, False]
+    db_session.expire_all()
+    assert float(contrato.valor_pago) == 30
+    assert contrato.status == StatusContrato.ATRASADO
+    assert db_session.query(Pagamento).filter(Pagamento.tenant_id == outro.id).count() == 0
+
+
+def test_webhook_recusa_corpo_sem_assinatura_valida(client, monkeypatch):
+    corpo = b'{"id": "wh-assinado", "status": "paid", "numero_contrato": "X", "valor": 1}'
+    monkeypatch.setattr(settings, "PAYMENT_WEBHOOK_SECRET", "segredo-teste")
+    assinatura = hmac.new(b"segredo-teste", corpo, hashlib.sha256).hexdigest()
+
+    assert client.post("/payments/webhook", content=corpo).status_code == 401
+    assert client.post("/payments/webhook", content=corpo, headers={"X-Signature": "sha256=00"}).status_code == 401
+    recebido = client.post("/payments/webhook", content=corpo, headers={"X-Signature": f"sha256={assinatura}"})
+    assert recebido.status_code == 202
+    assert webhook_buffer.drenar(1)[0][2] == corpo
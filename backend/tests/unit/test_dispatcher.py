@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+from app.integrations.base import ProviderClient, ProviderError, ResultadoEnvio
+from app.models.communication import MensagemOutbox, CanalComunicacao, StatusMensagem
+from app.services import communication_service
+from app.services.communication_service import MetricasDispatcher, OutboundDispatcher, TokenBucket
+from tests.conftest import TestingSessionLocal
+
+
+class ProviderStub(ProviderClient):
+    """Provedor em memória: registra os lotes e levanta as falhas programadas"""
+
+    nome = "stub"
+    tamanho_lote = 2
+
+    def __init__(self, falhas=None):
+        super().__init__("http://stub", taxa_por_segundo=1000)
+        self.lotes = []
+        self.falhas = list(falhas or [])
+
+    async def enviar_lote(self, client, mensagens):
+        self.lotes.append([m.id for m in mensagens])
+        if self.falhas:
+            raise self.falhas.pop(0)
+        return [ResultadoEnvio(id=m.id, sucesso=True, provider_message_id=f"stub-{m.id}") for m in mensagens]
+
+
+def _enfileirar(db_session, quantidade, tentativas=0):
+    mensagens = [
+        MensagemOutbox(
+            canal=CanalComunicacao.WHATSAPP, destinatario=f"+55119999{i:05d}", conteudo="Olá",
+            status=StatusMensagem.PENDENTE, tentativas=tentativas,
+        )
+        for i in range(quantidade)
+    ]
+    db_session.add_all(mensagens)
+    db_session.commit()
+    return mensagens
+
+
+def _ciclo(provider, **opcoes):
+    async def executar():
+        async with OutboundDispatcher(
+            session_factory=TestingSessionLocal,
+            providers={CanalComunicacao.WHATSAPP: provider},
+            **opcoes,
+        ) as dispatcher:
+            processadas = await dispatcher.executar_ciclo()
+            return dispatcher, processadas
+
+    return asyncio.run(executar())
+
+
+def test_reserva_um_lote_envia_em_chamadas_do_tamanho_do_provedor(db_session):
+    mensagens = _enfileirar(db_session, 5)
+    provider = ProviderStub()
+
+    dispatcher, processadas = _ciclo(provider, tamanho_reserva=100)
+
+    ids = [m.id for m in mensagens]
+    assert processadas == 5
+    assert sorted(i for lote in provider.lotes for i in lote) == ids
+    assert sorted(len(lote) for lote in provider.lotes) == [1, 2, 2]
+    db_session.expire_all()
+    for m in mensagens:
+        assert m.status == StatusMensagem.ENVIADA
+        assert m.tentativas == 1
+        assert m.provider_message_id == f"stub-{m.id}"
+    assert dispatcher.metricas.enviadas == 5
+    assert dispatcher.metricas.chamadas == 3
+    assert len(dispatcher.metricas.latencias) == 3
+
+    # Já enviadas: o próximo ciclo não reserva nada
+    assert _ciclo(ProviderStub(), tamanho_reserva=100)[1] == 0
+
+
+def test_retentativas_com_backoff_ate_o_maximo(db_session, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(communication_service, "_backoff", lambda tentativa: esperas.append(tentativa) or 0)
+    reagendada, = _enfileirar(db_session, 1)
+    esgotada, = _enfileirar(db_session, 1, tentativas=2)
+    # Lotes de um: cada mensagem esgota as retentativas HTTP na própria chamada
+    provider = ProviderStub(falhas=[ProviderError("stub: erro 503")] * 6)
+    provider.tamanho_lote = 1
+
+    dispatcher, _ = _ciclo(provider, tamanho_reserva=100, retentativas_http=2, max_tentativas=3)
+
+    assert len(provider.lotes) == 6
+    assert sorted(esperas) == [0, 0, 1, 1]
+    db_session.expire_all()
+    # Primeira falha do ciclo: volta para a fila com backoff
+    assert reagendada.status == StatusMensagem.PENDENTE
+    assert reagendada.tentativas == 1
+    assert reagendada.proxima_tentativa_em is not None
+    # Atingiu max_tentativas: falha definitiva
+    assert esgotada.status == StatusMensagem.FALHA
+    assert esgotada.tentativas == 3
+    assert "503" in esgotada.erro
+    assert (dispatcher.metricas.reagendadas, dispatcher.metricas.falhas) == (1, 1)
+    assert dispatcher.metricas.chamadas == 6
+
+
+def test_erro_nao_retentavel_falha_sem_nova_chamada(db_session, monkeypatch):
+    monkeypatch.setattr(communication_service, "_backoff", lambda tentativa: 0)
+    mensagem, = _enfileirar(db_session, 1)
+    provider = ProviderStub(falhas=[ProviderError("stub: requisição rejeitada (400)", retentavel=False)])
+
+    dispatcher, _ = _ciclo(provider, tamanho_reserva=100, retentativas_http=2, max_tentativas=3)
+
+    assert len(provider.lotes) == 1
+    db_session.expire_all()
+    assert mensagem.status == StatusMensagem.FALHA
+    assert dispatcher.metricas.falhas == 1
+
+
+def test_token_bucket_limita_a_taxa_configurada():
+    async def consumir():
+        bucket = TokenBucket(taxa=100, capacidade=10)
+        inicio = time.monotonic()
+        # Saldo inicial sai na hora; os outros 20 tokens esperam a reposição
+        await bucket.adquirir(10)
+        imediato = time.monotonic() - inicio
+        for _ in range(4):
+            await bucket.adquirir(5)
+        return imediato, time.monotonic() - inicio
+
+    imediato, total = asyncio.run(consumir())
+
+    assert imediato < 0.05
+    assert 0.19 <= total < 0.5
+
+
+def test_metricas_resumo():
+    metricas = MetricasDispatcher(enviadas=10, falhas=1, reagendadas=2, chamadas=5)
+    metricas.latencias.extend([0.010] * 98 + [0.500] * 2)
+
+    resumo = metricas.resumo()
+
+    assert (resumo["enviadas"], resumo["falhas"], resumo["reagendadas"], resumo["chamadas"]) == (10, 1, 2, 5)
+    assert resumo["latencia_p50_ms"] == 10.0
+    assert resumo["latencia_p99_ms"] == 500.0
+    assert resumo["mensagens_por_segundo"] > 0
+    # Janela limitada: o worker roda por dias
+    metricas.latencias.extend([0.001] * (communication_service.JANELA_LATENCIAS + 1))
+    assert len(metricas.latencias) == communication_service.JANELA_LATENCIAS
@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+from app.dependencies import etag as etag_module
+from app.models.tenant import Tenant
+from app.repositories.tenant_repository import TenantRepository
+from app.schemas.segmentation import SegmentCreate
+from app.services.segmentation_service import SegmentationService
+
+
+def test_leitura_condicional_responde_304_ate_os_dados_mudarem(client, db_session, user_factory, monkeypatch):
+    tenant = Tenant(nome="Tenant ETag", cnpj="88.888.888/0001-88")
+    db_session.add(tenant)
+    db_session.commit()
+    user_factory(email="etag@test.com", tenant_id=tenant.id)
+
+    token = client.post(
+        "/auth/login", data={"username": "etag@test.com", "password": "123456"}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    primeira = client.get("/base/estatisticas", headers=headers)
+    etag = primeira.headers["ETag"]
+    assert primeira.status_code == 200
+
+    repetida = client.get("/base/estatisticas", headers={**headers, "If-None-Match": etag})
+    assert repetida.status_code == 304
+    assert repetida.content == b""
+
+    TenantRepository(db_session).incrementar_versao(tenant.id)
+    db_session.commit()
+
+    nova = client.get("/base/estatisticas", headers={**headers, "If-None-Match": etag})
+    assert nova.status_code == 200
+    assert nova.headers["ETag"] != etag
+
+    # Escrita em segmentos também muda o ETag
+    etag = nova.headers["ETag"]
+    SegmentationService(db_session).criar_segmento(
+        SegmentCreate(name="D+0 a D+30", min_days_overdue=0, max_days_overdue=30), tenant.id
+    )
+    segmentos = client.get("/base/estatisticas", headers={**headers, "If-None-Match": etag})
+    assert segmentos.status_code == 200
+    assert segmentos.headers["ETag"] != etag
+
+    # Virada do dia: o D+ envelhece sem escrita nenhuma
+    etag = segmentos.headers["ETag"]
+    assert client.get("/base/estatisticas", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    class Amanha(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    monkeypatch.setattr(etag_module, "date", Amanha)
+    virada = client.get("/base/estatisticas", headers={**headers, "If-None-Match": etag})
+    assert virada.status_code == 200
+    assert virada.headers["ETag"] != etag
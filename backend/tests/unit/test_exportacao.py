@@ -0,0 +1,95 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from itertools import count
+
+import pytest
+from openpyxl import load_workbook
+
+from app.api.routes import base_v2
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato, StatusContrato
+from app.models.tenant import Tenant
+from app.services.export_service import COLUNAS_CLIENTES, COLUNAS_CONTRATOS, ExportService
+from tests.conftest import TestingSessionLocal
+
+CPFS_A = ["111.444.777-35", "529.982.247-25", "390.533.447-05"]
+CPF_B = "123.456.789-09"
+# Um par de tenants por teste (o banco de teste é compartilhado na sessão)
+_sequencia = count(1)
+
+
+class ExportServiceTeste(ExportService):
+    """A rota abre a própria sessão (SessionLocal); nos testes, a do banco de teste"""
+
+    def __init__(self, session_factory=TestingSessionLocal):
+        super().__init__(session_factory)
+
+
+@pytest.fixture()
+def exportacao(client, db_session, user_factory, monkeypatch):
+    monkeypatch.setattr(base_v2, "ExportService", ExportServiceTeste)
+    n = next(_sequencia)
+    tenant_a = Tenant(nome=f"Tenant Exporta A{n}", cnpj=f"98.000.{n:03d}/0001-01")
+    tenant_b = Tenant(nome=f"Tenant Exporta B{n}", cnpj=f"98.000.{n:03d}/0001-02")
+    db_session.add_all([tenant_a, tenant_b])
+    db_session.flush()
+    for i, (tenant, cpf) in enumerate([*((tenant_a, c) for c in CPFS_A), (tenant_b, CPF_B)]):
+        cliente = Cliente(tenant_id=tenant.id, nome=f"Exportado {i}", cpf=cpf)
+        db_session.add(cliente)
+        db_session.flush()
+        db_session.add(Contrato(
+            tenant_id=tenant.id, cliente_id=cliente.id, numero_contrato=f"EXP-{i}",
+            valor_original=Decimal("150.50"), data_vencimento=date(2025, 1, 10),
+            status=StatusContrato.ATRASADO,
+        ))
+    db_session.commit()
+
+    user_factory(email=f"exporta{n}@test.com", tenant_id=tenant_a.id)
+    token = client.post(
+        "/auth/login", data={"username": f"exporta{n}@test.com", "password": "123456"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_exportar_csv(client, exportacao):
+    resposta = client.get("/base/export/clientes?formato=csv", headers=exportacao)
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/csv")
+    assert resposta.headers["content-disposition"].endswith(".csv")
+    linhas = list(csv.reader(io.StringIO(resposta.text)))
+    assert linhas[0] == [nome for nome, _ in COLUNAS_CLIENTES]
+    assert sorted(linha[1] for linha in linhas[1:]) == sorted(CPFS_A)
+
+    contratos = list(csv.reader(io.StringIO(
+        client.get("/base/export/contratos?formato=csv", headers=exportacao).text
+    )))
+    assert contratos[0] == [nome for nome, _ in COLUNAS_CONTRATOS]
+    assert len(contratos) == 1 + len(CPFS_A)
+    # Enum sai pelo valor, não pelo nome da classe
+    assert {linha[-1] for linha in contratos[1:]} == {StatusContrato.ATRASADO.value}
+
+
+def test_exportar_xlsx(client, exportacao):
+    resposta = client.get("/base/export/contratos?formato=xlsx", headers=exportacao)
+
+    assert resposta.status_code == 200
+    linhas = list(load_workbook(io.BytesIO(resposta.content), read_only=True)["Dados"].values)
+    assert list(linhas[0]) == [nome for nome, _ in COLUNAS_CONTRATOS]
+    assert len(linhas) == 1 + len(CPFS_A)
+    assert sorted(linha[3] for linha in linhas[1:]) == sorted(CPFS_A)
+    assert {linha[5] for linha in linhas[1:]} == {150.5}
+
+
+def test_exportar_parquet(client, exportacao):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    resposta = client.get("/base/export/clientes?formato=parquet", headers=exportacao)
+
+    assert resposta.status_code == 200
+    tabela = pq.read_table(io.BytesIO(resposta.content))
+    assert tabela.column_names == [nome for nome, _ in COLUNAS_CLIENTES]
+    assert tabela.num_rows == len(CPFS_A)
+    assert sorted(tabela.column("cpf").to_pylist()) == sorted(CPFS_A)
@@ -0,0 +1,13 @@
+from app.utils.helpers import content_disposition
+
+
+def test_content_disposition_codifica_nome_do_usuario():
+    assert content_disposition("base.csv") == 'attachment; filename="base.csv"'
+
+    acentuado = content_disposition("cobrança.xlsx")
+    assert acentuado == "attachment; filename=\"cobranca.xlsx\"; filename*=UTF-8''cobran%C3%A7a.xlsx"
+    acentuado.encode("latin-1")
+
+    malicioso = content_disposition('a"b\r\nSet-Cookie: x.csv')
+    assert "\r" not in malicioso and "\n" not in malicioso
+    assert malicioso.startswith('attachment; filename="a_b__Set-Cookie: x.csv"')
@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import _criar_engine
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato
+from app.models.importacao_log import ImportacaoLog, StatusImportacao, TipoImportacao
+from app.models.tenant import Tenant
+from app.repositories.tenant_repository import TenantRepository
+from app.services.upload_service_v2 import UploadService
+
+# Engine como a da aplicação (BEGIN explícito no SQLite): o engine do conftest
+# usa o pysqlite sem ajuste, em que o RELEASE do savepoint da linha commita
+engine = _criar_engine("sqlite:///./test.db")
+SessaoApp = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+COL_MAP = {
+    "cpf": "cpf", "nome": "nome", "valor": "valor", "vencimento": "vencimento",
+    "numero_contrato": "contrato", "status": "status",
+}
+
+
+def _cpf(base: str) -> str:
+    """CPF válido a partir dos 9 primeiros dígitos"""
+    digitos = [int(d) for d in base]
+    for tamanho in (9, 10):
+        soma = sum(d * (tamanho + 1 - i) for i, d in enumerate(digitos))
+        digitos.append(0 if soma % 11 < 2 else 11 - soma % 11)
+    return "".join(map(str, digitos))
+
+
+@pytest.fixture()
+def db(db_engine):
+    db = SessaoApp()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_importacao_por_blocos_falha_no_meio_e_retoma_do_checkpoint(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 3)
+    tenant = Tenant(nome="Tenant Checkpoint", cnpj="99.999.999/0001-43")
+    db.add(tenant)
+    db.commit()
+
+    # 7 linhas em blocos de 3; a linha 2 é inválida (valor zero)
+    linhas = ["cpf,nome,valor,vencimento,contrato,status"]
+    for i in range(7):
+        valor = "0" if i == 1 else "100"
+        linhas.append(f"{_cpf(f'{i + 1:03d}456789')},Cliente {i},{valor},10/01/2025,CKP-{i},ativo")
+    arquivo = tmp_path / "base.csv"
+    arquivo.write_text("\n".join(linhas) + "\n")
+
+    service = UploadService(db)
+    df = service._read_contents(str(arquivo), "base.csv")
+    log = ImportacaoLog(
+        uuid=str(uuid.uuid4()), tenant_id=tenant.id, nome_arquivo="base.csv",
+        caminho_arquivo=str(arquivo), colunas_mapeadas=COL_MAP, total_linhas=len(df),
+        tipo=TipoImportacao.ATUALIZACAO, status=StatusImportacao.PROCESSANDO,
+    )
+    db.add(log)
+    db.commit()
+
+    # Falha de banco ao fechar o segundo bloco (fora do savepoint da linha)
+    original = TenantRepository.incrementar_versao
+    chamadas = []
+
+    def falha_no_segundo_bloco(self, tenant_id):
+        chamadas.append(tenant_id)
+        if len(chamadas) == 2:
+            raise RuntimeError("conexão perdida")
+        return original(self, tenant_id)
+
+    monkeypatch.setattr(TenantRepository, "incrementar_versao", falha_no_segundo_bloco)
+    with pytest.raises(HTTPException):
+        service._processar_importacao(df, COL_MAP, tenant.id, 0, False, log)
+    monkeypatch.setattr(TenantRepository, "incrementar_versao", original)
+
+    db.expire_all()
+    log = db.get(ImportacaoLog, log.id)
+    assert log.status == StatusImportacao.ERRO
+    # Primeiro bloco commitado (menos a linha inválida); o segundo foi desfeito inteiro
+    assert log.configuracao["checkpoint"]["proxima_linha"] == 3
+    assert (log.linhas_processadas, log.clientes_criados, log.total_erros) == (2, 2, 1)
+    assert log.erros_detalhes[0].startswith("Linha 3:")
+    assert log.erros_detalhes[-1] == "conexão perdida"
+    assert db.query(Cliente).filter(Cliente.tenant_id == tenant.id).count() == 2
+
+    resultado = asyncio.run(service.retomar_importacao(log.uuid, tenant.id))
+
+    assert resultado.status.value == "concluido"
+    db.expire_all()
+    log = db.get(ImportacaoLog, log.id)
+    assert log.configuracao["checkpoint"]["proxima_linha"] == 7
+    assert (log.linhas_processadas, log.clientes_criados, log.contratos_criados) == (6, 6, 6)
+    assert log.total_erros == 1
+    # Sem duplicatas: o bloco desfeito é regravado uma única vez
+    cpfs = [c.cpf for c in db.query(Cliente).filter(Cliente.tenant_id == tenant.id)]
+    assert len(cpfs) == len(set(cpfs)) == 6
+    numeros = [c.numero_contrato for c in db.query(Contrato).filter(Contrato.tenant_id == tenant.id)]
+    assert sorted(numeros) == [f"CKP-{i}" for i in (0, 2, 3, 4, 5, 6)]
@@ -0,0 +1,136 @@
+import uuid
+from datetime import date
+
+import pandas as pd
+
+from app.models.tenant import Tenant
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato, StatusContrato
+from app.models.importacao_log import ImportacaoLog, StatusImportacao, TipoImportacao
+from app.repositories.tenant_repository import TenantRepository
+from app.services.importacao_delta_service import DeltaImportService
+from app.services.payment_service import ConciliacaoService
+from app.services.upload_service_v2 import UploadService
+from tests.conftest import TestingSessionLocal
+
+COL_MAP = {
+    "cpf": "cpf", "nome": "nome", "valor": "valor", "vencimento": "vencimento",
+    "numero_contrato": "contrato", "status": "status",
+}
+
+
+def _base(linhas):
+    return pd.DataFrame(linhas, columns=["cpf", "nome", "valor", "vencimento", "contrato", "status"])
+
+
+def _concluir(db, tenant_id, resultado):
+    """Fecha a importação como _processar_em_lote: nova versão associada aos fingerprints"""
+    tenants = TenantRepository(db)
+    tenants.incrementar_versao(tenant_id)
+    versao = tenants.versao_dados(tenant_id)
+    assert int(versao) == int(resultado.versao_dados) + 1
+    db.add(ImportacaoLog(
+        uuid=str(uuid.uuid4()), tenant_id=tenant_id, nome_arquivo="base.csv",
+        tipo=TipoImportacao.DELTA, status=StatusImportacao.CONCLUIDO,
+        configuracao={"delta": resultado.detalhes, "versao_fingerprints": versao},
+    ))
+    db.commit()
+
+
+def test_importacao_delta_grava_apenas_o_que_mudou(db_session):
+    tenant = Tenant(nome="Tenant Delta", cnpj="99.999.999/0001-31")
+    db_session.add(tenant)
+    db_session.commit()
+
+    dia_1 = _base([
+        ["11144477735", "Fulano", "100,00", "10/01/2025", "DELTA-1", "ativo"],
+        ["52998224725", "Ciclano", "200,00", "15/01/2025", "DELTA-2", "ativo"],
+        ["52998224725", "Ciclano", "300,00", "20/01/2025", "DELTA-3", "ativo"],
+        ["123", "Inválido", "10", "01/01/2025", "DELTA-X", "ativo"],
+    ])
+    service = DeltaImportService(db_session)
+    primeiro = service.aplicar(dia_1, COL_MAP, tenant.id)
+    _concluir(db_session, tenant.id, primeiro)
+
+    assert primeiro.detalhes == {"novas": 3, "alteradas": 0, "inalteradas": 0, "removidas": 0}
+    assert primeiro.clientes_criados == 2
+    assert primeiro.contratos_criados == 3
+    assert len(primeiro.erros) == 1
+
+    # Reenvio: uma linha alterada, uma removida, uma nova
+    dia_2 = _base([
+        ["111.444.777-35", "Fulano", "100,00", "10/01/2025", "DELTA-1", "ativo"],
+        ["52998224725", "Ciclano", "250,00", "15/01/2025", "DELTA-2", "atrasado"],
+        ["52998224725", "Ciclano", "50,00", "25/01/2025", "DELTA-4", "ativo"],
+    ])
+    segundo = service.aplicar(dia_2, COL_MAP, tenant.id)
+    _concluir(db_session, tenant.id, segundo)
+
+    assert segundo.detalhes == {"novas": 1, "alteradas": 1, "inalteradas": 1, "removidas": 1}
+    assert segundo.clientes_criados == 0
+    assert segundo.clientes_atualizados == 1
+    assert (segundo.contratos_criados, segundo.contratos_atualizados) == (1, 1)
+
+    contratos = {
+        c.numero_contrato: c
+        for c in db_session.query(Contrato).filter(Contrato.tenant_id == tenant.id).all()
+    }
+    assert set(contratos) == {"DELTA-1", "DELTA-2", "DELTA-3", "DELTA-4"}
+    assert float(contratos["DELTA-2"].valor_original) == 250.0
+    assert contratos["DELTA-2"].status == StatusContrato.ATRASADO
+    assert contratos["DELTA-2"].data_vencimento == date(2025, 1, 15)
+    assert db_session.query(Cliente).filter(Cliente.tenant_id == tenant.id).count() == 2
+
+    # Sem mudanças, nada é gravado
+    terceiro = service.aplicar(dia_2, COL_MAP, tenant.id)
+    assert terceiro.linhas_gravadas == 0
+    assert terceiro.inalteradas == 3
+    _concluir(db_session, tenant.id, terceiro)
+
+    # Escrita fora da delta (conciliação) torna os fingerprints obsoletos: tudo é regravado
+    ConciliacaoService(db_session).conciliar(
+        pd.DataFrame([{
+            "identificador": "pix-delta-2", "numero_contrato": "DELTA-2", "cpf": None,
+            "valor": 100, "data_pagamento": date(2025, 2, 1), "metodo": "pix",
+        }]),
+        tenant.id,
+        origem="arquivo",
+    )
+    quarto = service.aplicar(dia_2, COL_MAP, tenant.id)
+    db_session.commit()
+    assert quarto.detalhes["novas"] == 3
+    assert quarto.contratos_atualizados == 3
+
+
+def test_cancelamento_tardio_nao_e_sobrescrito_pela_conclusao(db_session, monkeypatch):
+    tenant = Tenant(nome="Tenant Cancela", cnpj="99.999.999/0001-32")
+    db_session.add(tenant)
+    db_session.commit()
+    log = ImportacaoLog(
+        uuid=str(uuid.uuid4()), tenant_id=tenant.id, nome_arquivo="base.csv",
+        tipo=TipoImportacao.DELTA, status=StatusImportacao.PROCESSANDO,
+    )
+    db_session.add(log)
+    db_session.commit()
+
+    def cancelar_e_aplicar():
+        # Cancelamento de outra sessão que chega depois da última verificação
+        outra = TestingSessionLocal()
+        outra.query(ImportacaoLog).filter(ImportacaoLog.id == log.id).update(
+            {"status": StatusImportacao.CANCELADO}
+        )
+        outra.commit()
+        outra.close()
+        return DeltaImportService(db_session).aplicar(
+            _base([["11144477735", "Fulano", "100,00", "10/01/2025", "CANC-1", "ativo"]]),
+            COL_MAP, tenant.id,
+        )
+
+    service = UploadService(db_session)
+    monkeypatch.setattr(service, "_cancelada", lambda _log: False)
+    resultado = service._processar_em_lote(cancelar_e_aplicar, tenant.id, 0, log)
+
+    assert resultado.status.value == "cancelado"
+    db_session.expire_all()
+    assert db_session.get(ImportacaoLog, log.id).status == StatusImportacao.CANCELADO
+    assert db_session.query(Contrato).filter(Contrato.tenant_id == tenant.id).count() == 0
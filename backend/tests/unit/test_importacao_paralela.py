@@ -0,0 +1,95 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato, StatusContrato
+from app.models.importacao_log import ImportacaoLog, StatusImportacao, TipoImportacao
+from app.models.tenant import Tenant
+from app.repositories.tenant_repository import TenantRepository
+from app.services.importacao_lote import ResultadoLote
+from app.services.importacao_paralela_service import combinar, particionar
+from app.services.upload_service_v2 import UploadService
+from app.utils.validators import cpfs_para_numero
+from tests.conftest import TestingSessionLocal
+
+
+def test_particionar_mantem_cliente_no_mesmo_shard():
+    # Coluna mista: texto com e sem máscara e números lidos como float
+    df = pd.DataFrame({
+        "cpf": ["111.444.777-35", "11144477735", 11144477735.0, "11144477735.0",
+                "52998224725", "529.982.247-25", "1234567890", 1234567890] * 20,
+        "valor": range(160),
+    })
+
+    shards = particionar(df, "cpf", 4)
+
+    assert sum(len(s) for s in shards) == len(df)
+    assert sorted(pd.concat(shards).index) == list(df.index)
+    numeros = cpfs_para_numero(df["cpf"])
+    for cpf in [11144477735, 52998224725, 1234567890]:
+        com_cpf = [i for i, s in enumerate(shards) if (numeros.loc[s.index] == cpf).any()]
+        assert len(com_cpf) == 1
+
+
+def test_combinar_soma_shards_e_ordena_erros():
+    parciais = [
+        ResultadoLote(linhas_gravadas=3, clientes_criados=2, contratos_criados=3, erros=["Linha 10: x"]),
+        ResultadoLote(linhas_gravadas=1, clientes_atualizados=1, contratos_atualizados=1, erros=["Linha 4: y"]),
+    ]
+
+    resultado = combinar(parciais)
+
+    assert resultado.linhas_gravadas == 4
+    assert (resultado.clientes_criados, resultado.clientes_atualizados) == (2, 1)
+    assert (resultado.contratos_criados, resultado.contratos_atualizados) == (3, 1)
+    assert resultado.erros == ["Linha 4: y", "Linha 10: x"]
+
+
+def test_cancelamento_depois_dos_shards_registra_o_gravado_e_avanca_versao(db_session):
+    tenant = Tenant(nome="Tenant Paralela Cancela", cnpj="99.999.999/0001-42")
+    db_session.add(tenant)
+    db_session.commit()
+    log = ImportacaoLog(
+        uuid=str(uuid.uuid4()), tenant_id=tenant.id, nome_arquivo="base.csv",
+        tipo=TipoImportacao.NOVA_BASE, status=StatusImportacao.PROCESSANDO,
+    )
+    db_session.add(log)
+    db_session.commit()
+    versao_antes = TenantRepository(db_session).versao_dados(tenant.id)
+
+    def shard_commitado_e_cancelado():
+        # Como a paralela: o shard commita na própria sessão e o cancelamento chega depois
+        outra = TestingSessionLocal()
+        try:
+            cliente = Cliente(tenant_id=tenant.id, nome="Fulano", cpf="111.444.777-35")
+            outra.add(cliente)
+            outra.flush()
+            outra.add(Contrato(
+                tenant_id=tenant.id, cliente_id=cliente.id, numero_contrato="PAR-1",
+                valor_original=Decimal("100.00"), data_vencimento=date(2025, 1, 10),
+                status=StatusContrato.ATIVO,
+            ))
+            outra.query(ImportacaoLog).filter(ImportacaoLog.id == log.id).update(
+                {"status": StatusImportacao.CANCELADO}
+            )
+            outra.commit()
+        finally:
+            outra.close()
+        return ResultadoLote(linhas_gravadas=1, clientes_criados=1, contratos_criados=1)
+
+    resultado = UploadService(db_session)._processar_em_lote(
+        shard_commitado_e_cancelado, tenant.id, 0, log, commitado=True
+    )
+
+    assert resultado.status.value == "cancelado"
+    assert (resultado.clientes_criados, resultado.contratos_criados) == (1, 1)
+    db_session.expire_all()
+    gravado = db_session.get(ImportacaoLog, log.id)
+    assert gravado.status == StatusImportacao.CANCELADO
+    assert gravado.linhas_processadas == 1
+    assert gravado.data_fim is not None
+    assert db_session.query(Contrato).filter(Contrato.tenant_id == tenant.id).count() == 1
+    assert int(TenantRepository(db_session).versao_dados(tenant.id)) == int(versao_antes) + 1
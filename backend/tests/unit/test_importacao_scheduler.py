@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.services.importacao_scheduler import ImportacaoCancelada, ImportScheduler
+
+
+def test_scheduler_serializa_tenant_prioriza_pequenas_e_cancela_na_fila():
+    async def cenario():
+        scheduler = ImportScheduler(max_concorrentes=2, limite_faixa_rapida=100, envelhecimento=3600)
+        ordem = []
+        liberar = asyncio.Event()
+
+        async def importar(tenant_id, importacao_id, linhas):
+            async with scheduler.reservar(tenant_id, importacao_id, linhas):
+                ordem.append(importacao_id)
+                await liberar.wait()
+
+        # Ocupa as duas vagas: tenant 1 e tenant 2
+        t1 = asyncio.create_task(importar(1, "t1-grande", 10_000))
+        t2 = asyncio.create_task(importar(2, "t2-grande", 10_000))
+        await asyncio.sleep(0)
+        # Na fila: outra do tenant 1, uma grande e uma pequena do tenant 3
+        fila = [
+            asyncio.create_task(importar(1, "t1-segunda", 10)),
+            asyncio.create_task(importar(3, "t3-grande", 10_000)),
+            asyncio.create_task(importar(3, "t3-pequena", 10)),
+        ]
+        cancelada = asyncio.create_task(importar(4, "t4-cancelada", 10))
+        await asyncio.sleep(0)
+
+        metricas = scheduler.metricas()
+        assert metricas["executando"] == 2
+        assert metricas["na_fila"] == 4
+        assert metricas["na_fila_por_faixa"] == {"rapida": 3, "normal": 1}
+        assert scheduler.metricas(tenant_id=3)["na_fila"] == 2
+
+        assert await scheduler.cancelar("t4-cancelada")
+        with pytest.raises(ImportacaoCancelada):
+            await cancelada
+
+        liberar.set()
+        await asyncio.gather(t1, t2, *fila)
+        return ordem, scheduler.metricas()
+
+    ordem, metricas = asyncio.run(cenario())
+
+    assert ordem[:2] == ["t1-grande", "t2-grande"]
+    # Faixa rápida primeiro; uma por tenant de cada vez
+    assert ordem.index("t3-pequena") < ordem.index("t3-grande")
+    assert ordem.index("t1-segunda") < ordem.index("t3-grande")
+    assert metricas["concluidas"] == 5
+    assert metricas["canceladas_na_fila"] == 1
+    assert metricas["na_fila"] == 0
@@ -0,0 +1,50 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as db_session_module
+from app.db.base import Base
+from app.models.cliente import Cliente
+from app.models.tenant import Tenant
+from app.repositories.tenant_repository import TenantRepository
+
+replica_engine = create_engine("sqlite:///./test_replica.db", connect_args={"check_same_thread": False})
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
+
+def test_leitura_vai_para_replica_e_volta_ao_primario_enquanto_ela_atrasa(
+    client, db_session, user_factory, monkeypatch
+):
+    Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(db_session_module, "ReadSessionLocal", ReplicaSessionLocal)
+
+    tenant = Tenant(nome="Tenant Réplica", cnpj="77.777.777/0001-77")
+    db_session.add(tenant)
+    db_session.commit()
+    user_factory(email="replica@test.com", tenant_id=tenant.id)
+
+    # Réplica na mesma versão, com um cliente que só ela tem (para saber de onde veio a leitura)
+    replica = ReplicaSessionLocal()
+    try:
+        replica.add(Tenant(id=tenant.id, nome=tenant.nome, cnpj=tenant.cnpj))
+        replica.add(Cliente(tenant_id=tenant.id, nome="Só na réplica", cpf="123.456.789-09"))
+        replica.commit()
+
+        token = client.post(
+            "/auth/login", data={"username": "replica@test.com", "password": "123456"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert client.get("/base/estatisticas", headers=headers).json()["total_clientes"] == 1
+
+        # Importação concluída no primário, ainda não replicada: lê do primário
+        TenantRepository(db_session).incrementar_versao(tenant.id)
+        db_session.commit()
+        assert client.get("/base/estatisticas", headers=headers).json()["total_clientes"] == 0
+
+        # Réplica alcançou: volta a ler dela
+        TenantRepository(replica).incrementar_versao(tenant.id)
+        replica.commit()
+        assert client.get("/base/estatisticas", headers=headers).json()["total_clientes"] == 1
+    finally:
+        replica.close()
+        Base.metadata.drop_all(bind=replica_engine)
@@ -0,0 +1,32 @@
+import asyncio
+
+from passlib.context import CryptContext
+
+from app.core.security import (
+    get_password_hash,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
+
+
+def test_verify_and_update_regrava_hash_com_custo_antigo():
+    antigo = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("segredo")
+
+    valida, novo_hash = verify_and_update_password("segredo", antigo)
+    assert valida
+    assert novo_hash and novo_hash != antigo
+    assert verify_and_update_password("segredo", novo_hash) == (True, None)
+
+    assert verify_and_update_password("errada", antigo) == (False, None)
+
+
+def test_verify_and_update_async_usa_o_pool_de_hash():
+    atual = get_password_hash("segredo")
+
+    async def verificar():
+        return await asyncio.gather(
+            verify_and_update_password_async("segredo", atual),
+            verify_and_update_password_async("errada", atual),
+        )
+
+    assert asyncio.run(verificar()) == [(True, None), (False, None)]
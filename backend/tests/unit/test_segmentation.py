@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.core.exceptions import ConflictException
+from app.models.tenant import Tenant
+from app.models.cliente import Cliente
+from app.models.contrato import Contrato, StatusContrato
+from app.schemas.segmentation import SegmentCreate
+from app.services.segmentation_service import SegmentationService, IndiceSegmentos
+from app.models.segmentation import Segmento
+
+
+def _segmento(id, min_dias, max_dias):
+    return Segmento(id=id, nome=f"S{id}", min_dias_atraso=min_dias, max_dias_atraso=max_dias)
+
+
+def test_indice_localiza_faixas_com_lacunas():
+    indice = IndiceSegmentos([_segmento(2, 31, 60), _segmento(1, 0, 30), _segmento(3, 91, 180)])
+
+    assert indice.localizar(0).id == 1
+    assert indice.localizar(30).id == 1
+    assert indice.localizar(31).id == 2
+    assert indice.localizar(75) is None
+    assert indice.localizar(180).id == 3
+    assert indice.localizar(181) is None
+    assert [s.id for s in indice.conflitos(50, 100)] == [2, 3]
+
+
+def test_atualizar_membros_incremental(db_session):
+    tenant = Tenant(nome="Tenant Segmentação", cnpj="99.999.999/0001-26")
+    db_session.add(tenant)
+    db_session.flush()
+    cliente = Cliente(tenant_id=tenant.id, nome="Fulano", cpf="529.982.247-25")
+    db_session.add(cliente)
+    db_session.flush()
+
+    hoje = date.today()
+    contratos = [
+        Contrato(tenant_id=tenant.id, cliente_id=cliente.id, valor_original=Decimal("100"),
+                 data_vencimento=hoje - timedelta(days=dias), status=status)
+        for dias, status in [
+            (10, StatusContrato.ATRASADO),
+            (45, StatusContrato.ATRASADO),
+            (45, StatusContrato.PAGO),
+        ]
+    ]
+    db_session.add_all(contratos)
+    db_session.commit()
+
+    service = SegmentationService(db_session)
+    service.criar_segmento(SegmentCreate(name="Até 30", min_days_overdue=0, max_days_overdue=30), tenant.id)
+    service.criar_segmento(SegmentCreate(name="31 a 60", min_days_overdue=31, max_days_overdue=60), tenant.id)
+
+    with pytest.raises(ConflictException):
+        service.criar_segmento(SegmentCreate(name="X", min_days_overdue=20, max_days_overdue=40), tenant.id)
+
+    segmentos = {s.name: s for s in service.listar_segmentos(tenant.id)}
+    assert segmentos["Até 30"].total_contratos == 1
+    assert segmentos["31 a 60"].total_contratos == 1
+
+    # Envelhecimento: 25 dias depois o D+10 passa para 31-60 e o D+45 sai das faixas
+    resultado = service.atualizar_membros(tenant.id, hoje=hoje + timedelta(days=25))
+    assert resultado.adicionados == 1
+    assert resultado.removidos == 2
+    assert resultado.total_membros == 1
+
+    # Sem mudanças, nenhuma escrita
+    resultado = service.atualizar_membros(tenant.id, hoje=hoje + timedelta(days=25))
+    assert (resultado.adicionados, resultado.removidos) == (0, 0)
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import session as db_session_module
+from app.db.session import SessaoRoteada, ShardIndefinido, definir_tenant
+from app.db.sharding import criar_schema_shard, shutdown_shard_executor
+from app.models.cliente import Cliente
+from app.models.tenant import Tenant
+from app.repositories.cliente_repository import ClienteRepository
+from app.repositories.tenant_repository import TenantRepository
+from app.services.dashboard_service import DashboardService
+
+shard_engine = create_engine("sqlite:///./test_shard.db", connect_args={"check_same_thread": False})
+
+
+def test_tenant_em_shard_le_e_grava_no_proprio_banco(db_session, monkeypatch):
+    criar_schema_shard(shard_engine)
+    RoteadaLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=db_session.get_bind(), class_=SessaoRoteada
+    )
+    monkeypatch.setattr(db_session_module, "shard_engines", {"grandes": shard_engine})
+    monkeypatch.setattr(db_session_module, "SessionLocal", RoteadaLocal)
+
+    grande = Tenant(nome="Tenant Grande", cnpj="55.555.555/0001-55")
+    pequeno = Tenant(nome="Tenant Pequeno", cnpj="66.666.666/0001-66")
+    db_session.add_all([grande, pequeno])
+    db_session.commit()
+    monkeypatch.setattr(settings, "TENANT_SHARDS", {grande.id: "grandes"})
+
+    clientes_no_primario = db_session.scalar(select(func.count(Cliente.id)))
+    db = RoteadaLocal()
+    try:
+        # Insert sem filtro: vai para o shard padrão da sessão, junto com a versão dos dados
+        definir_tenant(db, grande.id)
+        db.add(Cliente(tenant_id=grande.id, nome="Cliente do shard", cpf="529.982.247-25"))
+        TenantRepository(db).incrementar_versao(grande.id)
+        db.commit()
+        with shard_engine.connect() as conexao:
+            assert conexao.execute(text("SELECT COUNT(*) FROM clientes")).scalar() == 1
+            assert conexao.execute(text("SELECT versao_dados FROM tenant_versoes")).scalar() == 1
+
+        # Consultas com filtro de tenant são roteadas pelo próprio filtro
+        definir_tenant(db, None)
+        repo = ClienteRepository(db)
+        assert repo.count(grande.id) == 1
+        assert repo.count(pequeno.id) == 0
+        assert TenantRepository(db).versao_dados(grande.id) == "1"
+        # Tabelas globais continuam no primário
+        assert db.get(Tenant, grande.id).nome == "Tenant Grande"
+
+        # Sem filtro de tenant nem shard padrão: erro em vez de ler só o primário
+        with pytest.raises(ShardIndefinido):
+            db.scalar(select(func.count(Cliente.id)))
+
+        # Visão global: soma primário e shard
+        principal = DashboardService(db).get_dashboard_principal(None)
+        assert principal.total_devedores == clientes_no_primario + 1
+    finally:
+        db.close()
+        shutdown_shard_executor()
+        with shard_engine.begin() as conexao:
+            conexao.execute(text("DELETE FROM clientes"))
+            conexao.execute(text("DELETE FROM tenant_versoes"))
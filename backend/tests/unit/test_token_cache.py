@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from app.core.security import create_access_token, decode_access_token
+from app.core.token_cache import TokenCache, token_cache
+from app.repositories.user_repository import UserRepository
+
+
+def test_decode_usa_cache():
+    token_cache.limpar()
+    token = create_access_token(subject="42")
+
+    assert decode_access_token(token)["sub"] == "42"
+    assert decode_access_token(token)["sub"] == "42"
+    assert token_cache.metricas()["hits"] == 1
+
+
+def test_revogacao_fica_no_banco_e_vale_para_todos_os_workers(client, db_session, user_factory):
+    user = user_factory(email="revoga@test.com")
+    token = create_access_token(subject=user.id)
+    outro = create_access_token(subject=user.id, expires_delta=timedelta(minutes=5))
+
+    def status(t):
+        return client.get("/auth/me", headers={"Authorization": f"Bearer {t}"}).status_code
+
+    assert status(token) == 200
+    assert client.post("/auth/logout", headers={"Authorization": f"Bearer {token}"}).status_code == 204
+    assert status(token) == 401
+    # Outro worker: cache vazio, mesma revogação
+    token_cache.limpar()
+    assert status(token) == 401
+    assert status(outro) == 200
+
+    # Desativação forçada: tokens emitidos antes continuam inválidos após reativar
+    repo = UserRepository(db_session)
+    repo.update(user, is_active=False)
+    repo.update(user, is_active=True)
+    assert status(outro) == 401
+    # Login no mesmo segundo da revogação vale
+    assert status(create_access_token(subject=user.id)) == 200
+
+
+def test_lru_descarta_o_menos_usado_e_entradas_expiradas():
+    cache = TokenCache(capacidade=2)
+    cache.guardar(b"a", {"sub": "1", "exp": 4102444800})
+    cache.guardar(b"b", {"sub": "2", "exp": 4102444800})
+    assert cache.obter(b"a")["sub"] == "1"
+    cache.guardar(b"c", {"sub": "3", "exp": 4102444800})
+
+    assert cache.obter(b"b") is None
+    assert cache.obter(b"a") and cache.obter(b"c")
+
+    cache.guardar(b"velho", {"sub": "4", "exp": 1})
+    assert cache.obter(b"velho") is None
@@ -0,0 +1,76 @@
+import asyncio
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from app.api.middlewares.upload_limit import UploadSizeLimitMiddleware
+from main import app as aplicacao
+
+ORIGEM = {"Origin": "http://app.exemplo"}
+
+
+def _app(lidos: list) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=1024)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        corpo = await request.body()
+        lidos.append(len(corpo))
+        return {"bytes": len(corpo)}
+
+    return app
+
+
+def test_content_length_acima_do_limite_recusado_antes_da_rota():
+    lidos = []
+    client = TestClient(_app(lidos))
+
+    resposta = client.post("/upload", content=b"x" * 2048, headers=ORIGEM)
+
+    assert resposta.status_code == 413
+    assert resposta.json()["error"] == "Arquivo excede o tamanho máximo permitido"
+    # Com CORS por fora, o navegador recebe o 413 e não um erro de CORS
+    assert resposta.headers["access-control-allow-origin"] == "*"
+    assert lidos == []
+
+    assert client.post("/upload", content=b"x" * 512, headers=ORIGEM).json() == {"bytes": 512}
+
+
+def test_corpo_chunked_interrompido_ao_passar_do_limite():
+    lidos = []
+    app = _app(lidos)
+    # Sem Content-Length: 10 chunks de 256 bytes chegando um a um (limite 1024)
+    chunks = [{"type": "http.request", "body": b"x" * 256, "more_body": i < 9} for i in range(10)]
+    consumidos = []
+    enviadas = []
+
+    async def receive():
+        consumidos.append(chunks[len(consumidos)])
+        return consumidos[-1]
+
+    async def send(message):
+        enviadas.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/upload", "raw_path": b"/upload", "root_path": "", "query_string": b"",
+        "headers": [(b"origin", b"http://app.exemplo"), (b"transfer-encoding", b"chunked")],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+
+    inicio = enviadas[0]
+    assert inicio["status"] == 413
+    assert (b"access-control-allow-origin", b"*") in inicio["headers"]
+    # Interrompido no chunk que passou do limite, sem ler o restante nem chegar à rota
+    assert len(consumidos) == 5
+    assert lidos == []
+
+
+def test_limite_de_upload_registrado_dentro_do_cors():
+    # user_middleware vem do mais externo para o mais interno
+    ordem = [m.cls for m in aplicacao.user_middleware]
+    assert ordem.index(CORSMiddleware) < ordem.index(UploadSizeLimitMiddleware)
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from app.utils.validators import cpfs_para_numero, formatar_cpfs, validar_cpf, validar_cpfs
+
+
+def test_validar_cpfs_digitos_verificadores_e_repetidos():
+    numeros = pd.Series([11144477735, 11144477736, 52998224725, 11111111111, 0, None], dtype="Int64")
+
+    assert validar_cpfs(numeros).tolist() == [True, False, True, False, False, False]
+    assert validar_cpf("111.444.777-35")
+    assert not validar_cpf("123")
+
+
+def test_normalizacao_de_formatos_variados():
+    valores = pd.Series(["111.444.777-35", "1234567890", 52998224725.0, "abc", None, "111 444 777 35 9"])
+
+    numeros = cpfs_para_numero(valores)
+
+    assert numeros.tolist()[:3] == [11144477735, 1234567890, 52998224725]
+    assert numeros.iloc[3:].isna().all()
+    assert formatar_cpfs(numeros).tolist()[:3] == ["111.444.777-35", "012.345.678-90", "529.982.247-25"]
+    assert cpfs_para_numero(pd.Series([11144477735.0, np.nan])).tolist()[0] == 11144477735
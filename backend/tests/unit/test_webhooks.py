@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime
+
+from app.core.config import settings
+from app.models.communication import MensagemOutbox, CanalComunicacao, StatusMensagem
+from app.models.webhook import WebhookEvento
+from app.repositories.webhook_repository import WebhookEventoRepository
+from app.services.communication_service import aplicar_status_mensagens
+from app.services.webhook_service import WebhookBuffer, WebhookFlusher, extrair_eventos, webhook_buffer
+from tests.conftest import TestingSessionLocal
+
+
+def test_extrair_eventos_formatos():
+    assert extrair_eventos(b'{"message_id": "a", "status": "delivered"}') == [
+        {"message_id": "a", "status": "delivered"}
+    ]
+    assert len(extrair_eventos(b'{"events": [{"id": 1}, {"id": 2}]}')) == 2
+    assert "_invalido" in extrair_eventos(b"nao-e-json")[0]
+
+
+def test_flusher_grava_em_lote_e_aplica_status(db_session):
+    mensagens = [
+        MensagemOutbox(
+            canal=CanalComunicacao.WHATSAPP, destinatario="+5511999990000", conteudo="Olá",
+            status=StatusMensagem.ENVIADA, tentativas=1, provider_message_id=f"wh-test-{i}",
+        )
+        for i in range(3)
+    ]
+    db_session.add_all(mensagens)
+    db_session.commit()
+
+    buffer = WebhookBuffer(capacidade=10)
+    buffer.adicionar("communication", json.dumps([
+        {"message_id": "wh-test-0", "status": "read"},
+        {"message_id": "wh-test-1", "status": "delivered"},
+        {"message_id": "wh-test-desconhecida", "status": "delivered"},
+    ]).encode())
+    # Callback atrasado não pode regredir uma mensagem já lida
+    buffer.adicionar("communication", b'{"message_id": "wh-test-0", "status": "delivered"}')
+
+    flusher = WebhookFlusher(
+        buffer, {"communication": aplicar_status_mensagens}, session_factory=TestingSessionLocal
+    )
+    ultimo_id = db_session.query(WebhookEvento.id).order_by(WebhookEvento.id.desc()).limit(1).scalar() or 0
+    assert flusher.gravar(buffer.drenar(100)) == 4
+
+    db_session.expire_all()
+    status = {m.provider_message_id: m.status for m in mensagens}
+    assert status == {
+        "wh-test-0": StatusMensagem.LIDA,
+        "wh-test-1": StatusMensagem.ENTREGUE,
+        "wh-test-2": StatusMensagem.ENVIADA,
+    }
+    pendentes = db_session.query(WebhookEvento).filter(
+        WebhookEvento.id > ultimo_id, WebhookEvento.processado_em.is_(None)
+    ).all()
+    assert [json.loads(p.payload)["message_id"] for p in pendentes] == ["wh-test-desconhecida"]
+
+
+def test_lote_que_falha_volta_ao_buffer_na_ordem():
+    def sem_banco():
+        raise RuntimeError("banco indisponível")
+
+    buffer = WebhookBuffer(capacidade=2)
+    buffer.adicionar("communication", b'{"id": 1}')
+    buffer.adicionar("communication", b'{"id": 2}')
+    flusher = WebhookFlusher(buffer, {}, session_factory=sem_banco)
+
+    assert asyncio.run(flusher._persistir(buffer.drenar(1))) is False
+    assert [corpo for _, _, corpo in buffer.drenar(10)] == [b'{"id": 1}', b'{"id": 2}']
+
+
+def test_reprocessamento_pagina_alem_dos_pendentes_que_nunca_resolvem(db_session):
+    db_session.add(MensagemOutbox(
+        canal=CanalComunicacao.SMS, destinatario="+5511999990001", conteudo="Olá",
+        status=StatusMensagem.ENVIADA, tentativas=1, provider_message_id="wh-reproc-ok",
+    ))
+    db_session.commit()
+
+    agora = datetime.now()
+    eventos = [{"message_id": f"wh-reproc-nunca-{i}", "status": "delivered"} for i in range(5)]
+    eventos.append({"message_id": "wh-reproc-ok", "status": "delivered"})
+    WebhookEventoRepository(db_session).inserir_lote([
+        {"origem": "communication", "payload": json.dumps(e), "recebido_em": agora} for e in eventos
+    ])
+    db_session.commit()
+
+    flusher = WebhookFlusher(
+        WebhookBuffer(10), {"communication": aplicar_status_mensagens}, session_factory=TestingSessionLocal
+    )
+    flusher.LOTE_REPROCESSAMENTO = 2
+    assert flusher.reprocessar_pendentes() == 1
+
+    db_session.expire_all()
+    mensagem = db_session.query(MensagemOutbox).filter_by(provider_message_id="wh-reproc-ok").one()
+    assert mensagem.status == StatusMensagem.ENTREGUE
+
+
+def test_webhook_de_comunicacao_exige_assinatura_do_provedor(client, monkeypatch):
+    corpo = b'{"message_id": "wh-assinado", "status": "read"}'
+    monkeypatch.setattr(settings, "SMS_WEBHOOK_SECRET", "segredo-sms")
+    monkeypatch.setattr(settings, "WHATSAPP_WEBHOOK_SECRET", None)
+    assinatura = hmac.new(b"segredo-sms", corpo, hashlib.sha256).hexdigest()
+    cabecalho = {"X-Signature": f"sha256={assinatura}"}
+
+    assert client.post("/communication/webhook/sms", content=corpo).status_code == 401
+    # Assinatura de um provedor não vale para outro; canal sem segredo recusa tudo
+    monkeypatch.setattr(settings, "VOICE_WEBHOOK_SECRET", "segredo-voz")
+    assert client.post("/communication/webhook/voice", content=corpo, headers=cabecalho).status_code == 401
+    assert client.post("/communication/webhook/whatsapp", content=corpo, headers=cabecalho).status_code == 403
+
+    assert client.post("/communication/webhook/sms", content=corpo, headers=cabecalho).status_code == 202
+    assert webhook_buffer.drenar(1)[0][2] == corpo